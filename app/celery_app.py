@@ -1,12 +1,20 @@
 from celery import Celery
+from kombu import Queue
 from app.config import settings
 
+# Task lanes: run a worker per lane (-Q prices, -Q alerts, -Q maintenance) so slow maintenance
+# never delays a price tick, or one worker with -Q prices,alerts,maintenance to drain them in that order
+PRICES_QUEUE = "prices"
+ALERTS_QUEUE = "alerts"
+MAINTENANCE_QUEUE = "maintenance"
+
 # Create Celery app
 celery_app = Celery(
     "crypto_tracker",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=["app.services.price_simulator"]
+    include=["app.services.price_simulator", "app.services.price_sources", "app.services.cold_storage",
+             "app.services.holding_snapshots"]
 )
 
 # Celery configuration
@@ -16,14 +24,41 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    task_queues=[Queue(PRICES_QUEUE), Queue(ALERTS_QUEUE), Queue(MAINTENANCE_QUEUE)],
+    task_default_queue=MAINTENANCE_QUEUE,
+    task_routes={
+        "app.services.price_simulator.update_market_prices": {"queue": PRICES_QUEUE},
+        "app.services.price_simulator.update_market_partition": {"queue": PRICES_QUEUE},
+        "app.services.price_simulator.merge_partition_prices": {"queue": PRICES_QUEUE},
+        "app.services.price_simulator.check_and_trigger_alerts": {"queue": ALERTS_QUEUE},
+        "app.services.cold_storage.compact_transactions": {"queue": MAINTENANCE_QUEUE},
+        "app.services.holding_snapshots.checkpoint_holdings": {"queue": MAINTENANCE_QUEUE},
+        "app.services.price_sources.replay_price_file": {"queue": MAINTENANCE_QUEUE},
+    },
+    # A worker consuming several lanes always takes from the first non-empty one in its -Q order
+    broker_transport_options={"queue_order_strategy": "priority"},
+    # Ticks are leased (app.services.tick_guard); a message not picked up within one interval is
+    # stale and expires instead of joining a backlog
     beat_schedule={
         "update-market-prices": {
             "task": "app.services.price_simulator.update_market_prices",
             "schedule": settings.PRICE_UPDATE_INTERVAL,  # Run every X seconds
+            "options": {"expires": settings.PRICE_UPDATE_INTERVAL},
         },
         "check-price-alerts": {
             "task": "app.services.price_simulator.check_and_trigger_alerts",
             "schedule": settings.PRICE_UPDATE_INTERVAL,  # Run every X seconds
+            "options": {"expires": settings.PRICE_UPDATE_INTERVAL},
+        },
+        "compact-transactions": {
+            "task": "app.services.cold_storage.compact_transactions",
+            "schedule": settings.COLD_STORAGE_COMPACT_INTERVAL,
+            "options": {"expires": settings.COLD_STORAGE_COMPACT_INTERVAL},
+        },
+        "checkpoint-holdings": {
+            "task": "app.services.holding_snapshots.checkpoint_holdings",
+            "schedule": settings.SNAPSHOT_INTERVAL,
+            "options": {"expires": settings.SNAPSHOT_INTERVAL},
         },
     },
 )
@@ -1,5 +1,8 @@
+import os
+from datetime import datetime
+from decimal import Decimal
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -12,18 +15,44 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///./crypto_tracker.db"
+    ASYNC_DATABASE_URL: Optional[str] = None  # derived from DATABASE_URL when not set
+    ASYNC_ROUTES: bool = False  # serve the core API from the async (non-blocking) handlers
+    DB_PROFILE: str = "default"  # storage profile: default, sqlite_wal or postgres
+    DATABASE_REPLICA_URLS: List[str] = []  # read replicas for get_read_db; empty = primary only
+    REPLICA_PIN_SECONDS: float = 5.0  # reads stay on the primary this long after a user's write
+    REPLICA_RETRY_INTERVAL: float = 5.0  # seconds before a failed replica is probed again
+    DATABASE_SHARD_URLS: List[str] = []  # extra shards for user-owned tables; empty = primary only
+    SHARD_TWO_PHASE: bool = False  # two-phase commit across primary + shard (PostgreSQL only)
+
+    # SQLite tuning (sqlite_wal profile)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # wait this long for the write lock instead of failing
+    SQLITE_CACHE_SIZE_KB: int = 65536  # page cache per connection
+    SQLITE_MMAP_SIZE: int = 268435456  # bytes of the database file to memory-map
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # safe with WAL, far fewer fsyncs than FULL
+
+    # Connection pool (postgres profile)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a connection before erroring
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
 
     # JWT Authentication
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    PRINCIPAL_CACHE_TTL: int = 60  # seconds a verified token is trusted without re-checking
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PASSWORD_HASH_WORKERS: int = min(4, os.cpu_count() or 1)  # bcrypt worker processes
+    PASSWORD_HASH_MAX_PENDING: int = 64  # hashes/verifications in flight before logins get 503
 
     # Redis
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_URL: str = "redis://localhost:6379/0"
+    MARKET_CACHE_PUBSUB: Optional[bool] = None  # broadcast market directory invalidations to other processes; unset = on, off with SCHEDULER=embedded
+    MARKET_CACHE_CHANNEL: str = "market-directory"
 
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
@@ -33,6 +62,53 @@ class Settings(BaseSettings):
     PRICE_UPDATE_INTERVAL: int = 5  # seconds
     PRICE_VARIATION_MIN: float = 0.5  # percent
     PRICE_VARIATION_MAX: float = 2.0  # percent
+    PRICE_UPDATE_PARTITIONS: int = 1  # >1 splits each price tick into that many tasks (a Celery chord)
+    PRICE_SIMULATION_SEED: Optional[int] = None  # set for reproducible price paths (one generator per market)
+    PRICE_SIMULATION_START: Dict[str, Decimal] = {}  # seeded start prices; empty = prices listed at the first step
+    PRICE_SIMULATION_START_TIME: Optional[datetime] = None  # seeded tick timestamps step from here; unset = wall clock
+    PRICE_SIMULATION_RECORD: Optional[str] = None  # append every simulated tick to this NDJSON file for replay
+    PRICE_REPLAY_SPEED: float = 1.0  # replay pace multiplier for recorded tick files; 0 = as fast as possible
+    PRICE_INGEST_BATCH: int = 1000  # ticks written per transaction by price sources
+    TICK_INGEST_MAX: int = 10000  # ticks per POST /api/markets/ticks request
+
+    # Scheduled ticks
+    SCHEDULER: str = "celery"  # celery (worker + beat via Redis) or embedded (asyncio ticks inside the API process)
+    TICK_OVERLAP_POLICY: str = "skip"  # when a tick is still running: skip the next, or coalesce missed ticks into one catch-up
+    TICK_LEASE_BACKEND: Optional[str] = None  # redis (shared by all workers) or memory (single worker process); unset = redis, memory with SCHEDULER=embedded
+    TICK_LEASE_TTL: int = 60  # seconds a tick may hold its lease; frees ticks held by a crashed worker
+
+    # Markets
+    MARKET_BULK_MAX: int = 5000  # symbols per bulk upsert or multi-symbol price lookup
+
+    # Indicators
+    INDICATOR_BACKFILL_TICKS: int = 5000  # stored ticks used to seed an indicator on first request
+    INDICATOR_CACHE_SIZE: int = 1024  # cached (market, indicator, window) states
+
+    # Export
+    EXPORT_CHUNK_SIZE: int = 1000  # rows fetched per query when streaming exports
+
+    # Cold storage
+    COLD_STORAGE_DIR: str = "./cold_storage"  # columnar segments for compacted transactions
+    COLD_STORAGE_MIN_AGE_DAYS: int = 90  # transactions older than this leave the hot table
+    COLD_STORAGE_COMPACT_INTERVAL: int = 86400  # seconds between compaction runs
+
+    # Holding snapshots (checkpoints replayed from the transaction log)
+    SNAPSHOT_INTERVAL: int = 3600  # seconds between checkpoint runs
+    SNAPSHOT_WORKERS: int = 4  # user batches replayed in parallel
+    SNAPSHOT_BATCH_USERS: int = 500  # users per replay batch
+    SNAPSHOT_KEEP: int = 2  # checkpoints kept per user
+    SNAPSHOT_SETTLE_SECONDS: int = 60  # transactions younger than this are replayed but not checkpointed
+
+    # Rate limiting: [tokens per second, burst] per route group and caller (user, or IP when anonymous)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per worker) or redis (shared by all workers)
+    RATE_LIMIT_SHARDS: int = 16  # lock stripes of the memory store
+    RATE_LIMITS: Dict[str, List[float]] = {
+        "auth": [1, 10],
+        "trade": [5, 20],
+        "write": [5, 20],
+        "read": [50, 200],
+    }
 
     # CORS
     CORS_ORIGINS: List[str] = ["*"]  # Allow all origins for easy deployment and sharing
@@ -1,16 +1,49 @@
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.db_profiles import build_async_engine, build_engine
+from app.db_sharding import ShardRoutingSession, ShardSet
 
-# Create SQLite engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+# Create engine for the configured storage profile (see app/db_profiles.py)
+engine = build_engine(settings.DATABASE_URL, settings.DB_PROFILE)
+
+# User-owned tables are split across the primary and DATABASE_SHARD_URLS (see app/db_sharding.py)
+shards = ShardSet(engine, settings.DATABASE_SHARD_URLS, settings.DB_PROFILE)
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    class_=ShardRoutingSession,
+    shards=shards,
+    twophase=settings.SHARD_TWO_PHASE,
+    autocommit=False,
+    autoflush=False,
+    bind=engine
+)
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
+
+# Async engine over the same database, for handlers that must not block the event loop
+async_engine = build_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    settings.DB_PROFILE
+)
+
+# Create AsyncSessionLocal class
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False  # attribute access after commit would otherwise need an await
+)
 
 # Create Base class for models
 Base = declarative_base()
@@ -25,6 +58,22 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def dialect_insert(db, table):
+    """INSERT construct with ON CONFLICT support for the session's backend (SQLite or PostgreSQL)"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
 def init_db():
-    """Initialize database - create all tables"""
-    Base.metadata.create_all(bind=engine)
+    """Initialize database - create all tables on the primary and every shard"""
+    for shard_engine in shards.engines:
+        Base.metadata.create_all(bind=shard_engine)
@@ -0,0 +1,173 @@
+"""
+Storage engine profiles, selected with Settings.DB_PROFILE
+
+- default:    SQLAlchemy defaults (rollback journal for SQLite), as before
+- sqlite_wal: SQLite tuned for one API process plus Celery workers - WAL journal so readers
+              never wait on the writer, a busy timeout instead of instant "database is locked",
+              larger page cache and memory-mapped I/O. PRAGMAs are applied on every connect.
+- postgres:   PostgreSQL with configurable pool size / overflow / timeout and pre-ping
+
+Every profile uses an instrumented pool that records how long checkouts wait for a
+connection, exposed together with the pool's connection counts by engine_stats().
+"""
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import settings
+
+PROFILES = ("default", "sqlite_wal", "postgres")
+
+
+class PoolMetrics:
+    """Checkout wait times and connection churn for one pool"""
+
+    def __init__(self, samples: int = 1024):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=samples)
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.connections_opened = 0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self._recent.append(seconds)
+
+    def record_connect(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            p99 = recent[min(len(recent) - 1, int(len(recent) * 0.99))] if recent else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "connections_opened": self.connections_opened,
+                "wait_ms_avg": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_ms_p99": round(p99 * 1000, 3),
+                "wait_ms_max": round(self.max_wait * 1000, 3),
+            }
+
+
+class _TimedCheckout:
+    """Pool mixin timing how long each checkout waits for a connection"""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.metrics.record_wait(time.perf_counter() - started)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _sqlite_pragmas() -> list:
+    return [
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",  # negative = KiB rather than pages
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith("sqlite:"))
+
+
+def _engine_options(url: str, profile: str, async_engine: bool) -> dict:
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{profile}', expected one of {', '.join(PROFILES)}")
+    if profile == "sqlite_wal" and not url.startswith("sqlite"):
+        raise ValueError("DB_PROFILE 'sqlite_wal' requires a sqlite DATABASE_URL")
+    if profile == "postgres" and not url.startswith("postgresql"):
+        raise ValueError("DB_PROFILE 'postgres' requires a postgresql DATABASE_URL")
+
+    options = {}
+    if url.startswith("sqlite") and not async_engine:
+        options["connect_args"] = {"check_same_thread": False}  # Needed for SQLite
+
+    # In-memory SQLite needs SQLAlchemy's single-connection pool to keep its data
+    if not _is_memory_sqlite(url):
+        options["poolclass"] = InstrumentedAsyncQueuePool if async_engine else InstrumentedQueuePool
+
+    if profile == "postgres":
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+
+    return options
+
+
+def _instrument(sync_engine: Engine, profile: str):
+    """Attach metrics to the pool and, for sqlite_wal, apply PRAGMAs on every new connection"""
+    metrics = PoolMetrics()
+    sync_engine.pool.metrics = metrics
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.record_connect()
+        if profile == "sqlite_wal":
+            cursor = dbapi_connection.cursor()
+            for pragma in _sqlite_pragmas():
+                cursor.execute(pragma)
+            cursor.close()
+
+
+def build_engine(url: str, profile: str) -> Engine:
+    """Create the sync engine for a storage profile"""
+    engine = create_engine(url, **_engine_options(url, profile, async_engine=False))
+    _instrument(engine, profile)
+    return engine
+
+
+def build_async_engine(url: str, profile: str) -> AsyncEngine:
+    """Create the async engine for a storage profile"""
+    engine = create_async_engine(url, **_engine_options(url, profile, async_engine=True))
+    _instrument(engine.sync_engine, profile)
+    return engine
+
+
+def engine_stats(engine: Engine, profile: Optional[str] = None) -> dict:
+    """Pool connection counts plus checkout wait metrics for an engine"""
+    pool = engine.pool
+    stats = {"profile": profile or settings.DB_PROFILE, "pool": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+
+    return stats
@@ -0,0 +1,179 @@
+"""
+Read/write session routing
+
+Writes always use the primary (get_db). Read-heavy endpoints depend on get_read_db, which
+hands out a session on one of DATABASE_REPLICA_URLS:
+- replicas are used round-robin, skipping any marked unhealthy
+- a replica that failed is retried after REPLICA_RETRY_INTERVAL, once a `SELECT 1` succeeds
+- after a user's own write (e.g. a trade) their reads are pinned to the primary for
+  REPLICA_PIN_SECONDS, so they never read a replica that has not caught up yet
+
+With no replicas configured every read goes to the primary, exactly as before. Pins live in
+process memory; with several API workers a pinned user's next request may land elsewhere.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.database import SessionLocal, shards
+from app.db_profiles import build_engine, engine_stats
+from app.db_sharding import ShardRoutingSession
+from app.utils.auth import decode_token
+from app.utils.principal_cache import principal_cache
+
+optional_security = HTTPBearer(auto_error=False)
+
+
+class Replica:
+    """One read replica and its health state"""
+
+    def __init__(self, url: str, profile: str):
+        self.url = url
+        self.engine = build_engine(url, profile)
+        # User-owned tables still route to their shard; with one shard they read from the replica too
+        self.session_factory = sessionmaker(
+            class_=ShardRoutingSession,
+            shards=shards,
+            autocommit=False,
+            autoflush=False,
+            bind=self.engine
+        )
+        self.healthy = True
+        self.retry_at = 0.0
+        self.failures = 0
+
+
+class SessionRouter:
+    """Chooses the engine a read session should use"""
+
+    def __init__(
+        self,
+        primary_factory: Callable[[], Session],
+        replica_urls: List[str],
+        profile: str = "default",
+        pin_seconds: float = 5.0,
+        retry_interval: float = 5.0
+    ):
+        self.primary_factory = primary_factory
+        self.replicas = [Replica(url, profile) for url in replica_urls]
+        self.pin_seconds = pin_seconds
+        self.retry_interval = retry_interval
+        self._pins: Dict[int, float] = {}  # user_id -> monotonic deadline
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def pin_user(self, user_id: int):
+        """Route this user's reads to the primary for the next pin_seconds"""
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._pins) > 10000:
+                self._pins = {uid: deadline for uid, deadline in self._pins.items() if deadline > now}
+            self._pins[user_id] = now + self.pin_seconds
+
+    def is_pinned(self, user_id: int) -> bool:
+        deadline = self._pins.get(user_id)
+        return deadline is not None and deadline > time.monotonic()
+
+    def _ping(self, replica: Replica) -> bool:
+        try:
+            with replica.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except DBAPIError:
+            return False
+
+    def _mark_down(self, replica: Replica):
+        replica.healthy = False
+        replica.failures += 1
+        replica.retry_at = time.monotonic() + self.retry_interval
+
+    def _pick_replica(self) -> Optional[Replica]:
+        """Next healthy replica in round-robin order, reviving ones whose retry time has come"""
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = self.replicas[self._next % len(self.replicas)]
+                self._next += 1
+
+            if replica.healthy:
+                return replica
+            if time.monotonic() >= replica.retry_at:
+                if self._ping(replica):
+                    replica.healthy = True
+                    return replica
+                self._mark_down(replica)
+
+        return None
+
+    def read_session(self, user_id: Optional[int] = None) -> Session:
+        """Session for a read-only unit of work"""
+        if user_id is not None and self.is_pinned(user_id):
+            return self.primary_factory()
+
+        replica = self._pick_replica()
+        if replica is None:
+            return self.primary_factory()
+
+        db = replica.session_factory()
+        db.info["replica"] = replica
+        return db
+
+    def mark_failed(self, db: Session):
+        """Take the replica behind a session out of rotation after a connection error"""
+        replica = db.info.get("replica")
+        if replica is not None:
+            self._mark_down(replica)
+
+    def stats(self) -> List[dict]:
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.healthy,
+                "failures": replica.failures,
+                **engine_stats(replica.engine),
+            }
+            for replica in self.replicas
+        ]
+
+
+session_router = SessionRouter(
+    SessionLocal,
+    settings.DATABASE_REPLICA_URLS,
+    profile=settings.DB_PROFILE,
+    pin_seconds=settings.REPLICA_PIN_SECONDS,
+    retry_interval=settings.REPLICA_RETRY_INTERVAL
+)
+
+
+def _token_user_id(credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[int]:
+    """User id from the bearer token, if any - invalid tokens are rejected later by get_current_user"""
+    if credentials is None:
+        return None
+    principal = principal_cache.get(credentials.credentials)
+    if principal is not None:
+        return principal.id
+    try:
+        return decode_token(credentials.credentials).user_id
+    except HTTPException:
+        return None
+
+
+def get_read_db(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """Dependency to get a read-only database session (replica when available)"""
+    db = session_router.read_session(_token_user_id(credentials))
+    try:
+        yield db
+    except OperationalError:
+        # Connection-level failure (unreachable, unable to open, ...): stop routing reads there
+        session_router.mark_failed(db)
+        raise
+    finally:
+        db.close()
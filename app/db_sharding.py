@@ -0,0 +1,101 @@
+"""
+Horizontal sharding of user-owned tables
+
+Holdings, alerts, transactions and holding snapshots only ever join other users' data through `markets`, so
+they are split across databases by user_id: shard 0 is DATABASE_URL and every entry in
+DATABASE_SHARD_URLS adds one more. A user's rows live on shard `user_id % shard_count`.
+Users, markets and price history stay on the primary; markets are also copied to every
+shard (see app/services/market_replication.py) so shard-local joins against them still work.
+
+Sessions route per table: ShardRoutingSession sends user-owned tables to the shard chosen
+with route_user() and everything else to the session's own bind. With a single shard (the
+default) routing is a no-op and every query runs on the primary exactly as before.
+
+The shard count is part of the data layout - changing it needs existing rows moved.
+A trade writes the balance on the primary and the holding on the user's shard; with
+SHARD_TWO_PHASE (PostgreSQL only) both commit as one two-phase transaction.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db_profiles import build_engine, engine_stats
+
+SHARDED_TABLES = frozenset({"holdings", "alerts", "transactions", "holding_snapshots"})
+
+T = TypeVar("T")
+
+
+class ShardSet:
+    """Engines holding user-owned tables; shard 0 is the primary database"""
+
+    def __init__(self, primary: Engine, shard_urls: List[str], profile: str = "default"):
+        self.engines = [primary] + [build_engine(url, profile) for url in shard_urls]
+
+    @property
+    def count(self) -> int:
+        return len(self.engines)
+
+    def shard_for(self, user_id: int) -> int:
+        """Shard holding a user's rows"""
+        return user_id % self.count
+
+    def fan_out(self, work: Callable[[Session], T], shard_ids: Optional[Iterable[int]] = None) -> List[T]:
+        """
+        Run work(db) against every shard (or just shard_ids) in parallel
+        Each call gets its own session bound entirely to that shard's database, markets
+        included. Results come back in shard order; the first exception is re-raised.
+        """
+        shard_ids = list(range(self.count) if shard_ids is None else shard_ids)
+
+        def run(shard_id: int) -> T:
+            db = Session(bind=self.engines[shard_id], autoflush=False)
+            db.info["shard"] = shard_id
+            try:
+                return work(db)
+            finally:
+                db.close()
+
+        if len(shard_ids) <= 1:
+            return [run(shard_id) for shard_id in shard_ids]
+
+        with ThreadPoolExecutor(max_workers=len(shard_ids)) as pool:
+            return list(pool.map(run, shard_ids))
+
+    def stats(self) -> List[dict]:
+        return [
+            {"shard": shard_id, **engine_stats(engine)}
+            for shard_id, engine in enumerate(self.engines)
+        ]
+
+
+class ShardRoutingSession(Session):
+    """Session that sends user-owned tables to the shard picked by route_user()"""
+
+    def __init__(self, *args, shards: Optional[ShardSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shards = shards
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if mapper is not None and self.shards is not None and self.shards.count > 1:
+            if inspect(mapper).local_table.name in SHARDED_TABLES:
+                shard_id = self.info.get("shard")
+                if shard_id is None:
+                    raise RuntimeError(
+                        f"Query on sharded table '{inspect(mapper).local_table.name}' "
+                        "without a shard - call route_user(db, user_id) first"
+                    )
+                return self.shards.engines[shard_id]
+
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+def route_user(db: Session, user_id: int) -> Session:
+    """Point a session's user-owned table access at the user's shard and return it"""
+    shards = getattr(db, "shards", None)
+    if shards is not None:
+        db.info["shard"] = shards.shard_for(user_id)
+    return db
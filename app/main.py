@@ -3,14 +3,31 @@ from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 
 from app.config import settings
-from app.database import init_db
+from app.database import SessionLocal, init_db, engine, async_engine, shards
+from app.db_profiles import engine_stats
+from app.db_routing import session_router
+from app.middleware import RateLimitMiddleware, rate_limit_store
 from app.routers import (
     auth_router,
     markets_router,
     holdings_router,
     alerts_router,
-    portfolio_router
+    orders_router,
+    portfolio_router,
+    transactions_router,
+    candles_router,
+    indicators_router
 )
+from app.routers import aio
+from app.services.embedded_scheduler import SCHEDULERS, embedded_scheduler
+from app.services.market_directory import market_directory, pubsub_enabled, start_invalidation_listener
+from app.services.market_replication import sync_markets
+from app.services.market_snapshot import market_snapshot
+from app.services.order_book import order_books
+from app.services.symbol_index import symbol_index
+from app.services.tick_guard import tick_guard
+from app.utils.password_pool import password_pool
+from app.utils.principal_cache import principal_cache
 from app.websockets.market_stream import manager, market_data_streamer
 
 # Create FastAPI app
@@ -22,6 +39,10 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Rate limit per user and route group (added before CORS so 429s still carry CORS headers)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, store=rate_limit_store, limits=settings.RATE_LIMITS)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -43,19 +64,64 @@ async def startup_event():
     init_db()
 
     print(f"✅ Database initialized successfully")
+
+    # Build the market search index; bring the shards' market copies in line with the primary
+    db = SessionLocal()
+    try:
+        symbol_index.rebuild(db)
+        sync_markets(db)
+    finally:
+        db.close()
+    print(f"🔎 Indexed {symbol_index.stats()['symbols']} market symbols for search")
     print(f"📡 WebSocket endpoint available at: ws://localhost:8000/ws/market-stream")
     print(f"📚 API Documentation available at: http://localhost:8000/docs")
 
-    # Start WebSocket market data streaming task
-    asyncio.create_task(market_data_streamer())
+    if settings.SCHEDULER == "embedded":
+        # Price ticks run in this process and push their prices to the WebSocket clients
+        embedded_scheduler.start()
+    else:
+        # Start WebSocket market data streaming task
+        asyncio.create_task(market_data_streamer())
+
+    # Hear about markets created or deleted through other API processes
+    if pubsub_enabled():
+        start_invalidation_listener(market_directory, settings.REDIS_URL, settings.MARKET_CACHE_CHANNEL)
+
+
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the embedded scheduler and the password hashing worker processes"""
+    if settings.SCHEDULER == "embedded":
+        await embedded_scheduler.stop()
+    password_pool.shutdown()
+
 
+if settings.SCHEDULER not in SCHEDULERS:
+    raise ValueError(f"Unknown SCHEDULER '{settings.SCHEDULER}' - expected celery or embedded")
+
+
+# Async handlers are registered first so they take precedence; the sync routers
+# still serve every route that has no async version (exports, candles, ...)
+if settings.ASYNC_ROUTES:
+    if shards.count > 1:
+        raise ValueError("ASYNC_ROUTES does not support DATABASE_SHARD_URLS yet - async handlers only use the primary")
+    app.include_router(aio.auth_router)
+    app.include_router(aio.markets_router)
+    app.include_router(aio.holdings_router)
+    app.include_router(aio.alerts_router)
+    app.include_router(aio.portfolio_router)
 
 # Include routers
 app.include_router(auth_router)
 app.include_router(markets_router)
 app.include_router(holdings_router)
 app.include_router(alerts_router)
+app.include_router(orders_router)
 app.include_router(portfolio_router)
+app.include_router(transactions_router)
+app.include_router(candles_router)
+app.include_router(indicators_router)
 
 
 # Root endpoint
@@ -82,6 +148,59 @@ def health_check():
     }
 
 
+# Database pool metrics endpoint
+@app.get("/health/db")
+def database_health():
+    """Connection pool counts and checkout wait times for the sync and async engines, replicas and shards"""
+    return {
+        "sync": engine_stats(engine),
+        "async": engine_stats(async_engine.sync_engine),
+        "replicas": session_router.stats(),
+        "shards": shards.stats()
+    }
+
+
+# In-process cache metrics endpoint
+@app.get("/health/cache")
+def cache_health():
+    """Size and hit/miss counters of the in-process caches"""
+    return {
+        "market_directory": market_directory.stats(),
+        "market_snapshot": market_snapshot.stats(),
+        "symbol_index": symbol_index.stats(),
+        "principals": principal_cache.stats()
+    }
+
+
+# Password hashing pool metrics endpoint
+@app.get("/health/password-pool")
+def password_pool_health():
+    """Queue depth, rejections and average latency of the bcrypt worker pool"""
+    return password_pool.stats()
+
+
+# Rate limiter metrics endpoint
+@app.get("/health/rate-limit")
+def rate_limit_health():
+    """Allowed/limited request counts of the rate limiter"""
+    return {
+        "enabled": settings.RATE_LIMIT_ENABLED,
+        "limits": settings.RATE_LIMITS,
+        **rate_limit_store.stats()
+    }
+
+
+# Scheduled tick metrics endpoint
+@app.get("/health/ticks")
+def ticks_health():
+    """Overlap policy, skip/coalesce counters, lag and duration of the scheduled ticks"""
+    stats = {"scheduler": settings.SCHEDULER, **tick_guard.stats()}
+    if settings.SCHEDULER == "embedded":
+        stats["embedded"] = embedded_scheduler.stats()
+        stats["order_books"] = order_books.stats()
+    return stats
+
+
 # WebSocket endpoint for real-time market streaming
 @app.websocket("/ws/market-stream")
 async def websocket_market_stream(websocket: WebSocket):
@@ -0,0 +1,3 @@
+from .rate_limit import RateLimitMiddleware, rate_limit_store
+
+__all__ = ["RateLimitMiddleware", "rate_limit_store"]
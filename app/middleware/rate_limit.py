@@ -0,0 +1,229 @@
+"""
+Per-user token-bucket rate limiting for the /api routes
+
+Every request under /api is put in a route group (auth, trade, write or read) and charged one
+token from the bucket of (group, caller). The caller is the authenticated user when the request
+carries a valid bearer token, otherwise the client IP. Buckets refill at RATE_LIMITS[group][0]
+tokens per second up to a burst of RATE_LIMITS[group][1]; an empty bucket answers 429 with
+Retry-After before the request reaches a route or the database.
+
+Two stores are available (RATE_LIMIT_BACKEND):
+- memory: buckets in this process, split over lock-striped shards. Limits are per worker.
+- redis: one atomic Lua script per request, so limits hold across all workers. If Redis is
+  unreachable requests are let through (fail open) rather than taking the API down with it.
+
+The middleware is plain ASGI (no BaseHTTPMiddleware) and resolves the user from the principal
+cache, so the common case costs one dict lookup and one lock per request.
+"""
+import math
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import redis.asyncio as aioredis
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from starlette.responses import JSONResponse
+
+from app.config import settings
+from app.utils.auth import decode_token
+from app.utils.principal_cache import principal_cache
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def route_group(method: str, path: str) -> Optional[str]:
+    """Rate limit group of a request, or None for routes that are never limited"""
+    if not path.startswith("/api/"):
+        return None
+    if path.startswith("/api/auth/"):
+        return "auth" if method == "POST" else "read"
+    if path.startswith("/api/holdings/trade"):
+        return "trade"
+    return "read" if method in READ_METHODS else "write"
+
+
+def caller_identity(scope) -> str:
+    """'user:<id>' for a valid bearer token, else 'ip:<client address>'"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                principal = principal_cache.peek(token)
+                if principal is not None:
+                    return f"user:{principal.id}"
+                try:
+                    return f"user:{decode_token(token).user_id}"
+                except HTTPException:
+                    pass
+            break
+
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class MemoryBucketStore:
+    """Token buckets in process memory, lock-striped over `shards` dicts"""
+
+    def __init__(self, shards: int = 16, max_keys: int = 100000):
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self._sweep_at = [max(1, max_keys // shards)] * shards
+        self._max_keys_per_shard = max(1, max_keys // shards)
+        self.allowed = 0
+        self.limited = 0
+
+    def take_sync(self, key: str, rate: float, burst: int) -> float:
+        """Take one token; returns 0 if allowed, else seconds until a token is available"""
+        index = hash(key) % len(self._shards)
+        buckets, lock = self._shards[index]
+        now = time.monotonic()
+
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                tokens = burst
+            else:
+                tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+                self.allowed += 1
+            else:
+                wait = (1 - tokens) / rate
+                self.limited += 1
+
+            # [tokens, updated_at, full_at]; a bucket past full_at is the same as no bucket
+            buckets[key] = [tokens, now, now + (burst - tokens) / rate]
+            if len(buckets) > self._sweep_at[index]:
+                self._sweep(index, now)
+
+        return wait
+
+    def _sweep(self, index: int, now: float):
+        """Drop refilled buckets; called with the shard lock held"""
+        buckets, _ = self._shards[index]
+        for key in [key for key, bucket in buckets.items() if bucket[2] <= now]:
+            del buckets[key]
+        # Every bucket still active: don't rescan on each request until the shard doubles
+        self._sweep_at[index] = max(self._max_keys_per_shard, 2 * len(buckets))
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        return self.take_sync(key, rate, burst)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "buckets": sum(len(buckets) for buckets, _ in self._shards),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+# KEYS[1] = bucket; ARGV = rate, burst. Returns seconds to wait as a string (Lua numbers are truncated to ints)
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """Token buckets shared by all workers through Redis"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        self.client = aioredis.Redis.from_url(url, socket_connect_timeout=0.5, socket_timeout=0.5)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.prefix = prefix
+        self.connected = True
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        try:
+            wait = float(await self.script(keys=[self.prefix + key], args=[rate, burst]))
+        except RedisError as e:
+            self.errors += 1
+            if self.connected:
+                print(f"⚠️  Rate limiter cannot reach Redis, letting requests through: {str(e)}")
+                self.connected = False
+            return 0.0
+
+        if not self.connected:
+            print(f"✅ Rate limiter reconnected to Redis")
+            self.connected = True
+
+        if wait > 0:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "connected": self.connected,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "errors": self.errors,
+        }
+
+
+class RateLimitMiddleware:
+    """ASGI middleware charging each /api request to its (route group, caller) bucket"""
+
+    def __init__(self, app, store, limits: Dict[str, Sequence[float]]):
+        self.app = app
+        self.store = store
+        self.limits: Dict[str, Tuple[float, int]] = {
+            group: (float(limit[0]), int(limit[1])) for group, limit in limits.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        group = route_group(scope["method"], scope["path"])
+        limit = self.limits.get(group) if group is not None else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        wait = await self.store.take(f"{group}:{caller_identity(scope)}", *limit)
+        if wait > 0:
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded, please slow down"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+def build_store(backend: str):
+    if backend == "memory":
+        return MemoryBucketStore(settings.RATE_LIMIT_SHARDS)
+    if backend == "redis":
+        return RedisBucketStore(settings.REDIS_URL)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{backend}' - expected memory or redis")
+
+
+rate_limit_store = build_store(settings.RATE_LIMIT_BACKEND)
@@ -1,7 +1,10 @@
 from .user import User
-from .market import Market
+from .market import Market, MarketRevision
 from .holding import Holding
 from .alert import Alert
 from .transaction import TransactionLog
+from .price_history import PriceTick, Candle
+from .order import Order
+from .snapshot import HoldingSnapshot
 
-__all__ = ["User", "Market", "Holding", "Alert", "TransactionLog"]
+__all__ = ["User", "Market", "MarketRevision", "Holding", "Alert", "TransactionLog", "PriceTick", "Candle", "Order", "HoldingSnapshot"]
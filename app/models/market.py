@@ -14,11 +14,22 @@ class Market(Base):
     current_price = Column(DECIMAL(20, 8), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    price_timestamp = Column(DateTime(timezone=True), nullable=True)  # tick behind current_price; older ticks never replace it
 
     # Relationships
     holdings = relationship("Holding", back_populates="market", cascade="all, delete-orphan")
     alerts = relationship("Alert", back_populates="market", cascade="all, delete-orphan")
     transactions = relationship("TransactionLog", back_populates="market", cascade="all, delete-orphan")
+    orders = relationship("Order", back_populates="market", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Market(id={self.id}, symbol={self.symbol}, price={self.current_price})>"
+
+
+class MarketRevision(Base):
+    """Single-row counter bumped in every transaction that creates, deletes or reprices a market"""
+
+    __tablename__ = "market_revision"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
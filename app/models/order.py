@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, ForeignKey, String, DECIMAL, DateTime, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Order(Base):
+    """Resting limit/stop order, filled by the price tick once the market price crosses `price`"""
+
+    __tablename__ = "orders"
+    __table_args__ = (
+        # Serves the order books' incremental sync: WHERE status = 'open' AND id > ?
+        Index("ix_orders_status_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    market_id = Column(Integer, ForeignKey("markets.id", ondelete="CASCADE"), nullable=False, index=True)
+    side = Column(String(4), nullable=False)  # 'buy' or 'sell'
+    type = Column(String(5), nullable=False)  # 'limit' or 'stop'
+    price = Column(DECIMAL(20, 8), nullable=False)  # limit price, or stop trigger price
+    quantity = Column(DECIMAL(20, 8), nullable=False)
+    status = Column(String(10), nullable=False, default="open")  # open, filled, rejected or cancelled
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    filled_price = Column(DECIMAL(20, 8), nullable=True)
+    filled_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    user = relationship("User", back_populates="orders")
+    market = relationship("Market", back_populates="orders")
+
+    def __repr__(self):
+        return f"<Order(id={self.id}, {self.side} {self.type} market_id={self.market_id}, price={self.price}, status={self.status})>"
@@ -0,0 +1,50 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, String, DECIMAL, DateTime, Index, UniqueConstraint
+from app.database import Base
+
+
+class PriceTick(Base):
+    """Append-only log of every price a market has taken"""
+
+    __tablename__ = "price_ticks"
+    __table_args__ = (
+        Index("ix_price_ticks_market_timestamp", "market_id", "timestamp"),
+        # Serves the indicator cache's catch-up: WHERE market_id = ? AND id > ?
+        Index("ix_price_ticks_market_id_id", "market_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    market_id = Column(Integer, ForeignKey("markets.id", ondelete="CASCADE"), nullable=False)
+    price = Column(DECIMAL(20, 8), nullable=False)
+    volume = Column(DECIMAL(20, 8), nullable=False, default=0)  # traded quantity, when the source reports it
+    timestamp = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<PriceTick(market_id={self.market_id}, price={self.price}, timestamp={self.timestamp})>"
+
+
+class Candle(Base):
+    """OHLCV candle per market, interval ('1m', '5m', '1h', '1d') and bucket start"""
+
+    __tablename__ = "candles"
+    __table_args__ = (
+        # Unique key doubles as the index serving range queries
+        UniqueConstraint("market_id", "interval", "bucket_start", name="uq_candles_market_interval_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    market_id = Column(Integer, ForeignKey("markets.id", ondelete="CASCADE"), nullable=False)
+    interval = Column(String(3), nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    open = Column(DECIMAL(20, 8), nullable=False)
+    high = Column(DECIMAL(20, 8), nullable=False)
+    low = Column(DECIMAL(20, 8), nullable=False)
+    close = Column(DECIMAL(20, 8), nullable=False)
+    volume = Column(DECIMAL(20, 8), nullable=False, default=0)
+    tick_count = Column(Integer, nullable=False, default=0)
+    # Timestamps of the ticks behind open and close, so a late batch only replaces them when it is outside them
+    first_tick_at = Column(DateTime(timezone=True), nullable=False)
+    last_tick_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<Candle(market_id={self.market_id}, interval={self.interval}, bucket_start={self.bucket_start}, close={self.close})>"
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, ForeignKey, DECIMAL, DateTime, Index, Text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class HoldingSnapshot(Base):
+    """Checkpoint of one user's holdings and balance, derived from their transactions up to transaction_id"""
+
+    __tablename__ = "holding_snapshots"
+    __table_args__ = (
+        # Serves "latest checkpoint per user": WHERE user_id IN (...) GROUP BY user_id -> MAX(id)
+        Index("ix_holding_snapshots_user_id_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    transaction_id = Column(Integer, nullable=False, default=0)  # last transaction folded in; 0 = none yet
+    balance = Column(DECIMAL(20, 8), nullable=False)
+    holdings = Column(Text, nullable=False, default="{}")  # JSON: {"<market_id>": ["<quantity>", "<avg_buy_price>"]}
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    user = relationship("User", back_populates="snapshots")
+
+    def __repr__(self):
+        return f"<HoldingSnapshot(id={self.id}, user_id={self.user_id}, transaction_id={self.transaction_id})>"
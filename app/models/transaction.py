@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, ForeignKey, String, DECIMAL, DateTime
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, String, DECIMAL, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -8,6 +9,10 @@ class TransactionLog(Base):
     """Transaction log model for storing all buy/sell transactions"""
 
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Serves keyset pagination of a user's history: WHERE user_id = ? ORDER BY timestamp DESC, id DESC
+        Index("ix_transactions_user_timestamp_id", "user_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -16,7 +21,8 @@ class TransactionLog(Base):
     price = Column(DECIMAL(20, 8), nullable=False)
     quantity = Column(DECIMAL(20, 8), nullable=False)
     total_amount = Column(DECIMAL(20, 8), nullable=False)  # price * quantity
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Python-side default keeps microsecond precision, so (timestamp, id) cursors compare consistently
+    timestamp = Column(DateTime(timezone=True), default=datetime.utcnow, server_default=func.now(), index=True)
 
     # Relationships
     user = relationship("User", back_populates="transactions")
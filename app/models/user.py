@@ -18,6 +18,8 @@ class User(Base):
     holdings = relationship("Holding", back_populates="user", cascade="all, delete-orphan")
     alerts = relationship("Alert", back_populates="user", cascade="all, delete-orphan")
     transactions = relationship("TransactionLog", back_populates="user", cascade="all, delete-orphan")
+    orders = relationship("Order", back_populates="user", cascade="all, delete-orphan")
+    snapshots = relationship("HoldingSnapshot", back_populates="user", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email}, balance={self.balance})>"
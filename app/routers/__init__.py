@@ -2,12 +2,20 @@ from .auth import router as auth_router
 from .markets import router as markets_router
 from .holdings import router as holdings_router
 from .alerts import router as alerts_router
+from .orders import router as orders_router
 from .portfolio import router as portfolio_router
+from .transactions import router as transactions_router
+from .candles import router as candles_router
+from .indicators import router as indicators_router
 
 __all__ = [
     "auth_router",
     "markets_router",
     "holdings_router",
     "alerts_router",
-    "portfolio_router"
+    "orders_router",
+    "portfolio_router",
+    "transactions_router",
+    "candles_router",
+    "indicators_router"
 ]
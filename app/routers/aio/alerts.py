@@ -0,0 +1,128 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.database import get_async_db
+from app.db_routing import session_router
+from app.models import User, Alert
+from app.schemas.alert import AlertCreate, AlertResponse
+from app.services.market_directory import market_directory
+from app.utils.auth import get_current_principal_async
+from app.utils.principal_cache import Principal
+from app.utils.responses import json_response
+
+router = APIRouter(prefix="/api/alerts", tags=["Alerts"])
+
+
+@router.post("/", response_model=AlertResponse, status_code=status.HTTP_201_CREATED)
+async def create_alert(
+    alert_data: AlertCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Create a new price alert"""
+
+    # Check if user exists
+    user = await db.get(User, alert_data.user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    # Check if market exists
+    market_id = await market_directory.resolve_async(db, alert_data.symbol)
+    if market_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Market {alert_data.symbol} not found"
+        )
+
+    # Validate alert direction
+    if alert_data.direction not in ["above", "below"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Direction must be 'above' or 'below'"
+        )
+
+    # Create alert
+    new_alert = Alert(
+        user_id=user.id,
+        market_id=market_id,
+        target_price=alert_data.target_price,
+        direction=alert_data.direction,
+        triggered=False
+    )
+
+    db.add(new_alert)
+    await db.commit()
+    session_router.pin_user(user.id)
+    await db.refresh(new_alert)
+
+    return new_alert
+
+
+@router.get("/user/{user_id}", response_model=List[AlertResponse])
+async def get_user_alerts(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Get all alerts for a specific user"""
+
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    result = await db.execute(select(Alert).where(Alert.user_id == user_id))
+    return json_response(List[AlertResponse], result.scalars().all())
+
+
+@router.get("/user/{user_id}/active", response_model=List[AlertResponse])
+async def get_active_alerts(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Get only active (non-triggered) alerts for a user"""
+
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    result = await db.execute(select(Alert).where(
+        Alert.user_id == user_id,
+        Alert.triggered == False
+    ))
+
+    return json_response(List[AlertResponse], result.scalars().all())
+
+
+@router.delete("/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_alert(
+    alert_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Delete a specific alert"""
+
+    alert = await db.get(Alert, alert_id)
+    if not alert:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Alert not found"
+        )
+
+    owner_id = alert.user_id
+    await db.delete(alert)
+    await db.commit()
+    session_router.pin_user(owner_id)
+
+    return None
@@ -0,0 +1,160 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.db_routing import session_router
+from app.models import User, Holding, TransactionLog
+from app.schemas.holding import TradeRequest, HoldingResponse
+from app.services.market_directory import market_directory
+from app.utils.auth import get_current_principal_async
+from app.utils.fixed_point import divide, from_units, round_units, to_units
+from app.utils.principal_cache import Principal
+from app.utils.responses import json_response
+
+router = APIRouter(prefix="/api/holdings", tags=["Holdings"])
+
+
+@router.post("/trade/", status_code=status.HTTP_201_CREATED)
+async def execute_trade(
+    trade: TradeRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """
+    Execute a buy or sell trade
+    - Buy: Decrease user balance, add/update holdings
+    - Sell: Increase user balance, reduce holdings
+    - Record transaction in TransactionLog
+    """
+
+    # Get user
+    user = await db.get(User, trade.user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    # Get market
+    market_id = await market_directory.resolve_async(db, trade.symbol)
+    if market_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Market {trade.symbol} not found"
+        )
+
+    # Calculate in fixed-point units; request amounts are rounded to the 8 decimals that get stored
+    price = to_units(trade.price)
+    quantity = to_units(trade.quantity)
+    if price == 0 or quantity == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Price and quantity must be at least 0.00000001"
+        )
+    cost = price * quantity  # exact, at product scale
+    total_amount = round_units(cost)  # the balance moves by exactly the logged total, so replays match
+    balance = to_units(user.balance)
+
+    # Check if holding exists
+    result = await db.execute(select(Holding).where(
+        Holding.user_id == user.id,
+        Holding.market_id == market_id
+    ))
+    holding = result.scalar_one_or_none()
+
+    if trade.type == "buy":
+        # Check if user has sufficient balance
+        if balance < total_amount:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient balance"
+            )
+
+        # Deduct balance
+        user.balance = from_units(balance - total_amount)
+
+        if holding:
+            # Update existing holding - calculate new average buy price
+            held = to_units(holding.quantity)
+            total_value = to_units(holding.avg_buy_price) * held + cost
+            new_quantity = held + quantity
+            holding.avg_buy_price = from_units(divide(total_value, new_quantity))
+            holding.quantity = from_units(new_quantity)
+        else:
+            # Create new holding
+            holding = Holding(
+                user_id=user.id,
+                market_id=market_id,
+                quantity=from_units(quantity),
+                avg_buy_price=from_units(price)
+            )
+            db.add(holding)
+
+    elif trade.type == "sell":
+        if not holding:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No holdings found for this market"
+            )
+
+        # Check if user has sufficient quantity
+        if to_units(holding.quantity) < quantity:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient quantity. Available: {holding.quantity}"
+            )
+
+        # Increase balance
+        user.balance = from_units(balance + total_amount)
+
+        # Reduce holding quantity
+        holding.quantity = from_units(to_units(holding.quantity) - quantity)
+
+        # If quantity becomes zero, delete the holding
+        if holding.quantity == 0:
+            await db.delete(holding)
+
+    # Record transaction
+    transaction = TransactionLog(
+        user_id=user.id,
+        market_id=market_id,
+        type=trade.type,
+        price=from_units(price),
+        quantity=from_units(quantity),
+        total_amount=from_units(total_amount)
+    )
+    db.add(transaction)
+
+    # Commit all changes
+    await db.commit()
+    session_router.pin_user(user.id)  # read-your-writes: skip replicas until they catch up
+
+    return {
+        "message": f"{trade.type.capitalize()} order executed successfully",
+        "trade_type": trade.type,
+        "symbol": trade.symbol,
+        "quantity": float(trade.quantity),
+        "price": float(trade.price),
+        "total_amount": float(from_units(total_amount)),
+        "new_balance": float(user.balance)
+    }
+
+
+@router.get("/user/{user_id}", response_model=list[HoldingResponse])
+async def get_user_holdings(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Get all holdings for a specific user"""
+
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    result = await db.execute(select(Holding).where(Holding.user_id == user_id))
+    return json_response(list[HoldingResponse], result.scalars().all())
@@ -0,0 +1,279 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+
+from app.config import settings
+from app.database import get_async_db
+from app.models import Market, Order, PriceTick, Candle
+from app.schemas.market import (
+    MarketBulkResponse,
+    MarketBulkUpsert,
+    MarketCreate,
+    MarketPrices,
+    MarketResponse,
+    MarketSearchPage,
+    MarketUpdate,
+    TickIngest,
+    TickIngestResponse
+)
+from app.services.holding_snapshots import drop_market_positions
+from app.services.indicators import indicator_cache
+from app.services.market_bulk import SymbolTick, ingest_ticks, parse_symbols, upsert_markets
+from app.services.market_directory import market_directory
+from app.services.market_snapshot import bump_market_revision, bumped_listing_revision, market_snapshot
+from app.services.order_book import order_books
+from app.services.price_history import Tick, record_ticks
+from app.services.symbol_index import decode_cursor, encode_cursor, symbol_index
+from app.utils.auth import get_current_principal_async
+from app.utils.principal_cache import Principal
+from app.utils.responses import json_response
+
+router = APIRouter(prefix="/api/markets", tags=["Markets"])
+
+
+@router.post("/", response_model=MarketResponse, status_code=status.HTTP_201_CREATED)
+async def create_or_update_market(
+    market_data: MarketCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """
+    Create a new market or update existing market price
+    This simulates manual price updates for testing
+    """
+
+    # Check if market already exists
+    existing_market = await market_directory.get_market_async(db, market_data.symbol)
+
+    if existing_market:
+        # Update existing market
+        now = datetime.utcnow()
+        existing_market.current_price = market_data.price
+        existing_market.price_timestamp = now
+        await db.run_sync(record_ticks, [Tick(market_id=existing_market.id, price=market_data.price, timestamp=now)])
+        await db.run_sync(bump_market_revision)
+        await db.commit()
+        await db.refresh(existing_market)
+        return existing_market
+    else:
+        # Create new market
+        now = datetime.utcnow()
+        new_market = Market(
+            symbol=market_data.symbol,
+            current_price=market_data.price,
+            price_timestamp=now
+        )
+        db.add(new_market)
+        await db.flush()
+        await db.run_sync(record_ticks, [Tick(market_id=new_market.id, price=market_data.price, timestamp=now)])
+        await db.run_sync(bump_market_revision, listing_changed=True)
+        await db.commit()
+        await db.refresh(new_market)
+        # Drop any stale id other processes still hold for a re-created symbol
+        market_directory.invalidate(new_market.symbol)
+        market_directory.remember(new_market.symbol, new_market.id)
+        symbol_index.add(new_market.symbol, new_market.id, bumped_listing_revision(db))
+        return new_market
+
+
+@router.post("/bulk", response_model=MarketBulkResponse)
+async def bulk_upsert_markets(
+    payload: MarketBulkUpsert,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """
+    Create or update many markets with one upsert statement
+    If a symbol appears more than once, its last price wins
+    """
+    if len(payload.markets) > settings.MARKET_BULK_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MARKET_BULK_MAX} markets per request"
+        )
+
+    prices = {item.symbol: item.price for item in payload.markets}
+    rows, created = await db.run_sync(upsert_markets, prices)
+    await db.commit()
+
+    market_directory.invalidate_many(created)
+    revision = bumped_listing_revision(db)
+    for row in rows:
+        market_directory.remember(row.symbol, row.id)
+        symbol_index.add(row.symbol, row.id, revision)
+
+    return json_response(MarketBulkResponse, {
+        "created": len(created),
+        "updated": len(rows) - len(created),
+        "markets": rows
+    })
+
+
+@router.post("/ticks", response_model=TickIngestResponse)
+async def ingest_market_ticks(
+    payload: TickIngest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """
+    Record a batch of price ticks (e.g. from a feed or a replayed file) in one transaction
+    Every tick lands in price history; each market ends at the price of its latest tick
+    """
+    if len(payload.ticks) > settings.TICK_INGEST_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.TICK_INGEST_MAX} ticks per request"
+        )
+
+    now = datetime.utcnow()
+    ticks = [SymbolTick(tick.symbol, tick.price, tick.timestamp or now, tick.volume) for tick in payload.ticks]
+    rows, created = await db.run_sync(ingest_ticks, ticks)
+    await db.commit()
+
+    market_directory.invalidate_many(created)
+    revision = bumped_listing_revision(db)
+    for row in rows:
+        market_directory.remember(row.symbol, row.id)
+        symbol_index.add(row.symbol, row.id, revision)
+
+    return json_response(TickIngestResponse, {"ticks": len(ticks), "markets": len(rows), "created": len(created)})
+
+
+@router.get("/", response_model=List[MarketResponse])
+async def get_all_markets(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Get all markets
+    Served from the versioned snapshot: 304 when If-None-Match names the current version
+    """
+    return await market_snapshot.response_async(db, if_none_match)
+
+
+@router.get("/search", response_model=MarketSearchPage)
+async def search_markets(
+    prefix: str = Query("", description="Symbol prefix, case-insensitive (e.g. SO matches SOL/USDT)"),
+    base: Optional[str] = Query(None, description="Base asset, e.g. BTC"),
+    quote: Optional[str] = Query(None, description="Quote asset, e.g. USDT for all */USDT pairs"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Search markets by symbol prefix and base/quote asset, paged in symbol order"""
+    await symbol_index.refresh_async(db)
+    after = decode_cursor(cursor) if cursor else None
+    matches, next_symbol = symbol_index.search(prefix, base, quote, after, limit)
+
+    ids = [market_id for _, market_id in matches]
+    markets = {}
+    if ids:
+        result = await db.execute(select(Market).where(Market.id.in_(ids)))
+        markets = {market.id: market for market in result.scalars()}
+
+    return json_response(MarketSearchPage, {
+        "items": [markets[market_id] for market_id in ids if market_id in markets],
+        "next_cursor": encode_cursor(next_symbol) if next_symbol else None
+    })
+
+
+@router.get("/symbol", response_model=MarketResponse)
+async def get_market_by_symbol(
+    symbol: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Get a specific market by symbol (use query parameter: ?symbol=BTC/USDT)"""
+    market = await market_directory.get_market_async(db, symbol)
+
+    if not market:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Market {symbol} not found"
+        )
+
+    return market
+
+
+@router.get("/prices", response_model=MarketPrices)
+async def get_market_prices(
+    symbols: List[str] = Query(..., description="Symbols, repeated (?symbols=A&symbols=B) or comma-separated"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Get current prices for many symbols with a single IN query"""
+    wanted = parse_symbols(symbols)
+
+    result = await db.execute(select(Market.symbol, Market.current_price).where(Market.symbol.in_(wanted)))
+    prices = {row.symbol: row.current_price for row in result}
+
+    return json_response(MarketPrices, {
+        "prices": prices,
+        "missing": [symbol for symbol in wanted if symbol not in prices]
+    })
+
+
+@router.put("/", response_model=MarketResponse)
+async def update_market_price(
+    symbol: str,
+    price_update: MarketUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Update market price (use query parameter: ?symbol=BTC/USDT)"""
+    market = await market_directory.get_market_async(db, symbol)
+
+    if not market:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Market {symbol} not found"
+        )
+
+    now = datetime.utcnow()
+    market.current_price = price_update.price
+    market.price_timestamp = now
+    await db.run_sync(record_ticks, [Tick(market_id=market.id, price=price_update.price, timestamp=now)])
+    await db.run_sync(bump_market_revision)
+    await db.commit()
+    await db.refresh(market)
+
+    return market
+
+
+@router.delete("/{market_id}", status_code=status.HTTP_200_OK)
+async def delete_market(
+    market_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Delete a market by ID"""
+    market = await db.get(Market, market_id)
+
+    if not market:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Market with ID {market_id} not found"
+        )
+
+    # Price history has no ORM relationship (it can be huge), so clear it in bulk
+    await db.execute(delete(PriceTick).where(PriceTick.market_id == market.id))
+    await db.execute(delete(Candle).where(Candle.market_id == market.id))
+    # Resting orders go too, so a market later created with the same id never fills them
+    await db.execute(delete(Order).where(Order.market_id == market.id))
+    # Checkpoints keep positions as JSON, out of reach of the cascade
+    await db.run_sync(drop_market_positions, market.id)
+
+    # Delete the market (cascade will handle related records)
+    await db.delete(market)
+    await db.run_sync(bump_market_revision, listing_changed=True)
+    await db.commit()
+    indicator_cache.invalidate_market(market_id)
+    order_books.drop_market(market_id)
+    market_directory.invalidate(market.symbol)
+    symbol_index.remove(market.symbol, bumped_listing_revision(db))
+
+    return {"message": f"Market {market.symbol} deleted successfully"}
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.database import get_async_db
+from app.models import User, Holding
+from app.schemas.portfolio import PortfolioResponse, HoldingDetail
+from app.utils.auth import get_current_principal_async
+from app.utils.fixed_point import SCALE, from_units, mul, round_units, to_units
+from app.utils.principal_cache import Principal
+from app.utils.responses import json_response
+
+router = APIRouter(prefix="/api/users", tags=["Portfolio"])
+
+
+@router.get("/{user_id}/portfolio", response_model=PortfolioResponse)
+async def get_portfolio_summary(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """
+    Get portfolio summary for a user including:
+    - Current balance
+    - All holdings with unrealized P&L
+    - Total portfolio value
+    """
+
+    # Get user
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    # Get all holdings with their markets (no lazy loads under asyncio)
+    result = await db.execute(
+        select(Holding).options(joinedload(Holding.market)).where(Holding.user_id == user_id)
+    )
+    holdings = result.scalars().all()
+
+    # Calculate holding details in fixed-point units
+    holding_details = []
+    total_holdings_value = 0  # at product scale, rounded once into the total
+
+    for holding in holdings:
+        # Get current market price
+        current_price = to_units(holding.market.current_price)
+        avg_buy_price = to_units(holding.avg_buy_price)
+        quantity = to_units(holding.quantity)
+
+        # Calculate unrealized P&L
+        # P&L = (current_price - avg_buy_price) * quantity
+        unrealized_pnl = mul(current_price - avg_buy_price, quantity)
+
+        # Calculate value of this holding
+        total_holdings_value += current_price * quantity
+
+        holding_detail = HoldingDetail(
+            symbol=holding.market.symbol,
+            quantity=holding.quantity,
+            avg_buy_price=holding.avg_buy_price,
+            current_price=holding.market.current_price,
+            unrealized_pnl=from_units(unrealized_pnl)
+        )
+        holding_details.append(holding_detail)
+
+    # Calculate total portfolio value (balance + holdings value)
+    total_value = from_units(round_units(to_units(user.balance) * SCALE + total_holdings_value))
+
+    portfolio = PortfolioResponse(
+        balance=user.balance,
+        holdings=holding_details,
+        total_value=total_value
+    )
+
+    return json_response(PortfolioResponse, portfolio)
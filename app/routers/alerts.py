@@ -3,9 +3,14 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from app.database import get_db
-from app.models import User, Market, Alert
+from app.db_routing import get_read_db, session_router
+from app.db_sharding import route_user
+from app.models import User, Alert
 from app.schemas.alert import AlertCreate, AlertResponse
-from app.utils.auth import get_current_user
+from app.services.market_directory import market_directory
+from app.utils.auth import get_current_principal
+from app.utils.principal_cache import Principal
+from app.utils.responses import json_response
 
 router = APIRouter(prefix="/api/alerts", tags=["Alerts"])
 
@@ -14,7 +19,7 @@ router = APIRouter(prefix="/api/alerts", tags=["Alerts"])
 def create_alert(
     alert_data: AlertCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Create a new price alert"""
 
@@ -26,9 +31,11 @@ def create_alert(
             detail="User not found"
         )
 
+    route_user(db, user.id)
+
     # Check if market exists
-    market = db.query(Market).filter(Market.symbol == alert_data.symbol).first()
-    if not market:
+    market_id = market_directory.resolve(db, alert_data.symbol)
+    if market_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Market {alert_data.symbol} not found"
@@ -44,7 +51,7 @@ def create_alert(
     # Create alert
     new_alert = Alert(
         user_id=user.id,
-        market_id=market.id,
+        market_id=market_id,
         target_price=alert_data.target_price,
         direction=alert_data.direction,
         triggered=False
@@ -52,6 +59,7 @@ def create_alert(
 
     db.add(new_alert)
     db.commit()
+    session_router.pin_user(user.id)
     db.refresh(new_alert)
 
     return new_alert
@@ -60,8 +68,8 @@ def create_alert(
 @router.get("/user/{user_id}", response_model=List[AlertResponse])
 def get_user_alerts(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get all alerts for a specific user"""
 
@@ -72,15 +80,17 @@ def get_user_alerts(
             detail="User not found"
         )
 
+    route_user(db, user.id)
+
     alerts = db.query(Alert).filter(Alert.user_id == user_id).all()
-    return alerts
+    return json_response(List[AlertResponse], alerts)
 
 
 @router.get("/user/{user_id}/active", response_model=List[AlertResponse])
 def get_active_alerts(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get only active (non-triggered) alerts for a user"""
 
@@ -91,22 +101,26 @@ def get_active_alerts(
             detail="User not found"
         )
 
+    route_user(db, user.id)
+
     alerts = db.query(Alert).filter(
         Alert.user_id == user_id,
         Alert.triggered == False
     ).all()
 
-    return alerts
+    return json_response(List[AlertResponse], alerts)
 
 
 @router.delete("/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_alert(
     alert_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Delete a specific alert"""
 
+    # Alert ids are only unique per shard, so look on the caller's own shard
+    route_user(db, current_user.id)
     alert = db.query(Alert).filter(Alert.id == alert_id).first()
     if not alert:
         raise HTTPException(
@@ -114,7 +128,9 @@ def delete_alert(
             detail="Alert not found"
         )
 
+    owner_id = alert.user_id
     db.delete(alert)
     db.commit()
+    session_router.pin_user(owner_id)
 
     return None
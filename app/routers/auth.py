@@ -1,26 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models import User
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
 from app.utils.auth import (
-    get_password_hash,
     authenticate_user,
     create_access_token,
     create_refresh_token,
     get_current_user
 )
+from app.utils.password_pool import password_pool
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
-    """Register a new user"""
+async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+    """
+    Register a new user
+    Async so bcrypt can be awaited in the password pool; the blocking queries run in the threadpool
+    """
 
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_in_threadpool(lambda: db.query(User).filter(User.email == user_data.email).first())
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -28,7 +32,7 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_pool.hash(user_data.password)
     new_user = User(
         name=user_data.name,
         email=user_data.email,
@@ -36,18 +40,21 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         balance=user_data.balance
     )
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    def save():
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+
+    await run_in_threadpool(save)
 
     return new_user
 
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     """Login and get access token"""
 
-    user = authenticate_user(db, user_credentials.email, user_credentials.password)
+    user = await authenticate_user(db, user_credentials.email, user_credentials.password)
 
     if not user:
         raise HTTPException(
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+from datetime import datetime
+
+from app.db_routing import get_read_db
+from app.models import Market
+from app.schemas.candle import CandleResponse
+from app.services.price_history import get_candles
+from app.utils.auth import get_current_principal
+from app.utils.principal_cache import Principal
+
+router = APIRouter(prefix="/api/candles", tags=["Price History"])
+
+
+@router.get("/", response_model=List[CandleResponse])
+def get_market_candles(
+    symbol: str,
+    interval: Literal["1m", "5m", "1h", "1d"] = "1m",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Get OHLCV candles for a market (use query parameters: ?symbol=BTC/USDT&interval=5m)
+    - Optional ?start= and ?end= (ISO 8601) bound the range; without start the latest candles are returned
+    """
+    market = db.query(Market).filter(Market.symbol == symbol).first()
+
+    if not market:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Market {symbol} not found"
+        )
+
+    return get_candles(db, market.id, interval, start=start, end=end, limit=limit)
@@ -1,11 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from decimal import Decimal
+from typing import Literal
 
 from app.database import get_db
-from app.models import User, Market, Holding, TransactionLog
+from app.db_routing import get_read_db, session_router
+from app.db_sharding import route_user
+from app.models import User, Holding, TransactionLog
 from app.schemas.holding import TradeRequest, HoldingResponse
-from app.utils.auth import get_current_user
+from app.services.market_directory import market_directory
+from app.services.export import EXPORT_FORMATS, HOLDING_FIELDS, stream_export, holding_chunk_fetcher
+from app.utils.auth import get_current_principal
+from app.utils.fixed_point import divide, from_units, round_units, to_units
+from app.utils.principal_cache import Principal
+from app.utils.responses import json_response
 
 router = APIRouter(prefix="/api/holdings", tags=["Holdings"])
 
@@ -14,7 +23,7 @@ router = APIRouter(prefix="/api/holdings", tags=["Holdings"])
 def execute_trade(
     trade: TradeRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Execute a buy or sell trade
@@ -31,47 +40,60 @@ def execute_trade(
             detail="User not found"
         )
 
+    # Holdings and the transaction log live on the user's shard; the balance stays on the primary
+    route_user(db, user.id)
+
     # Get market
-    market = db.query(Market).filter(Market.symbol == trade.symbol).first()
-    if not market:
+    market_id = market_directory.resolve(db, trade.symbol)
+    if market_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Market {trade.symbol} not found"
         )
 
-    # Calculate total amount
-    total_amount = trade.price * trade.quantity
+    # Calculate in fixed-point units; request amounts are rounded to the 8 decimals that get stored
+    price = to_units(trade.price)
+    quantity = to_units(trade.quantity)
+    if price == 0 or quantity == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Price and quantity must be at least 0.00000001"
+        )
+    cost = price * quantity  # exact, at product scale
+    total_amount = round_units(cost)  # the balance moves by exactly the logged total, so replays match
+    balance = to_units(user.balance)
 
     if trade.type == "buy":
         # Check if user has sufficient balance
-        if user.balance < total_amount:
+        if balance < total_amount:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Insufficient balance"
             )
 
         # Deduct balance
-        user.balance -= total_amount
+        user.balance = from_units(balance - total_amount)
 
         # Check if holding exists
         holding = db.query(Holding).filter(
             Holding.user_id == user.id,
-            Holding.market_id == market.id
+            Holding.market_id == market_id
         ).first()
 
         if holding:
             # Update existing holding - calculate new average buy price
-            total_value = (holding.avg_buy_price * holding.quantity) + (trade.price * trade.quantity)
-            new_quantity = holding.quantity + trade.quantity
-            holding.avg_buy_price = total_value / new_quantity
-            holding.quantity = new_quantity
+            held = to_units(holding.quantity)
+            total_value = to_units(holding.avg_buy_price) * held + cost
+            new_quantity = held + quantity
+            holding.avg_buy_price = from_units(divide(total_value, new_quantity))
+            holding.quantity = from_units(new_quantity)
         else:
             # Create new holding
             holding = Holding(
                 user_id=user.id,
-                market_id=market.id,
-                quantity=trade.quantity,
-                avg_buy_price=trade.price
+                market_id=market_id,
+                quantity=from_units(quantity),
+                avg_buy_price=from_units(price)
             )
             db.add(holding)
 
@@ -79,7 +101,7 @@ def execute_trade(
         # Check if holding exists
         holding = db.query(Holding).filter(
             Holding.user_id == user.id,
-            Holding.market_id == market.id
+            Holding.market_id == market_id
         ).first()
 
         if not holding:
@@ -89,17 +111,17 @@ def execute_trade(
             )
 
         # Check if user has sufficient quantity
-        if holding.quantity < trade.quantity:
+        if to_units(holding.quantity) < quantity:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Insufficient quantity. Available: {holding.quantity}"
             )
 
         # Increase balance
-        user.balance += total_amount
+        user.balance = from_units(balance + total_amount)
 
         # Reduce holding quantity
-        holding.quantity -= trade.quantity
+        holding.quantity = from_units(to_units(holding.quantity) - quantity)
 
         # If quantity becomes zero, delete the holding
         if holding.quantity == 0:
@@ -108,16 +130,17 @@ def execute_trade(
     # Record transaction
     transaction = TransactionLog(
         user_id=user.id,
-        market_id=market.id,
+        market_id=market_id,
         type=trade.type,
-        price=trade.price,
-        quantity=trade.quantity,
-        total_amount=total_amount
+        price=from_units(price),
+        quantity=from_units(quantity),
+        total_amount=from_units(total_amount)
     )
     db.add(transaction)
 
     # Commit all changes
     db.commit()
+    session_router.pin_user(user.id)  # read-your-writes: skip replicas until they catch up
 
     return {
         "message": f"{trade.type.capitalize()} order executed successfully",
@@ -125,7 +148,7 @@ def execute_trade(
         "symbol": trade.symbol,
         "quantity": float(trade.quantity),
         "price": float(trade.price),
-        "total_amount": float(total_amount),
+        "total_amount": float(from_units(total_amount)),
         "new_balance": float(user.balance)
     }
 
@@ -133,8 +156,8 @@ def execute_trade(
 @router.get("/user/{user_id}", response_model=list[HoldingResponse])
 def get_user_holdings(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get all holdings for a specific user"""
 
@@ -145,5 +168,37 @@ def get_user_holdings(
             detail="User not found"
         )
 
+    route_user(db, user.id)
+
     holdings = db.query(Holding).filter(Holding.user_id == user_id).all()
-    return holdings
+    return json_response(list[HoldingResponse], holdings)
+
+
+@router.get("/user/{user_id}/export")
+def export_user_holdings(
+    user_id: int,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Stream all holdings for a user as NDJSON or CSV (use query parameter: ?format=csv)"""
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    _, media_type = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream_export(
+            holding_chunk_fetcher(user_id),
+            HOLDING_FIELDS,
+            format,
+            "holding",
+            session_factory=lambda: route_user(session_router.read_session(user_id), user_id)
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="holdings_user_{user_id}.{format}"'}
+    )
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Literal
+
+from app.db_routing import get_read_db
+from app.models import Market
+from app.schemas.indicator import IndicatorResponse
+from app.services.indicators import indicator_cache
+from app.utils.auth import get_current_principal
+from app.utils.principal_cache import Principal
+
+router = APIRouter(prefix="/api/indicators", tags=["Indicators"])
+
+
+@router.get("/", response_model=List[IndicatorResponse])
+def get_market_indicators(
+    symbol: str,
+    indicator: List[Literal["sma", "ema", "rsi", "vwap"]] = Query(["sma", "ema", "rsi", "vwap"]),
+    window: int = Query(14, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Get technical indicators for a market (use query parameters: ?symbol=BTC/USDT&indicator=rsi&window=14)
+    - Repeat ?indicator= to select several; all four are returned by default
+    """
+    market = db.query(Market).filter(Market.symbol == symbol).first()
+
+    if not market:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Market {symbol} not found"
+        )
+
+    results = []
+    for name in indicator:
+        value, as_of = indicator_cache.get(db, market.id, name, window)
+        results.append(IndicatorResponse(
+            symbol=market.symbol,
+            indicator=name,
+            window=window,
+            value=value,
+            as_of=as_of
+        ))
+
+    return results
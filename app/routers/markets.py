@@ -1,11 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 
+from app.config import settings
 from app.database import get_db
-from app.models import Market, User
-from app.schemas.market import MarketCreate, MarketResponse, MarketUpdate
-from app.utils.auth import get_current_user
+from app.db_routing import get_read_db
+from app.models import Market, PriceTick, Candle
+from app.schemas.market import (
+    MarketBulkResponse,
+    MarketBulkUpsert,
+    MarketCreate,
+    MarketPrices,
+    MarketResponse,
+    MarketSearchPage,
+    MarketUpdate,
+    TickIngest,
+    TickIngestResponse
+)
+from app.services.indicators import indicator_cache
+from app.services.market_bulk import SymbolTick, ingest_ticks, parse_symbols, upsert_markets
+from app.services.market_directory import market_directory
+from app.services.market_replication import delete_market_rows, replicate_market_rows, replicate_markets
+from app.services.market_snapshot import bump_market_revision, bumped_listing_revision, market_snapshot
+from app.services.order_book import order_books
+from app.services.price_history import Tick, record_ticks
+from app.services.symbol_index import decode_cursor, encode_cursor, symbol_index
+from app.utils.auth import get_current_principal
+from app.utils.principal_cache import Principal
+from app.utils.responses import json_response
 
 router = APIRouter(prefix="/api/markets", tags=["Markets"])
 
@@ -14,7 +37,7 @@ router = APIRouter(prefix="/api/markets", tags=["Markets"])
 def create_or_update_market(
     market_data: MarketCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Create a new market or update existing market price
@@ -22,45 +45,151 @@ def create_or_update_market(
     """
 
     # Check if market already exists
-    existing_market = db.query(Market).filter(Market.symbol == market_data.symbol).first()
+    existing_market = market_directory.get_market(db, market_data.symbol)
 
     if existing_market:
         # Update existing market
+        now = datetime.utcnow()
         existing_market.current_price = market_data.price
+        existing_market.price_timestamp = now
+        record_ticks(db, [Tick(market_id=existing_market.id, price=market_data.price, timestamp=now)])
+        bump_market_revision(db)
         db.commit()
+        replicate_markets(db, [existing_market.id])
         db.refresh(existing_market)
         return existing_market
     else:
         # Create new market
+        now = datetime.utcnow()
         new_market = Market(
             symbol=market_data.symbol,
-            current_price=market_data.price
+            current_price=market_data.price,
+            price_timestamp=now
         )
         db.add(new_market)
+        db.flush()
+        record_ticks(db, [Tick(market_id=new_market.id, price=market_data.price, timestamp=now)])
+        bump_market_revision(db, listing_changed=True)
         db.commit()
+        replicate_markets(db, [new_market.id])
         db.refresh(new_market)
+        # Drop any stale id other processes still hold for a re-created symbol
+        market_directory.invalidate(new_market.symbol)
+        market_directory.remember(new_market.symbol, new_market.id)
+        symbol_index.add(new_market.symbol, new_market.id, bumped_listing_revision(db))
         return new_market
 
 
+@router.post("/bulk", response_model=MarketBulkResponse)
+def bulk_upsert_markets(
+    payload: MarketBulkUpsert,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Create or update many markets with one upsert statement
+    If a symbol appears more than once, its last price wins
+    """
+    if len(payload.markets) > settings.MARKET_BULK_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MARKET_BULK_MAX} markets per request"
+        )
+
+    prices = {item.symbol: item.price for item in payload.markets}
+    rows, created = upsert_markets(db, prices)
+    db.commit()
+    replicate_market_rows(rows)
+
+    market_directory.invalidate_many(created)
+    revision = bumped_listing_revision(db)
+    for row in rows:
+        market_directory.remember(row.symbol, row.id)
+        symbol_index.add(row.symbol, row.id, revision)
+
+    return json_response(MarketBulkResponse, {
+        "created": len(created),
+        "updated": len(rows) - len(created),
+        "markets": rows
+    })
+
+
+@router.post("/ticks", response_model=TickIngestResponse)
+def ingest_market_ticks(
+    payload: TickIngest,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Record a batch of price ticks (e.g. from a feed or a replayed file) in one transaction
+    Every tick lands in price history; each market ends at the price of its latest tick
+    """
+    if len(payload.ticks) > settings.TICK_INGEST_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.TICK_INGEST_MAX} ticks per request"
+        )
+
+    now = datetime.utcnow()
+    ticks = [SymbolTick(tick.symbol, tick.price, tick.timestamp or now, tick.volume) for tick in payload.ticks]
+    rows, created = ingest_ticks(db, ticks)
+    db.commit()
+    replicate_market_rows(rows)
+
+    market_directory.invalidate_many(created)
+    revision = bumped_listing_revision(db)
+    for row in rows:
+        market_directory.remember(row.symbol, row.id)
+        symbol_index.add(row.symbol, row.id, revision)
+
+    return json_response(TickIngestResponse, {"ticks": len(ticks), "markets": len(rows), "created": len(created)})
+
+
 @router.get("/", response_model=List[MarketResponse])
 def get_all_markets(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Get all markets
+    Served from the versioned snapshot: 304 when If-None-Match names the current version
+    """
+    return market_snapshot.response(db, if_none_match)
+
+
+@router.get("/search", response_model=MarketSearchPage)
+def search_markets(
+    prefix: str = Query("", description="Symbol prefix, case-insensitive (e.g. SO matches SOL/USDT)"),
+    base: Optional[str] = Query(None, description="Base asset, e.g. BTC"),
+    quote: Optional[str] = Query(None, description="Quote asset, e.g. USDT for all */USDT pairs"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    """Get all markets"""
-    markets = db.query(Market).all()
-    print(markets)
-    return markets
+    """Search markets by symbol prefix and base/quote asset, paged in symbol order"""
+    symbol_index.refresh(db)
+    after = decode_cursor(cursor) if cursor else None
+    matches, next_symbol = symbol_index.search(prefix, base, quote, after, limit)
+
+    ids = [market_id for _, market_id in matches]
+    markets = {market.id: market for market in db.query(Market).filter(Market.id.in_(ids))} if ids else {}
+
+    return json_response(MarketSearchPage, {
+        "items": [markets[market_id] for market_id in ids if market_id in markets],
+        "next_cursor": encode_cursor(next_symbol) if next_symbol else None
+    })
 
 
 @router.get("/symbol", response_model=MarketResponse)
 def get_market_by_symbol(
     symbol: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get a specific market by symbol (use query parameter: ?symbol=BTC/USDT)"""
-    market = db.query(Market).filter(Market.symbol == symbol).first()
+    market = market_directory.get_market(db, symbol)
 
     if not market:
         raise HTTPException(
@@ -71,15 +200,33 @@ def get_market_by_symbol(
     return market
 
 
+@router.get("/prices", response_model=MarketPrices)
+def get_market_prices(
+    symbols: List[str] = Query(..., description="Symbols, repeated (?symbols=A&symbols=B) or comma-separated"),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Get current prices for many symbols with a single IN query"""
+    wanted = parse_symbols(symbols)
+
+    rows = db.query(Market.symbol, Market.current_price).filter(Market.symbol.in_(wanted)).all()
+    prices = {row.symbol: row.current_price for row in rows}
+
+    return json_response(MarketPrices, {
+        "prices": prices,
+        "missing": [symbol for symbol in wanted if symbol not in prices]
+    })
+
+
 @router.put("/", response_model=MarketResponse)
 def update_market_price(
     symbol: str,
     price_update: MarketUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Update market price (use query parameter: ?symbol=BTC/USDT)"""
-    market = db.query(Market).filter(Market.symbol == symbol).first()
+    market = market_directory.get_market(db, symbol)
 
     if not market:
         raise HTTPException(
@@ -87,8 +234,13 @@ def update_market_price(
             detail=f"Market {symbol} not found"
         )
 
+    now = datetime.utcnow()
     market.current_price = price_update.price
+    market.price_timestamp = now
+    record_ticks(db, [Tick(market_id=market.id, price=price_update.price, timestamp=now)])
+    bump_market_revision(db)
     db.commit()
+    replicate_markets(db, [market.id])
     db.refresh(market)
 
     return market
@@ -98,7 +250,7 @@ def update_market_price(
 def delete_market(
     market_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Delete a market by ID"""
     market = db.query(Market).filter(Market.id == market_id).first()
@@ -109,8 +261,23 @@ def delete_market(
             detail=f"Market with ID {market_id} not found"
         )
 
-    # Delete the market (cascade will handle related records)
-    db.delete(market)
+    # Holdings, alerts, orders and transactions live on the user shards, so they are cleared per shard
+    # rather than through the ORM cascade (before this session starts writing to the primary)
+    delete_market_rows(db, market.id)
+
+    # Price history has no ORM relationship (it can be huge), so clear it in bulk
+    db.query(PriceTick).filter(PriceTick.market_id == market.id).delete(synchronize_session=False)
+    db.query(Candle).filter(Candle.market_id == market.id).delete(synchronize_session=False)
+
+    symbol = market.symbol
+    db.query(Market).filter(Market.id == market.id).delete(synchronize_session=False)
+    bump_market_revision(db, listing_changed=True)
     db.commit()
+    replicate_markets(db, [market_id])
+    market_directory.invalidate(symbol)
+    symbol_index.remove(symbol, bumped_listing_revision(db))
+    indicator_cache.invalidate_market(market_id)
+    # Ticking processes elsewhere keep stale ladder entries, but their rows are gone so no fill claims them
+    order_books.drop_market(market_id)
 
-    return {"message": f"Market {market.symbol} deleted successfully"}
+    return {"message": f"Market {symbol} deleted successfully"}
@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+
+from app.database import get_db, shards
+from app.db_routing import get_read_db, session_router
+from app.models import User, Order
+from app.schemas.order import OrderCreate, OrderResponse
+from app.services.market_directory import market_directory
+from app.utils.auth import get_current_principal
+from app.utils.principal_cache import Principal
+from app.utils.responses import json_response
+
+router = APIRouter(prefix="/api/orders", tags=["Orders"])
+
+
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+def place_order(
+    order_data: OrderCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Place a resting limit or stop order, filled by the price tick once the market price crosses it
+    - Buy limit: fills when price <= limit price; buy stop: when price >= stop price
+    - Sell limit: fills when price >= limit price; sell stop: when price <= stop price
+    - Fills execute at the tick price; balance and holdings are checked at fill time
+    """
+
+    # Fills change the balance (primary) and holdings (user's shard) in one transaction
+    if shards.count > 1:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Resting orders do not support DATABASE_SHARD_URLS yet"
+        )
+
+    # Check if user exists
+    user = db.query(User).filter(User.id == order_data.user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    # Check if market exists
+    market_id = market_directory.resolve(db, order_data.symbol)
+    if market_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Market {order_data.symbol} not found"
+        )
+
+    # Create order
+    new_order = Order(
+        user_id=user.id,
+        market_id=market_id,
+        side=order_data.side,
+        type=order_data.type,
+        price=order_data.price,
+        quantity=order_data.quantity,
+        status="open"
+    )
+
+    db.add(new_order)
+    db.commit()
+    session_router.pin_user(user.id)
+    db.refresh(new_order)
+
+    return new_order
+
+
+@router.get("/user/{user_id}", response_model=List[OrderResponse])
+def get_user_orders(
+    user_id: int,
+    order_status: Optional[Literal["open", "filled", "rejected", "cancelled"]] = Query(None, alias="status"),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Get a user's orders, newest first (use query parameter: ?status=open)"""
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    query = db.query(Order).filter(Order.user_id == user_id)
+    if order_status:
+        query = query.filter(Order.status == order_status)
+
+    orders = query.order_by(Order.id.desc()).all()
+    return json_response(List[OrderResponse], orders)
+
+
+@router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_order(
+    order_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Cancel an open order"""
+
+    order = db.query(Order).filter(Order.id == order_id).first()
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+
+    # Conditional on status, so a fill claiming the order concurrently wins or loses cleanly
+    cancelled = db.query(Order).filter(Order.id == order_id, Order.status == "open").update(
+        {"status": "cancelled"}, synchronize_session=False
+    )
+    if not cancelled:
+        db.rollback()
+        db.refresh(order)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Order is already {order.status}"
+        )
+
+    owner_id = order.user_id
+    db.commit()
+    session_router.pin_user(owner_id)
+
+    return None
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from decimal import Decimal
 
-from app.database import get_db
+from app.db_routing import get_read_db
+from app.db_sharding import route_user
 from app.models import User, Holding
 from app.schemas.portfolio import PortfolioResponse, HoldingDetail
-from app.utils.auth import get_current_user
+from app.utils.auth import get_current_principal
+from app.utils.fixed_point import SCALE, from_units, mul, round_units, to_units
+from app.utils.principal_cache import Principal
+from app.utils.responses import json_response
 
 router = APIRouter(prefix="/api/users", tags=["Portfolio"])
 
@@ -13,8 +16,8 @@ router = APIRouter(prefix="/api/users", tags=["Portfolio"])
 @router.get("/{user_id}/portfolio", response_model=PortfolioResponse)
 def get_portfolio_summary(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Get portfolio summary for a user including:
@@ -31,36 +34,39 @@ def get_portfolio_summary(
             detail="User not found"
         )
 
+    route_user(db, user.id)
+
     # Get all holdings
     holdings = db.query(Holding).filter(Holding.user_id == user_id).all()
 
-    # Calculate holding details
+    # Calculate holding details in fixed-point units
     holding_details = []
-    total_holdings_value = Decimal("0")
+    total_holdings_value = 0  # at product scale, rounded once into the total
 
     for holding in holdings:
         # Get current market price
-        current_price = holding.market.current_price
+        current_price = to_units(holding.market.current_price)
+        avg_buy_price = to_units(holding.avg_buy_price)
+        quantity = to_units(holding.quantity)
 
         # Calculate unrealized P&L
         # P&L = (current_price - avg_buy_price) * quantity
-        unrealized_pnl = (current_price - holding.avg_buy_price) * holding.quantity
+        unrealized_pnl = mul(current_price - avg_buy_price, quantity)
 
         # Calculate value of this holding
-        holding_value = current_price * holding.quantity
-        total_holdings_value += holding_value
+        total_holdings_value += current_price * quantity
 
         holding_detail = HoldingDetail(
             symbol=holding.market.symbol,
             quantity=holding.quantity,
             avg_buy_price=holding.avg_buy_price,
-            current_price=current_price,
-            unrealized_pnl=unrealized_pnl
+            current_price=holding.market.current_price,
+            unrealized_pnl=from_units(unrealized_pnl)
         )
         holding_details.append(holding_detail)
 
     # Calculate total portfolio value (balance + holdings value)
-    total_value = user.balance + total_holdings_value
+    total_value = from_units(round_units(to_units(user.balance) * SCALE + total_holdings_value))
 
     portfolio = PortfolioResponse(
         balance=user.balance,
@@ -68,4 +74,4 @@ def get_portfolio_summary(
         total_value=total_value
     )
 
-    return portfolio
+    return json_response(PortfolioResponse, portfolio)
@@ -0,0 +1,164 @@
+import base64
+import binascii
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from typing import Literal, Optional, Tuple
+
+from app.database import shards
+from app.db_routing import get_read_db, session_router
+from app.db_sharding import route_user
+from app.models import User, Market, TransactionLog
+from app.schemas.transaction import TransactionPage
+from app.services.cold_storage import cold_store_for_shard
+from app.services.export import (
+    EXPORT_FORMATS,
+    TRANSACTION_FIELDS,
+    cold_transaction_chunks,
+    stream_export,
+    transaction_chunk_fetcher
+)
+from app.utils.auth import get_current_principal
+from app.utils.principal_cache import Principal
+
+router = APIRouter(prefix="/api/transactions", tags=["Transactions"])
+
+
+def encode_cursor(timestamp: datetime, transaction_id: int) -> str:
+    """Encode the (timestamp, id) position of the last row on a page"""
+    raw = f"{timestamp.isoformat()}|{transaction_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, transaction_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(transaction_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+@router.get("/user/{user_id}", response_model=TransactionPage)
+def get_user_transactions(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    symbol: Optional[str] = None,
+    type: Optional[Literal["buy", "sell"]] = None,
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Get a user's transaction history, newest first
+    - Keyset pagination on (timestamp, id): pass next_cursor back as ?cursor=
+    - Optional filters: ?symbol=BTC/USDT and ?type=buy|sell
+    """
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    route_user(db, user.id)
+
+    query = db.query(TransactionLog).filter(TransactionLog.user_id == user_id)
+    market_id = None
+
+    if symbol:
+        market = db.query(Market).filter(Market.symbol == symbol).first()
+        if not market:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Market {symbol} not found"
+            )
+        market_id = market.id
+        query = query.filter(TransactionLog.market_id == market.id)
+
+    if type:
+        query = query.filter(TransactionLog.type == type)
+
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        # Seek past the last row of the previous page instead of using OFFSET,
+        # so deep pages cost the same as the first one
+        cursor_timestamp, cursor_id = position
+        query = query.filter(or_(
+            TransactionLog.timestamp < cursor_timestamp,
+            and_(TransactionLog.timestamp == cursor_timestamp, TransactionLog.id < cursor_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(
+        TransactionLog.timestamp.desc(),
+        TransactionLog.id.desc()
+    ).limit(limit + 1).all()
+
+    # Older rows live in cold storage. Compaction moves whole months, so they normally all sort
+    # after the hot page - but a row too large for cold columns stays hot among them
+    store = cold_store_for_shard(shards.shard_for(user_id))
+    newest_cold = store.newest_timestamp() if len(rows) > limit else None
+    if len(rows) <= limit or (newest_cold is not None and newest_cold >= rows[-1].timestamp):
+        cold_rows = store.user_page(
+            user_id,
+            before=position,
+            limit=limit + 1,
+            market_id=market_id,
+            type=type
+        )
+        # A compaction that died before deleting its hot rows leaves them in both places
+        hot_ids = {row.id for row in rows}
+        rows = sorted(
+            rows + [row for row in cold_rows if row.id not in hot_ids],
+            key=lambda row: (row.timestamp, row.id),
+            reverse=True
+        )
+
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.timestamp, last.id)
+
+    return TransactionPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/user/{user_id}/export")
+def export_user_transactions(
+    user_id: int,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Stream a user's full transaction history as NDJSON or CSV (use query parameter: ?format=csv)"""
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    _, media_type = EXPORT_FORMATS[format]
+    store = cold_store_for_shard(shards.shard_for(user_id))
+    return StreamingResponse(
+        stream_export(
+            transaction_chunk_fetcher(user_id),
+            TRANSACTION_FIELDS,
+            format,
+            "transaction",
+            leading_chunks=cold_transaction_chunks(user_id, store),
+            session_factory=lambda: route_user(session_router.read_session(user_id), user_id),
+            store=store
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions_user_{user_id}.{format}"'}
+    )
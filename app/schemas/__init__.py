@@ -1,13 +1,22 @@
 from .user import UserCreate, UserResponse, UserLogin, Token
-from .market import MarketCreate, MarketUpdate, MarketResponse
+from .market import MarketCreate, MarketUpdate, MarketResponse, MarketBulkUpsert, MarketBulkResponse, MarketPrices, MarketSearchPage, TickIn, TickIngest, TickIngestResponse
 from .holding import HoldingResponse, TradeRequest
 from .alert import AlertCreate, AlertResponse
+from .order import OrderCreate, OrderResponse
 from .portfolio import PortfolioResponse, HoldingDetail
+from .transaction import TransactionResponse, TransactionPage
+from .candle import CandleResponse
+from .indicator import IndicatorResponse
 
 __all__ = [
     "UserCreate", "UserResponse", "UserLogin", "Token",
-    "MarketCreate", "MarketUpdate", "MarketResponse",
+    "MarketCreate", "MarketUpdate", "MarketResponse", "MarketBulkUpsert", "MarketBulkResponse", "MarketPrices",
+    "MarketSearchPage", "TickIn", "TickIngest", "TickIngestResponse",
     "HoldingResponse", "TradeRequest",
     "AlertCreate", "AlertResponse",
-    "PortfolioResponse", "HoldingDetail"
+    "OrderCreate", "OrderResponse",
+    "PortfolioResponse", "HoldingDetail",
+    "TransactionResponse", "TransactionPage",
+    "CandleResponse",
+    "IndicatorResponse"
 ]
@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from decimal import Decimal
 from datetime import datetime
 from typing import Optional, Literal
+from app.schemas.fields import Amount
 
 
 class AlertCreate(BaseModel):
@@ -17,7 +18,7 @@ class AlertResponse(BaseModel):
     id: int
     user_id: int
     market_id: int
-    target_price: Decimal
+    target_price: Amount
     direction: str
     triggered: bool
     created_at: datetime
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from datetime import datetime
+from app.schemas.fields import Amount
+
+
+class CandleResponse(BaseModel):
+    """Schema for an OHLCV candle"""
+    bucket_start: datetime
+    open: Amount
+    high: Amount
+    low: Amount
+    close: Amount
+    volume: Amount
+    tick_count: int
+
+    class Config:
+        from_attributes = True
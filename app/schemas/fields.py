@@ -0,0 +1,19 @@
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Annotated
+
+from pydantic import PlainSerializer
+
+from app.utils.fixed_point import QUANTUM
+
+# Every money/quantity column is DECIMAL(20, 8): 8 decimals, the scale of the fixed-point units
+AMOUNT_SCALE = QUANTUM
+
+
+def format_amount(value: Decimal) -> str:
+    """Fixed-point string with exactly 8 decimals, e.g. 1E-8 -> '0.00000001', never exponent form"""
+    text = format(value.quantize(AMOUNT_SCALE, ROUND_HALF_EVEN), "f")
+    return "0.00000000" if text == "-0.00000000" else text
+
+
+# Decimal that is serialized to JSON as a fixed-scale string (Python-mode dumps keep the Decimal)
+Amount = Annotated[Decimal, PlainSerializer(format_amount, return_type=str, when_used="json")]
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from decimal import Decimal
 from typing import Literal
+from app.schemas.fields import Amount
 
 
 class TradeRequest(BaseModel):
@@ -17,8 +18,8 @@ class HoldingResponse(BaseModel):
     id: int
     user_id: int
     market_id: int
-    quantity: Decimal
-    avg_buy_price: Decimal
+    quantity: Amount
+    avg_buy_price: Amount
 
     class Config:
         from_attributes = True
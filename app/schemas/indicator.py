@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class IndicatorResponse(BaseModel):
+    """Schema for a technical indicator value"""
+    symbol: str
+    indicator: str
+    window: int
+    value: Optional[float] = None  # None until enough ticks (or, for VWAP, volume) exist
+    as_of: Optional[datetime] = None  # timestamp of the latest tick included
@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field
 from decimal import Decimal
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
+from app.schemas.fields import Amount
 
 
 class MarketCreate(BaseModel):
@@ -19,9 +20,53 @@ class MarketResponse(BaseModel):
     """Schema for market response"""
     id: int
     symbol: str
-    current_price: Decimal
+    current_price: Amount
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+
+class MarketBulkUpsert(BaseModel):
+    """Schema for creating/updating many markets at once"""
+    markets: List[MarketCreate] = Field(..., min_length=1)
+
+
+class MarketBulkResponse(BaseModel):
+    """Schema for bulk upsert result"""
+    created: int
+    updated: int
+    markets: List[MarketResponse]
+
+
+class TickIn(BaseModel):
+    """Schema for one ingested price tick"""
+    symbol: str = Field(..., min_length=1, max_length=50)
+    price: Decimal = Field(..., gt=0)
+    timestamp: Optional[datetime] = None  # defaults to the time of ingest
+    volume: Decimal = Field(Decimal("0"), ge=0)
+
+
+class TickIngest(BaseModel):
+    """Schema for bulk tick ingest"""
+    ticks: List[TickIn] = Field(..., min_length=1)
+
+
+class TickIngestResponse(BaseModel):
+    """Schema for bulk tick ingest result"""
+    ticks: int  # ticks recorded
+    markets: int  # markets repriced or created
+    created: int  # markets created
+
+
+class MarketPrices(BaseModel):
+    """Schema for a multi-symbol price lookup"""
+    prices: Dict[str, Amount]  # symbol -> current price
+    missing: List[str]  # requested symbols with no market
+
+
+class MarketSearchPage(BaseModel):
+    """Schema for one page of market search results"""
+    items: List[MarketResponse]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to fetch the next page
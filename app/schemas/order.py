@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field
+from decimal import Decimal
+from datetime import datetime
+from typing import Optional, Literal
+from app.schemas.fields import Amount
+
+
+class OrderCreate(BaseModel):
+    """Schema for placing a resting limit or stop order"""
+    user_id: int = Field(..., gt=0)
+    symbol: str = Field(..., min_length=1, description="Market symbol like BTC/USDT")
+    side: Literal["buy", "sell"] = Field(..., description="Order side: buy or sell")
+    type: Literal["limit", "stop"] = Field(..., description="limit: fill at price or better; stop: fill once price is reached")
+    price: Decimal = Field(..., gt=0, description="Limit price or stop trigger price")
+    quantity: Decimal = Field(..., gt=0, description="Quantity to trade")
+
+
+class OrderResponse(BaseModel):
+    """Schema for order response"""
+    id: int
+    user_id: int
+    market_id: int
+    side: str
+    type: str
+    price: Amount
+    quantity: Amount
+    status: str
+    created_at: datetime
+    filled_price: Optional[Amount] = None
+    filled_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
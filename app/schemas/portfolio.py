@@ -1,15 +1,15 @@
 from pydantic import BaseModel
-from decimal import Decimal
 from typing import List
+from app.schemas.fields import Amount
 
 
 class HoldingDetail(BaseModel):
     """Schema for detailed holding information in portfolio"""
     symbol: str
-    quantity: Decimal
-    avg_buy_price: Decimal
-    current_price: Decimal
-    unrealized_pnl: Decimal  # Profit/Loss
+    quantity: Amount
+    avg_buy_price: Amount
+    current_price: Amount
+    unrealized_pnl: Amount  # Profit/Loss
 
     class Config:
         from_attributes = True
@@ -17,9 +17,9 @@ class HoldingDetail(BaseModel):
 
 class PortfolioResponse(BaseModel):
     """Schema for portfolio summary response"""
-    balance: Decimal
+    balance: Amount
     holdings: List[HoldingDetail]
-    total_value: Decimal  # balance + value of all holdings
+    total_value: Amount  # balance + value of all holdings
 
     class Config:
         from_attributes = True
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+from app.schemas.fields import Amount
+
+
+class TransactionResponse(BaseModel):
+    """Schema for a single transaction log entry"""
+    id: int
+    user_id: int
+    market_id: int
+    type: str
+    price: Amount
+    quantity: Amount
+    total_amount: Amount
+    timestamp: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class TransactionPage(BaseModel):
+    """Schema for one page of transaction history"""
+    items: List[TransactionResponse]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to fetch the next page
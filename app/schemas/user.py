@@ -38,3 +38,4 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     """Schema for token payload data"""
     user_id: Optional[int] = None
+    exp: Optional[int] = None  # expiry, seconds since epoch
@@ -0,0 +1,419 @@
+"""
+Columnar cold storage for old transactions
+
+A compaction job moves transactions older than COLD_STORAGE_MIN_AGE_DAYS out of the hot
+`transactions` table into per-month segments on disk. Each segment is a directory of NumPy
+column files (one .npy per column) sorted by (user_id, timestamp, id), plus a small meta.json:
+
+    <COLD_STORAGE_DIR>/transactions/2024-03/<first_id>-<last_id>/{id,user_id,...}.npy
+
+Reads memory-map the column files, so history pages, exports and analytics over old data are
+served straight from the page cache without touching the database.
+
+Amounts are int64 units of 1e-8, which hold up to about 9.2e10. DECIMAL(20, 8) allows more, so a
+row with a larger price, quantity or total stays in the hot table rather than failing the batch.
+"""
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.config import settings
+from app.database import shards
+from app.models import TransactionLog
+from app.services.tick_guard import tick_guard
+from app.utils.fixed_point import from_units, to_units  # DECIMAL(20, 8) columns are stored as int64 units of 1e-8
+
+EPOCH = datetime(1970, 1, 1)
+TYPE_CODES = {"buy": 0, "sell": 1}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+COMPACT_TICK = "compact_transactions"  # lease / metrics name of the scheduled compaction
+
+COLUMNS = {
+    "id": np.int64,
+    "user_id": np.int64,
+    "market_id": np.int64,
+    "type": np.int8,
+    "price": np.int64,
+    "quantity": np.int64,
+    "total_amount": np.int64,
+    "timestamp": np.int64,  # microseconds since epoch, UTC
+}
+
+DELETE_BATCH_SIZE = 500
+UNITS_MAX = int(np.iinfo(np.int64).max)  # largest amount a cold column holds, in units
+
+
+def to_micros(value: datetime) -> int:
+    """Convert a (naive UTC or aware) datetime to microseconds since epoch"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros: int) -> datetime:
+    """Convert microseconds since epoch to a naive UTC datetime"""
+    return EPOCH + timedelta(microseconds=int(micros))
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(value: datetime) -> datetime:
+    return (value.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+@dataclass
+class ColdTransaction:
+    """A transaction read back from cold storage, shaped like a TransactionLog row"""
+    id: int
+    user_id: int
+    market_id: int
+    type: str
+    price: Decimal
+    quantity: Decimal
+    total_amount: Decimal
+    timestamp: datetime
+
+
+class ColdSegment:
+    """One immutable, memory-mapped segment of compacted transactions"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.row_count: int = meta["row_count"]
+        self.min_id: int = meta["min_id"]
+        self.max_id: int = meta["max_id"]
+        self.min_timestamp: int = meta["min_timestamp"]
+        self.max_timestamp: int = meta["max_timestamp"]
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        """Memory-map a column on first use"""
+        if name not in self._columns:
+            self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return self._columns[name]
+
+    def user_bounds(self, user_id: int) -> Tuple[int, int]:
+        """Row range [start, end) belonging to a user (rows are sorted by user_id first)"""
+        user_ids = self.column("user_id")
+        start = int(np.searchsorted(user_ids, user_id, side="left"))
+        end = int(np.searchsorted(user_ids, user_id, side="right"))
+        return start, end
+
+    def rows(self, indexes: np.ndarray) -> List[ColdTransaction]:
+        """Materialize selected rows"""
+        ids = self.column("id")[indexes]
+        user_ids = self.column("user_id")[indexes]
+        market_ids = self.column("market_id")[indexes]
+        types = self.column("type")[indexes]
+        prices = self.column("price")[indexes]
+        quantities = self.column("quantity")[indexes]
+        totals = self.column("total_amount")[indexes]
+        timestamps = self.column("timestamp")[indexes]
+
+        return [
+            ColdTransaction(
+                id=int(ids[i]),
+                user_id=int(user_ids[i]),
+                market_id=int(market_ids[i]),
+                type=TYPE_NAMES[int(types[i])],
+                price=from_units(prices[i]),
+                quantity=from_units(quantities[i]),
+                total_amount=from_units(totals[i]),
+                timestamp=from_micros(timestamps[i])
+            )
+            for i in range(len(ids))
+        ]
+
+
+class ColdStore:
+    """Directory of cold transaction segments"""
+
+    def __init__(self, root: str):
+        self.root = os.path.join(root, "transactions")
+        self._segments: Dict[str, ColdSegment] = {}
+
+    def segments(self) -> List[ColdSegment]:
+        """All committed segments, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+
+        found = []
+        for month in sorted(os.listdir(self.root)):
+            month_dir = os.path.join(self.root, month)
+            if not os.path.isdir(month_dir):
+                continue
+            for name in os.listdir(month_dir):
+                if name.endswith(".tmp"):
+                    continue  # interrupted write
+                path = os.path.join(month_dir, name)
+                if path not in self._segments:
+                    self._segments[path] = ColdSegment(path)
+                found.append(self._segments[path])
+
+        return sorted(found, key=lambda segment: (segment.min_timestamp, segment.min_id))
+
+    def newest_timestamp(self) -> Optional[datetime]:
+        """Timestamp of the newest cold transaction, or None when nothing is cold yet"""
+        segments = self.segments()
+        if not segments:
+            return None
+        return from_micros(max(segment.max_timestamp for segment in segments))
+
+    def user_page(
+        self,
+        user_id: int,
+        before: Optional[Tuple[datetime, int]] = None,
+        limit: int = 50,
+        market_id: Optional[int] = None,
+        type: Optional[str] = None
+    ) -> List[ColdTransaction]:
+        """Newest-first page of a user's cold transactions strictly before the (timestamp, id) cursor"""
+        results: List[ColdTransaction] = []
+        before_ts, before_id = (to_micros(before[0]), before[1]) if before else (None, None)
+
+        for segment in reversed(self.segments()):
+            if len(results) >= limit:
+                break
+            if before_ts is not None and segment.min_timestamp > before_ts:
+                continue
+
+            start, end = segment.user_bounds(user_id)
+            if start == end:
+                continue
+
+            mask = np.ones(end - start, dtype=bool)
+            if before_ts is not None:
+                timestamps = segment.column("timestamp")[start:end]
+                ids = segment.column("id")[start:end]
+                mask &= (timestamps < before_ts) | ((timestamps == before_ts) & (ids < before_id))
+            if market_id is not None:
+                mask &= segment.column("market_id")[start:end] == market_id
+            if type is not None:
+                mask &= segment.column("type")[start:end] == TYPE_CODES[type]
+
+            # The user's slice is ascending, so the newest matches are at the end
+            indexes = np.flatnonzero(mask)[::-1][:limit - len(results)] + start
+            results.extend(segment.rows(indexes))
+
+        return results
+
+    def iter_user_rows(self, user_id: int, chunk_size: int = 1000) -> Iterator[List[ColdTransaction]]:
+        """Oldest-first chunks of every cold transaction for a user"""
+        for segment in self.segments():
+            start, end = segment.user_bounds(user_id)
+            for offset in range(start, end, chunk_size):
+                yield segment.rows(np.arange(offset, min(offset + chunk_size, end)))
+
+    def user_rows_after(self, user_id: int, after_id: int) -> List[ColdTransaction]:
+        """A user's cold transactions with id > after_id, in id order (holdings replay)"""
+        results: List[ColdTransaction] = []
+        for segment in self.segments():
+            if segment.max_id <= after_id:
+                continue
+            start, end = segment.user_bounds(user_id)
+            if start == end:
+                continue
+            indexes = np.flatnonzero(segment.column("id")[start:end] > after_id) + start
+            results.extend(segment.rows(indexes))
+        return sorted(results, key=lambda row: row.id)
+
+    def scan(self, columns: List[str], start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yield raw column arrays per segment for analytics, optionally limited to [start, end)
+        Prices and amounts are int64 units of 1e-8 and timestamps are epoch microseconds
+        """
+        start_ts = to_micros(start) if start else None
+        end_ts = to_micros(end) if end else None
+
+        for segment in self.segments():
+            if start_ts is not None and segment.max_timestamp < start_ts:
+                continue
+            if end_ts is not None and segment.min_timestamp >= end_ts:
+                continue
+
+            arrays = {name: segment.column(name) for name in columns}
+            if start_ts is not None or end_ts is not None:
+                timestamps = segment.column("timestamp")
+                mask = np.ones(segment.row_count, dtype=bool)
+                if start_ts is not None:
+                    mask &= timestamps >= start_ts
+                if end_ts is not None:
+                    mask &= timestamps < end_ts
+                arrays = {name: array[mask] for name, array in arrays.items()}
+            yield arrays
+
+    def contains_ids(self, month: str, ids: np.ndarray) -> np.ndarray:
+        """Mask of ids already present in a month's segments (used to recover from interrupted runs)"""
+        present = np.zeros(len(ids), dtype=bool)
+        month_dir = os.path.join(self.root, month)
+        for segment in self.segments():
+            if os.path.dirname(segment.path) == month_dir:
+                present |= np.isin(ids, segment.column("id"))
+        return present
+
+    def write_segment(self, month: str, columns: Dict[str, np.ndarray]) -> str:
+        """Write a sorted segment atomically (temp dir + rename) and return its path"""
+        order = np.lexsort((columns["id"], columns["timestamp"], columns["user_id"]))
+        columns = {name: array[order] for name, array in columns.items()}
+
+        ids = columns["id"]
+        name = f"{int(ids.min())}-{int(ids.max())}"
+        final_path = os.path.join(self.root, month, name)
+        tmp_path = final_path + ".tmp"
+
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+
+        for column, array in columns.items():
+            np.save(os.path.join(tmp_path, f"{column}.npy"), array)
+
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump({
+                "row_count": int(len(ids)),
+                "min_id": int(ids.min()),
+                "max_id": int(ids.max()),
+                "min_timestamp": int(columns["timestamp"].min()),
+                "max_timestamp": int(columns["timestamp"].max()),
+            }, f)
+
+        os.replace(tmp_path, final_path)
+        return final_path
+
+
+cold_store = ColdStore(settings.COLD_STORAGE_DIR)
+_shard_stores: Dict[int, ColdStore] = {}
+
+
+def cold_store_for_shard(shard_id: int) -> ColdStore:
+    """
+    Cold store for one database shard (see app/db_sharding.py)
+    Transaction ids are only unique per shard, so each extra shard compacts into its own
+    <COLD_STORAGE_DIR>/shard_<n>/ tree; shard 0 keeps the top-level layout.
+    """
+    if shard_id == 0:
+        return cold_store
+    if shard_id not in _shard_stores:
+        _shard_stores[shard_id] = ColdStore(os.path.join(settings.COLD_STORAGE_DIR, f"shard_{shard_id}"))
+    return _shard_stores[shard_id]
+
+
+def compact_transactions_before(db: Session, store: ColdStore, cutoff: datetime) -> int:
+    """
+    Move every transaction with timestamp < cutoff into cold segments, one month at a time
+    Returns the number of rows removed from the hot table
+    """
+    oldest = db.query(TransactionLog.timestamp).filter(
+        TransactionLog.timestamp < cutoff
+    ).order_by(TransactionLog.timestamp).first()
+
+    if not oldest:
+        return 0
+
+    moved = 0
+    window_start = _month_start(oldest[0].replace(tzinfo=None))
+
+    while window_start < cutoff:
+        window_end = min(_next_month(window_start), cutoff)
+        month = window_start.strftime("%Y-%m")
+
+        rows = db.query(
+            TransactionLog.id,
+            TransactionLog.user_id,
+            TransactionLog.market_id,
+            TransactionLog.type,
+            TransactionLog.price,
+            TransactionLog.quantity,
+            TransactionLog.total_amount,
+            TransactionLog.timestamp
+        ).filter(
+            TransactionLog.timestamp >= window_start,
+            TransactionLog.timestamp < window_end
+        ).all()
+
+        # Amounts beyond int64 units cannot be stored cold: those rows stay hot
+        units = [(to_units(row.price), to_units(row.quantity), to_units(row.total_amount)) for row in rows]
+        storable = [index for index, amounts in enumerate(units) if max(map(abs, amounts)) <= UNITS_MAX]
+        if len(storable) < len(rows):
+            print(f"⚠️  Kept {len(rows) - len(storable)} transactions from {month} hot: amounts above "
+                  f"{from_units(UNITS_MAX)} do not fit cold storage")
+        rows = [rows[index] for index in storable]
+        units = [units[index] for index in storable]
+
+        if rows:
+            columns = {
+                "id": np.fromiter((row.id for row in rows), dtype=COLUMNS["id"], count=len(rows)),
+                "user_id": np.fromiter((row.user_id for row in rows), dtype=COLUMNS["user_id"], count=len(rows)),
+                "market_id": np.fromiter((row.market_id for row in rows), dtype=COLUMNS["market_id"], count=len(rows)),
+                "type": np.fromiter((TYPE_CODES[row.type] for row in rows), dtype=COLUMNS["type"], count=len(rows)),
+                "price": np.fromiter((price for price, _, _ in units), dtype=COLUMNS["price"], count=len(rows)),
+                "quantity": np.fromiter((quantity for _, quantity, _ in units), dtype=COLUMNS["quantity"], count=len(rows)),
+                "total_amount": np.fromiter((total for _, _, total in units), dtype=COLUMNS["total_amount"], count=len(rows)),
+                "timestamp": np.fromiter((to_micros(row.timestamp) for row in rows), dtype=COLUMNS["timestamp"], count=len(rows)),
+            }
+
+            # Rows already in a segment were written by a run that died before deleting them
+            fresh = ~store.contains_ids(month, columns["id"])
+            if fresh.any():
+                store.write_segment(month, {name: array[fresh] for name, array in columns.items()})
+
+            # Segment is durable on disk before the hot rows go away
+            ids = [row.id for row in rows]
+            for offset in range(0, len(ids), DELETE_BATCH_SIZE):
+                db.query(TransactionLog).filter(
+                    TransactionLog.id.in_(ids[offset:offset + DELETE_BATCH_SIZE])
+                ).delete(synchronize_session=False)
+            db.commit()
+
+            moved += len(rows)
+            print(f"🧊 Compacted {len(rows)} transactions from {month} into cold storage")
+
+        window_start = _next_month(window_start)
+
+    return moved
+
+
+def compact_all_shards() -> int:
+    """Compact every shard in parallel into its own cold store; returns the number of rows moved"""
+    cutoff = datetime.utcnow() - timedelta(days=settings.COLD_STORAGE_MIN_AGE_DAYS)
+
+    def compact(db: Session) -> int:
+        # A failed shard's session is closed (rolled back) by fan_out
+        return compact_transactions_before(db, cold_store_for_shard(db.info["shard"]), cutoff)
+
+    return sum(shards.fan_out(compact))
+
+
+@celery_app.task(name="app.services.cold_storage.compact_transactions")
+def compact_transactions():
+    """
+    Celery task to move transactions older than COLD_STORAGE_MIN_AGE_DAYS into cold storage
+    Every shard is compacted in parallel into its own cold store
+    """
+    lease = tick_guard.begin(
+        COMPACT_TICK, settings.COLD_STORAGE_COMPACT_INTERVAL, ttl=settings.COLD_STORAGE_COMPACT_INTERVAL
+    )
+    if lease is None:
+        return
+
+    try:
+        moved = compact_all_shards()
+        print(f"✅ Cold storage compaction moved {moved} transactions at {datetime.now()}")
+
+    except Exception as e:
+        print(f"❌ Error compacting transactions: {str(e)}")
+    finally:
+        if tick_guard.end(lease):
+            compact_transactions.delay()
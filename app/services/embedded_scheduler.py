@@ -0,0 +1,188 @@
+"""
+Brokerless scheduler running the periodic ticks inside the API process
+
+With SCHEDULER=embedded, a small deployment does not need Redis, a Celery worker or beat. The
+API process runs each tick as an asyncio loop:
+- the price tick walks the markets, writes them through the bulk tick path, fills the resting
+  orders and evaluates the alerts against the prices it just wrote, instead of reading them back
+  on a separate alert tick;
+- the new prices are pushed straight to the WebSocket clients, replacing the once-a-second poll
+  of the markets table;
+- cold storage compaction runs every COLD_STORAGE_COMPACT_INTERVAL, holding checkpoints every
+  SNAPSHOT_INTERVAL.
+
+The blocking work (database I/O, the random walk, alert evaluation) runs in a single-thread
+executor per job, so the event loop keeps serving requests and a job never overlaps itself. Each
+run takes the same tick_guard lease as the Celery tasks, which keeps ticks single across several
+API processes sharing a Redis lease store. In this mode leases default to the in-process store and
+market directory pub/sub to off, so nothing needs Redis unless configured to. A run that overruns its interval is handled by
+TICK_OVERLAP_POLICY: skip drops the missed ticks (counted as skipped); coalesce runs one catch-up
+tick straight away. PRICE_UPDATE_PARTITIONS only applies to Celery deployments.
+"""
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, shards
+from app.services.cold_storage import COMPACT_TICK, compact_all_shards
+from app.services.holding_snapshots import SNAPSHOT_TICK, checkpoint_all
+from app.services.order_book import fill_crossed_orders
+from app.services.price_simulator import PRICE_TICK, trigger_alerts
+from app.services.price_sources import simulation_source, write_batch
+from app.services.tick_guard import tick_guard
+from app.utils.fixed_point import from_units, to_units
+from app.websockets.market_stream import broadcast_prices
+
+SCHEDULERS = ("celery", "embedded")
+
+
+def price_tick(session_factory: Callable[[], Session] = SessionLocal) -> Dict[str, Any]:
+    """
+    Walk and write every market one step, then fill the resting orders and trigger the alerts
+    their new prices cross. Returns market_id -> (symbol, price) for the walked markets and the
+    number of orders filled and alerts triggered
+    """
+    prices: Dict[int, Tuple[str, Decimal]] = {}
+    orders = {"filled": 0, "rejected": 0}
+    db = session_factory()
+    try:
+        for batch in simulation_source(log=True, session_factory=session_factory):
+            rows, created = write_batch(db, batch)
+            prices.update({row.id: (row.symbol, from_units(to_units(row.current_price))) for row in rows})
+        if prices:
+            orders = fill_crossed_orders(db, prices)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    triggered_count = sum(shards.fan_out(lambda shard_db: trigger_alerts(shard_db, prices))) if prices else 0
+    if triggered_count > 0:
+        print(f"✅ Triggered {triggered_count} alerts at {datetime.now()}")
+    return {"prices": prices, "orders_filled": orders["filled"], "alerts_triggered": triggered_count}
+
+
+async def publish_price_tick(result: Dict[str, Any]):
+    """Hand a price tick's prices to the WebSocket clients"""
+    await broadcast_prices(result["prices"])
+
+
+@dataclass
+class Job:
+    """A periodic tick: `run` is blocking and executes off the event loop; `on_result` is awaited on it"""
+    name: str
+    interval: float
+    run: Callable[[], Any]
+    on_result: Optional[Callable[[Any], Awaitable[None]]] = None
+    lease_ttl: Optional[float] = None
+    runs: int = 0
+    failures: int = 0
+    executor: Optional[ThreadPoolExecutor] = field(default=None, repr=False)
+
+
+class EmbeddedScheduler:
+    """Runs jobs as asyncio loops in the current event loop, each with its own one-thread executor"""
+
+    def __init__(self, jobs: List[Job]):
+        self.jobs = jobs
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self):
+        """Start every job's loop; call from within the running event loop"""
+        for job in self.jobs:
+            job.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"tick-{job.name}")
+            self._tasks.append(asyncio.create_task(self._loop(job)))
+            print(f"⏱️  Embedded scheduler: {job.name} every {job.interval}s")
+
+    async def stop(self):
+        """Cancel the job loops and wait for them; a tick already in its executor finishes in the background"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in self.jobs:
+            if job.executor is not None:
+                job.executor.shutdown(wait=False)
+
+    def _guarded_run(self, job: Job) -> Tuple[bool, Any, bool]:
+        """Executor side of one tick: (ran, result, catch_up_due)"""
+        lease = tick_guard.begin(job.name, job.interval, ttl=job.lease_ttl)
+        if lease is None:
+            return False, None, False
+        try:
+            result = job.run()
+        except Exception:
+            tick_guard.end(lease)
+            raise
+        return True, result, tick_guard.end(lease)
+
+    async def _loop(self, job: Job):
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+
+        while True:
+            catch_up = False
+            try:
+                ran, result, catch_up = await loop.run_in_executor(job.executor, self._guarded_run, job)
+                if ran:
+                    job.runs += 1
+                    if job.on_result is not None:
+                        await job.on_result(result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.failures += 1
+                print(f"❌ Error in embedded {job.name} tick: {str(e)}")
+
+            next_at += job.interval
+            now = loop.time()
+            if catch_up:
+                next_at = now
+            elif next_at < now:
+                # Overran: drop the ticks that fell due meanwhile, or run one catch-up tick now
+                missed = math.ceil((now - next_at) / job.interval)
+                if tick_guard.policy == "coalesce":
+                    tick_guard.store.record(job.name, counters={"coalesced": missed, "catch_ups": 1})
+                    next_at = now
+                else:
+                    tick_guard.store.record(job.name, counters={"skipped": missed})
+                    next_at += missed * job.interval
+            await asyncio.sleep(max(0.0, next_at - now))
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "jobs": {
+                job.name: {"interval": job.interval, "runs": job.runs, "failures": job.failures}
+                for job in self.jobs
+            }
+        }
+
+
+def build_scheduler() -> EmbeddedScheduler:
+    """The embedded equivalents of the Celery beat schedule"""
+    return EmbeddedScheduler([
+        Job(PRICE_TICK, settings.PRICE_UPDATE_INTERVAL, price_tick, on_result=publish_price_tick),
+        Job(
+            COMPACT_TICK,
+            settings.COLD_STORAGE_COMPACT_INTERVAL,
+            compact_all_shards,
+            lease_ttl=settings.COLD_STORAGE_COMPACT_INTERVAL
+        ),
+        Job(SNAPSHOT_TICK, settings.SNAPSHOT_INTERVAL, checkpoint_all, lease_ttl=settings.SNAPSHOT_INTERVAL),
+    ])
+
+
+embedded_scheduler = build_scheduler()
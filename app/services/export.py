@@ -0,0 +1,229 @@
+"""
+Streaming export pipeline for transactions and holdings
+
+Rows are fetched in keyset chunks (WHERE id > last_id ORDER BY id LIMIT n), each in its own
+short read transaction, then encoded chunk by chunk. Memory stays flat regardless of how many
+rows a user has, and SQLite writers are never blocked for the length of a download.
+Transactions already compacted into cold storage are streamed first, oldest to newest. A
+compaction that died before deleting its hot rows leaves them in both places, so hot rows at or
+below the highest cold id are skipped when cold storage holds them (rows too large for cold
+columns stay hot with lower ids, and are still exported).
+"""
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Market, Holding, TransactionLog
+from app.schemas.fields import format_amount
+from app.services.cold_storage import ColdStore, cold_store
+
+TRANSACTION_FIELDS = ["id", "symbol", "type", "price", "quantity", "total_amount", "timestamp"]
+HOLDING_FIELDS = ["id", "symbol", "quantity", "avg_buy_price"]
+
+# fetch_chunk(db, after_id, chunk_size) -> rows whose first column is the keyset id
+ChunkFetcher = Callable[[Session, int, int], Sequence[tuple]]
+
+
+def transaction_chunk_fetcher(user_id: int) -> ChunkFetcher:
+    """Build a chunk fetcher for a user's transactions, oldest first"""
+
+    def fetch(db: Session, after_id: int, chunk_size: int) -> Sequence[tuple]:
+        return db.query(
+            TransactionLog.id,
+            Market.symbol,
+            TransactionLog.type,
+            TransactionLog.price,
+            TransactionLog.quantity,
+            TransactionLog.total_amount,
+            TransactionLog.timestamp
+        ).join(Market, Market.id == TransactionLog.market_id).filter(
+            TransactionLog.user_id == user_id,
+            TransactionLog.id > after_id
+        ).order_by(TransactionLog.id).limit(chunk_size).all()
+
+    return fetch
+
+
+def holding_chunk_fetcher(user_id: int) -> ChunkFetcher:
+    """Build a chunk fetcher for a user's holdings"""
+
+    def fetch(db: Session, after_id: int, chunk_size: int) -> Sequence[tuple]:
+        return db.query(
+            Holding.id,
+            Market.symbol,
+            Holding.quantity,
+            Holding.avg_buy_price
+        ).join(Market, Market.id == Holding.market_id).filter(
+            Holding.user_id == user_id,
+            Holding.id > after_id
+        ).order_by(Holding.id).limit(chunk_size).all()
+
+    return fetch
+
+
+def cold_transaction_chunks(
+    user_id: int,
+    store: ColdStore = cold_store,
+    session_factory: Callable[[], Session] = SessionLocal
+) -> Iterator[Sequence[tuple]]:
+    """Chunks of a user's compacted transactions, in TRANSACTION_FIELDS order"""
+    symbols = None
+
+    for chunk in store.iter_user_rows(user_id, settings.EXPORT_CHUNK_SIZE):
+        if symbols is None:
+            db = session_factory()
+            try:
+                symbols = dict(db.query(Market.id, Market.symbol).all())
+            finally:
+                db.close()
+
+        yield [
+            (row.id, symbols.get(row.market_id), row.type, row.price, row.quantity, row.total_amount, row.timestamp)
+            for row in chunk
+        ]
+
+
+def iter_row_chunks(
+    fetch_chunk: ChunkFetcher,
+    chunk_size: int = None,
+    session_factory: Callable[[], Session] = SessionLocal
+) -> Iterator[Sequence[tuple]]:
+    """Yield row chunks until the fetcher runs dry, using a session owned by the generator"""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    db = session_factory()
+
+    try:
+        last_id = 0
+        while True:
+            rows = fetch_chunk(db, last_id, chunk_size)
+            # End the read transaction between chunks so writers are not held up by a slow client
+            db.rollback()
+
+            if not rows:
+                return
+
+            yield rows
+
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+    finally:
+        db.close()
+
+
+def drop_compacted(chunks: Iterable[Sequence[tuple]], store: ColdStore, high_water: int) -> Iterator[Sequence[tuple]]:
+    """Drop transaction rows (TRANSACTION_FIELDS order) at or below `high_water` that the cold store already holds"""
+    timestamp = TRANSACTION_FIELDS.index("timestamp")
+    for rows in chunks:
+        by_month = {}
+        for index, row in enumerate(rows):
+            if row[0] <= high_water:
+                by_month.setdefault(row[timestamp].strftime("%Y-%m"), []).append(index)
+
+        compacted = set()
+        for month, indexes in by_month.items():
+            present = store.contains_ids(month, np.array([rows[index][0] for index in indexes]))
+            compacted.update(index for index, found in zip(indexes, present) if found)
+
+        rows = [row for index, row in enumerate(rows) if index not in compacted]
+        if rows:
+            yield rows
+
+
+def _leading_then_hot(
+    leading_chunks: Iterable[Sequence[tuple]],
+    hot_chunks: Iterator[Sequence[tuple]],
+    store: Optional[ColdStore]
+) -> Iterator[Sequence[tuple]]:
+    high_water = 0
+    for rows in leading_chunks:
+        high_water = max(high_water, max(row[0] for row in rows))
+        yield rows
+
+    if store is not None and high_water:
+        hot_chunks = drop_compacted(hot_chunks, store, high_water)
+    yield from hot_chunks
+
+
+def _export_value(value):
+    """Convert a column value to a JSON/CSV friendly primitive"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return format_amount(value)
+    return value
+
+
+def encode_ndjson(chunks: Iterable[Sequence[tuple]], fields: List[str]) -> Iterator[bytes]:
+    """Encode row chunks as newline-delimited JSON, one bytes blob per chunk"""
+    for rows in chunks:
+        lines = [
+            json.dumps(dict(zip(fields, (_export_value(value) for value in row))))
+            for row in rows
+        ]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def encode_csv(chunks: Iterable[Sequence[tuple]], fields: List[str]) -> Iterator[bytes]:
+    """Encode row chunks as CSV with a header row, one bytes blob per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(fields)
+    yield buffer.getvalue().encode()
+
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_export_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode()
+
+
+def track_throughput(chunks: Iterable[Sequence[tuple]], label: str) -> Iterator[Sequence[tuple]]:
+    """Pass chunks through unchanged and report rows per second once the stream ends"""
+    started = time.perf_counter()
+    row_count = 0
+
+    try:
+        for rows in chunks:
+            row_count += len(rows)
+            yield rows
+    finally:
+        elapsed = time.perf_counter() - started
+        rate = row_count / elapsed if elapsed > 0 else 0.0
+        print(f"📤 Exported {row_count} {label} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+
+
+EXPORT_FORMATS = {
+    "ndjson": (encode_ndjson, "application/x-ndjson"),
+    "csv": (encode_csv, "text/csv"),
+}
+
+
+def stream_export(
+    fetch_chunk: ChunkFetcher,
+    fields: List[str],
+    format: str,
+    label: str,
+    leading_chunks: Iterable[Sequence[tuple]] = (),
+    session_factory: Callable[[], Session] = SessionLocal,
+    store: Optional[ColdStore] = None
+) -> Iterator[bytes]:
+    """
+    Full pipeline: (cold chunks, then hot chunked fetch) -> throughput meter -> encoder
+    Pass the cold store the leading chunks came from so rows found in both are exported once
+    """
+    encoder, _ = EXPORT_FORMATS[format]
+    hot_chunks = iter_row_chunks(fetch_chunk, session_factory=session_factory)
+    chunks = track_throughput(_leading_then_hot(leading_chunks, hot_chunks, store), label)
+    return encoder(chunks, fields)
@@ -0,0 +1,415 @@
+"""
+Holdings and balances rebuilt from the transaction log, with periodic checkpoints
+
+`transactions` is the ledger: every trade and order fill logs one row, and moves the balance by
+exactly its total_amount. `holdings` and `users.balance` are derived state. A checkpoint
+(`holding_snapshots`, on the user's shard) stores one user's holdings and balance as of
+transaction id `transaction_id`. A replay starts from the latest checkpoint and applies only the
+transactions after it: hot rows, plus any already compacted into cold storage.
+
+- checkpoint: folds each user's transactions since their last checkpoint into a new one, every
+  SNAPSHOT_INTERVAL (Celery beat or the embedded scheduler). Checkpoints come from the log only,
+  never from the live rows, so drift in `holdings` cannot leak into them. Transactions do not
+  record the opening balance, so a user's first checkpoint takes its balance from `users.balance`
+  (less the transactions it does not fold in yet, read from the same state of the database):
+  balances are verified from the first checkpoint on, holdings from the start of the log.
+- verify: replays every user (or the given ones) and reports drift from the live rows.
+- rebuild: verify, then overwrite the drifted live rows with the replayed state.
+
+Users are split into batches of SNAPSHOT_BATCH_USERS replayed by SNAPSHOT_WORKERS threads, each
+with its own sessions. Ids are assigned at insert, so a transaction can commit after a higher
+id; checkpoints stop before the first transaction younger than SNAPSHOT_SETTLE_SECONDS, so none
+can land below a checkpoint's watermark afterwards.
+
+    python -m app.services.holding_snapshots checkpoint
+    python -m app.services.holding_snapshots verify [--user 7 --user 9]
+    python -m app.services.holding_snapshots rebuild [--user 7]
+"""
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, bindparam, func, select
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.config import settings
+from app.database import shards
+from app.models import Holding, HoldingSnapshot, Market, TransactionLog, User
+from app.services.cold_storage import cold_store_for_shard
+from app.services.order_book import chunked
+from app.services.tick_guard import tick_guard
+from app.utils.fixed_point import divide, from_units, to_units
+
+SNAPSHOT_TICK = "checkpoint_holdings"  # lease / metrics name of the scheduled checkpoint run
+MODES = ("checkpoint", "verify", "rebuild")
+
+
+@dataclass
+class Ledger:
+    """
+    A user's state replayed from the log, in fixed-point units
+    positions maps market_id -> (quantity, avg_buy_price); balance is None until the first checkpoint
+    """
+    transaction_id: int = 0
+    balance: Optional[int] = None
+    positions: Dict[int, Tuple[int, int]] = field(default_factory=dict)
+    replayed: int = 0
+
+    @classmethod
+    def from_snapshot(cls, snapshot: HoldingSnapshot) -> "Ledger":
+        positions = {
+            int(market_id): (to_units(Decimal(quantity)), to_units(Decimal(avg_buy_price)))
+            for market_id, (quantity, avg_buy_price) in json.loads(snapshot.holdings).items()
+        }
+        return cls(snapshot.transaction_id, to_units(snapshot.balance), positions)
+
+    def apply(self, transaction_id: int, type: str, market_id: int, price: int, quantity: int, total_amount: int):
+        """One logged buy or sell, with the same math as execute_trade and the order fills"""
+        held, avg_buy_price = self.positions.get(market_id, (0, 0))
+        if type == "buy":
+            if self.balance is not None:
+                self.balance -= total_amount
+            self.positions[market_id] = (held + quantity, divide(avg_buy_price * held + price * quantity, held + quantity))
+        else:
+            if self.balance is not None:
+                self.balance += total_amount
+            if held == quantity:
+                self.positions.pop(market_id, None)
+            else:
+                self.positions[market_id] = (held - quantity, avg_buy_price)
+        self.transaction_id = transaction_id
+        self.replayed += 1
+
+    def holdings_json(self) -> str:
+        return json.dumps({
+            str(market_id): [str(from_units(quantity)), str(from_units(avg_buy_price))]
+            for market_id, (quantity, avg_buy_price) in sorted(self.positions.items())
+        })
+
+
+@dataclass
+class Drift:
+    """A live value that differs from the replayed one; None means the row is missing on that side"""
+    user_id: int
+    market_id: Optional[int]
+    field: str
+    expected: Optional[Decimal]
+    actual: Optional[Decimal]
+
+
+def latest_snapshots(db: Session, user_ids: Sequence[int]) -> Dict[int, HoldingSnapshot]:
+    latest = db.query(func.max(HoldingSnapshot.id)).filter(
+        HoldingSnapshot.user_id.in_(user_ids)
+    ).group_by(HoldingSnapshot.user_id).scalar_subquery()
+    return {snapshot.user_id: snapshot for snapshot in db.query(HoldingSnapshot).filter(HoldingSnapshot.id.in_(latest))}
+
+
+def drop_market_positions(db: Session, market_id: int):
+    """Remove a deleted market's position from every checkpoint on this shard (does not commit)"""
+    key = str(market_id)
+    for snapshot in db.query(HoldingSnapshot).filter(HoldingSnapshot.holdings.like(f'%"{key}"%')):
+        holdings = json.loads(snapshot.holdings)
+        if holdings.pop(key, None) is not None:
+            snapshot.holdings = json.dumps(holdings)
+    db.flush()
+
+
+def replay(db: Session, store, user_ids: Sequence[int], until: Optional[int] = None) -> Dict[int, Ledger]:
+    """
+    Every user's state from their latest checkpoint plus the transactions after it (up to id `until`)
+    Hot rows are read first: a row compacted meanwhile is then found in cold storage, and a row
+    found in both is applied once. Deleting a market deletes its hot rows, so its positions and
+    cold rows are skipped too (every shard holds a copy of the markets table)
+    """
+    markets = {market_id for (market_id,) in db.query(Market.id)}
+    ledgers = {user_id: Ledger() for user_id in user_ids}
+    ledgers.update({user_id: Ledger.from_snapshot(snapshot) for user_id, snapshot in latest_snapshots(db, user_ids).items()})
+    for ledger in ledgers.values():
+        ledger.positions = {market_id: position for market_id, position in ledger.positions.items() if market_id in markets}
+
+    # One range scan of the user_id index per user, from that user's own checkpoint
+    query = select(
+        TransactionLog.id, TransactionLog.type, TransactionLog.market_id,
+        TransactionLog.price, TransactionLog.quantity, TransactionLog.total_amount
+    ).where(TransactionLog.user_id == bindparam("user_id"), TransactionLog.id > bindparam("after"))
+    if until is not None:
+        query = query.where(TransactionLog.id <= until)
+
+    events: Dict[int, Dict[int, tuple]] = {}
+    for user_id, ledger in ledgers.items():
+        events[user_id] = {
+            row.id: (row.type, row.market_id, to_units(row.price), to_units(row.quantity), to_units(row.total_amount))
+            for row in db.execute(query, {"user_id": user_id, "after": ledger.transaction_id})
+        }
+
+    for user_id, ledger in ledgers.items():
+        for row in store.user_rows_after(user_id, ledger.transaction_id):
+            if (until is None or row.id <= until) and row.id not in events[user_id] and row.market_id in markets:
+                events[user_id][row.id] = (row.type, row.market_id, to_units(row.price),
+                                           to_units(row.quantity), to_units(row.total_amount))
+        for transaction_id in sorted(events[user_id]):
+            ledger.apply(transaction_id, *events[user_id][transaction_id])
+
+    return ledgers
+
+
+def settled_watermark(db: Session) -> int:
+    """
+    Highest transaction id a checkpoint may fold in: just below the first unsettled transaction,
+    or the newest one when all are settled, so a trade committing during the run is never folded in
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.SNAPSHOT_SETTLE_SECONDS)
+    first_unsettled = db.query(func.min(TransactionLog.id)).filter(TransactionLog.timestamp >= cutoff).scalar()
+    if first_unsettled is None:
+        return db.query(func.max(TransactionLog.id)).scalar() or 0
+    return first_unsettled - 1
+
+
+def opening_balances(db: Session, primary: Session, user_ids: Sequence[int], until: int) -> Dict[int, int]:
+    """
+    Live balance (units) of users without a checkpoint, less the transactions after `until` it already includes
+    The balance and those transactions must come from one state of the database: a trade committing
+    between two separate reads would leave a checkpoint that is off by its total for good
+    """
+    balances = dict.fromkeys(user_ids, 0)
+    for chunk in chunked(list(user_ids)):
+        if primary is db:
+            # One statement, so one snapshot: each balance joined to the transactions it includes
+            rows = db.query(User.id, User.balance, TransactionLog.type, TransactionLog.total_amount).outerjoin(
+                TransactionLog, and_(TransactionLog.user_id == User.id, TransactionLog.id > until)
+            ).filter(User.id.in_(chunk))
+            flows = []
+            for user_id, balance, type, total_amount in rows:
+                balances[user_id] = to_units(balance)
+                if type is not None:
+                    flows.append((user_id, type, total_amount))
+        else:
+            # Balances live on the primary: their rows stay locked, so no trade can move them, until the shard's log was read
+            balances.update({
+                user_id: to_units(balance)
+                for user_id, balance in primary.query(User.id, User.balance).filter(User.id.in_(chunk)).with_for_update()
+            })
+            flows = db.query(TransactionLog.user_id, TransactionLog.type, TransactionLog.total_amount).filter(
+                TransactionLog.user_id.in_(chunk), TransactionLog.id > until
+            ).all()
+            primary.rollback()
+
+        for user_id, type, total_amount in flows:
+            balances[user_id] -= to_units(total_amount) if type == "sell" else -to_units(total_amount)
+    return balances
+
+
+def write_checkpoints(db: Session, ledgers: Dict[int, Ledger], snapshots: Dict[int, HoldingSnapshot]) -> int:
+    """Add a checkpoint for each user that has none yet or replayed transactions past it; prune old ones"""
+    written = 0
+    for user_id, ledger in ledgers.items():
+        if user_id in snapshots and not ledger.replayed:
+            continue
+        db.add(HoldingSnapshot(
+            user_id=user_id,
+            transaction_id=ledger.transaction_id,
+            balance=from_units(ledger.balance),
+            holdings=ledger.holdings_json()
+        ))
+        written += 1
+    db.flush()
+
+    # Newest first per user, so everything past the first SNAPSHOT_KEEP goes
+    stale, kept = [], {}
+    for snapshot_id, user_id in db.query(HoldingSnapshot.id, HoldingSnapshot.user_id).filter(
+        HoldingSnapshot.user_id.in_(list(ledgers))
+    ).order_by(HoldingSnapshot.user_id, HoldingSnapshot.id.desc()):
+        kept[user_id] = kept.get(user_id, 0) + 1
+        if kept[user_id] > settings.SNAPSHOT_KEEP:
+            stale.append(snapshot_id)
+    if stale:
+        db.query(HoldingSnapshot).filter(HoldingSnapshot.id.in_(stale)).delete(synchronize_session=False)
+    return written
+
+
+def find_drift(ledgers: Dict[int, Ledger], holdings: Iterable, balances: Dict[int, Decimal]) -> List[Drift]:
+    """Compare replayed ledgers with the live holdings rows (user_id, market_id, quantity, avg_buy_price) and balances"""
+    drift = []
+    live: Dict[int, Dict[int, tuple]] = {}
+    for holding in holdings:
+        live.setdefault(holding.user_id, {})[holding.market_id] = holding
+
+    for user_id, ledger in ledgers.items():
+        actual = balances.get(user_id)
+        if ledger.balance is not None and (actual is None or to_units(actual) != ledger.balance):
+            drift.append(Drift(user_id, None, "balance", from_units(ledger.balance), actual))
+
+        rows = live.get(user_id, {})
+        for market_id in sorted(set(rows) | set(ledger.positions)):
+            holding = rows.get(market_id)
+            quantity, avg_buy_price = ledger.positions.get(market_id, (None, None))
+            if holding is None or quantity is None:
+                drift.append(Drift(
+                    user_id, market_id, "quantity",
+                    None if quantity is None else from_units(quantity),
+                    None if holding is None else holding.quantity
+                ))
+                continue
+            if to_units(holding.quantity) != quantity:
+                drift.append(Drift(user_id, market_id, "quantity", from_units(quantity), holding.quantity))
+            if to_units(holding.avg_buy_price) != avg_buy_price:
+                drift.append(Drift(user_id, market_id, "avg_buy_price", from_units(avg_buy_price), holding.avg_buy_price))
+
+    return drift
+
+
+def repair(db: Session, primary: Session, ledgers: Dict[int, Ledger], drift: List[Drift]):
+    """Overwrite the drifted live rows with the replayed state (does not commit)"""
+    for user_id in sorted({item.user_id for item in drift}):
+        ledger = ledgers[user_id]
+        if ledger.balance is not None:
+            primary.query(User).filter(User.id == user_id).update(
+                {User.balance: from_units(ledger.balance)}, synchronize_session=False
+            )
+        rows = {holding.market_id: holding for holding in db.query(Holding).filter(Holding.user_id == user_id)}
+        for market_id, holding in rows.items():
+            if market_id not in ledger.positions:
+                db.delete(holding)
+        for market_id, (quantity, avg_buy_price) in ledger.positions.items():
+            holding = rows.get(market_id)
+            if holding is None:
+                db.add(Holding(user_id=user_id, market_id=market_id,
+                               quantity=from_units(quantity), avg_buy_price=from_units(avg_buy_price)))
+            else:
+                holding.quantity = from_units(quantity)
+                holding.avg_buy_price = from_units(avg_buy_price)
+
+
+def run_batch(mode: str, shard_id: int, user_ids: Sequence[int], until: Optional[int]) -> dict:
+    """Replay one batch of a shard's users in its own sessions and checkpoint, verify or rebuild them"""
+    db = Session(bind=shards.engines[shard_id], autoflush=False)
+    primary = db if shard_id == 0 else Session(bind=shards.engines[0], autoflush=False)
+    try:
+        store = cold_store_for_shard(shard_id)
+        ledgers = replay(db, store, user_ids, until if mode == "checkpoint" else None)
+        replayed = sum(ledger.replayed for ledger in ledgers.values())
+
+        if mode == "checkpoint":
+            # Users without a checkpoint have no opening balance yet: the first checkpoint reads it
+            opening = [user_id for user_id, ledger in ledgers.items() if ledger.balance is None]
+            for user_id, balance in opening_balances(db, primary, opening, until).items():
+                ledgers[user_id].balance = balance
+            written = write_checkpoints(db, ledgers, latest_snapshots(db, user_ids))
+            db.commit()
+            return {"users": len(user_ids), "replayed": replayed, "checkpoints": written, "drift": []}
+
+        balances = {}
+        for chunk in chunked(list(user_ids)):
+            balances.update(primary.query(User.id, User.balance).filter(User.id.in_(chunk)).all())
+        holdings = db.query(Holding.user_id, Holding.market_id, Holding.quantity, Holding.avg_buy_price).filter(
+            Holding.user_id.in_(user_ids)
+        ).all()
+        drift = find_drift(ledgers, holdings, balances)
+        if mode == "rebuild" and drift:
+            repair(db, primary, ledgers, drift)
+            db.commit()
+            if primary is not db:
+                primary.commit()
+        return {"users": len(user_ids), "replayed": replayed, "checkpoints": 0, "drift": drift}
+    except Exception:
+        db.rollback()
+        if primary is not db:
+            primary.rollback()
+        raise
+    finally:
+        db.close()
+        if primary is not db:
+            primary.close()
+
+
+def run(mode: str, user_ids: Optional[Iterable[int]] = None, workers: Optional[int] = None) -> dict:
+    """
+    Checkpoint, verify or rebuild every user (or user_ids), in parallel batches across all shards
+    Returns counts and, for verify/rebuild, the drift found (rebuild has already repaired it)
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+
+    if user_ids is None:
+        primary = Session(bind=shards.engines[0])
+        try:
+            user_ids = [user_id for (user_id,) in primary.query(User.id).order_by(User.id)]
+        finally:
+            primary.close()
+
+    by_shard: Dict[int, List[int]] = {}
+    for user_id in sorted(set(user_ids)):
+        by_shard.setdefault(shards.shard_for(user_id), []).append(user_id)
+
+    watermarks = {}
+    if mode == "checkpoint":
+        watermarks = dict(zip(by_shard, shards.fan_out(settled_watermark, shard_ids=list(by_shard))))
+
+    batches = [
+        (shard_id, batch)
+        for shard_id, ids in by_shard.items()
+        for batch in chunked(ids, settings.SNAPSHOT_BATCH_USERS)
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, workers or settings.SNAPSHOT_WORKERS)) as pool:
+        results = list(pool.map(
+            lambda batch: run_batch(mode, batch[0], batch[1], watermarks.get(batch[0])), batches
+        ))
+
+    return {
+        "mode": mode,
+        "users": sum(result["users"] for result in results),
+        "replayed": sum(result["replayed"] for result in results),
+        "checkpoints": sum(result["checkpoints"] for result in results),
+        "drift": [item for result in results for item in result["drift"]],
+    }
+
+
+def checkpoint_all() -> int:
+    """Checkpoint every user; returns the number of checkpoints written"""
+    return run("checkpoint")["checkpoints"]
+
+
+@celery_app.task(name="app.services.holding_snapshots.checkpoint_holdings")
+def checkpoint_holdings():
+    """Celery task to checkpoint every user's holdings and balance"""
+    lease = tick_guard.begin(SNAPSHOT_TICK, settings.SNAPSHOT_INTERVAL, ttl=settings.SNAPSHOT_INTERVAL)
+    if lease is None:
+        return
+
+    try:
+        written = checkpoint_all()
+        print(f"✅ Wrote {written} holding checkpoints at {datetime.now()}")
+
+    except Exception as e:
+        print(f"❌ Error checkpointing holdings: {str(e)}")
+    finally:
+        if tick_guard.end(lease):
+            checkpoint_holdings.delay()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Checkpoint holdings, or verify / rebuild them from the transaction log")
+    parser.add_argument("mode", choices=MODES)
+    parser.add_argument("--user", type=int, action="append", dest="users", help="limit to this user id (repeatable)")
+    parser.add_argument("--workers", type=int, default=None, help="parallel batches (default SNAPSHOT_WORKERS)")
+    args = parser.parse_args(argv)
+
+    report = run(args.mode, args.users, args.workers)
+    print(f"📒 {report['mode']}: {report['users']} users, {report['replayed']} transactions replayed, "
+          f"{report['checkpoints']} checkpoints written")
+    for item in report["drift"]:
+        print(json.dumps(asdict(item), default=str))
+    if args.mode != "checkpoint":
+        verb = "repaired" if args.mode == "rebuild" else "found"
+        print(f"{'⚠️ ' if report['drift'] else '✅'} {len(report['drift'])} drifted values {verb}")
+    # verify exits non-zero on drift, so it can gate a deploy or a cron alert
+    return 1 if args.mode == "verify" and report["drift"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
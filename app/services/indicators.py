@@ -0,0 +1,283 @@
+"""
+Technical indicators (SMA, EMA, RSI, VWAP) maintained incrementally per market
+
+Each indicator keeps just enough state to absorb a new tick in O(1). When an indicator is
+first requested, its state is backfilled from the stored price series with vectorized NumPy;
+after that, each request only folds in the ticks recorded since the previous one, found by id.
+A tick whose timestamp is older than the state (a late ingest or a replay) triggers a fresh
+backfill instead. States are cached per (market, indicator, window) in a bounded LRU.
+"""
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import PriceTick
+
+
+def _decay_weights(count: int, alpha: float) -> np.ndarray:
+    """Weights (1 - alpha)^(count-1) ... (1 - alpha)^0 for a closed-form exponential average"""
+    return np.power(1.0 - alpha, np.arange(count - 1, -1, -1, dtype=np.float64))
+
+
+def _exponential_average(seed: float, values: np.ndarray, alpha: float) -> float:
+    """Result of applying avg = avg + alpha * (x - avg) over values, starting from seed"""
+    if len(values) == 0:
+        return seed
+    decay = (1.0 - alpha) ** len(values)
+    return decay * seed + alpha * float(np.dot(_decay_weights(len(values), alpha), values))
+
+
+class SMA:
+    """Simple moving average over the last `window` prices"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.prices = deque(maxlen=window)
+        self.total = 0.0
+
+    def update(self, price: float, volume: float = 0.0):
+        if len(self.prices) == self.window:
+            self.total -= self.prices[0]
+        self.prices.append(price)
+        self.total += price
+
+    def backfill(self, prices: np.ndarray, volumes: np.ndarray):
+        tail = prices[-self.window:]
+        self.prices = deque(tail.tolist(), maxlen=self.window)
+        self.total = float(tail.sum())
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self.prices) < self.window:
+            return None
+        return self.total / self.window
+
+
+class EMA:
+    """Exponential moving average, seeded with the SMA of the first `window` prices"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.alpha = 2.0 / (window + 1)
+        self.seed_total = 0.0
+        self.count = 0
+        self.ema: Optional[float] = None
+
+    def update(self, price: float, volume: float = 0.0):
+        self.count += 1
+        if self.ema is not None:
+            self.ema += self.alpha * (price - self.ema)
+            return
+        self.seed_total += price
+        if self.count == self.window:
+            self.ema = self.seed_total / self.window
+
+    def backfill(self, prices: np.ndarray, volumes: np.ndarray):
+        self.count = len(prices)
+        if len(prices) < self.window:
+            self.seed_total = float(prices.sum())
+            return
+        seed = float(prices[:self.window].mean())
+        self.ema = _exponential_average(seed, prices[self.window:], self.alpha)
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.ema
+
+
+class RSI:
+    """Relative strength index with Wilder smoothing"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.last_price: Optional[float] = None
+        self.changes = 0
+        self.gain_total = 0.0
+        self.loss_total = 0.0
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+
+    def update(self, price: float, volume: float = 0.0):
+        if self.last_price is None:
+            self.last_price = price
+            return
+
+        change = price - self.last_price
+        self.last_price = price
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self.changes += 1
+
+        if self.avg_gain is not None:
+            self.avg_gain += (gain - self.avg_gain) / self.window
+            self.avg_loss += (loss - self.avg_loss) / self.window
+            return
+
+        self.gain_total += gain
+        self.loss_total += loss
+        if self.changes == self.window:
+            self.avg_gain = self.gain_total / self.window
+            self.avg_loss = self.loss_total / self.window
+
+    def backfill(self, prices: np.ndarray, volumes: np.ndarray):
+        if len(prices) == 0:
+            return
+        self.last_price = float(prices[-1])
+        changes = np.diff(prices)
+        gains, losses = np.clip(changes, 0, None), np.clip(-changes, 0, None)
+        self.changes = len(changes)
+
+        if len(changes) < self.window:
+            self.gain_total = float(gains.sum())
+            self.loss_total = float(losses.sum())
+            return
+
+        alpha = 1.0 / self.window
+        self.avg_gain = _exponential_average(float(gains[:self.window].mean()), gains[self.window:], alpha)
+        self.avg_loss = _exponential_average(float(losses[:self.window].mean()), losses[self.window:], alpha)
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.avg_gain is None:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+
+class VWAP:
+    """Volume-weighted average price over the last `window` ticks"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.entries = deque(maxlen=window)  # (price * volume, volume)
+        self.pv_total = 0.0
+        self.volume_total = 0.0
+
+    def update(self, price: float, volume: float = 0.0):
+        if len(self.entries) == self.window:
+            old_pv, old_volume = self.entries[0]
+            self.pv_total -= old_pv
+            self.volume_total -= old_volume
+        self.entries.append((price * volume, volume))
+        self.pv_total += price * volume
+        self.volume_total += volume
+
+    def backfill(self, prices: np.ndarray, volumes: np.ndarray):
+        pv = prices[-self.window:] * volumes[-self.window:]
+        tail_volumes = volumes[-self.window:]
+        self.entries = deque(zip(pv.tolist(), tail_volumes.tolist()), maxlen=self.window)
+        self.pv_total = float(pv.sum())
+        self.volume_total = float(tail_volumes.sum())
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.volume_total <= 0:
+            return None  # source did not report volume
+        return self.pv_total / self.volume_total
+
+
+INDICATORS = {
+    "sma": SMA,
+    "ema": EMA,
+    "rsi": RSI,
+    "vwap": VWAP,
+}
+
+
+class _Entry:
+    """Cached indicator state plus the position of the last tick folded into it"""
+
+    def __init__(self, indicator):
+        self.indicator = indicator
+        self.ready = False  # backfilled; until then whoever holds `lock` backfills and the rest wait
+        self.last_tick_id = 0
+        self.last_timestamp: Optional[datetime] = None
+        self.lock = threading.Lock()
+
+
+class IndicatorCache:
+    """Bounded LRU of indicator states keyed by (market_id, indicator, window)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, str, int], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, key: Tuple[int, str, int]) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(INDICATORS[key[1]](key[2]))
+                self._entries[key] = entry
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+            return entry
+
+    def invalidate_market(self, market_id: int):
+        """Drop every cached state for a market (e.g. when it is deleted)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == market_id]:
+                del self._entries[key]
+
+    def get(self, db: Session, market_id: int, name: str, window: int) -> Tuple[Optional[float], Optional[datetime]]:
+        """Current indicator value and the timestamp of the last tick it includes"""
+        entry = self._entry((market_id, name, window))
+
+        with entry.lock:
+            if not entry.ready:
+                self._backfill(db, market_id, entry)
+                entry.ready = True
+            else:
+                self._catch_up(db, market_id, entry)
+            return entry.indicator.value, entry.last_timestamp
+
+    def _backfill(self, db: Session, market_id: int, entry: _Entry):
+        """Seed state from the most recent stored ticks with vectorized math"""
+        entry.indicator = type(entry.indicator)(entry.indicator.window)
+        entry.last_timestamp = None
+
+        # Every tick up to the market's newest id counts as seen, including late ones outside the window
+        watermark = db.query(func.max(PriceTick.id)).filter(PriceTick.market_id == market_id).scalar() or 0
+        rows = db.query(PriceTick.price, PriceTick.volume, PriceTick.timestamp).filter(
+            PriceTick.market_id == market_id,
+            PriceTick.id <= watermark
+        ).order_by(PriceTick.timestamp.desc(), PriceTick.id.desc()).limit(settings.INDICATOR_BACKFILL_TICKS).all()
+        entry.last_tick_id = watermark
+
+        if not rows:
+            return
+
+        rows.reverse()
+        prices = np.fromiter((float(row.price) for row in rows), dtype=np.float64, count=len(rows))
+        volumes = np.fromiter((float(row.volume or 0) for row in rows), dtype=np.float64, count=len(rows))
+        entry.indicator.backfill(prices, volumes)
+        entry.last_timestamp = rows[-1].timestamp
+
+    def _catch_up(self, db: Session, market_id: int, entry: _Entry):
+        """
+        Fold in ticks recorded since the last request, O(1) each, found by id so late ticks are seen too
+        A tick older than the state (ingested or replayed out of order) cannot be folded in: backfill again
+        """
+        rows = db.query(PriceTick.id, PriceTick.price, PriceTick.volume, PriceTick.timestamp).filter(
+            PriceTick.market_id == market_id,
+            PriceTick.id > entry.last_tick_id
+        ).order_by(PriceTick.id).all()
+
+        for row in rows:
+            if entry.last_timestamp is not None and row.timestamp < entry.last_timestamp:
+                self._backfill(db, market_id, entry)
+                return
+            entry.indicator.update(float(row.price), float(row.volume or 0))
+            entry.last_tick_id = row.id
+            entry.last_timestamp = row.timestamp
+
+
+indicator_cache = IndicatorCache(settings.INDICATOR_CACHE_SIZE)
@@ -0,0 +1,119 @@
+"""
+Bulk market upsert and multi-symbol lookup helpers
+
+Loading a market universe or syncing a price feed one symbol per request costs a lookup and a
+commit each. upsert_markets writes any number of (symbol, price) pairs with a single
+INSERT .. ON CONFLICT (symbol) DO UPDATE .. RETURNING (SQLAlchemy packs the rows into
+multi-row VALUES batches), records one price tick per market and bumps the markets revision,
+all inside the caller's transaction.
+
+ingest_ticks is the same write for a stream of ticks (a price feed, a replayed file, the
+simulator): every tick is recorded, and each market ends at the price of its latest tick. A
+market keeps the timestamp of that tick (price_timestamp), so a delayed batch is recorded in the
+price history but never moves current_price back to an older price.
+
+Rows that come back with updated_at NULL were inserted by this statement: the conflict branch
+is the only thing that sets updated_at.
+"""
+from dataclasses import dataclass, replace
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, func, or_
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import dialect_insert
+from app.models import Market
+from app.services.market_snapshot import bump_market_revision
+from app.services.price_history import Tick, record_ticks, to_naive_utc
+
+
+@dataclass
+class SymbolTick:
+    """A price observed for a market, addressed by symbol"""
+    symbol: str
+    price: Decimal
+    timestamp: datetime
+    volume: Decimal = Decimal("0")
+
+
+def upsert_markets(
+    db: Session,
+    prices: Dict[str, Decimal],
+    timestamp: Optional[datetime] = None
+) -> Tuple[List[Row], List[str]]:
+    """
+    Create or reprice every symbol in `prices`; the caller commits
+    Returns the (id, symbol, current_price, created_at, updated_at) rows and the newly created symbols
+    """
+    timestamp = timestamp or datetime.utcnow()
+    return ingest_ticks(db, [SymbolTick(symbol, price, timestamp) for symbol, price in prices.items()])
+
+
+def ingest_ticks(db: Session, ticks: List[SymbolTick]) -> Tuple[List[Row], List[str]]:
+    """
+    Record every tick and move each market to its latest price unless it already holds a newer one
+    (creating unknown symbols); the caller commits
+    Returns the upserted market rows and the newly created symbols, as upsert_markets does
+    """
+    if not ticks:
+        return [], []
+
+    # Stored timestamps are naive UTC; then the last tick per symbol wins (the sort is stable,
+    # so equal timestamps keep arrival order)
+    ticks = [
+        tick if tick.timestamp.tzinfo is None else replace(tick, timestamp=to_naive_utc(tick.timestamp))
+        for tick in ticks
+    ]
+    ticks.sort(key=lambda tick: tick.timestamp)
+    latest = {tick.symbol: tick for tick in ticks}
+
+    stmt = dialect_insert(db, Market)
+    newer = or_(Market.price_timestamp.is_(None), stmt.excluded.price_timestamp >= Market.price_timestamp)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Market.symbol],
+        set_={
+            "current_price": case((newer, stmt.excluded.current_price), else_=Market.current_price),
+            "price_timestamp": case((newer, stmt.excluded.price_timestamp), else_=Market.price_timestamp),
+            "updated_at": func.now()
+        }
+    ).returning(Market.id, Market.symbol, Market.current_price, Market.created_at, Market.updated_at)
+
+    rows = db.execute(stmt, [
+        {"symbol": symbol, "current_price": tick.price, "price_timestamp": tick.timestamp}
+        for symbol, tick in latest.items()
+    ]).all()
+
+    market_ids = {row.symbol: row.id for row in rows}
+    record_ticks(db, [
+        Tick(market_id=market_ids[tick.symbol], price=tick.price, timestamp=tick.timestamp, volume=tick.volume)
+        for tick in ticks
+    ])
+
+    created = [row.symbol for row in rows if row.updated_at is None]
+    bump_market_revision(db, listing_changed=bool(created))
+    return rows, created
+
+
+def parse_symbols(values: List[str]) -> List[str]:
+    """Flatten repeated and comma-separated symbol params, dropping blanks and duplicates"""
+    symbols = list(dict.fromkeys(
+        symbol.strip() for value in values for symbol in value.split(",") if symbol.strip()
+    ))
+
+    if not symbols:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No symbols given"
+        )
+    if len(symbols) > settings.MARKET_BULK_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MARKET_BULK_MAX} symbols per request"
+        )
+
+    return symbols
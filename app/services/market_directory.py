@@ -0,0 +1,190 @@
+"""
+Process-local symbol -> market id cache shared by all routers
+
+A market's symbol never changes after it is created, so trades, alerts and market lookups
+resolve it from memory instead of querying `markets` on every request. Only hits are cached:
+an unknown symbol is looked up again next time, so markets created elsewhere show up at once.
+
+Entries are dropped explicitly when markets are created or deleted. Each invalidation is
+also published on Redis (MARKET_CACHE_CHANNEL) and every API process subscribes, so a market
+deleted through one worker disappears from all of them. If the subscription drops, the whole
+cache is cleared on reconnect since invalidations may have been missed meanwhile.
+"""
+import threading
+import time
+from typing import Callable, List, Optional, Union
+
+import redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Market
+
+ALL_SYMBOLS = "*"
+
+
+class MarketDirectory:
+    """Thread-safe symbol -> market id map with hit/miss counters"""
+
+    def __init__(self, publish: Optional[Callable[[str], None]] = None):
+        self.publish = publish
+        self._ids = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _cached(self, symbol: str) -> Optional[int]:
+        with self._lock:
+            market_id = self._ids.get(symbol)
+            if market_id is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return market_id
+
+    def remember(self, symbol: str, market_id: int):
+        with self._lock:
+            self._ids[symbol] = market_id
+
+    def resolve(self, db: Session, symbol: str) -> Optional[int]:
+        """Market id for a symbol, or None if no such market exists"""
+        market_id = self._cached(symbol)
+        if market_id is None:
+            market_id = db.query(Market.id).filter(Market.symbol == symbol).scalar()
+            if market_id is not None:
+                self.remember(symbol, market_id)
+        return market_id
+
+    async def resolve_async(self, db: AsyncSession, symbol: str) -> Optional[int]:
+        """Async variant of resolve() for the async route handlers"""
+        market_id = self._cached(symbol)
+        if market_id is None:
+            market_id = (await db.execute(select(Market.id).where(Market.symbol == symbol))).scalar()
+            if market_id is not None:
+                self.remember(symbol, market_id)
+        return market_id
+
+    def get_market(self, db: Session, symbol: str) -> Optional[Market]:
+        """Full market row for a symbol, fetched by primary key when the id is cached"""
+        market_id = self._cached(symbol)
+        if market_id is not None:
+            market = db.get(Market, market_id)
+            if market is not None:
+                return market
+            self.invalidate(symbol, broadcast=False)  # deleted by a process we did not hear from
+
+        market = db.query(Market).filter(Market.symbol == symbol).first()
+        if market is not None:
+            self.remember(symbol, market.id)
+        return market
+
+    async def get_market_async(self, db: AsyncSession, symbol: str) -> Optional[Market]:
+        """Async variant of get_market() for the async route handlers"""
+        market_id = self._cached(symbol)
+        if market_id is not None:
+            market = await db.get(Market, market_id)
+            if market is not None:
+                return market
+            self.invalidate(symbol, broadcast=False)
+
+        market = (await db.execute(select(Market).where(Market.symbol == symbol))).scalars().first()
+        if market is not None:
+            self.remember(symbol, market.id)
+        return market
+
+    def invalidate(self, symbol: str = ALL_SYMBOLS, broadcast: bool = True):
+        """Drop one symbol (or everything) here and, unless broadcast=False, in every other process"""
+        with self._lock:
+            if symbol == ALL_SYMBOLS:
+                self._ids.clear()
+            else:
+                self._ids.pop(symbol, None)
+            self.invalidations += 1
+
+        if broadcast and self.publish is not None:
+            self.publish(symbol)
+
+    def invalidate_many(self, symbols: List[str]):
+        """Drop several symbols here; other processes are told to drop everything (one message)"""
+        if len(symbols) == 1:
+            self.invalidate(symbols[0])
+            return
+
+        with self._lock:
+            for symbol in symbols:
+                self._ids.pop(symbol, None)
+            self.invalidations += 1
+
+        if symbols and self.publish is not None:
+            self.publish(ALL_SYMBOLS)
+
+    def handle_message(self, data: Union[bytes, str]):
+        """Apply an invalidation received from another process"""
+        symbol = data.decode() if isinstance(data, bytes) else data
+        self.invalidate(symbol, broadcast=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._ids),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+def redis_publisher(url: str, channel: str) -> Callable[[str], None]:
+    """Publish invalidations on a Redis channel; failures are logged, never raised to the request"""
+    client = redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+
+    def publish(symbol: str):
+        try:
+            client.publish(channel, symbol)
+        except redis.RedisError as e:
+            print(f"⚠️  Could not broadcast market cache invalidation for {symbol}: {str(e)}")
+
+    return publish
+
+
+def start_invalidation_listener(directory: MarketDirectory, url: str, channel: str) -> threading.Thread:
+    """Subscribe to invalidations from other processes on a daemon thread, reconnecting on errors"""
+
+    def listen():
+        connected = True
+        while True:
+            try:
+                pubsub = redis.Redis.from_url(url).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(channel)
+                if not connected:
+                    print(f"✅ Market cache invalidation listener reconnected")
+                    connected = True
+                # Anything may have changed while we were not subscribed
+                directory.invalidate(broadcast=False)
+                for message in pubsub.listen():
+                    directory.handle_message(message["data"])
+            except redis.RedisError as e:
+                if connected:
+                    print(f"⚠️  Market cache invalidation listener disconnected: {str(e)}")
+                    connected = False
+                time.sleep(5)
+
+    thread = threading.Thread(target=listen, name="market-directory-listener", daemon=True)
+    thread.start()
+    return thread
+
+
+def pubsub_enabled() -> bool:
+    """MARKET_CACHE_PUBSUB, defaulting to off for the brokerless embedded scheduler"""
+    if settings.MARKET_CACHE_PUBSUB is None:
+        return settings.SCHEDULER != "embedded"
+    return settings.MARKET_CACHE_PUBSUB
+
+
+market_directory = MarketDirectory(
+    redis_publisher(settings.REDIS_URL, settings.MARKET_CACHE_CHANNEL) if pubsub_enabled() else None
+)
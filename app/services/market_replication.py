@@ -0,0 +1,104 @@
+"""
+Copies of the `markets` table on every shard
+
+Markets are written on the primary only. After each write the markets it touched are pushed to
+shards 1..N-1 with one upsert each, in parallel: either the rows the write returned, or the ids,
+re-read from the primary (an id no longer there is deleted from the shards). A whole-table sync,
+which also removes markets missing on the primary, runs at startup and after seeding, and can
+repair copies that missed a write. Shard copies are only used for joins from holdings and
+transactions; market reads themselves always go to the primary.
+"""
+from typing import Iterable, List, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert, shards
+from app.models import Alert, Holding, Market, Order, TransactionLog
+from app.services.holding_snapshots import drop_market_positions
+from app.services.order_book import chunked
+
+REPLICATED_COLUMNS = ("id", "symbol", "current_price", "created_at", "updated_at")
+
+
+def _push(rows: List[dict], deleted_ids: Sequence[int] = (), prune: bool = False):
+    """Upsert `rows` on every other shard and delete `deleted_ids` (or, with prune, every market not in rows)"""
+    market_ids = [row["id"] for row in rows]
+
+    def sync(shard_db: Session):
+        if prune:
+            query = shard_db.query(Market)
+            if market_ids:
+                query = query.filter(Market.id.notin_(market_ids))
+            query.delete(synchronize_session=False)
+        for chunk in chunked(list(deleted_ids)):
+            shard_db.query(Market).filter(Market.id.in_(chunk)).delete(synchronize_session=False)
+
+        if rows:
+            stmt = dialect_insert(shard_db, Market)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Market.id],
+                set_={column: stmt.excluded[column] for column in REPLICATED_COLUMNS[1:]}
+            )
+            shard_db.execute(stmt, rows)
+        shard_db.commit()
+
+    shards.fan_out(sync, shard_ids=range(1, shards.count))
+
+
+def replicate_market_rows(rows: Iterable):
+    """Push market rows a write returned (RETURNING the replicated columns) to every other shard"""
+    if shards.count == 1:
+        return
+    rows = [{column: getattr(row, column) for column in REPLICATED_COLUMNS} for row in rows]
+    if rows:
+        _push(rows)
+
+
+def replicate_markets(db: Session, market_ids: Iterable[int]):
+    """Push the primary's current state of `market_ids` to every other shard; ids gone from the primary are deleted"""
+    if shards.count == 1:
+        return
+
+    market_ids = sorted(set(market_ids))
+    rows = []
+    for chunk in chunked(market_ids):
+        rows += [
+            {column: getattr(market, column) for column in REPLICATED_COLUMNS}
+            for market in db.query(Market).filter(Market.id.in_(chunk))
+        ]
+    found = {row["id"] for row in rows}
+    _push(rows, deleted_ids=[market_id for market_id in market_ids if market_id not in found])
+
+
+def sync_markets(db: Session):
+    """Copy the primary's whole markets table to every other shard (startup, seeding and repair)"""
+    if shards.count == 1:
+        return
+
+    _push([
+        {column: getattr(market, column) for column in REPLICATED_COLUMNS}
+        for market in db.query(Market).all()
+    ], prune=True)
+
+
+def _purge_market(db: Session, market_id: int):
+    # Bulk deletes skip the Market relationship cascades, so every dependent table is listed here
+    for model in (Holding, Alert, Order, TransactionLog):
+        db.query(model).filter(model.market_id == market_id).delete(synchronize_session=False)
+    drop_market_positions(db, market_id)
+
+
+def delete_market_rows(db: Session, market_id: int):
+    """
+    Delete every holding, alert, order, transaction and checkpointed position for a market on all shards
+    With a single shard this runs inside the caller's transaction, which commits it
+    """
+    if shards.count == 1:
+        _purge_market(db, market_id)
+        return
+
+    def purge(shard_db: Session):
+        _purge_market(shard_db, market_id)
+        shard_db.commit()
+
+    shards.fan_out(purge)
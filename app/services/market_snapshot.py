@@ -0,0 +1,149 @@
+"""
+Versioned snapshot of the markets list with pre-serialized JSON and ETags
+
+Every transaction that creates, deletes or reprices a market also bumps the single-row
+`market_revision` counter (bump_market_revision), so the counter changes exactly when the
+list does, whichever process made the change (API workers, the price simulator task).
+
+GET /api/markets/ then costs one primary-key read of the counter:
+- the client's If-None-Match already names this version -> 304, nothing else is done
+- this process already serialized this version -> the cached bytes are sent as-is
+- otherwise the markets are loaded and serialized once, and cached until the next bump
+"""
+import threading
+from typing import List, Optional
+
+from fastapi import Response, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Market, MarketRevision
+from app.schemas.market import MarketResponse
+from app.utils.responses import dump_json
+
+REVISION_ID = 1  # any change to the list: prices, new or deleted markets
+LISTING_REVISION_ID = 2  # only markets created or deleted (see symbol_index)
+
+
+def _bump(db: Session, revision_id: int) -> int:
+    version = db.execute(
+        update(MarketRevision)
+        .where(MarketRevision.id == revision_id)
+        .values(version=MarketRevision.version + 1)
+        .returning(MarketRevision.version)
+    ).scalar()
+    if version is None:
+        db.add(MarketRevision(id=revision_id, version=1))
+        db.flush()
+        version = 1
+    return version
+
+
+def bump_market_revision(db: Session, listing_changed: bool = False):
+    """
+    Advance the markets version as part of the caller's transaction
+    Pass listing_changed=True when markets were created or deleted; the new listing revision is
+    then kept on the session for bumped_listing_revision()
+    """
+    _bump(db, REVISION_ID)
+    if listing_changed:
+        db.info["listing_revision"] = _bump(db, LISTING_REVISION_ID)
+
+
+def bumped_listing_revision(db) -> Optional[int]:
+    """Listing revision the session's last write bumped to (None if it did not), for symbol_index after the commit"""
+    return db.info.pop("listing_revision", None)
+
+
+def etag_for(version: int) -> str:
+    return f'"markets-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison against a (possibly comma-separated) If-None-Match header"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class MarketSnapshot:
+    """The serialized markets list of the latest version this process has seen"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._body: Optional[bytes] = None
+        self.not_modified = 0
+        self.hits = 0
+        self.rebuilds = 0
+
+    def _cached(self, version: int) -> Optional[bytes]:
+        with self._lock:
+            if self._version == version:
+                self.hits += 1
+                return self._body
+            return None
+
+    def _store(self, version: int, markets: List[Market]) -> bytes:
+        body = dump_json(List[MarketResponse], markets)
+        with self._lock:
+            # Keep the newest version if a concurrent request got further ahead
+            if self._version is None or version >= self._version:
+                self._version = version
+                self._body = body
+            self.rebuilds += 1
+        return body
+
+    def _respond(self, version: int, body: Optional[bytes]) -> Response:
+        headers = {"ETag": etag_for(version), "Cache-Control": "no-cache"}
+        if body is None:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def _check_not_modified(self, version: int, if_none_match: Optional[str]) -> bool:
+        if etag_matches(if_none_match, etag_for(version)):
+            with self._lock:
+                self.not_modified += 1
+            return True
+        return False
+
+    def response(self, db: Session, if_none_match: Optional[str] = None) -> Response:
+        """Markets list response (or 304) for the current version"""
+        version = db.query(MarketRevision.version).filter(MarketRevision.id == REVISION_ID).scalar() or 0
+        if self._check_not_modified(version, if_none_match):
+            return self._respond(version, None)
+
+        body = self._cached(version)
+        if body is None:
+            body = self._store(version, db.query(Market).all())
+        return self._respond(version, body)
+
+    async def response_async(self, db: AsyncSession, if_none_match: Optional[str] = None) -> Response:
+        """Async variant of response() for the async route handlers"""
+        result = await db.execute(select(MarketRevision.version).where(MarketRevision.id == REVISION_ID))
+        version = result.scalar() or 0
+        if self._check_not_modified(version, if_none_match):
+            return self._respond(version, None)
+
+        body = self._cached(version)
+        if body is None:
+            body = self._store(version, (await db.execute(select(Market))).scalars().all())
+        return self._respond(version, body)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self._version,
+                "bytes": len(self._body) if self._body is not None else 0,
+                "not_modified": self.not_modified,
+                "hits": self.hits,
+                "rebuilds": self.rebuilds,
+            }
+
+
+market_snapshot = MarketSnapshot()
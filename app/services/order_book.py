@@ -0,0 +1,315 @@
+"""
+Resting limit and stop orders, matched by the price tick
+
+Orders are rows in `orders` on the primary, which stays the source of truth. A process running
+price ticks (a Celery worker, or the API with SCHEDULER=embedded) keeps an in-memory index of
+the open orders. Per market there are two ladders sorted by (trigger price, id):
+
+- at or below: buy limits and sell stops, crossed once the price P <= trigger (a suffix)
+- at or above: sell limits and buy stops, crossed once P >= trigger (a prefix)
+
+so a tick finds its crossed orders with one bisect per ladder, however many orders rest. A ladder
+is two parallel int64 arrays (trigger in 1e-8 units, order id): 16 bytes per order.
+
+Every tick first syncs the ladders with `status = 'open' AND id > watermark`. The query re-reads
+the last SYNC_OVERLAP ids, so an order whose insert committed after a higher id is still picked
+up. Cancelled orders stay on the ladders until the price reaches them: a fill claims its orders
+with UPDATE ... WHERE status = 'open' RETURNING, which skips them and also makes concurrent fills
+(several workers) and cancels race safely.
+
+Fills execute at the tick price: a crossed limit order fills at its price or better, a triggered
+stop fills like a market order. All fills of a tick (order status, balances, holdings and
+transaction log rows) commit as one transaction. A buy the user cannot pay for, or a sell larger
+than the holding, is rejected instead. Balances and holdings live on different databases once
+DATABASE_SHARD_URLS is set, so resting orders need a single database for now.
+"""
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import bindparam, insert, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.database import shards
+from app.models import Holding, Order, TransactionLog, User
+from app.utils.fixed_point import divide, from_units, mul, to_units
+
+AT_OR_BELOW = 0  # buy limits and sell stops
+AT_OR_ABOVE = 1  # sell limits and buy stops
+SYNC_OVERLAP = 1000  # ids re-read by each sync, covering inserts that committed out of id order
+BULK_ADD = 64  # more new orders than this for one ladder are merged by a sort, not inserted one by one
+IN_CHUNK = 500  # values per IN (...) list
+
+orders_table = Order.__table__
+
+
+def ladder_of(side: str, type: str) -> int:
+    """Ladder an order rests on: buy limits and sell stops fill at or below their price"""
+    return AT_OR_BELOW if (side == "buy") == (type == "limit") else AT_OR_ABOVE
+
+
+def chunked(values: Sequence, size: int = IN_CHUNK) -> Iterator[Sequence]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+@dataclass
+class Crossed:
+    """An order taken off its ladder by a tick"""
+    order_id: int
+    market_id: int
+    ladder: int
+    trigger: int
+
+
+class Ladder:
+    """Order ids sorted by (trigger price in 1e-8 units, id), as two parallel int64 arrays"""
+
+    def __init__(self):
+        self.triggers = array("q")
+        self.ids = array("q")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, trigger: int, order_id: int):
+        # Equal triggers keep id (time) order
+        lo = bisect_left(self.triggers, trigger)
+        hi = bisect_right(self.triggers, trigger, lo)
+        index = bisect_left(self.ids, order_id, lo, hi)
+        self.triggers.insert(index, trigger)
+        self.ids.insert(index, order_id)
+
+    def extend(self, entries: List[Tuple[int, int]]):
+        merged = sorted(list(zip(self.triggers, self.ids)) + entries)
+        self.triggers = array("q", (trigger for trigger, _ in merged))
+        self.ids = array("q", (order_id for _, order_id in merged))
+
+    def take_from(self, trigger: int) -> List[Tuple[int, int]]:
+        """Remove and return the entries with trigger >= `trigger`"""
+        index = bisect_left(self.triggers, trigger)
+        taken = list(zip(self.triggers[index:], self.ids[index:]))
+        del self.triggers[index:], self.ids[index:]
+        return taken
+
+    def take_through(self, trigger: int) -> List[Tuple[int, int]]:
+        """Remove and return the entries with trigger <= `trigger`"""
+        index = bisect_right(self.triggers, trigger)
+        taken = list(zip(self.triggers[:index], self.ids[:index]))
+        del self.triggers[:index], self.ids[:index]
+        return taken
+
+
+class OrderBooks:
+    """Every market's ladders, synced incrementally from the orders table"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ladders: Dict[Tuple[int, int], Ladder] = {}
+        self.known = set()
+        self.watermark = 0
+        self.synced = 0
+        self.crossed = 0
+
+    def add_many(self, rows: Iterable[Tuple[int, int, int, int]]) -> int:
+        """Add (order_id, market_id, ladder, trigger) rows, skipping orders already on a ladder"""
+        grouped: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        with self._lock:
+            for order_id, market_id, ladder, trigger in rows:
+                if order_id in self.known:
+                    continue
+                self.known.add(order_id)
+                self.watermark = max(self.watermark, order_id)
+                grouped.setdefault((market_id, ladder), []).append((trigger, order_id))
+
+            for key, entries in grouped.items():
+                target = self.ladders.setdefault(key, Ladder())
+                if len(entries) > BULK_ADD:
+                    target.extend(entries)
+                else:
+                    for trigger, order_id in entries:
+                        target.add(trigger, order_id)
+
+        added = sum(len(entries) for entries in grouped.values())
+        self.synced += added
+        return added
+
+    def sync(self, db: Session) -> int:
+        """Put the open orders placed since the last sync on their ladders; returns how many were added"""
+        rows = db.query(Order.id, Order.market_id, Order.side, Order.type, Order.price).filter(
+            Order.status == "open",
+            Order.id > self.watermark - SYNC_OVERLAP
+        ).order_by(Order.id).yield_per(10000)
+
+        return self.add_many(
+            (order_id, market_id, ladder_of(side, type), to_units(price))
+            for order_id, market_id, side, type, price in rows
+        )
+
+    def take_crossed(self, prices: Dict[int, Decimal]) -> List[Crossed]:
+        """Remove and return the orders crossed by market_id -> price"""
+        crossed = []
+        with self._lock:
+            for market_id, price in prices.items():
+                units = to_units(price)
+                below = self.ladders.get((market_id, AT_OR_BELOW))
+                if below:
+                    crossed += [Crossed(order_id, market_id, AT_OR_BELOW, trigger)
+                                for trigger, order_id in below.take_from(units)]
+                above = self.ladders.get((market_id, AT_OR_ABOVE))
+                if above:
+                    crossed += [Crossed(order_id, market_id, AT_OR_ABOVE, trigger)
+                                for trigger, order_id in above.take_through(units)]
+            for order in crossed:
+                self.known.discard(order.order_id)
+
+        self.crossed += len(crossed)
+        return crossed
+
+    def drop_market(self, market_id: int) -> int:
+        """Take a deleted market's ladders out of the books; returns how many orders were on them"""
+        with self._lock:
+            dropped = [self.ladders.pop((market_id, ladder), None) for ladder in (AT_OR_BELOW, AT_OR_ABOVE)]
+            ids = [order_id for ladder in dropped if ladder for order_id in ladder.ids]
+            self.known.difference_update(ids)
+        return len(ids)
+
+    def restore(self, crossed: List[Crossed]):
+        """Put back orders whose fill transaction failed"""
+        self.add_many((order.order_id, order.market_id, order.ladder, order.trigger) for order in crossed)
+
+    def stats(self) -> dict:
+        return {
+            "resting": len(self.known),
+            "ladders": len(self.ladders),
+            "watermark": self.watermark,
+            "synced": self.synced,
+            "crossed": self.crossed
+        }
+
+
+def settle_fills(db: Session, crossed: List[Crossed], prices: Dict[int, Decimal]) -> Dict[str, int]:
+    """
+    Fill the crossed orders at their market's tick price, oldest order first (does not commit)
+    Orders cancelled or filled elsewhere meanwhile are skipped; unaffordable ones are rejected
+    """
+    now = datetime.utcnow()
+    claimed = []
+    for chunk in chunked(sorted(order.order_id for order in crossed)):
+        claimed += db.execute(
+            update(orders_table)
+            .where(orders_table.c.id.in_(chunk), orders_table.c.status == "open")
+            .values(status="filled", filled_at=now)
+            .returning(orders_table.c.id, orders_table.c.user_id, orders_table.c.market_id,
+                       orders_table.c.side, orders_table.c.quantity)
+        ).all()
+
+    if not claimed:
+        return {"filled": 0, "rejected": 0}
+    claimed.sort(key=lambda row: row.id)
+
+    users = {}
+    for chunk in chunked(sorted({row.user_id for row in claimed})):
+        users.update({user.id: user for user in db.query(User).filter(User.id.in_(chunk))})
+    holdings = {}
+    for chunk in chunked(sorted({(row.user_id, row.market_id) for row in claimed})):
+        for holding in db.query(Holding).filter(tuple_(Holding.user_id, Holding.market_id).in_(chunk)):
+            holdings[(holding.user_id, holding.market_id)] = holding
+
+    # Balances and holdings are settled in fixed-point units and written back once at the end
+    balances = {user_id: to_units(user.balance) for user_id, user in users.items()}
+    positions = {key: (to_units(h.quantity), to_units(h.avg_buy_price)) for key, h in holdings.items()}
+    price_units = {market_id: to_units(price) for market_id, price in prices.items()}
+
+    outcomes = []
+    transactions = []
+    for row in claimed:
+        price = price_units[row.market_id]
+        quantity = to_units(row.quantity)
+        total_amount = mul(price, quantity)
+        key = (row.user_id, row.market_id)
+        held, avg_buy_price = positions.get(key, (0, 0))
+
+        if row.side == "buy":
+            if balances[row.user_id] < total_amount:
+                outcomes.append({"order_id": row.id, "new_status": "rejected", "fill_price": None, "fill_time": None})
+                continue
+            balances[row.user_id] -= total_amount
+            # Average buy price rounded once, from the exact cost of both lots
+            positions[key] = (held + quantity, divide(avg_buy_price * held + price * quantity, held + quantity))
+        else:
+            if held < quantity:
+                outcomes.append({"order_id": row.id, "new_status": "rejected", "fill_price": None, "fill_time": None})
+                continue
+            balances[row.user_id] += total_amount
+            positions[key] = (held - quantity, avg_buy_price)
+
+        outcomes.append({"order_id": row.id, "new_status": "filled", "fill_price": from_units(price), "fill_time": now})
+        transactions.append({
+            "user_id": row.user_id,
+            "market_id": row.market_id,
+            "type": row.side,
+            "price": from_units(price),
+            "quantity": from_units(quantity),
+            "total_amount": from_units(total_amount),
+            "timestamp": now
+        })
+
+    for user_id, balance in balances.items():
+        users[user_id].balance = from_units(balance)
+    for (user_id, market_id), (quantity, avg_buy_price) in positions.items():
+        holding = holdings.get((user_id, market_id))
+        if quantity == 0:
+            if holding is not None:
+                db.delete(holding)
+        elif holding is None:
+            db.add(Holding(user_id=user_id, market_id=market_id,
+                           quantity=from_units(quantity), avg_buy_price=from_units(avg_buy_price)))
+        else:
+            holding.quantity = from_units(quantity)
+            holding.avg_buy_price = from_units(avg_buy_price)
+
+    db.execute(
+        update(orders_table)
+        .where(orders_table.c.id == bindparam("order_id"))
+        .values(status=bindparam("new_status"), filled_price=bindparam("fill_price"), filled_at=bindparam("fill_time")),
+        outcomes
+    )
+    if transactions:
+        db.execute(insert(TransactionLog.__table__), transactions)
+
+    filled = len(transactions)
+    return {"filled": filled, "rejected": len(outcomes) - filled}
+
+
+def fill_crossed_orders(db: Session, prices: Dict[int, Tuple[str, Decimal]]) -> Dict[str, int]:
+    """
+    Fill every resting order crossed by a tick's prices (market_id -> (symbol, price)) in one transaction
+    Called by the price tick, after the new prices are written
+    """
+    if shards.count > 1:
+        return {"filled": 0, "rejected": 0}
+
+    order_books.sync(db)
+    crossed = order_books.take_crossed({market_id: price for market_id, (symbol, price) in prices.items()})
+    if not crossed:
+        return {"filled": 0, "rejected": 0}
+
+    try:
+        result = settle_fills(db, crossed, {market_id: price for market_id, (symbol, price) in prices.items()})
+        db.commit()
+    except Exception:
+        db.rollback()
+        order_books.restore(crossed)
+        raise
+
+    if result["filled"] or result["rejected"]:
+        print(f"✅ Filled {result['filled']} resting orders ({result['rejected']} rejected) at {datetime.now()}")
+    return result
+
+
+order_books = OrderBooks()
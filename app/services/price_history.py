@@ -0,0 +1,159 @@
+"""
+Tick-level price history with incrementally maintained OHLCV candles
+
+Every price a market takes is appended to `price_ticks` in one batched INSERT per write.
+The same batch is folded into per-(market, interval, bucket) partial candles in memory and
+merged into `candles` with a single upsert: the database combines highs/lows, adds volume and
+tick counts, and takes open / close from whichever side has the earliest / latest tick, so a
+late or out-of-order batch (a replay, a slow partition) never rewrites them with its own. Candles
+are never recomputed from raw ticks, and several writers (API and Celery workers) can record
+ticks concurrently.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, insert
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert
+from app.models import Candle, PriceTick
+
+INTERVALS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass
+class Tick:
+    """A single observed price for a market"""
+    market_id: int
+    price: Decimal
+    timestamp: datetime
+    volume: Decimal = Decimal("0")
+
+
+def to_naive_utc(timestamp: datetime) -> datetime:
+    """Normalize a datetime to naive UTC, the form timestamps are stored in"""
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def bucket_start(timestamp: datetime, seconds: int) -> datetime:
+    """Start of the interval bucket a timestamp falls into (naive UTC)"""
+    elapsed = int((to_naive_utc(timestamp) - EPOCH).total_seconds())
+    return EPOCH + timedelta(seconds=elapsed - elapsed % seconds)
+
+
+def _fold_ticks(ticks: List[Tick]) -> Dict[Tuple[int, str, datetime], dict]:
+    """Fold a batch of ticks into one partial candle per (market, interval, bucket)"""
+    partial: Dict[Tuple[int, str, datetime], dict] = {}
+
+    for tick in sorted(ticks, key=lambda t: t.timestamp):
+        # bucket_start() inlined: the epoch offset is computed once per tick, not per interval
+        timestamp = to_naive_utc(tick.timestamp)
+        elapsed = int((timestamp - EPOCH).total_seconds())
+        for interval, seconds in INTERVALS.items():
+            key = (tick.market_id, interval, EPOCH + timedelta(seconds=elapsed - elapsed % seconds))
+            candle = partial.get(key)
+
+            if candle is None:
+                partial[key] = {
+                    "market_id": tick.market_id,
+                    "interval": interval,
+                    "bucket_start": key[2],
+                    "open": tick.price,
+                    "high": tick.price,
+                    "low": tick.price,
+                    "close": tick.price,
+                    "volume": tick.volume,
+                    "tick_count": 1,
+                    "first_tick_at": timestamp,
+                    "last_tick_at": timestamp,
+                }
+            else:
+                candle["high"] = max(candle["high"], tick.price)
+                candle["low"] = min(candle["low"], tick.price)
+                candle["close"] = tick.price
+                candle["last_tick_at"] = timestamp
+                candle["volume"] += tick.volume
+                candle["tick_count"] += 1
+
+    return partial
+
+
+def record_ticks(db: Session, ticks: List[Tick]):
+    """
+    Append ticks and roll them into candles inside the caller's transaction
+    The caller commits, so ticks land atomically with the price change that produced them
+    """
+    if not ticks:
+        return
+
+    # Core inserts on the tables: executemany without the ORM's per-row bulk bookkeeping
+    db.execute(insert(PriceTick.__table__), [
+        {
+            "market_id": tick.market_id,
+            "price": tick.price,
+            "volume": tick.volume,
+            "timestamp": tick.timestamp,
+        }
+        for tick in ticks
+    ])
+
+    stmt = dialect_insert(db, Candle.__table__)
+    excluded = stmt.excluded
+    # SET expressions read the stored row before the update, so each comparison sees the old timestamps
+    earlier = excluded.first_tick_at < Candle.first_tick_at
+    later = excluded.last_tick_at >= Candle.last_tick_at
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Candle.market_id, Candle.interval, Candle.bucket_start],
+        set_={
+            "open": case((earlier, excluded.open), else_=Candle.open),
+            "first_tick_at": case((earlier, excluded.first_tick_at), else_=Candle.first_tick_at),
+            "high": case((excluded.high > Candle.high, excluded.high), else_=Candle.high),
+            "low": case((excluded.low < Candle.low, excluded.low), else_=Candle.low),
+            "close": case((later, excluded.close), else_=Candle.close),
+            "last_tick_at": case((later, excluded.last_tick_at), else_=Candle.last_tick_at),
+            "volume": Candle.volume + excluded.volume,
+            "tick_count": Candle.tick_count + excluded.tick_count,
+        }
+    )
+    db.execute(stmt, list(_fold_ticks(ticks).values()))
+
+
+def get_candles(
+    db: Session,
+    market_id: int,
+    interval: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 500
+) -> List[Candle]:
+    """
+    Candles in [start, end), oldest first, read through the (market, interval, bucket) index
+    Without a start bound the most recent `limit` candles are returned
+    """
+    query = db.query(Candle).filter(
+        Candle.market_id == market_id,
+        Candle.interval == interval
+    )
+
+    if start:
+        query = query.filter(Candle.bucket_start >= bucket_start(start, INTERVALS[interval]))
+    if end:
+        query = query.filter(Candle.bucket_start < to_naive_utc(end))
+
+    if start:
+        return query.order_by(Candle.bucket_start).limit(limit).all()
+
+    # No start bound: return the most recent candles
+    candles = query.order_by(Candle.bucket_start.desc()).limit(limit).all()
+    return candles[::-1]
@@ -1,12 +1,30 @@
-import random
 from decimal import Decimal
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from celery import chord
 from sqlalchemy.orm import Session
 
 from app.celery_app import celery_app
-from app.database import SessionLocal
-from app.models import Market, Alert
 from app.config import settings
+from app.database import SessionLocal, shards
+from app.models import Market, Alert
+from app.services.market_replication import replicate_markets
+from app.services.order_book import fill_crossed_orders
+from app.services.price_sources import (
+    SIMULATION_STATE,
+    RandomWalkSource,
+    SeededRandomWalkSource,
+    run_source,
+    simulation_source,
+    split_prices,
+    write_batch
+)
+from app.services.tick_guard import Lease, tick_guard
+from app.utils.fixed_point import from_units, to_units
+
+# Lease / metrics names of the scheduled ticks
+PRICE_TICK = "update_market_prices"
+ALERT_TICK = "check_and_trigger_alerts"
 
 
 def get_db_session():
@@ -22,105 +40,259 @@ def get_db_session():
 def update_market_prices():
     """
     Celery task to simulate price changes for all markets
-    Updates prices with random variations between configured min/max percentages
+    Updates prices with random variations between configured min/max percentages,
+    written like any other price source through the bulk tick path
+    Reproducible when PRICE_SIMULATION_SEED is set; split across workers when PRICE_UPDATE_PARTITIONS > 1
     """
-    db = get_db_session()
+    lease = tick_guard.begin(PRICE_TICK, settings.PRICE_UPDATE_INTERVAL)
+    if lease is None:
+        return
+
+    if settings.PRICE_UPDATE_PARTITIONS > 1:
+        # The lease is held until merge_partition_prices has run
+        try:
+            if dispatch_partitioned_update(settings.PRICE_UPDATE_PARTITIONS, lease) is None:
+                finish_price_tick(lease)
+        except Exception as e:
+            print(f"❌ Error dispatching market partitions: {str(e)}")
+            finish_price_tick(lease)
+        return
 
     try:
-        markets = db.query(Market).all()
+        stats = run_source(simulation_source(log=True))
 
-        if not markets:
+        if not stats["ticks"]:
             print("⚠️  No markets found to update")
             return
 
-        updated_count = 0
+        print(f"✅ Updated {stats['ticks']} market prices at {datetime.now()}")
 
-        for market in markets:
-            # Generate random price change percentage
-            variation_percent = random.uniform(
-                settings.PRICE_VARIATION_MIN,
-                settings.PRICE_VARIATION_MAX
-            )
+        db = get_db_session()
+        try:
+            fill_crossed_orders(db, current_prices(db))
+        finally:
+            db.close()
 
-            # Randomly decide if price goes up or down
-            direction = random.choice([1, -1])
+    except Exception as e:
+        print(f"❌ Error updating market prices: {str(e)}")
+    finally:
+        finish_price_tick(lease)
 
-            # Calculate new price
-            current_price = Decimal(str(market.current_price))
-            price_change = current_price * Decimal(str(variation_percent / 100)) * direction
-            new_price = current_price + price_change
 
-            # Ensure price doesn't go negative
-            if new_price < Decimal("0.00000001"):
-                new_price = current_price * Decimal("0.99")
+def finish_price_tick(lease: Lease):
+    """Release the price tick lease, enqueueing the coalesced catch-up tick if one is owed"""
+    if tick_guard.end(lease):
+        update_market_prices.delay()
 
-            # Update market price
-            market.current_price = new_price
-            updated_count += 1
 
-            print(f"📊 {market.symbol}: {float(current_price):.8f} → {float(new_price):.8f} ({direction * variation_percent:+.2f}%)")
+def current_prices(db: Session) -> Dict[int, Tuple[str, Decimal]]:
+    """market_id -> (symbol, current price) of every market"""
+    return {
+        market_id: (symbol, from_units(to_units(price)))
+        for market_id, symbol, price in db.query(Market.id, Market.symbol, Market.current_price)
+    }
+
+
+def partition_step() -> int:
+    """The seeded walk's next step, shared with the single-task walk through the tick guard; 0 before the first"""
+    state = tick_guard.load_state(SIMULATION_STATE)
+    if state is None or state["seed"] != settings.PRICE_SIMULATION_SEED:
+        return 0
+    return state["step"]
+
+
+def partition_start_prices(db: Session, step: int) -> Dict[str, Decimal]:
+    """
+    Prices the next partitioned step walks from: the seeded start state on shared step 0, else the
+    stored prices, so a newly started dispatcher never rewinds markets mid-run
+    """
+    if step == 0 and settings.PRICE_SIMULATION_SEED is not None and settings.PRICE_SIMULATION_START:
+        return dict(settings.PRICE_SIMULATION_START)
+    return {symbol: from_units(to_units(price)) for symbol, price in db.query(Market.symbol, Market.current_price)}
+
+
+def dispatch_partitioned_update(partitions: int, lease: Optional[Lease] = None):
+    """
+    Split the markets into partitions (by symbol hash) and walk them on as many workers at once
+    Each update_market_partition task prices and writes its own markets; merge_partition_prices
+    runs once all of them finished, replicates markets, evaluates alerts on the merged prices and
+    releases the tick's lease. Returns the chord's result, or None when there is nothing to update
+    """
+    seeded = settings.PRICE_SIMULATION_SEED is not None
+    db = get_db_session()
+
+    try:
+        step = partition_step() if seeded else 0
+        parts = [
+            {symbol: str(price) for symbol, price in part.items()}
+            for part in split_prices(partition_start_prices(db, step), partitions)
+            if part
+        ]
+    finally:
+        db.close()
+
+    if not parts:
+        print("⚠️  No markets found to update")
+        return None
+
+    if seeded:
+        # Prices live in the markets table between partitioned steps, so only the step is shared
+        tick_guard.save_state(SIMULATION_STATE, {"seed": settings.PRICE_SIMULATION_SEED, "step": step + 1, "prices": {}})
+    callback = merge_partition_prices.s(lease.token, lease.started) if lease else merge_partition_prices.s()
+    return chord(update_market_partition.s(part, step) for part in parts)(callback)
 
-        db.commit()
-        print(f"✅ Updated {updated_count} market prices at {datetime.now()}")
+
+@celery_app.task(name="app.services.price_simulator.update_market_partition")
+def update_market_partition(prices: Dict[str, str], step: int = 0) -> Dict[str, List[str]]:
+    """
+    Celery task to walk one partition of the markets one step and write it
+    prices maps symbol -> price to walk from; returns market_id -> [symbol, new price] for the merge
+    """
+    start = {symbol: Decimal(price) for symbol, price in prices.items()}
+    if settings.PRICE_SIMULATION_SEED is None:
+        source = RandomWalkSource(prices=start)
+    else:
+        # Same generators as the single-task walk, so partitioning does not change a seeded path
+        source = SeededRandomWalkSource(
+            settings.PRICE_SIMULATION_SEED,
+            start,
+            start_time=settings.PRICE_SIMULATION_START_TIME,
+            start_step=step
+        )
+
+    db = get_db_session()
+
+    try:
+        updated = {}
+        for batch in source:
+            # Markets are replicated once for the whole tick, by the merge
+            rows, created = write_batch(db, batch, replicate=False)
+            updated.update({str(row.id): [row.symbol, str(row.current_price)] for row in rows})
+        return updated
 
     except Exception as e:
         db.rollback()
-        print(f"❌ Error updating market prices: {str(e)}")
+        print(f"❌ Error updating market partition: {str(e)}")
+        return {}
     finally:
         db.close()
 
 
-@celery_app.task(name="app.services.price_simulator.check_and_trigger_alerts")
-def check_and_trigger_alerts():
+@celery_app.task(name="app.services.price_simulator.merge_partition_prices")
+def merge_partition_prices(
+    results: List[Dict[str, List[str]]],
+    lease_token: Optional[str] = None,
+    lease_started: Optional[float] = None
+) -> dict:
     """
-    Celery task to check all active alerts and trigger them if conditions are met
-    Runs after each price update
+    Celery task (chord callback) merging the partition results of one tick
+    Replicates markets to the shards once, then fills resting orders and evaluates alerts against the merged prices
     """
+    prices = {
+        int(market_id): (symbol, Decimal(price))
+        for result in results
+        for market_id, (symbol, price) in result.items()
+    }
+
     db = get_db_session()
 
     try:
-        # Get all non-triggered alerts
-        active_alerts = db.query(Alert).filter(Alert.triggered == False).all()
+        replicate_markets(db, prices)
+        orders = fill_crossed_orders(db, prices)
+        triggered_count = sum(shards.fan_out(lambda shard_db: trigger_alerts(shard_db, prices)))
 
-        if not active_alerts:
-            return
+        print(f"✅ Updated {len(prices)} market prices in {len(results)} partitions at {datetime.now()}")
+        if triggered_count > 0:
+            print(f"✅ Triggered {triggered_count} alerts at {datetime.now()}")
+
+        return {
+            "markets": len(prices),
+            "partitions": len(results),
+            "orders_filled": orders["filled"],
+            "alerts_triggered": triggered_count
+        }
+
+    except Exception as e:
+        print(f"❌ Error merging market partitions: {str(e)}")
+    finally:
+        db.close()
+        if lease_token:
+            finish_price_tick(Lease(name=PRICE_TICK, token=lease_token, started=lease_started))
+
+
+def trigger_alerts(db: Session, prices: Dict[int, Tuple[str, Decimal]]) -> int:
+    """
+    Trigger the active alerts in one shard whose condition holds at the given prices
+    prices maps market_id -> (symbol, current price), read once from the primary
+    """
+    active_alerts = db.query(Alert).filter(Alert.triggered == False).all()
+
+    if not active_alerts:
+        return 0
 
-        triggered_count = 0
+    triggered_count = 0
+    # Conditions are compared in fixed-point units, converted once per market
+    price_units = {market_id: to_units(price) for market_id, (symbol, price) in prices.items()}
 
-        for alert in active_alerts:
-            market = alert.market
-            current_price = Decimal(str(market.current_price))
-            target_price = Decimal(str(alert.target_price))
+    for alert in active_alerts:
+        if alert.market_id not in prices:
+            continue
+        symbol, current_price = prices[alert.market_id]
+        current_units = price_units[alert.market_id]
+        target_units = to_units(alert.target_price)
 
-            should_trigger = False
+        should_trigger = False
 
-            # Check if alert conditions are met
-            if alert.direction == "above" and current_price >= target_price:
-                should_trigger = True
-            elif alert.direction == "below" and current_price <= target_price:
-                should_trigger = True
+        # Check if alert conditions are met
+        if alert.direction == "above" and current_units >= target_units:
+            should_trigger = True
+        elif alert.direction == "below" and current_units <= target_units:
+            should_trigger = True
 
-            if should_trigger:
-                # Mark alert as triggered
-                alert.triggered = True
-                alert.triggered_at = datetime.utcnow()
-                triggered_count += 1
+        if should_trigger:
+            # Mark alert as triggered
+            alert.triggered = True
+            alert.triggered_at = datetime.utcnow()
+            triggered_count += 1
 
-                # Log to console (simulated notification)
-                print(f"\n🚨 ALERT TRIGGERED!")
-                print(f"   User ID: {alert.user_id}")
-                print(f"   Market: {market.symbol}")
-                print(f"   Condition: Price {alert.direction} {float(target_price):.8f}")
-                print(f"   Current Price: {float(current_price):.8f}")
-                print(f"   Triggered At: {alert.triggered_at}")
-                print(f"=" * 50)
+            # Log to console (simulated notification)
+            print(f"\n🚨 ALERT TRIGGERED!")
+            print(f"   User ID: {alert.user_id}")
+            print(f"   Market: {symbol}")
+            print(f"   Condition: Price {alert.direction} {float(alert.target_price):.8f}")
+            print(f"   Current Price: {float(current_price):.8f}")
+            print(f"   Triggered At: {alert.triggered_at}")
+            print(f"=" * 50)
+
+    if triggered_count > 0:
+        db.commit()
+
+    return triggered_count
+
+
+@celery_app.task(name="app.services.price_simulator.check_and_trigger_alerts")
+def check_and_trigger_alerts():
+    """
+    Celery task to check all active alerts and trigger them if conditions are met
+    Runs after each price update; alerts on every shard are evaluated in parallel
+    """
+    lease = tick_guard.begin(ALERT_TICK, settings.PRICE_UPDATE_INTERVAL)
+    if lease is None:
+        return
+
+    db = get_db_session()
+
+    try:
+        prices = current_prices(db)
+
+        triggered_count = sum(shards.fan_out(lambda shard_db: trigger_alerts(shard_db, prices)))
 
         if triggered_count > 0:
-            db.commit()
             print(f"✅ Triggered {triggered_count} alerts at {datetime.now()}")
 
     except Exception as e:
-        db.rollback()
         print(f"❌ Error checking alerts: {str(e)}")
     finally:
         db.close()
+        if tick_guard.end(lease):
+            check_and_trigger_alerts.delay()
@@ -0,0 +1,445 @@
+"""
+Price sources feeding the bulk tick write path
+
+A source is an iterable of tick batches (lists of SymbolTick). run_source() writes each batch
+with ingest_ticks - one market upsert, one tick insert and one candle upsert - commits, copies
+markets to the shards and broadcasts new symbols to the other processes' market directories.
+That is the same path POST /api/markets/bulk and /api/markets/ticks take, so candles,
+indicators, the markets snapshot, search, alerts and the WebSocket stream see simulated and
+replayed prices exactly like prices written through the API.
+
+- RandomWalkSource: the simulator's random walk over the listed markets, one batch per step
+- SeededRandomWalkSource: the same walk made reproducible from a seed and a start state
+- ReplaySource: recorded ticks from an NDJSON or CSV file (symbol, price, timestamp[, volume]),
+  paced by their timestamps divided by `speed`; speed 0 replays as fast as the database accepts
+
+RecordingSource wraps any source and appends the ticks it writes to an NDJSON file that
+ReplaySource reads back tick for tick.
+"""
+import csv
+import json
+import random
+import time
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Market
+from app.services.market_bulk import SymbolTick, ingest_ticks
+from app.services.market_directory import market_directory
+from app.services.market_replication import replicate_market_rows
+from app.services.price_history import to_naive_utc
+from app.services.tick_guard import tick_guard
+from app.utils.fixed_point import SCALE, divide, float_ratio, from_units, to_units
+
+MIN_PRICE_UNITS = 1  # prices never walk below 0.00000001
+
+# Prices stay exact Decimals; one decoder for the whole file instead of one per json.loads call
+_decoder = json.JSONDecoder(parse_float=Decimal)
+
+
+def next_price(current_units: int, rng=random) -> int:
+    """
+    One random-walk step in fixed-point units: move by PRICE_VARIATION_MIN..MAX percent, up or down
+    Computed exactly and rounded half-even once, so it equals the Decimal walk quantized to 8 decimals
+    """
+    variation_percent = rng.uniform(settings.PRICE_VARIATION_MIN, settings.PRICE_VARIATION_MAX)
+    direction = rng.choice([1, -1])
+
+    # new price = current * (1 + direction * variation), scaled by the variation's denominator
+    numerator, denominator = float_ratio(variation_percent / 100)
+    scaled = current_units * (denominator + direction * numerator)
+
+    # Ensure price doesn't go negative
+    if scaled < denominator * MIN_PRICE_UNITS:
+        return max(divide(current_units * 99, 100), MIN_PRICE_UNITS)
+    return max(divide(scaled, denominator), MIN_PRICE_UNITS)
+
+
+class RandomWalkSource:
+    """
+    Random-walk every listed market from its current price, `steps` times
+    Given `prices` (symbol -> price), walks just those markets and keeps them in memory instead
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        steps: int = 1,
+        interval: float = 0.0,
+        rng=random,
+        log: bool = False,
+        prices: Optional[Dict[str, Decimal]] = None
+    ):
+        self.session_factory = session_factory
+        self.steps = steps
+        self.interval = interval
+        self.rng = rng
+        self.log = log
+        self.prices = prices
+
+    def __iter__(self) -> Iterator[List[SymbolTick]]:
+        for step in range(self.steps):
+            if step and self.interval:
+                time.sleep(self.interval)
+
+            if self.prices is not None:
+                markets = list(self.prices.items())
+            else:
+                # Prices are re-read every step, so markets listed meanwhile join the walk
+                db = self.session_factory()
+                try:
+                    markets = db.query(Market.symbol, Market.current_price).all()
+                finally:
+                    db.close()
+
+            now = datetime.utcnow()
+            batch = []
+            for symbol, current_price in markets:
+                current_units = to_units(current_price)
+                new_units = next_price(current_units, self.rng)
+                new_price = from_units(new_units)
+                batch.append(SymbolTick(symbol=symbol, price=new_price, timestamp=now))
+                if self.prices is not None:
+                    self.prices[symbol] = new_price
+                if self.log:
+                    change = (new_units - current_units) / current_units * 100
+                    print(f"📊 {symbol}: {current_units / SCALE:.8f} → {new_units / SCALE:.8f} ({change:+.2f}%)")
+
+            if batch:
+                yield batch
+
+
+class SeededRandomWalkSource:
+    """
+    Reproducible random walk: the same seed and start state always produce the same ticks
+
+    Step n of a market draws from its own generator seeded with (seed, symbol, n), so adding or
+    removing a market never shifts another market's path, and a run can resume at any step from
+    the prices it had there. Prices are kept in memory, rounded to the stored 8 decimals, rather
+    than re-read, so API writes during a run cannot bend the path. The walked markets are the
+    start prices, or the markets listed when the first step runs. Tick timestamps advance
+    `step_seconds` per step from `start_time` when one is given, else they are the wall clock.
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        start_prices: Optional[Dict[str, Decimal]] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        steps: int = 1,
+        interval: float = 0.0,
+        start_time: Optional[datetime] = None,
+        step_seconds: float = None,
+        start_step: int = 0,
+        log: bool = False
+    ):
+        self.seed = seed
+        # The walk runs in fixed-point units; `prices` converts them back
+        self.units: Dict[str, int] = {symbol: to_units(price) for symbol, price in (start_prices or {}).items()}
+        self.session_factory = session_factory
+        self.steps = steps
+        self.interval = interval
+        self.start_time = to_naive_utc(start_time) if start_time else None
+        self.step_seconds = settings.PRICE_UPDATE_INTERVAL if step_seconds is None else step_seconds
+        self.step = start_step
+        self.log = log
+
+    def generator(self, symbol: str, step: int) -> random.Random:
+        # String seeds are hashed with SHA-512, so they do not depend on PYTHONHASHSEED
+        return random.Random(f"{self.seed}:{symbol}:{step}")
+
+    @property
+    def prices(self) -> Dict[str, Decimal]:
+        return {symbol: from_units(units) for symbol, units in self.units.items()}
+
+    def state(self) -> dict:
+        """Seed, next step and prices: enough to resume the exact same path later"""
+        return {"seed": self.seed, "step": self.step, "prices": {symbol: str(price) for symbol, price in self.prices.items()}}
+
+    def __iter__(self) -> Iterator[List[SymbolTick]]:
+        if not self.units:
+            db = self.session_factory()
+            try:
+                self.units = {symbol: to_units(price) for symbol, price in db.query(Market.symbol, Market.current_price)}
+            finally:
+                db.close()
+
+        for n in range(self.steps):
+            if n and self.interval:
+                time.sleep(self.interval)
+
+            if self.start_time is not None:
+                timestamp = self.start_time + timedelta(seconds=self.step * self.step_seconds)
+            else:
+                timestamp = datetime.utcnow()
+
+            batch = []
+            for symbol in sorted(self.units):
+                current_units = self.units[symbol]
+                new_units = next_price(current_units, self.generator(symbol, self.step))
+                self.units[symbol] = new_units
+                batch.append(SymbolTick(symbol=symbol, price=from_units(new_units), timestamp=timestamp))
+                if self.log:
+                    print(f"📊 {symbol}: {current_units / SCALE:.8f} → {new_units / SCALE:.8f} (step {self.step})")
+
+            self.step += 1
+            if batch:
+                yield batch
+
+
+def parse_timestamp(value) -> datetime:
+    """Epoch seconds (number or numeric string) or ISO 8601, returned as naive UTC"""
+    if isinstance(value, (int, float, Decimal)):
+        return datetime.utcfromtimestamp(float(value))
+    value = str(value).strip()
+    try:
+        return datetime.utcfromtimestamp(float(value))
+    except ValueError:
+        pass
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return to_naive_utc(datetime.fromisoformat(value))
+
+
+def parse_tick(record: Dict, line: int) -> SymbolTick:
+    """Build a tick from one NDJSON object or CSV row; ValueError names the offending line"""
+    try:
+        tick = SymbolTick(
+            symbol=str(record["symbol"]).strip(),
+            price=Decimal(str(record["price"])),
+            timestamp=parse_timestamp(record["timestamp"]),
+            volume=Decimal(str(record.get("volume") or "0")),
+        )
+    except (KeyError, TypeError, ValueError, InvalidOperation, OverflowError) as e:
+        raise ValueError(f"Invalid tick on line {line}: {e!r}")
+
+    if not tick.symbol or not tick.price > 0 or tick.volume < 0:
+        raise ValueError(f"Invalid tick on line {line}: {record}")
+    return tick
+
+
+def read_ticks(path: str, format: Optional[str] = None) -> Iterator[SymbolTick]:
+    """Stream ticks from an NDJSON or CSV file (format from the extension unless given)"""
+    format = format or ("csv" if path.lower().endswith(".csv") else "ndjson")
+
+    with open(path, newline="", encoding="utf-8") as f:
+        if format == "csv":
+            # Line 1 is the header
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield parse_tick(row, line)
+        else:
+            for line, text in enumerate(f, start=1):
+                if text.strip():
+                    try:
+                        record = _decoder.decode(text)
+                    except ValueError as e:
+                        raise ValueError(f"Invalid tick on line {line}: {e}")
+                    yield parse_tick(record, line)
+
+
+class ReplaySource:
+    """
+    Recorded ticks replayed in file order at `speed` x their original pace
+    Ticks keep their recorded timestamps; pacing only decides when each batch is written
+    """
+
+    def __init__(
+        self,
+        path: str,
+        speed: float = None,
+        batch_size: int = None,
+        format: Optional[str] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.path = path
+        self.speed = settings.PRICE_REPLAY_SPEED if speed is None else speed
+        self.batch_size = batch_size or settings.PRICE_INGEST_BATCH
+        self.format = format
+        self.clock = clock
+        self.sleep = sleep
+
+    def __iter__(self) -> Iterator[List[SymbolTick]]:
+        started = self.clock()
+        first: Optional[datetime] = None
+        batch: List[SymbolTick] = []
+
+        for tick in read_ticks(self.path, self.format):
+            if self.speed > 0:
+                first = first or tick.timestamp
+                due = started + (tick.timestamp - first).total_seconds() / self.speed
+
+                # Flush what is due before waiting, then wait out whatever the write left over
+                if due > self.clock():
+                    if batch:
+                        yield batch
+                        batch = []
+                    wait = due - self.clock()
+                    if wait > 0:
+                        self.sleep(wait)
+
+            batch.append(tick)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+
+def encode_tick(tick: SymbolTick) -> str:
+    """One NDJSON line that read_ticks() parses back to an identical tick"""
+    return json.dumps({
+        "symbol": tick.symbol,
+        "price": str(tick.price),
+        "timestamp": to_naive_utc(tick.timestamp).isoformat(),
+        "volume": str(tick.volume),
+    }) + "\n"
+
+
+class RecordingSource:
+    """Pass batches through from `source`, appending each one to an NDJSON file once it was written"""
+
+    def __init__(self, source: Iterable[List[SymbolTick]], path: str):
+        self.source = source
+        self.path = path
+
+    def __iter__(self) -> Iterator[List[SymbolTick]]:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for batch in self.source:
+                # Resumes only after run_source committed the batch, so failed batches are not recorded
+                yield batch
+                f.write("".join(encode_tick(tick) for tick in batch))
+                f.flush()
+
+
+def partition_of(symbol: str, partitions: int) -> int:
+    """Stable partition of a symbol (CRC32, so every process agrees, even before the market exists)"""
+    return zlib.crc32(symbol.encode()) % partitions
+
+
+def split_prices(prices: Dict[str, Decimal], partitions: int) -> List[Dict[str, Decimal]]:
+    """Split symbol -> price into `partitions` disjoint maps by partition_of()"""
+    parts: List[Dict[str, Decimal]] = [{} for _ in range(partitions)]
+    for symbol, price in prices.items():
+        parts[partition_of(symbol, partitions)][symbol] = price
+    return parts
+
+
+def write_batch(db: Session, ticks: List[SymbolTick], replicate: bool = True) -> Tuple[List[Row], List[str]]:
+    """
+    Write one batch through the bulk path and publish it
+    Returns the upserted market rows and the newly created symbols
+    """
+    rows, created = ingest_ticks(db, ticks)
+    db.commit()
+    if replicate:
+        replicate_market_rows(rows)
+    market_directory.invalidate_many(created)
+    return rows, created
+
+
+def run_source(source: Iterable[List[SymbolTick]], session_factory: Callable[[], Session] = SessionLocal) -> dict:
+    """Drain a source into the database, one transaction per batch; returns throughput stats"""
+    ticks = batches = created = 0
+    started = time.perf_counter()
+
+    for batch in source:
+        db = session_factory()
+        try:
+            created += len(write_batch(db, batch)[1])
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        ticks += len(batch)
+        batches += 1
+
+    seconds = time.perf_counter() - started
+    return {
+        "ticks": ticks,
+        "batches": batches,
+        "markets_created": created,
+        "seconds": round(seconds, 3),
+        "ticks_per_second": round(ticks / seconds, 1) if seconds > 0 else 0.0,
+    }
+
+
+# Tick-guard state holding the seeded simulation's next step and prices, shared by every worker
+SIMULATION_STATE = "price_simulation"
+
+
+class SavedWalkSource:
+    """Pass a seeded walk's batches through, saving its state to the tick guard once each batch was written"""
+
+    def __init__(self, walk: SeededRandomWalkSource):
+        self.walk = walk
+
+    def __iter__(self) -> Iterator[List[SymbolTick]]:
+        for batch in self.walk:
+            # Resumes only after run_source committed the batch; a failed step is walked again next tick
+            yield batch
+            tick_guard.save_state(SIMULATION_STATE, self.walk.state())
+
+
+def seeded_simulation(log: bool = False, session_factory: Callable[[], Session] = SessionLocal) -> SeededRandomWalkSource:
+    """
+    The seeded walk from the state the previous tick saved, on any process, or from the start
+    state when none was saved for this seed. Saved prices may be empty (a partitioned tick keeps
+    only the step); the walk then starts from the listed markets.
+    """
+    state = tick_guard.load_state(SIMULATION_STATE)
+    if state is None or state["seed"] != settings.PRICE_SIMULATION_SEED:
+        start_prices, step = settings.PRICE_SIMULATION_START, 0
+    else:
+        start_prices = {symbol: Decimal(price) for symbol, price in state["prices"].items()}
+        step = state["step"]
+
+    return SeededRandomWalkSource(
+        settings.PRICE_SIMULATION_SEED,
+        start_prices=start_prices,
+        session_factory=session_factory,
+        start_time=settings.PRICE_SIMULATION_START_TIME,
+        start_step=step,
+        log=log
+    )
+
+
+def simulation_source(
+    log: bool = False,
+    session_factory: Callable[[], Session] = SessionLocal
+) -> Iterable[List[SymbolTick]]:
+    """
+    The simulator as configured: seeded when PRICE_SIMULATION_SEED is set, recorded to
+    PRICE_SIMULATION_RECORD when set. The seeded walk saves its step and prices after every
+    step, so consecutive update_market_prices runs continue one path whichever worker runs them.
+    """
+    if settings.PRICE_SIMULATION_SEED is None:
+        source = RandomWalkSource(session_factory, log=log)
+    else:
+        source = SavedWalkSource(seeded_simulation(log, session_factory))
+
+    if settings.PRICE_SIMULATION_RECORD:
+        source = RecordingSource(source, settings.PRICE_SIMULATION_RECORD)
+    return source
+
+
+@celery_app.task(name="app.services.price_sources.replay_price_file")
+def replay_price_file(path: str, speed: float = None):
+    """Celery task to replay a recorded NDJSON/CSV tick file into the markets"""
+    try:
+        stats = run_source(ReplaySource(path, speed=speed))
+        print(f"✅ Replayed {stats['ticks']} ticks from {path} ({stats['ticks_per_second']} ticks/s)")
+        return stats
+
+    except Exception as e:
+        print(f"❌ Error replaying {path}: {str(e)}")
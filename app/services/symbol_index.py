@@ -0,0 +1,205 @@
+"""
+In-memory prefix index over market symbols for search and paging
+
+Symbols are kept in sorted lists, one over all symbols and one per base and per quote asset
+("SOL/USDT" -> base SOL, quote USDT), so a prefix is a bisect range and a page is a slice that
+starts after the cursor symbol. Matching is case-insensitive. Only the ids of a page are then
+loaded from the database, by primary key.
+
+The index is built at startup and updated in place when this process creates or deletes a
+market. Markets created or deleted by other processes bump the listing revision
+(market_revision row LISTING_REVISION_ID); search compares it with the revision the index
+was built from and rebuilds when they differ. An in-place update moves the index to the
+revision its own write bumped to, when that is the only change since the index's revision, so
+local writes do not cost a rebuild. Price changes do not touch the listing revision.
+"""
+import base64
+import binascii
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Market, MarketRevision
+from app.services.market_snapshot import LISTING_REVISION_ID
+
+# Entries are (upper-cased symbol, symbol) so ordering and prefixes ignore case
+Entry = Tuple[str, str]
+
+_MAX_CHAR = "\U0010ffff"
+
+
+def split_symbol(symbol: str) -> Tuple[str, str]:
+    """'SOL/USDT' -> ('SOL', 'USDT'); symbols without a quote asset get ''"""
+    base, _, quote = symbol.upper().partition("/")
+    return base, quote
+
+
+def encode_cursor(symbol: str) -> str:
+    return base64.urlsafe_b64encode(symbol.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        symbol = base64.b64decode(cursor.encode(), altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        symbol = ""
+
+    if not symbol:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return symbol
+
+
+class SymbolIndex:
+    """Sorted symbol lists (all, per base, per quote) with symbol -> market id"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._all: List[Entry] = []
+        self._by_base: Dict[str, List[Entry]] = {}
+        self._by_quote: Dict[str, List[Entry]] = {}
+        self.revision: Optional[int] = None
+        self.rebuilds = 0
+
+    def _insert(self, symbol: str, market_id: int):
+        entry = (symbol.upper(), symbol)
+        base, quote = split_symbol(symbol)
+        if symbol not in self._ids:
+            insort(self._all, entry)
+            insort(self._by_base.setdefault(base, []), entry)
+            if quote:
+                insort(self._by_quote.setdefault(quote, []), entry)
+        self._ids[symbol] = market_id
+
+    @staticmethod
+    def _discard(entries: Dict[str, List[Entry]], key: str, entry: Entry):
+        bucket = entries.get(key)
+        if bucket is None:
+            return
+        position = bisect_left(bucket, entry)
+        if position < len(bucket) and bucket[position] == entry:
+            del bucket[position]
+        if not bucket:
+            del entries[key]
+
+    def _advance(self, revision: Optional[int]):
+        # Another process's change in between leaves the index behind: keep the old revision so refresh() rebuilds
+        if revision is not None and self.revision is not None and self.revision >= revision - 1:
+            self.revision = max(self.revision, revision)
+
+    def add(self, symbol: str, market_id: int, revision: Optional[int] = None):
+        """Index a market created by this process; `revision` is the listing revision its write bumped to"""
+        with self._lock:
+            self._insert(symbol, market_id)
+            self._advance(revision)
+
+    def remove(self, symbol: str, revision: Optional[int] = None):
+        """Drop a market deleted by this process; `revision` is the listing revision its write bumped to"""
+        with self._lock:
+            self._advance(revision)
+            if self._ids.pop(symbol, None) is None:
+                return
+            entry = (symbol.upper(), symbol)
+            del self._all[bisect_left(self._all, entry)]
+            base, quote = split_symbol(symbol)
+            self._discard(self._by_base, base, entry)
+            self._discard(self._by_quote, quote, entry)
+
+    def load(self, rows, revision: Optional[int]):
+        """Replace the whole index with (id, symbol) rows read at `revision`"""
+        with self._lock:
+            self._ids.clear()
+            self._all.clear()
+            self._by_base.clear()
+            self._by_quote.clear()
+            for market_id, symbol in rows:
+                self._ids[symbol] = market_id
+                self._all.append((symbol.upper(), symbol))
+            self._all.sort()
+            for entry in self._all:
+                base, quote = split_symbol(entry[1])
+                self._by_base.setdefault(base, []).append(entry)
+                if quote:
+                    self._by_quote.setdefault(quote, []).append(entry)
+            self.revision = revision
+            self.rebuilds += 1
+
+    def rebuild(self, db: Session):
+        """(Re)build from the markets table"""
+        revision = db.query(MarketRevision.version).filter(MarketRevision.id == LISTING_REVISION_ID).scalar()
+        self.load(db.query(Market.id, Market.symbol).all(), revision)
+
+    def refresh(self, db: Session):
+        """Rebuild if another process created or deleted markets since the last build"""
+        revision = db.query(MarketRevision.version).filter(MarketRevision.id == LISTING_REVISION_ID).scalar()
+        if revision != self.revision:
+            self.load(db.query(Market.id, Market.symbol).all(), revision)
+
+    async def refresh_async(self, db: AsyncSession):
+        """Async variant of refresh() for the async route handlers"""
+        result = await db.execute(select(MarketRevision.version).where(MarketRevision.id == LISTING_REVISION_ID))
+        revision = result.scalar()
+        if revision != self.revision:
+            self.load((await db.execute(select(Market.id, Market.symbol))).all(), revision)
+
+    def search(
+        self,
+        prefix: str = "",
+        base: Optional[str] = None,
+        quote: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[Tuple[str, int]], Optional[str]]:
+        """
+        Symbols matching a prefix and/or exact base/quote asset, in symbol order
+        Returns up to `limit` (symbol, market id) pairs after the `after` symbol, and the next cursor symbol
+        """
+        prefix = prefix.upper()
+        base = base.upper() if base else None
+        quote = quote.upper() if quote else None
+
+        with self._lock:
+            # Walk the smallest sorted list that already satisfies one filter
+            if base is not None:
+                source = self._by_base.get(base, [])
+            elif quote is not None:
+                source = self._by_quote.get(quote, [])
+            else:
+                source = self._all
+
+            start = bisect_left(source, (prefix,))
+            end = bisect_left(source, (prefix + _MAX_CHAR,))
+            if after is not None:
+                start = max(start, bisect_right(source, (after.upper(), after)))
+
+            matches = []
+            for position in range(start, end):
+                entry = source[position]
+                if base is not None and quote is not None and split_symbol(entry[1])[1] != quote:
+                    continue
+                if len(matches) == limit:
+                    return matches, matches[-1][0]
+                matches.append((entry[1], self._ids[entry[1]]))
+
+        return matches, None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "symbols": len(self._ids),
+                "bases": len(self._by_base),
+                "quotes": len(self._by_quote),
+                "revision": self.revision,
+                "rebuilds": self.rebuilds,
+            }
+
+
+symbol_index = SymbolIndex()
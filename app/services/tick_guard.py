@@ -0,0 +1,299 @@
+"""
+Overlap protection and timing metrics for scheduled ticks
+
+Celery beat enqueues a tick every interval whether or not the previous one finished, so a slow
+tick used to let ticks pile up. Every scheduled task now runs under a lease named after it
+(SET NX PX in Redis, shared by all workers; a dict for a single process). A tick that finds the
+lease taken does not run, and TICK_OVERLAP_POLICY decides what happens to it:
+
+- skip:     it is dropped and counted
+- coalesce: it is dropped but leaves a rerun mark; when the running tick finishes it enqueues
+            exactly one catch-up tick, however many ticks were dropped meanwhile
+
+The lease TTL bounds how long a crashed worker can hold up ticks. Per task the store keeps
+counters (ran, skipped, coalesced, catch_ups, overruns), the last and worst tick duration, and
+the last and worst lag: how much later than one interval after the previous start a tick started.
+
+Ticks that carry state from one run to the next (the seeded simulator's step and prices) keep it in
+the same store, so whichever worker process takes the next lease continues where the last one
+stopped. Unlike leases, state does not fail open: a tick that cannot read it raises instead of
+starting over.
+"""
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import redis
+
+from app.config import settings
+
+POLICIES = ("skip", "coalesce")
+
+
+@dataclass
+class Lease:
+    """A held tick lease; `started` is epoch seconds"""
+    name: str
+    token: str
+    started: float
+
+
+class MemoryLeaseStore:
+    """Leases, rerun marks and metrics in process memory (one worker process, tests)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._leases: Dict[str, tuple] = {}
+        self._reruns = set()
+        self._metrics: Dict[str, dict] = {}
+        self._states: Dict[str, str] = {}
+
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            held = self._leases.get(name)
+            if held is not None and held[1] > now:
+                return None
+            token = uuid.uuid4().hex
+            self._leases[name] = (token, now + ttl)
+            return token
+
+    def release(self, name: str, token: str):
+        with self._lock:
+            if self._leases.get(name, (None,))[0] == token:
+                del self._leases[name]
+
+    def request_rerun(self, name: str, ttl: float):
+        with self._lock:
+            self._reruns.add(name)
+
+    def take_rerun(self, name: str) -> bool:
+        with self._lock:
+            if name in self._reruns:
+                self._reruns.discard(name)
+                return True
+            return False
+
+    def record(self, name: str, counters: Dict[str, int] = None, timings: Dict[str, float] = None,
+               marks: Dict[str, float] = None):
+        with self._lock:
+            metrics = self._metrics.setdefault(name, {})
+            for field, amount in (counters or {}).items():
+                metrics[field] = metrics.get(field, 0) + amount
+            for field, value in (timings or {}).items():
+                metrics[f"last_{field}"] = value
+                metrics[f"max_{field}"] = max(value, metrics.get(f"max_{field}", 0.0))
+            metrics.update(marks or {})
+
+    def metrics(self, name: str) -> dict:
+        with self._lock:
+            return dict(self._metrics.get(name, {}))
+
+    def load_state(self, name: str) -> Optional[dict]:
+        with self._lock:
+            state = self._states.get(name)
+        return None if state is None else json.loads(state)
+
+    def save_state(self, name: str, state: dict):
+        # Stored as JSON like in Redis, so callers never share a mutable dict with the store
+        with self._lock:
+            self._states[name] = json.dumps(state)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": "memory", "tasks": {name: dict(metrics) for name, metrics in self._metrics.items()}}
+
+
+# KEYS[1] = lease; ARGV[1] = token. Delete only our own lease, never one re-acquired after ours expired
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# KEYS[1] = metrics hash; ARGV = field, value pairs. Sets last_<field> and raises max_<field>
+TIMING_SCRIPT = """
+for i = 1, #ARGV, 2 do
+    local value = tonumber(ARGV[i + 1])
+    redis.call('HSET', KEYS[1], 'last_' .. ARGV[i], ARGV[i + 1])
+    local worst = tonumber(redis.call('HGET', KEYS[1], 'max_' .. ARGV[i])) or 0
+    if value > worst then
+        redis.call('HSET', KEYS[1], 'max_' .. ARGV[i], ARGV[i + 1])
+    end
+end
+return 0
+"""
+
+
+class RedisLeaseStore:
+    """Leases and metrics shared by every Celery worker through Redis"""
+
+    def __init__(self, url: str, prefix: str = "ticks:"):
+        self.client = redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+        self.release_script = self.client.register_script(RELEASE_SCRIPT)
+        self.timing_script = self.client.register_script(TIMING_SCRIPT)
+        self.prefix = prefix
+        self.connected = True
+
+    def _failed(self, e: Exception):
+        if self.connected:
+            print(f"⚠️  Tick leases cannot reach Redis, running ticks unguarded: {str(e)}")
+            self.connected = False
+
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.client.set(f"{self.prefix}lease:{name}", token, nx=True, px=int(ttl * 1000))
+        except redis.RedisError as e:
+            # Fail open: without Redis the broker is down too, so no tick can be queued behind this one
+            self._failed(e)
+            return token
+
+        if not self.connected:
+            print(f"✅ Tick leases reconnected to Redis")
+            self.connected = True
+        return token if acquired else None
+
+    def release(self, name: str, token: str):
+        try:
+            self.release_script(keys=[f"{self.prefix}lease:{name}"], args=[token])
+        except redis.RedisError as e:
+            self._failed(e)
+
+    def request_rerun(self, name: str, ttl: float):
+        try:
+            self.client.set(f"{self.prefix}rerun:{name}", 1, px=int(ttl * 1000))
+        except redis.RedisError as e:
+            self._failed(e)
+
+    def take_rerun(self, name: str) -> bool:
+        try:
+            return self.client.delete(f"{self.prefix}rerun:{name}") == 1
+        except redis.RedisError as e:
+            self._failed(e)
+            return False
+
+    def record(self, name: str, counters: Dict[str, int] = None, timings: Dict[str, float] = None,
+               marks: Dict[str, float] = None):
+        key = f"{self.prefix}metrics:{name}"
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for field, amount in (counters or {}).items():
+                pipe.hincrby(key, field, amount)
+            if marks:
+                pipe.hset(key, mapping=marks)
+            if timings:
+                self.timing_script(keys=[key], args=[item for pair in timings.items() for item in pair], client=pipe)
+            pipe.execute()
+        except redis.RedisError as e:
+            self._failed(e)
+
+    def metrics(self, name: str) -> dict:
+        try:
+            raw = self.client.hgetall(f"{self.prefix}metrics:{name}")
+        except redis.RedisError as e:
+            self._failed(e)
+            return {}
+        return {field.decode(): float(value) for field, value in raw.items()}
+
+    def load_state(self, name: str) -> Optional[dict]:
+        try:
+            state = self.client.get(f"{self.prefix}state:{name}")
+        except redis.RedisError as e:
+            self._failed(e)
+            raise
+        return None if state is None else json.loads(state)
+
+    def save_state(self, name: str, state: dict):
+        try:
+            self.client.set(f"{self.prefix}state:{name}", json.dumps(state))
+        except redis.RedisError as e:
+            self._failed(e)
+            raise
+
+    def stats(self) -> dict:
+        tasks = {}
+        try:
+            for key in self.client.scan_iter(match=f"{self.prefix}metrics:*"):
+                name = key.decode()[len(f"{self.prefix}metrics:"):]
+                tasks[name] = self.metrics(name)
+        except redis.RedisError as e:
+            self._failed(e)
+        return {"backend": "redis", "connected": self.connected, "tasks": tasks}
+
+
+class TickGuard:
+    """Runs scheduled ticks one at a time per task name, applying the overlap policy and recording metrics"""
+
+    def __init__(self, store, policy: str = "skip", ttl: float = 60.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown TICK_OVERLAP_POLICY '{policy}' - expected skip or coalesce")
+        self.store = store
+        self.policy = policy
+        self.ttl = ttl
+
+    def begin(self, name: str, interval: float, ttl: Optional[float] = None) -> Optional[Lease]:
+        """Take the lease for a tick of `name`; None means another tick is running and this one must not"""
+        ttl = ttl or self.ttl
+        token = self.store.acquire(name, ttl)
+
+        if token is None:
+            if self.policy == "coalesce":
+                self.store.request_rerun(name, ttl)
+                self.store.record(name, counters={"coalesced": 1})
+            else:
+                self.store.record(name, counters={"skipped": 1})
+            print(f"⏭️  {name}: previous tick still running, {'coalesced' if self.policy == 'coalesce' else 'skipped'}")
+            return None
+
+        started = time.time()
+        previous = self.store.metrics(name).get("last_started")
+        lag = max(0.0, started - previous - interval) if previous else 0.0
+        self.store.record(name, timings={"lag": lag}, marks={"last_started": started, "interval": interval})
+        return Lease(name=name, token=token, started=started)
+
+    def end(self, lease: Lease) -> bool:
+        """Release a tick's lease; True when a coalesced catch-up tick should be enqueued now"""
+        duration = time.time() - lease.started
+        interval = self.store.metrics(lease.name).get("interval", 0.0)
+        counters = {"ran": 1}
+        if interval and duration > interval:
+            counters["overruns"] = 1
+        self.store.record(lease.name, counters=counters, timings={"duration": duration})
+        self.store.release(lease.name, lease.token)
+
+        if self.policy == "coalesce" and self.store.take_rerun(lease.name):
+            self.store.record(lease.name, counters={"catch_ups": 1})
+            return True
+        return False
+
+    def load_state(self, name: str) -> Optional[dict]:
+        """State the last tick of `name` saved, None before the first one"""
+        return self.store.load_state(name)
+
+    def save_state(self, name: str, state: dict):
+        """Save JSON-serializable state for the next tick of `name`, on whichever process runs it"""
+        self.store.save_state(name, state)
+
+    def stats(self) -> dict:
+        return {"policy": self.policy, "lease_ttl": self.ttl, **self.store.stats()}
+
+
+def build_store(backend: str):
+    if backend == "memory":
+        return MemoryLeaseStore()
+    if backend == "redis":
+        return RedisLeaseStore(settings.REDIS_URL)
+    raise ValueError(f"Unknown TICK_LEASE_BACKEND '{backend}' - expected memory or redis")
+
+
+def lease_backend() -> str:
+    """TICK_LEASE_BACKEND, defaulting to in-process leases for the brokerless embedded scheduler"""
+    return settings.TICK_LEASE_BACKEND or ("memory" if settings.SCHEDULER == "embedded" else "redis")
+
+
+tick_guard = TickGuard(build_store(lease_backend()), settings.TICK_OVERLAP_POLICY, settings.TICK_LEASE_TTL)
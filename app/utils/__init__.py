@@ -1,9 +1,10 @@
-from .auth import get_password_hash, verify_password, create_access_token, create_refresh_token, get_current_user
+from .auth import get_password_hash, verify_password, create_access_token, create_refresh_token, get_current_user, get_current_principal
 
 __all__ = [
     "get_password_hash",
     "verify_password",
     "create_access_token",
     "create_refresh_token",
-    "get_current_user"
+    "get_current_user",
+    "get_current_principal"
 ]
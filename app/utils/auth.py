@@ -1,18 +1,19 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models import User
 from app.schemas.user import TokenData
-
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.utils.password_pool import pwd_context, password_pool
+from app.utils.principal_cache import Principal, principal_cache
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
@@ -64,7 +65,7 @@ def decode_token(token: str) -> TokenData:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        return TokenData(user_id=int(user_id))
+        return TokenData(user_id=int(user_id), exp=payload.get("exp"))
 
     except JWTError:
         raise HTTPException(
@@ -74,14 +75,20 @@ def decode_token(token: str) -> TokenData:
         )
 
 
-async def get_current_user(
+def get_current_principal(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token"""
+) -> Principal:
+    """
+    Get the authenticated principal, from the token cache when this token was seen recently
+    Use this for access checks; routes that need live user data (e.g. balance) use get_current_user
+    """
     token = credentials.credentials
-    token_data = decode_token(token)
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
 
+    token_data = decode_token(token)
     user = db.query(User).filter(User.id == token_data.user_id).first()
 
     if user is None:
@@ -91,17 +98,98 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    return principal_cache.put(token, user, token_data)
+
+
+async def get_current_principal_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Async variant of get_current_principal for the async route handlers"""
+    token = credentials.credentials
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    token_data = decode_token(token)
+    user = await db.get(User, token_data.user_id)
+
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return principal_cache.put(token, user, token_data)
+
+
+def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Get current authenticated user row from the database (fresh balance)
+    Plain def on purpose: FastAPI runs it in the threadpool, so the blocking query stays off the event loop
+    """
+    user = db.query(User).filter(User.id == principal.id).first()
+
+    if user is None:
+        principal_cache.invalidate_user(principal.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return user
+
+
+async def get_current_user_async(
+    principal: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Get current authenticated user row from the database using the async session"""
+    result = await db.execute(select(User).where(User.id == principal.id))
+    user = result.scalar_one_or_none()
+
+    if user is None:
+        principal_cache.invalidate_user(principal.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return user
+
+
+async def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+    """
+    Authenticate a user by email and password
+    The lookup runs in the threadpool and bcrypt in the password pool, so neither blocks the event loop
+    """
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email == email).first())
+
+    if not user:
+        return None
+
+    if not await password_pool.verify(password, user.hashed_password):
+        return None
+
     return user
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-    """Authenticate a user by email and password"""
-    user = db.query(User).filter(User.email == email).first()
+async def authenticate_user_async(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    """Authenticate a user by email and password using the async session"""
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalar_one_or_none()
 
     if not user:
         return None
 
-    if not verify_password(password, user.hashed_password):
+    # bcrypt is CPU-bound; run it in the password pool
+    if not await password_pool.verify(password, user.hashed_password):
         return None
 
     return user
@@ -0,0 +1,71 @@
+"""
+Fixed-point amounts: integer units of 1e-8, the scale of every DECIMAL(20, 8) column
+
+Hot paths (the price walk, alert checks, order fills, trades, portfolio valuation) compute in
+plain ints instead of Decimal: 12.5 is 1_250_000_000 units. Values are converted once where they
+come in (database rows, request bodies) and converted back with from_units() where they go out,
+so API responses and stored columns are unchanged.
+
+Products and quotients are exact until the one rounding step back to units, which is half-even
+like Decimal.quantize() in schemas.fields. Sums of products can stay at the product scale
+(SCALE ** 2) and round once with round_units(), matching a Decimal sum that is quantized at the end.
+"""
+from decimal import Decimal
+from typing import Tuple, Union
+
+SCALE = 10 ** 8  # units per 1
+HALF = SCALE // 2
+QUANTUM = Decimal(1).scaleb(-8)  # one unit as a Decimal, 0.00000001
+
+Number = Union[Decimal, int, str]
+
+
+def to_units(value: Number) -> int:
+    """Decimal (or int / numeric string) -> units, rounding beyond 8 decimals half-even"""
+    if isinstance(value, int):
+        return value * SCALE
+    return int(Decimal(value).scaleb(8).to_integral_value())
+
+
+def from_units(units: int) -> Decimal:
+    """Units -> Decimal with exactly 8 decimals"""
+    return Decimal(int(units)).scaleb(-8)
+
+
+def divide(numerator: int, denominator: int) -> int:
+    """numerator / denominator rounded half-even to an int"""
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient & 1):
+        quotient += 1
+    return quotient
+
+
+def round_units(product: int) -> int:
+    """A product of two unit values (scale SCALE ** 2) rounded back to units"""
+    # divide() inlined for the fixed SCALE: these run once per value on every tick
+    quotient, remainder = divmod(product, SCALE)
+    if remainder > HALF or (remainder == HALF and quotient & 1):
+        quotient += 1
+    return quotient
+
+
+def mul(a: int, b: int) -> int:
+    """a * b for two unit values, e.g. price * quantity"""
+    return round_units(a * b)
+
+
+def float_ratio(value: float) -> Tuple[int, int]:
+    """
+    The float's shortest repr (what Decimal(str(value)) reads) as an exact fraction: (numerator, 10 ** k)
+    Lets float inputs such as random variations enter integer math with the same value Decimal saw
+    """
+    mantissa, _, exponent = repr(value).partition("e")
+    whole, _, fraction = mantissa.partition(".")
+    numerator = int(whole + fraction)
+    places = len(fraction) - int(exponent or 0)
+    if places < 0:
+        return numerator * 10 ** -places, 1
+    return numerator, 10 ** places
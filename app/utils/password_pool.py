@@ -0,0 +1,149 @@
+"""
+bcrypt hashing and verification in a dedicated process pool
+
+bcrypt is deliberately slow CPU work (~0.25s per call at the default cost). Run inline in a
+request handler it holds a threadpool thread and the GIL for that long, so a burst of logins
+starves every other sync route. PasswordPool runs it in PASSWORD_HASH_WORKERS separate
+processes behind an async API instead; callers only await the result.
+
+At most PASSWORD_HASH_MAX_PENDING operations may be in flight (running or queued). Beyond that
+new logins and registrations get 503 + Retry-After straight away rather than piling up, which
+keeps a login storm from eating the memory and latency budget of the rest of the API.
+Queue depth and timings are reported by stats().
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.config import settings
+
+# Password hashing context
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    """Hash a password (runs inside a pool worker)"""
+    return pwd_context.hash(password)
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash (runs inside a pool worker)"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordPool:
+    """Bounded process pool for bcrypt with an async API and queue-depth metrics"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the API process runs threads (listeners, pools) that fork would copy mid-flight
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _admit(self, count: int, enforce_limit: bool = True):
+        with self._lock:
+            if enforce_limit and self.in_flight + count > self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many authentication requests, please retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.in_flight += count
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _release(self, count: int, started: float):
+        with self._lock:
+            self.in_flight -= count
+            self.completed += count
+            self.total_seconds += time.perf_counter() - started
+
+    def _reset_if_broken(self, executor: ProcessPoolExecutor):
+        """A worker died (e.g. OOM-killed): start a fresh pool on the next call"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    async def _run(self, fn, *args):
+        self._admit(1)
+        started = time.perf_counter()
+        executor = self._get_executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            self._reset_if_broken(executor)
+            raise
+        finally:
+            self._release(1, started)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop or a threadpool thread"""
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop or a threadpool thread"""
+        return await self._run(check_password, plain_password, hashed_password)
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        Hash a batch across all workers and block until done (for scripts such as seed_data.py)
+        Counted in the queue depth but never rejected
+        """
+        if not passwords:
+            return []
+
+        self._admit(len(passwords), enforce_limit=False)
+        started = time.perf_counter()
+        executor = self._get_executor()
+        try:
+            return list(executor.map(hash_password, passwords))
+        except BrokenProcessPool:
+            self._reset_if_broken(executor)
+            raise
+        finally:
+            self._release(len(passwords), started)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "queued": max(0, self.in_flight - self.workers),
+                "peak_in_flight": self.peak_in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": round(self.total_seconds / self.completed * 1000, 3) if self.completed else 0.0,
+            }
+
+
+password_pool = PasswordPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
@@ -0,0 +1,154 @@
+"""
+Cache of authenticated principals keyed by bearer token
+
+Verifying a JWT and loading the user row costs a signature check plus a SELECT on `users` for
+every request, even when the same token was verified a moment ago. PrincipalCache keeps the
+decoded claims and a small snapshot of the user (id, name, email) for PRINCIPAL_CACHE_TTL
+seconds, never past the token's own expiry, in a bounded LRU.
+
+The snapshot deliberately leaves out the balance: paths that depend on it (trading, /me) still
+read the row. Entries for a user are dropped whenever their name, email or password change or
+the user is deleted, via ORM events, so a changed account is re-checked on its next request.
+Tokens are stored as SHA-256 digests, never in the clear.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+from sqlalchemy import event, inspect
+
+from app.config import settings
+from app.models import User
+from app.schemas.user import TokenData
+
+SNAPSHOT_FIELDS = ("name", "email", "hashed_password")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Lightweight snapshot of an authenticated user"""
+    id: int
+    name: str
+    email: str
+
+
+class _Entry:
+    def __init__(self, principal: Principal, expires_at: float):
+        self.principal = principal
+        self.expires_at = expires_at
+
+
+class PrincipalCache:
+    """Bounded TTL + LRU map of token digest -> Principal (user id claim plus snapshot)"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, _Entry]" = OrderedDict()
+        self._by_user: Dict[int, Set[bytes]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def _drop(self, key: bytes):
+        entry = self._entries.pop(key)
+        tokens = self._by_user.get(entry.principal.id)
+        if tokens is not None:
+            tokens.discard(key)
+            if not tokens:
+                del self._by_user[entry.principal.id]
+
+    def get(self, token: str) -> Optional[Principal]:
+        """Cached principal for a token, or None if unknown or expired"""
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.time():
+                self._drop(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.principal
+
+    def peek(self, token: str) -> Optional[Principal]:
+        """Like get(), but leaves the hit/miss counters and LRU order alone (for middleware)"""
+        with self._lock:
+            entry = self._entries.get(self._key(token))
+            if entry is None or entry.expires_at <= time.time():
+                return None
+            return entry.principal
+
+    def put(self, token: str, user: User, claims: TokenData) -> Principal:
+        """Remember a verified token; returns the snapshot to hand to the route"""
+        principal = Principal(id=user.id, name=user.name, email=user.email)
+        expires_at = time.time() + self.ttl
+        if claims.exp is not None:
+            expires_at = min(expires_at, claims.exp)
+
+        key = self._key(token)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(principal, expires_at)
+            self._by_user.setdefault(user.id, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+        return principal
+
+    def invalidate_user(self, user_id: int):
+        """Forget every cached token of a user"""
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._drop(key)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "users": len(self._by_user),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    """Drop cached principals when identity fields change (balance updates keep them)"""
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in SNAPSHOT_FIELDS):
+        principal_cache.invalidate_user(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
@@ -0,0 +1,35 @@
+"""
+Direct-to-bytes JSON responses for the Decimal-heavy list endpoints
+
+Returning ORM rows with a response_model makes FastAPI validate them into models, dump those to
+Python dicts and then run the dicts through the stdlib json encoder, which dominates CPU time
+for long lists. json_response validates and serializes in one go with pydantic-core, so the
+bytes are produced without building intermediate dicts. Output is identical to the
+response_model path (Decimals as fixed-scale strings, see app.schemas.fields).
+"""
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def dump_json(schema: Any, content: Any) -> bytes:
+    """Serialize ORM objects (or models) to JSON bytes as `schema`, e.g. List[HoldingResponse]"""
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def json_response(schema: Any, content: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """Response with `content` serialized as `schema`, bypassing FastAPI's response_model encoding"""
+    return Response(
+        content=dump_json(schema, content),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers
+    )
@@ -1,6 +1,7 @@
 import asyncio
 import json
-from typing import List
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
 
@@ -42,23 +43,32 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 
-async def get_market_data(db: Session) -> dict:
-    """Fetch current market data from database"""
-    markets = db.query(Market).all()
-
-    market_data = {
+def build_market_data(markets: Iterable[Tuple[int, str, Decimal]]) -> dict:
+    """Stream message for (id, symbol, price) triples"""
+    return {
         "timestamp": asyncio.get_event_loop().time(),
         "markets": [
             {
-                "id": market.id,
-                "symbol": market.symbol,
-                "price": float(market.current_price),
+                "id": market_id,
+                "symbol": symbol,
+                "price": float(price),
             }
-            for market in markets
+            for market_id, symbol, price in markets
         ]
     }
 
-    return market_data
+
+async def get_market_data(db: Session) -> dict:
+    """Fetch current market data from database"""
+    markets = db.query(Market).all()
+    return build_market_data((market.id, market.symbol, market.current_price) for market in markets)
+
+
+async def broadcast_prices(prices: Dict[int, Tuple[str, Decimal]]):
+    """Push a price tick (market_id -> (symbol, price)) straight to every client, without a database poll"""
+    if manager.active_connections:
+        markets = ((market_id, symbol, price) for market_id, (symbol, price) in prices.items())
+        await manager.broadcast(json.dumps(build_market_data(markets)))
 
 
 async def market_data_streamer():
@@ -0,0 +1,126 @@
+"""
+Load benchmark: sync route handlers vs the async (ASYNC_ROUTES) handlers
+
+Runs both router sets in-process against the same throwaway SQLite database and fires
+concurrent requests at the read-heavy endpoints. Reports p50/p99 latency per endpoint and
+the p99 event loop lag seen by a probe coroutine (a stand-in for the WebSocket streamer).
+
+Run with: python -m benchmarks.bench_async_routes [requests] [concurrency]
+"""
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+
+import asyncio  # noqa: E402
+import contextlib  # noqa: E402
+import statistics  # noqa: E402
+import time  # noqa: E402
+from decimal import Decimal  # noqa: E402
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from app.database import SessionLocal, init_db  # noqa: E402
+from app.models import User, Market, Holding  # noqa: E402
+from app.routers import aio, auth_router, markets_router, holdings_router, alerts_router, portfolio_router  # noqa: E402
+from app.utils.auth import create_access_token  # noqa: E402
+
+ENDPOINTS = ["/api/markets/", "/api/users/1/portfolio", "/api/holdings/user/1", "/api/auth/me"]
+
+
+def seed():
+    """Create one user with a holding in each of 50 markets"""
+    init_db()
+    db = SessionLocal()
+    try:
+        user = User(name="Bench", email="bench@example.com", hashed_password="x", balance=Decimal("10000"))
+        db.add(user)
+        markets = [Market(symbol=f"C{i}/USDT", current_price=Decimal("100.5")) for i in range(50)]
+        db.add_all(markets)
+        db.flush()
+        db.add_all([
+            Holding(user_id=user.id, market_id=market.id, quantity=Decimal("1.5"), avg_buy_price=Decimal("90"))
+            for market in markets
+        ])
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def build_app(routers) -> FastAPI:
+    app = FastAPI()
+    for router in routers:
+        app.include_router(router)
+    return app
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def probe_loop_lag(samples, stop: asyncio.Event):
+    """Measure how late a 1ms sleep wakes up - blocking calls on the loop show up here"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        samples.append((time.perf_counter() - started - 0.001) * 1000)
+
+
+async def run(app: FastAPI, token: str, total: int, concurrency: int):
+    latencies = {endpoint: [] for endpoint in ENDPOINTS}
+    lag_samples = []
+    stop = asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(i):
+            endpoint = ENDPOINTS[i % len(ENDPOINTS)]
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(endpoint, headers=headers)
+                latencies[endpoint].append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.text
+
+        probe = asyncio.create_task(probe_loop_lag(lag_samples, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+
+    return latencies, lag_samples, elapsed
+
+
+async def main(total: int, concurrency: int):
+    user_id = seed()
+    token = create_access_token(data={"sub": str(user_id)})
+
+    variants = {
+        "sync": build_app([auth_router, markets_router, holdings_router, alerts_router, portfolio_router]),
+        "async": build_app([aio.auth_router, aio.markets_router, aio.holdings_router, aio.alerts_router, aio.portfolio_router]),
+    }
+
+    print(f"⚡ Route benchmark: {total} requests, concurrency {concurrency}")
+    for name, app in variants.items():
+        # Silence handler prints so terminal I/O does not skew the numbers
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            await run(app, token, min(total, 200), concurrency)  # warm up pools and caches
+            latencies, lag, elapsed = await run(app, token, total, concurrency)
+        print(f"\n  [{name}] {total / elapsed:,.0f} req/s, loop lag p99 {percentile(lag, 0.99):.2f} ms")
+        for endpoint, values in latencies.items():
+            print(
+                f"    {endpoint:<26} p50 {statistics.median(values):7.2f} ms   "
+                f"p99 {percentile(values, 0.99):7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(main(total, concurrency))
@@ -0,0 +1,97 @@
+"""
+Benchmark the streaming export pipeline
+
+Seeds a throwaway SQLite database with one heavy trader and measures export throughput
+(rows/s) and peak Python memory for NDJSON and CSV at increasing row counts. Peak memory
+should stay flat as the row count grows.
+
+Run with: python -m benchmarks.bench_export [rows ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import User, Market, TransactionLog
+from app.services.export import (
+    TRANSACTION_FIELDS,
+    encode_csv,
+    encode_ndjson,
+    iter_row_chunks,
+    transaction_chunk_fetcher
+)
+
+
+def seed(session_factory, row_count: int) -> int:
+    """Insert one user with row_count transactions, return the user id"""
+    db = session_factory()
+    try:
+        user = User(name="Bench", email="bench@example.com", hashed_password="x", balance=Decimal("0"))
+        market = Market(symbol="BTC/USDT", current_price=Decimal("60000"))
+        db.add_all([user, market])
+        db.commit()
+
+        start = datetime(2024, 1, 1)
+        batch = []
+        for i in range(row_count):
+            batch.append({
+                "user_id": user.id,
+                "market_id": market.id,
+                "type": "buy" if i % 2 == 0 else "sell",
+                "price": Decimal("60000.12345678"),
+                "quantity": Decimal("0.01000000"),
+                "total_amount": Decimal("600.00123457"),
+                "timestamp": start + timedelta(seconds=i),
+            })
+            if len(batch) == 10000:
+                db.execute(insert(TransactionLog), batch)
+                batch = []
+        if batch:
+            db.execute(insert(TransactionLog), batch)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def run(row_count: int):
+    """Benchmark both formats against a fresh database holding row_count transactions"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        user_id = seed(session_factory, row_count)
+
+        for name, encoder in (("ndjson", encode_ndjson), ("csv", encode_csv)):
+            tracemalloc.start()
+            started = time.perf_counter()
+            total_bytes = 0
+
+            chunks = iter_row_chunks(transaction_chunk_fetcher(user_id), session_factory=session_factory)
+            for blob in encoder(chunks, TRANSACTION_FIELDS):
+                total_bytes += len(blob)
+
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(
+                f"  {name:<6} {row_count:>9,} rows  {row_count / elapsed:>10,.0f} rows/s  "
+                f"{total_bytes / 1e6:>8.1f} MB out  peak {peak / 1e6:>6.2f} MB"
+            )
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print("📤 Streaming export benchmark")
+    for size in sizes:
+        run(size)
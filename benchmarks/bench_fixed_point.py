@@ -0,0 +1,117 @@
+"""
+Benchmark the hot-path arithmetic in Decimal against fixed-point integer units
+
+Times the same inputs both ways, without a database, so only the arithmetic is compared:
+- walk:      one random-walk step per price (the seeded walk quantizes to 8 decimals every step)
+- alerts:    comparing the tick's prices against alert targets
+- portfolio: P&L per holding and the total value
+- trade:     balance check, new balance and average buy price of a buy
+Inputs are converted to units before timing and results back to Decimal after it, as they are at
+the API and database boundary; each result is checked against the other before its timing is printed.
+
+Run with: python -m benchmarks.bench_fixed_point [n]
+"""
+import random
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_EVEN
+
+from app.config import settings
+from app.services.price_sources import next_price
+from app.utils.fixed_point import QUANTUM, SCALE, divide, from_units, mul, round_units, to_units
+
+MIN_PRICE = Decimal("0.00000001")
+
+
+def decimal_next_price(current_price: Decimal, rng) -> Decimal:
+    """The Decimal walk step, quantized like the seeded walk did"""
+    variation_percent = rng.uniform(0.1, 2.0)
+    direction = rng.choice([1, -1])
+    new_price = current_price + current_price * Decimal(str(variation_percent / 100)) * direction
+    if new_price < MIN_PRICE:
+        new_price = current_price * Decimal("0.99")
+    return max(new_price.quantize(QUANTUM, ROUND_HALF_EVEN), MIN_PRICE)
+
+
+def timed(label: str, decimal_run, units_run, convert=lambda result: result):
+    started = time.perf_counter()
+    expected = decimal_run()
+    decimal_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = units_run()
+    units_seconds = time.perf_counter() - started
+    assert convert(actual) == expected, f"{label}: fixed-point result differs from Decimal"
+    print(f"  {label:<9} {decimal_seconds * 1000:9.1f} ms (Decimal)  vs {units_seconds * 1000:9.1f} ms (units): "
+          f"{decimal_seconds / units_seconds:.1f}x")
+
+
+def main(n: int):
+    print(f"⚡ Fixed-point benchmark: {n:,} values per operation")
+    rng = random.Random(42)
+    prices = [Decimal(rng.randint(1, 10 ** 14)).scaleb(-8) for _ in range(n)]
+    targets = [Decimal(rng.randint(1, 10 ** 14)).scaleb(-8) for _ in range(n)]
+    quantities = [Decimal(rng.randint(1, 10 ** 10)).scaleb(-8) for _ in range(n)]
+    price_units = [to_units(price) for price in prices]
+    target_units = [to_units(target) for target in targets]
+    quantity_units = [to_units(quantity) for quantity in quantities]
+
+    # The variation settings only feed rng.uniform, so pin them to the range decimal_next_price uses
+    settings.PRICE_VARIATION_MIN, settings.PRICE_VARIATION_MAX = 0.1, 2.0
+    # Both walks draw the same variations from identically seeded generators
+    timed(
+        "walk",
+        lambda: [decimal_next_price(price, walk_rng) for walk_rng in [random.Random(7)] for price in prices],
+        lambda: [next_price(units, walk_rng) for walk_rng in [random.Random(7)] for units in price_units],
+        lambda walked: [from_units(units) for units in walked]
+    )
+    timed(
+        "alerts",
+        lambda: sum(price >= target for price, target in zip(prices, targets)),
+        lambda: sum(price >= target for price, target in zip(price_units, target_units))
+    )
+
+    def decimal_portfolio():
+        pnl = [((price - target) * quantity).quantize(QUANTUM, ROUND_HALF_EVEN)
+               for price, target, quantity in zip(prices, targets, quantities)]
+        total = sum((price * quantity for price, quantity in zip(prices, quantities)), Decimal("0"))
+        return pnl, total.quantize(QUANTUM, ROUND_HALF_EVEN)
+
+    def units_portfolio():
+        pnl = [mul(price - target, quantity) for price, target, quantity in zip(price_units, target_units, quantity_units)]
+        total = sum(price * quantity for price, quantity in zip(price_units, quantity_units))
+        return pnl, round_units(total)
+
+    timed("portfolio", decimal_portfolio, units_portfolio,
+          lambda result: ([from_units(units) for units in result[0]], from_units(result[1])))
+
+    balance, held, avg_buy_price = Decimal("1e9"), Decimal("1.5"), Decimal("100")
+
+    def decimal_trades():
+        results = []
+        for price, quantity in zip(prices, quantities):
+            total_amount = price * quantity
+            if balance < total_amount:
+                continue
+            avg = (avg_buy_price * held + total_amount) / (held + quantity)
+            results.append(((balance - total_amount).quantize(QUANTUM, ROUND_HALF_EVEN),
+                            avg.quantize(QUANTUM, ROUND_HALF_EVEN)))
+        return results
+
+    balance_units, held_units, avg_units = to_units(balance), to_units(held), to_units(avg_buy_price)
+
+    def units_trades():
+        results = []
+        for price, quantity in zip(price_units, quantity_units):
+            cost = price * quantity
+            if balance_units * SCALE < cost:
+                continue
+            avg = divide(avg_units * held_units + cost, held_units + quantity)
+            results.append((round_units(balance_units * SCALE - cost), avg))
+        return results
+
+    timed("trade", decimal_trades, units_trades,
+          lambda result: [(from_units(new_balance), from_units(avg)) for new_balance, avg in result])
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,125 @@
+"""
+Benchmark holdings verification: full log replay against replay from checkpoints
+
+Seeds a throwaway SQLite database with U users, each with T logged trades over M markets, and
+the live holdings and balances those trades produce. It then reports:
+- full:       verify every user by replaying the whole log (no checkpoints yet)
+- checkpoint: write the first checkpoint of every user
+- tail:       verify again after each user made a few more trades, replaying only those
+- workers:    the tail verification with 1 and with SNAPSHOT_WORKERS parallel batches
+
+Run with: python -m benchmarks.bench_holding_snapshots [users] [trades_per_user] [markets]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import Base
+from app.db_sharding import ShardSet
+from app.models import Holding, Market, TransactionLog, User
+from app.services import holding_snapshots
+from app.services.cold_storage import ColdStore
+from app.services.holding_snapshots import Ledger, run
+from app.utils.fixed_point import from_units, mul, to_units
+
+TAIL_TRADES = 3
+# SQLite stores DECIMAL columns as doubles: keep balances within ~15 significant digits
+OPENING_BALANCE = to_units(10 ** 6)
+
+
+def trades(rng, users, count: int, markets: int, ledgers: dict, start: datetime) -> list:
+    """Random buys, and sells of part of a position, applied to `ledgers` as they are logged"""
+    rows = []
+    for user_id in users:
+        ledger = ledgers[user_id]
+        for i in range(count):
+            market_id = rng.randint(1, markets)
+            price = to_units(Decimal(rng.randint(100, 10000)))
+            held = ledger.positions.get(market_id, (0, 0))[0]
+            type = "sell" if held and rng.random() < 0.3 else "buy"
+            quantity = rng.randint(1, held) if type == "sell" else to_units(Decimal("0.01")) * rng.randint(1, 100)
+            total_amount = mul(price, quantity)
+            rows.append({"user_id": user_id, "market_id": market_id, "type": type, "price": from_units(price),
+                         "quantity": from_units(quantity), "total_amount": from_units(total_amount),
+                         "timestamp": start + timedelta(seconds=i), "_units": (price, quantity, total_amount)})
+    return rows
+
+
+def log(db: Session, rows: list, ledgers: dict):
+    db.execute(insert(TransactionLog.__table__), [{k: v for k, v in row.items() if k != "_units"} for row in rows])
+    ids = [transaction_id for (transaction_id,) in db.query(TransactionLog.id).order_by(TransactionLog.id.desc()).limit(len(rows))]
+    for transaction_id, row in zip(sorted(ids), rows):
+        ledgers[row["user_id"]].apply(transaction_id, row["type"], row["market_id"], *row["_units"])
+
+
+def write_live_state(db: Session, ledgers: dict):
+    db.query(Holding).delete()
+    db.execute(insert(Holding.__table__), [
+        {"user_id": user_id, "market_id": market_id, "quantity": from_units(quantity), "avg_buy_price": from_units(avg)}
+        for user_id, ledger in ledgers.items() for market_id, (quantity, avg) in ledger.positions.items()
+    ])
+    for user_id, ledger in ledgers.items():
+        db.query(User).filter(User.id == user_id).update({User.balance: from_units(ledger.balance)})
+
+
+def timed(label: str, mode: str, **kwargs) -> dict:
+    started = time.perf_counter()
+    report = run(mode, **kwargs)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<10} {elapsed:7.2f}s  {report['replayed']:>9,} transactions replayed "
+          f"({report['users'] / elapsed:,.0f} users/s), {report['checkpoints']:,} checkpoints, {len(report['drift'])} drift")
+    return report
+
+
+def main(users: int, per_user: int, markets: int):
+    print(f"⚡ Holdings replay benchmark: {users:,} users x {per_user} trades over {markets} markets")
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'ledger.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        holding_snapshots.shards = ShardSet(engine, [])
+        store = ColdStore(tmp)
+        holding_snapshots.cold_store_for_shard = lambda shard_id: store
+        settings.SNAPSHOT_SETTLE_SECONDS = 0
+
+        user_ids = list(range(1, users + 1))
+        ledgers = {user_id: Ledger(balance=OPENING_BALANCE) for user_id in user_ids}
+        started = time.perf_counter()
+        with Session(bind=engine) as db:
+            db.execute(insert(User.__table__), [
+                {"id": i, "name": f"u{i}", "email": f"u{i}@example.com", "hashed_password": "x", "balance": from_units(OPENING_BALANCE)}
+                for i in user_ids
+            ])
+            db.execute(insert(Market.__table__), [
+                {"id": i, "symbol": f"C{i}/USDT", "current_price": Decimal("100")} for i in range(1, markets + 1)
+            ])
+            log(db, trades(rng, user_ids, per_user, markets, ledgers, datetime(2024, 1, 1)), ledgers)
+            write_live_state(db, ledgers)
+            db.commit()
+        print(f"  seeded in {time.perf_counter() - started:.1f}s")
+
+        timed("full", "verify")
+        timed("checkpoint", "checkpoint")
+
+        with Session(bind=engine) as db:
+            log(db, trades(rng, user_ids, TAIL_TRADES, markets, ledgers, datetime(2024, 6, 1)), ledgers)
+            write_live_state(db, ledgers)
+            db.commit()
+        timed("tail", "verify")
+        timed("tail x1", "verify", workers=1)
+        timed(f"tail x{settings.SNAPSHOT_WORKERS}", "verify", workers=settings.SNAPSHOT_WORKERS)
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    markets = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    main(users, per_user, markets)
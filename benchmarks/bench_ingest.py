@@ -0,0 +1,81 @@
+"""
+Benchmark sustained tick ingestion through the price source write path
+
+Writes a recorded-data file of N ticks spread over M symbols, then replays it unpaced
+(speed 0) into a throwaway SQLite database at several batch sizes and reports ticks/s.
+Each run starts from an empty database, so the first batch also creates the markets.
+A per-tick baseline (one transaction per tick, as with one API call per price) is timed on
+a slice of the file for comparison.
+
+Run with: python -m benchmarks.bench_ingest [ticks] [symbols]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.services.market_directory import market_directory
+from app.services.price_sources import ReplaySource, read_ticks, run_source
+
+BATCH_SIZES = (100, 1000, 5000)
+BASELINE_TICKS = 2000
+
+
+def write_recording(path: str, ticks: int, symbols: int):
+    """NDJSON random walk: one tick every 10ms, round-robin over the symbols"""
+    rng = random.Random(42)
+    prices = [rng.uniform(1, 1000) for _ in range(symbols)]
+    start = datetime(2024, 1, 1)
+
+    with open(path, "w") as f:
+        for i in range(ticks):
+            s = i % symbols
+            prices[s] *= 1 + rng.uniform(-0.01, 0.01)
+            f.write(json.dumps({
+                "symbol": f"C{s}/USDT",
+                "price": f"{prices[s]:.8f}",
+                "timestamp": (start + timedelta(milliseconds=10 * i)).isoformat(),
+                "volume": f"{rng.uniform(0, 5):.4f}",
+            }) + "\n")
+
+
+def fresh_database(tmp: str, name: str):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, name)}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def main(ticks: int, symbols: int):
+    market_directory.publish = None  # no other processes to tell about new symbols
+    print(f"⚡ Tick ingest benchmark: {ticks} ticks over {symbols} symbols, replayed at speed 0")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ticks.ndjson")
+        write_recording(path, ticks, symbols)
+
+        started = time.perf_counter()
+        parsed = sum(1 for _ in read_ticks(path))
+        print(f"  parse only        {parsed / (time.perf_counter() - started):12,.0f} ticks/s")
+
+        session_factory = fresh_database(tmp, "baseline.db")
+        single = [[tick] for _, tick in zip(range(BASELINE_TICKS), read_ticks(path))]
+        stats = run_source(single, session_factory=session_factory)
+        print(f"  1 tick / commit   {stats['ticks_per_second']:12,.0f} ticks/s   ({stats['ticks']} ticks)")
+
+        for batch_size in BATCH_SIZES:
+            session_factory = fresh_database(tmp, f"batch{batch_size}.db")
+            stats = run_source(ReplaySource(path, speed=0, batch_size=batch_size), session_factory=session_factory)
+            print(f"  batch {batch_size:<6}      {stats['ticks_per_second']:12,.0f} ticks/s   "
+                  f"({stats['batches']} commits, {stats['seconds']}s)")
+
+
+if __name__ == "__main__":
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    symbols = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    main(ticks, symbols)
@@ -0,0 +1,154 @@
+"""
+Benchmark tick matching against a large number of resting orders
+
+Seeds a throwaway SQLite database with N resting limit/stop orders (default 1,000,000) spread
+over M markets and U users. Orders sit within 5% of a start price of 100 and users hold
+enough balance and coins for every fill; no order is crossed at the start. It then reports:
+- sync:  loading every open order from the database into the in-memory ladders (what a fresh
+         worker does on its first tick), plus the ladders' memory use
+- match: per-tick cost of finding the crossed orders while the prices random-walk ±0.5% a tick,
+         compared with a plain scan that checks every resting order
+- fill:  one batch settlement (claim, balances, holdings, transaction log) in a single transaction
+
+Run with: python -m benchmarks.bench_orders [orders] [markets] [users]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Holding, Market, Order, User
+from app.services.order_book import OrderBooks, ladder_of, settle_fills
+from app.utils.fixed_point import to_units
+
+TICKS = 20
+SEED_CHUNK = 50000
+
+
+def seed(session_factory, orders: int, markets: int, users: int):
+    rng = random.Random(42)
+    db = session_factory()
+    try:
+        db.execute(insert(User.__table__), [
+            {"id": i, "name": f"u{i}", "email": f"u{i}@example.com", "hashed_password": "x", "balance": Decimal("1e9")}
+            for i in range(1, users + 1)
+        ])
+        db.execute(insert(Market.__table__), [
+            {"id": i, "symbol": f"C{i}/USDT", "current_price": Decimal("100")} for i in range(1, markets + 1)
+        ])
+        db.execute(insert(Holding.__table__), [
+            {"user_id": u, "market_id": m, "quantity": Decimal("1e6"), "avg_buy_price": Decimal("100")}
+            for u in range(1, users + 1) for m in range(1, markets + 1)
+        ])
+
+        def order() -> dict:
+            side, type = rng.choice(("buy", "sell")), rng.choice(("limit", "stop"))
+            # Not crossed yet: buy limits and sell stops wait below the price, the others above it
+            low, high = (95, 100) if ladder_of(side, type) == 0 else (100, 105)
+            return {
+                "user_id": rng.randint(1, users),
+                "market_id": rng.randint(1, markets),
+                "side": side,
+                "type": type,
+                "price": Decimal(f"{rng.uniform(low, high):.8f}"),
+                "quantity": Decimal("0.1"),
+                "status": "open",
+            }
+
+        for start in range(0, orders, SEED_CHUNK):
+            db.execute(insert(Order.__table__), [order() for _ in range(start, min(orders, start + SEED_CHUNK))])
+        db.commit()
+    finally:
+        db.close()
+
+
+def ladder_bytes(books: OrderBooks) -> int:
+    return sum(
+        ladder.triggers.itemsize * len(ladder.triggers) + ladder.ids.itemsize * len(ladder.ids)
+        for ladder in books.ladders.values()
+    )
+
+
+def scan_crossed(resting: list, prices: dict) -> int:
+    """Baseline: check every resting order against its market's price"""
+    crossed = 0
+    for market_id, ladder, trigger in resting:
+        price = prices[market_id]
+        if (price <= trigger) if ladder == 0 else (price >= trigger):
+            crossed += 1
+    return crossed
+
+
+def main(orders: int, markets: int, users: int):
+    print(f"⚡ Order matching benchmark: {orders:,} resting orders over {markets} markets, {users} users")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'orders.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        started = time.perf_counter()
+        seed(session_factory, orders, markets, users)
+        print(f"  seeded in {time.perf_counter() - started:.1f}s")
+
+        books = OrderBooks()
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            books.sync(db)
+            elapsed = time.perf_counter() - started
+            resting = [
+                (market_id, ladder_of(side, type), to_units(price))
+                for market_id, side, type, price in db.query(Order.market_id, Order.side, Order.type, Order.price)
+            ]
+        finally:
+            db.close()
+        print(f"  sync   {books.stats()['resting']:,} orders in {elapsed:.2f}s "
+              f"({books.stats()['resting'] / elapsed:,.0f} orders/s), ladders {ladder_bytes(books) / 2**20:.1f} MiB")
+
+        # Walk the prices; matching only removes what crossed, so each tick sees the remaining book
+        rng = random.Random(7)
+        prices = {market_id: Decimal("100") for market_id in range(1, markets + 1)}
+        match_seconds = scan_seconds = 0.0
+        crossed_total = 0
+        last_crossed = []
+        for _ in range(TICKS):
+            prices = {m: (p * Decimal(str(1 + rng.uniform(-0.005, 0.005)))).quantize(Decimal("0.00000001"))
+                      for m, p in prices.items()}
+            units = {m: to_units(p) for m, p in prices.items()}
+
+            started = time.perf_counter()
+            scan_crossed(resting, units)
+            scan_seconds += time.perf_counter() - started
+
+            started = time.perf_counter()
+            last_crossed = books.take_crossed(prices)
+            match_seconds += time.perf_counter() - started
+            crossed_total += len(last_crossed)
+
+        print(f"  match  {match_seconds / TICKS * 1000:8.2f} ms/tick (ladders)  vs "
+              f"{scan_seconds / TICKS * 1000:8.2f} ms/tick (scan of every order): "
+              f"{scan_seconds / match_seconds:,.0f}x, {crossed_total / TICKS:,.0f} crossed/tick")
+
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            result = settle_fills(db, last_crossed, prices)
+            db.commit()
+            elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+        fills = result["filled"] + result["rejected"]
+        print(f"  fill   {fills:,} orders in one transaction in {elapsed:.2f}s ({fills / elapsed:,.0f} fills/s)")
+
+
+if __name__ == "__main__":
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    markets = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    users = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    main(orders, markets, users)
@@ -0,0 +1,150 @@
+"""
+Benchmark partitioned price updates against the number of workers
+
+Seeds a throwaway SQLite (sqlite_wal) database with M markets, then runs price ticks the way
+PRICE_UPDATE_PARTITIONS does: the dispatcher reads the prices once and splits them by symbol
+hash, update_market_partition walks and writes each partition, and merge_partition_prices
+replicates markets and evaluates alerts on the merged result. A process pool of W processes
+stands in for W Celery workers (each runs the task body, exactly as a worker would).
+
+Per worker count it reports ticks/s and the speedup over one worker, and splits a tick into
+dispatch + merge (serial), the partitions' write transactions, and the rest of the partition
+work (walk, parameter building). Two Amdahl bounds follow from that split, so the benchmark is
+informative even on a machine with fewer cores than workers:
+- pg:     writes run in parallel (PostgreSQL: partitions lock disjoint market and candle rows)
+- sqlite: writes are serialized by SQLite's single write lock
+
+Set BENCH_DATABASE_URL (and DB_PROFILE=postgres) to run against PostgreSQL instead.
+
+Run with: python -m benchmarks.bench_partitions [markets] [ticks] [max_workers]
+"""
+import os
+import sys
+import tempfile
+
+# Children of the pool re-import this module; they must find the parent's database
+os.environ.setdefault("BENCH_PARTITIONS_DIR", tempfile.mkdtemp())
+if os.environ.get("BENCH_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["BENCH_DATABASE_URL"]
+else:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(os.environ['BENCH_PARTITIONS_DIR'], 'bench.db')}"
+    os.environ["DB_PROFILE"] = "sqlite_wal"
+
+import multiprocessing  # noqa: E402
+import time  # noqa: E402
+from concurrent.futures import ProcessPoolExecutor  # noqa: E402
+from decimal import Decimal  # noqa: E402
+
+from app.database import SessionLocal, init_db  # noqa: E402
+from app.models import Market, PriceTick, Candle  # noqa: E402
+from app.services.market_bulk import upsert_markets  # noqa: E402
+from app.services.market_directory import market_directory  # noqa: E402
+from app.services import price_simulator  # noqa: E402
+from app.services.price_simulator import (  # noqa: E402
+    merge_partition_prices,
+    partition_start_prices,
+    update_market_partition
+)
+from app.services.price_sources import split_prices  # noqa: E402
+
+
+def seed(markets: int):
+    init_db()
+    db = SessionLocal()
+    try:
+        db.query(PriceTick).delete()
+        db.query(Candle).delete()
+        db.query(Market).delete()
+        upsert_markets(db, {f"C{i}/USDT": Decimal("100") for i in range(markets)})
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_partition(prices: dict, step: int):
+    """Worker body: the task, plus how long it took and how much of that was the write transaction"""
+    writes = []
+    write_batch = price_simulator.write_batch
+
+    def timed_write_batch(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return write_batch(*args, **kwargs)
+        finally:
+            writes.append(time.perf_counter() - started)
+
+    price_simulator.write_batch = timed_write_batch
+    try:
+        started = time.perf_counter()
+        result = update_market_partition(prices, step)
+        return result, time.perf_counter() - started, sum(writes)
+    finally:
+        price_simulator.write_batch = write_batch
+
+
+def run(workers: int, markets: int, ticks: int) -> dict:
+    seed(markets)
+    serial = compute = write = 0.0
+
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pool.submit(time.sleep, 0).result()  # start the workers before timing
+
+        started = time.perf_counter()
+        for step in range(ticks):
+            t0 = time.perf_counter()
+            db = SessionLocal()
+            try:
+                parts = [
+                    {symbol: str(price) for symbol, price in part.items()}
+                    for part in split_prices(partition_start_prices(db, step), workers)
+                    if part
+                ]
+            finally:
+                db.close()
+            t1 = time.perf_counter()
+
+            outcomes = list(pool.map(run_partition, parts, [step] * len(parts)))
+            t2 = time.perf_counter()
+
+            merge_partition_prices([result for result, _, _ in outcomes])
+            t3 = time.perf_counter()
+
+            serial += (t1 - t0) + (t3 - t2)
+            write += sum(writing for _, _, writing in outcomes)
+            compute += sum(seconds - writing for _, seconds, writing in outcomes)
+        elapsed = time.perf_counter() - started
+
+    total = serial + write + compute
+    return {
+        "ticks_per_second": ticks * markets / elapsed,
+        "serial_share": serial / total,
+        "write_share": write / total,
+    }
+
+
+def amdahl(serial: float, workers: int) -> float:
+    return 1 / (serial + (1 - serial) / workers)
+
+
+def main(markets: int, ticks: int, max_workers: int):
+    market_directory.publish = None
+    print(f"⚡ Partitioned price update benchmark: {markets} markets, {ticks} ticks, {os.cpu_count()} CPU(s)")
+
+    baseline = None
+    worker_counts = [w for w in (1, 2, 4, 8, 16) if w <= max_workers]
+    for workers in worker_counts:
+        stats = run(workers, markets, ticks)
+        baseline = baseline or stats["ticks_per_second"]
+        serial, write = stats["serial_share"], stats["write_share"]
+        print(f"  {workers:>2} worker(s) {stats['ticks_per_second']:10,.0f} ticks/s  {stats['ticks_per_second'] / baseline:5.2f}x"
+              f"   dispatch+merge {serial:5.1%}  writes {write:5.1%}")
+        for name, share in (("pg", serial), ("sqlite", serial + write)):
+            bounds = "  ".join(f"{n} workers <= {amdahl(share, n):4.1f}x" for n in (2, 4, 8))
+            print(f"       Amdahl ({name:<6}) {bounds}")
+
+
+if __name__ == "__main__":
+    markets = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else max(4, os.cpu_count() or 1)
+    main(markets, ticks, max_workers)
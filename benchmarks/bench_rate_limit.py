@@ -0,0 +1,78 @@
+"""
+Micro-benchmark: per-request overhead of the rate limit middleware
+
+Calls a no-op ASGI app directly, bare and wrapped in RateLimitMiddleware, with requests
+spread over many users (authenticated through the principal cache, as in production after the
+first request), and reports the added cost per request. Also times the Redis store when a
+Redis server is reachable at REDIS_URL.
+
+Run with: python -m benchmarks.bench_rate_limit [requests] [users]
+"""
+import asyncio
+import sys
+import time
+
+from app.config import settings
+from app.middleware.rate_limit import MemoryBucketStore, RateLimitMiddleware, RedisBucketStore
+from app.models import User
+from app.schemas.user import TokenData
+from app.utils.auth import create_access_token
+from app.utils.principal_cache import principal_cache
+
+LIMITS = {"read": [1e9, 10 ** 9]}  # never limit: measure the bookkeeping, not rejections
+
+
+async def noop_app(scope, receive, send):
+    pass
+
+
+def build_scopes(users: int):
+    """One GET /api/markets/ scope per user, tokens already in the principal cache"""
+    scopes = []
+    for user_id in range(1, users + 1):
+        token = create_access_token({"sub": str(user_id)})
+        principal_cache.put(token, User(id=user_id, name="Bench", email=f"u{user_id}@example.com"), TokenData(user_id=user_id))
+        scopes.append({
+            "type": "http",
+            "method": "GET",
+            "path": "/api/markets/",
+            "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+            "client": ("127.0.0.1", 50000),
+        })
+    return scopes
+
+
+async def time_app(app, scopes, total: int) -> float:
+    """Microseconds per request"""
+    started = time.perf_counter()
+    for i in range(total):
+        await app(scopes[i % len(scopes)], None, None)
+    return (time.perf_counter() - started) / total * 1e6
+
+
+async def main(total: int, users: int):
+    scopes = build_scopes(users)
+    variants = {"memory": RateLimitMiddleware(noop_app, MemoryBucketStore(settings.RATE_LIMIT_SHARDS), LIMITS)}
+
+    redis_store = RedisBucketStore(settings.REDIS_URL)
+    redis_store.connected = False  # suppress the warning if Redis is down
+    await redis_store.take("bench:probe", 1e9, 10 ** 9)
+    if redis_store.connected:
+        variants["redis"] = RateLimitMiddleware(noop_app, redis_store, LIMITS)
+
+    print(f"⚡ Rate limit overhead: {total} requests over {users} users")
+    await time_app(noop_app, scopes, min(total, 1000))
+    baseline = await time_app(noop_app, scopes, total)
+    print(f"  [bare]   {baseline:7.2f} µs/request")
+    for name, app in variants.items():
+        await time_app(app, scopes, min(total, 1000))  # warm up
+        elapsed = await time_app(app, scopes, total if name == "memory" else min(total, 5000))
+        print(f"  [{name:<6}] {elapsed:7.2f} µs/request (+{elapsed - baseline:.2f} µs)")
+    if "redis" not in variants:
+        print(f"  [redis]  skipped - no Redis at {settings.REDIS_URL}")
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    asyncio.run(main(total, users))
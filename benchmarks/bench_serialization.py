@@ -0,0 +1,94 @@
+"""
+Micro-benchmark: FastAPI response_model encoding vs json_response for the list endpoints
+
+Builds N in-memory ORM rows per endpoint and times, per response:
+- response_model: what FastAPI does for `return rows` (validate, dump to dicts, json.dumps)
+- json_response:  app.utils.responses (pydantic-core validate + serialize straight to bytes)
+Both produce the same JSON; the script checks that before timing.
+
+Run with: python -m benchmarks.bench_serialization [rows] [repeats]
+"""
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models import Alert, Holding, Market
+from app.schemas.alert import AlertResponse
+from app.schemas.holding import HoldingResponse
+from app.schemas.market import MarketResponse
+from app.schemas.portfolio import HoldingDetail, PortfolioResponse
+from app.utils.responses import json_response
+
+
+def build_cases(rows: int) -> dict:
+    now = datetime.utcnow()
+    price = Decimal("62000.12345678")
+    markets = [Market(id=i, symbol=f"C{i}/USDT", current_price=price, created_at=now, updated_at=now) for i in range(rows)]
+    holdings = [
+        Holding(id=i, user_id=1, market_id=i, quantity=Decimal("1.50000000"), avg_buy_price=Decimal("90.00000000"))
+        for i in range(rows)
+    ]
+    alerts = [
+        Alert(id=i, user_id=1, market_id=i, target_price=price, direction="above", triggered=False, created_at=now)
+        for i in range(rows)
+    ]
+    portfolio = PortfolioResponse(
+        balance=Decimal("10000"),
+        holdings=[
+            HoldingDetail(symbol=f"C{i}/USDT", quantity=Decimal("1.5"), avg_buy_price=Decimal("90"),
+                          current_price=price, unrealized_pnl=(price - Decimal("90")) * Decimal("1.5"))
+            for i in range(rows)
+        ],
+        total_value=Decimal("10000") + price * rows,
+    )
+    return {
+        "markets": (List[MarketResponse], markets),
+        "holdings": (List[HoldingResponse], holdings),
+        "alerts": (List[AlertResponse], alerts),
+        "portfolio": (PortfolioResponse, portfolio),
+    }
+
+
+async def response_model_body(schema, content) -> bytes:
+    """Replicates FastAPI's handling of a plain return value with response_model=schema"""
+    field = create_response_field(name="bench", type_=schema)
+    encoded = await serialize_response(field=field, response_content=content, is_coroutine=True)
+    return JSONResponse(encoded).body
+
+
+def time_per_call(fn, repeats: int) -> float:
+    """Milliseconds per call (best of 3 runs)"""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        best = min(best, (time.perf_counter() - started) / repeats * 1000)
+    return best
+
+
+def main(rows: int, repeats: int):
+    print(f"⚡ Serialization benchmark: {rows} rows per response, best of 3 x {repeats}")
+    loop = asyncio.new_event_loop()
+    for name, (schema, content) in build_cases(rows).items():
+        baseline = loop.run_until_complete(response_model_body(schema, content))
+        assert json.loads(baseline) == json.loads(json_response(schema, content).body), name
+
+        slow = time_per_call(lambda: loop.run_until_complete(response_model_body(schema, content)), repeats)
+        fast = time_per_call(lambda: json_response(schema, content), repeats)
+        print(f"  {name:<10} response_model {slow:8.2f} ms   json_response {fast:7.2f} ms   {slow / fast:5.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    main(rows, repeats)
@@ -0,0 +1,52 @@
+"""
+Replay recorded market data into the database
+Run with: python replay_prices.py ticks.ndjson [--speed 10] [--batch 1000]
+Use --speed 0 to ingest as fast as possible, or --simulate N for N random-walk steps instead
+Add --seed (and --start-time) to --simulate for a reproducible run, and --record to save its ticks
+"""
+import argparse
+from datetime import datetime
+
+from app.config import settings
+from app.database import init_db
+from app.services.price_sources import RandomWalkSource, RecordingSource, ReplaySource, SeededRandomWalkSource, run_source
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feed recorded or simulated ticks through the bulk ingest path")
+    parser.add_argument("path", nargs="?", help="NDJSON or CSV file with symbol, price, timestamp[, volume]")
+    parser.add_argument("--speed", type=float, default=settings.PRICE_REPLAY_SPEED, help="pace multiplier, 0 = unpaced")
+    parser.add_argument("--batch", type=int, default=settings.PRICE_INGEST_BATCH, help="ticks per transaction")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="file format (default: from the extension)")
+    parser.add_argument("--simulate", type=int, metavar="STEPS", help="random-walk the listed markets instead")
+    parser.add_argument("--interval", type=float, default=0.0, help="seconds between simulation steps")
+    parser.add_argument("--seed", type=int, default=settings.PRICE_SIMULATION_SEED, help="reproducible simulation seed")
+    parser.add_argument("--start-time", type=datetime.fromisoformat, default=settings.PRICE_SIMULATION_START_TIME,
+                        help="seeded runs: first tick timestamp (then +PRICE_UPDATE_INTERVAL per step)")
+    parser.add_argument("--record", help="append the ingested ticks to this NDJSON file")
+    args = parser.parse_args()
+
+    if args.simulate and args.seed is not None:
+        source = SeededRandomWalkSource(args.seed, start_prices=settings.PRICE_SIMULATION_START, steps=args.simulate,
+                                        interval=args.interval, start_time=args.start_time)
+        print(f"🎲 Simulating {args.simulate} random-walk steps with seed {args.seed}...")
+    elif args.simulate:
+        source = RandomWalkSource(steps=args.simulate, interval=args.interval)
+        print(f"🎲 Simulating {args.simulate} random-walk steps...")
+    elif args.path:
+        source = ReplaySource(args.path, speed=args.speed, batch_size=args.batch, format=args.format)
+        print(f"⏯️  Replaying {args.path} at {args.speed}x...")
+    else:
+        parser.error("give a tick file or --simulate STEPS")
+
+    if args.record:
+        source = RecordingSource(source, args.record)
+
+    init_db()
+    stats = run_source(source)
+    print(f"✅ Ingested {stats['ticks']} ticks in {stats['batches']} batches "
+          f"({stats['markets_created']} new markets) in {stats['seconds']}s: {stats['ticks_per_second']} ticks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,9 @@ Run this script to create sample users and markets
 from decimal import Decimal
 from app.database import SessionLocal, init_db
 from app.models import User, Market
-from app.utils.auth import get_password_hash
+from app.services.market_replication import sync_markets
+from app.services.market_snapshot import bump_market_revision
+from app.utils.password_pool import password_pool
 
 
 def seed_database():
@@ -48,11 +50,13 @@ def seed_database():
         ]
 
         print("\n👥 Creating users...")
-        for user_data in users_data:
+        # Hash all passwords in parallel across the password pool workers
+        hashed_passwords = password_pool.hash_many([user_data["password"] for user_data in users_data])
+        for user_data, hashed_password in zip(users_data, hashed_passwords):
             user = User(
                 name=user_data["name"],
                 email=user_data["email"],
-                hashed_password=get_password_hash(user_data["password"]),
+                hashed_password=hashed_password,
                 balance=user_data["balance"]
             )
             db.add(user)
@@ -80,7 +84,9 @@ def seed_database():
             print(f"  ✓ {market_data['symbol']}: ${float(market_data['price']):.2f}")
 
         # Commit all changes
+        bump_market_revision(db, listing_changed=True)
         db.commit()
+        sync_markets(db)
 
         print("\n✅ Database seeding completed successfully!")
         print("\n📝 Test credentials:")
@@ -96,6 +102,7 @@ def seed_database():
         print(f"\n❌ Error seeding database: {str(e)}")
     finally:
         db.close()
+        password_pool.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+from decimal import Decimal
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, Market, TransactionLog
+from app.routers import transactions as transactions_router
+from app.services import cold_storage
+from app.services.cold_storage import ColdStore, compact_transactions_before, from_units, to_units
+from app.services.export import cold_transaction_chunks
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_cold_storage.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Create test database and session"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Cold store in a temp directory, wired into the history endpoint"""
+    store = ColdStore(str(tmp_path))
+    monkeypatch.setattr(cold_storage, "cold_store", store)
+    return store
+
+
+@pytest.fixture
+def history(db):
+    """One user with 10 transactions spread over Jan-Mar 2024, plus another user's row"""
+    user = User(name="Test User", email="test@example.com", hashed_password="x", balance=Decimal("10000"))
+    other = User(name="Other", email="other@example.com", hashed_password="x", balance=Decimal("10000"))
+    market = Market(symbol="BTC/USDT", current_price=Decimal("60000"))
+    db.add_all([user, other, market])
+    db.commit()
+
+    start = datetime(2024, 1, 20)
+    for i in range(10):
+        db.add(TransactionLog(
+            user_id=user.id,
+            market_id=market.id,
+            type="buy" if i % 2 == 0 else "sell",
+            price=Decimal("60000.12345678"),
+            quantity=Decimal("0.00000001") * (i + 1),
+            total_amount=Decimal("0.00060000"),
+            timestamp=start + timedelta(days=7 * i)
+        ))
+    db.add(TransactionLog(
+        user_id=other.id, market_id=market.id, type="buy", price=Decimal("1"),
+        quantity=Decimal("1"), total_amount=Decimal("1"), timestamp=start
+    ))
+    db.commit()
+    return user, market
+
+
+def test_units_round_trip():
+    """Test fixed-point column encoding is exact at 8 decimal places"""
+    value = Decimal("123456789.12345678")
+    assert from_units(to_units(value)) == value
+
+
+def test_compaction_moves_old_rows(db, store, history):
+    """Test rows before the cutoff leave the hot table and land in monthly segments"""
+    user, _ = history
+    cutoff = datetime(2024, 3, 1)
+    expected = db.query(TransactionLog).filter(TransactionLog.timestamp < cutoff).count()
+
+    moved = compact_transactions_before(db, store, cutoff)
+
+    assert moved == expected
+    assert db.query(TransactionLog).filter(TransactionLog.timestamp < cutoff).count() == 0
+    assert {segment.path.split("/")[-2] for segment in store.segments()} == {"2024-01", "2024-02"}
+    assert compact_transactions_before(db, store, cutoff) == 0
+
+
+def test_amounts_beyond_int64_units_stay_hot(db, store, history):
+    """Test a legal DECIMAL(20, 8) total above int64 units is left hot instead of failing the batch"""
+    user, market = history
+    huge = TransactionLog(
+        user_id=user.id, market_id=market.id, type="buy", price=Decimal("100000"),
+        quantity=Decimal("1000000"), total_amount=Decimal("100000000000"), timestamp=datetime(2024, 1, 25)
+    )
+    db.add(huge)
+    db.commit()
+    assert to_units(huge.total_amount) > cold_storage.UNITS_MAX
+    before = [t.id for t in db.query(TransactionLog).filter(TransactionLog.user_id == user.id)
+              .order_by(TransactionLog.timestamp.desc(), TransactionLog.id.desc())]
+    expected = db.query(TransactionLog).filter(TransactionLog.timestamp < datetime(2024, 3, 1)).count() - 1
+
+    moved = compact_transactions_before(db, store, datetime(2024, 3, 1))
+
+    assert moved == expected
+    assert [t.id for t in db.query(TransactionLog).filter(TransactionLog.timestamp < datetime(2024, 3, 1))] == [huge.id]
+    assert not store.contains_ids("2024-01", np.array([huge.id])).any()
+
+    # Pages still list it in order between the cold rows
+    seen, cursor = [], None
+    while True:
+        page = transactions_router.get_user_transactions(
+            user_id=user.id, cursor=cursor, limit=4, symbol=None, type=None, db=db, current_user=user
+        )
+        seen.extend(item.id for item in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == before
+
+
+def test_history_pages_span_hot_and_cold(db, store, history):
+    """Test the history endpoint walks from hot rows into cold segments seamlessly"""
+    user, _ = history
+    before = [t.id for t in db.query(TransactionLog).filter(TransactionLog.user_id == user.id)
+              .order_by(TransactionLog.timestamp.desc(), TransactionLog.id.desc())]
+    compact_transactions_before(db, store, datetime(2024, 3, 1))
+
+    seen = []
+    cursor = None
+    while True:
+        page = transactions_router.get_user_transactions(
+            user_id=user.id, cursor=cursor, limit=3, symbol=None, type=None, db=db, current_user=user
+        )
+        seen.extend(item.id for item in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == before
+
+
+def test_export_reads_cold_rows(db, store, history):
+    """Test cold rows come back with their original values for export"""
+    user, market = history
+    compact_transactions_before(db, store, datetime(2024, 3, 1))
+
+    rows = [row for chunk in cold_transaction_chunks(user.id, store, TestingSessionLocal) for row in chunk]
+
+    assert rows
+    assert all(row[1] == market.symbol for row in rows)
+    assert rows[0][3] == Decimal("60000.12345678")
+    assert rows[0][4] == Decimal("0.00000001")
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import text
+from app.db_profiles import build_engine, engine_stats
+
+
+def test_sqlite_wal_profile_applies_pragmas(tmp_path):
+    """Test the tuned SQLite profile sets WAL, busy timeout and cache size on connect"""
+    engine = build_engine(f"sqlite:///{tmp_path / 'wal.db'}", "sqlite_wal")
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
+        assert conn.execute(text("PRAGMA cache_size")).scalar() < 0
+
+    stats = engine_stats(engine, "sqlite_wal")
+    assert stats["checkouts"] == 1
+    assert stats["connections_opened"] == 1
+    assert stats["checked_out"] == 0
+    engine.dispose()
+
+
+def test_default_profile_keeps_rollback_journal(tmp_path):
+    """Test the default profile leaves SQLite settings alone"""
+    engine = build_engine(f"sqlite:///{tmp_path / 'default.db'}", "default")
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+    engine.dispose()
+
+
+@pytest.mark.parametrize("url, profile", [
+    ("sqlite:///./x.db", "unknown"),
+    ("sqlite:///./x.db", "postgres"),
+    ("postgresql://localhost/db", "sqlite_wal"),
+])
+def test_profile_validation(url, profile):
+    """Test mismatched or unknown profiles are rejected at startup"""
+    with pytest.raises(ValueError):
+        build_engine(url, profile)
@@ -0,0 +1,124 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db_routing import SessionRouter
+
+
+def _database_name(db):
+    return db.execute(text("SELECT name FROM whoami")).scalar()
+
+
+@pytest.fixture
+def urls(tmp_path):
+    """Primary plus two replicas, each a SQLite file that knows its own name"""
+    urls = {}
+    for name in ("primary", "replica1", "replica2"):
+        url = f"sqlite:///{tmp_path / name}.db"
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE whoami (name TEXT)"))
+            conn.execute(text("INSERT INTO whoami VALUES (:name)"), {"name": name})
+        engine.dispose()
+        urls[name] = url
+    return urls
+
+
+def _router(urls, replica_urls, **kwargs):
+    primary = sessionmaker(bind=create_engine(urls["primary"]))
+    return SessionRouter(primary, replica_urls, **kwargs)
+
+
+def test_no_replicas_reads_primary(urls):
+    """Test reads fall back to the primary when no replicas are configured"""
+    router = _router(urls, [])
+
+    db = router.read_session(user_id=1)
+    assert _database_name(db) == "primary"
+    db.close()
+
+
+def test_reads_round_robin_across_replicas(urls):
+    """Test read sessions alternate between replicas"""
+    router = _router(urls, [urls["replica1"], urls["replica2"]])
+
+    names = []
+    for _ in range(4):
+        db = router.read_session()
+        names.append(_database_name(db))
+        db.close()
+
+    assert names == ["replica1", "replica2", "replica1", "replica2"]
+
+
+def test_user_pinned_to_primary_after_write(urls):
+    """Test a user's reads go to the primary right after their own write"""
+    router = _router(urls, [urls["replica1"]], pin_seconds=60)
+    router.pin_user(7)
+
+    db = router.read_session(user_id=7)
+    assert _database_name(db) == "primary"
+    db.close()
+
+    # Other users still read from the replica
+    db = router.read_session(user_id=8)
+    assert _database_name(db) == "replica1"
+    db.close()
+
+
+def test_pin_expires(urls):
+    """Test pinning only lasts pin_seconds"""
+    router = _router(urls, [urls["replica1"]], pin_seconds=0)
+    router.pin_user(7)
+
+    assert not router.is_pinned(7)
+
+
+def test_failed_replica_skipped_then_revived(urls, tmp_path):
+    """Test an unhealthy replica leaves the rotation and rejoins once it answers again"""
+    missing_dir = tmp_path / "not_there_yet"
+    broken_url = f"sqlite:///{missing_dir / 'replica.db'}"
+    router = _router(urls, [broken_url, urls["replica2"]], retry_interval=60)
+
+    # A query on the broken replica fails; the dependency marks it down
+    db = router.read_session()
+    assert db.info["replica"].url == broken_url
+    with pytest.raises(Exception):
+        _database_name(db)
+    router.mark_failed(db)
+    db.close()
+
+    for _ in range(3):
+        db = router.read_session()
+        assert _database_name(db) == "replica2"
+        db.close()
+
+    broken = router.replicas[0]
+    assert not broken.healthy
+    assert broken.failures == 1
+
+    # Retry time reached but the replica is still unreachable: stays down
+    broken.retry_at = 0
+    db = router.read_session()
+    assert _database_name(db) == "replica2"
+    db.close()
+    assert broken.failures == 2
+
+    # Replica comes back: the next probe after retry_interval revives it
+    missing_dir.mkdir()
+    broken.retry_at = 0
+    db = router.read_session()
+    assert db.info["replica"] is broken
+    db.close()
+    assert broken.healthy
+
+
+def test_all_replicas_down_uses_primary(urls, tmp_path):
+    """Test reads fall back to the primary when every replica is unhealthy"""
+    router = _router(urls, [f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"], retry_interval=60)
+    router.mark_failed(router.read_session())
+
+    db = router.read_session()
+    assert _database_name(db) == "primary"
+    db.close()
+    assert router.stats()[0]["healthy"] is False
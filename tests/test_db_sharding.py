@@ -0,0 +1,145 @@
+import pytest
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.db_sharding import ShardRoutingSession, ShardSet, route_user
+from app.models import User, Market, Holding, Alert, TransactionLog
+from app.routers import holdings as holdings_router
+from app.schemas.holding import TradeRequest
+from app.services import market_replication
+from app.services.price_simulator import trigger_alerts
+
+
+@pytest.fixture
+def shards(tmp_path, monkeypatch):
+    """Primary plus two extra shards, each a SQLite file with the full schema"""
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}", connect_args={"check_same_thread": False})
+    shards = ShardSet(primary, [f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in (1, 2)])
+    for shard_engine in shards.engines:
+        Base.metadata.create_all(bind=shard_engine)
+    monkeypatch.setattr(market_replication, "shards", shards)
+    yield shards
+    for shard_engine in shards.engines:
+        shard_engine.dispose()
+
+
+@pytest.fixture
+def session_factory(shards):
+    return sessionmaker(class_=ShardRoutingSession, shards=shards, autoflush=False, bind=shards.engines[0])
+
+
+@pytest.fixture
+def setup(session_factory):
+    """Three users (one per shard) and a market replicated to every shard"""
+    db = session_factory()
+    users = [
+        User(id=user_id, name=f"User {user_id}", email=f"u{user_id}@example.com", hashed_password="x", balance=Decimal("10000"))
+        for user_id in (3, 4, 5)
+    ]
+    market = Market(symbol="BTC/USDT", current_price=Decimal("60000"))
+    db.add_all(users + [market])
+    db.commit()
+    market_replication.sync_markets(db)
+    db.close()
+
+
+def _count(shards, shard_id, model):
+    return shards.fan_out(lambda db: db.query(model).count(), shard_ids=[shard_id])[0]
+
+
+def test_user_rows_land_on_their_shard(shards, session_factory, setup):
+    """Test trades write holdings and transactions to user_id % shard_count, balances to the primary"""
+    for user_id in (3, 4, 5):
+        db = session_factory()
+        trade = TradeRequest(user_id=user_id, symbol="BTC/USDT", type="buy", price=Decimal("100"), quantity=Decimal("1"))
+        holdings_router.execute_trade(trade=trade, db=db, current_user=None)
+        db.close()
+
+    for shard_id, user_id in ((0, 3), (1, 4), (2, 5)):
+        assert shards.shard_for(user_id) == shard_id
+        assert _count(shards, shard_id, Holding) == 1
+        assert _count(shards, shard_id, TransactionLog) == 1
+
+    # Balances stay on the primary
+    db = session_factory()
+    assert db.query(User).filter(User.id == 4).one().balance == Decimal("9900")
+
+    # Reads through a routed session only see the user's own shard
+    route_user(db, 4)
+    holding = db.query(Holding).one()
+    assert holding.user_id == 4
+    assert holding.market.symbol == "BTC/USDT"
+    db.close()
+
+
+def test_unrouted_query_on_sharded_table_fails(session_factory, setup):
+    """Test user-owned tables cannot be queried before picking a shard"""
+    db = session_factory()
+    assert db.query(Market).count() == 1  # global tables need no routing
+
+    with pytest.raises(RuntimeError):
+        db.query(Holding).all()
+    db.close()
+
+
+def test_markets_replicated_to_every_shard(shards, session_factory, setup):
+    """Test market writes on the primary are copied to all shards, including deletes"""
+    assert [count for count in shards.fan_out(lambda db: db.query(Market).count())] == [1, 1, 1]
+
+    db = session_factory()
+    market = db.query(Market).one()
+    market.current_price = Decimal("65000")
+    eth = Market(symbol="ETH/USDT", current_price=Decimal("3000"))
+    db.add(eth)
+    db.commit()
+    market_replication.replicate_markets(db, [market.id, eth.id])
+
+    prices = shards.fan_out(lambda shard_db: shard_db.query(Market).filter(Market.symbol == "BTC/USDT").one().current_price)
+    assert prices == [Decimal("65000")] * 3
+
+    eth_id = eth.id
+    db.query(Market).filter(Market.symbol == "ETH/USDT").delete()
+    db.commit()
+    market_replication.replicate_markets(db, [eth_id])
+    db.close()
+
+    assert shards.fan_out(lambda shard_db: shard_db.query(Market).count()) == [1, 1, 1]
+
+
+def test_writes_replicate_only_the_markets_they_touch(shards, session_factory, setup):
+    """Test a write pushes just its own rows, and a full sync repairs copies that missed writes"""
+    db = session_factory()
+    btc = db.query(Market).one()
+    sol = Market(symbol="SOL/USDT", current_price=Decimal("140"))
+    db.add(sol)
+    btc.current_price = Decimal("61000")  # written on the primary but never replicated
+    db.commit()
+    market_replication.replicate_market_rows([sol])
+
+    def copies(shard_db):
+        return {market.symbol: market.current_price for market in shard_db.query(Market)}
+
+    assert shards.fan_out(copies, shard_ids=[1, 2]) == [{"BTC/USDT": Decimal("60000"), "SOL/USDT": Decimal("140")}] * 2
+
+    # A copy left behind by a lost delete is removed by the full sync
+    shards.fan_out(lambda shard_db: (shard_db.add(Market(id=99, symbol="OLD/USDT", current_price=Decimal("1"))),
+                                     shard_db.commit()), shard_ids=[1])
+    market_replication.sync_markets(db)
+    db.close()
+    assert shards.fan_out(copies, shard_ids=[1, 2]) == [{"BTC/USDT": Decimal("61000"), "SOL/USDT": Decimal("140")}] * 2
+
+
+def test_alert_evaluation_fans_out(shards, session_factory, setup):
+    """Test alerts on every shard are evaluated against primary prices"""
+    for user_id, target in ((3, "50000"), (4, "55000"), (5, "70000")):
+        db = route_user(session_factory(), user_id)
+        db.add(Alert(user_id=user_id, market_id=1, target_price=Decimal(target), direction="above", triggered=False))
+        db.commit()
+        db.close()
+
+    prices = {1: ("BTC/USDT", Decimal("60000"))}
+    assert shards.fan_out(lambda db: trigger_alerts(db, prices)) == [1, 1, 0]
+
+    triggered = shards.fan_out(lambda db: [alert.triggered for alert in db.query(Alert).all()])
+    assert triggered == [[True], [True], [False]]
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import time
+import pytest
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.database import Base
+from app.db_sharding import ShardSet
+from app.models import Alert, Market, PriceTick, User
+from app.services import embedded_scheduler as scheduler_module, order_book, price_sources
+from app.services.embedded_scheduler import EmbeddedScheduler, Job, price_tick, publish_price_tick
+from app.services.market_directory import MarketDirectory, pubsub_enabled
+from app.services.tick_guard import MemoryLeaseStore, TickGuard, lease_backend
+from app.websockets.market_stream import manager
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_embedded_scheduler.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def guard(monkeypatch):
+    guard = TickGuard(MemoryLeaseStore())
+    monkeypatch.setattr(scheduler_module, "tick_guard", guard)
+    return guard
+
+
+@pytest.fixture
+def db(monkeypatch, guard):
+    """Test database wired into the embedded price tick"""
+    monkeypatch.setattr(scheduler_module, "shards", ShardSet(engine, []))
+    monkeypatch.setattr(price_sources, "market_directory", MarketDirectory())
+    monkeypatch.setattr(order_book, "order_books", order_book.OrderBooks())
+
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def send_text(self, message: str):
+        self.messages.append(json.loads(message))
+
+
+def run_for(scheduler: EmbeddedScheduler, seconds: float):
+    async def run():
+        scheduler.start()
+        await asyncio.sleep(seconds)
+        await scheduler.stop()
+
+    asyncio.run(run())
+
+
+def test_price_tick_writes_and_triggers_alerts(db):
+    """Test one embedded tick writes every market and evaluates alerts on the prices it wrote"""
+    user = User(name="Alice", email="alice@example.com", hashed_password="x", balance=Decimal("0"))
+    db.add_all([user, Market(symbol="BTC/USDT", current_price=Decimal("100")), Market(symbol="ETH/USDT", current_price=Decimal("10"))])
+    db.commit()
+    btc = db.query(Market).filter(Market.symbol == "BTC/USDT").one()
+    db.add(Alert(user_id=user.id, market_id=btc.id, target_price=Decimal("1"), direction="above", triggered=False))
+    db.commit()
+
+    result = price_tick(TestingSessionLocal)
+
+    assert result["alerts_triggered"] == 1
+    assert {symbol for symbol, price in result["prices"].values()} == {"BTC/USDT", "ETH/USDT"}
+    assert db.query(PriceTick).count() == 2
+    db.expire_all()
+    assert db.query(Alert).one().triggered is True
+
+
+def test_price_tick_is_pushed_to_websocket_clients(db, monkeypatch):
+    """Test tick prices go straight to connected clients in the stream's message format"""
+    client = FakeWebSocket()
+    monkeypatch.setattr(manager, "active_connections", [client])
+    db.add(Market(symbol="BTC/USDT", current_price=Decimal("100")))
+    db.commit()
+
+    asyncio.run(publish_price_tick(price_tick(TestingSessionLocal)))
+
+    assert len(client.messages) == 1
+    [market] = client.messages[0]["markets"]
+    assert market["symbol"] == "BTC/USDT"
+    assert market["price"] == float(db.query(Market.current_price).scalar())
+
+
+def test_scheduler_runs_jobs_off_the_event_loop(guard):
+    """Test a job ticks repeatedly in its executor thread and its results reach on_result"""
+    results = []
+
+    async def on_result(result):
+        results.append(result)
+
+    scheduler = EmbeddedScheduler([Job("tick", 0.02, lambda: time.monotonic(), on_result=on_result)])
+    run_for(scheduler, 0.15)
+
+    assert len(results) >= 3
+    assert scheduler.stats()["jobs"]["tick"]["runs"] == len(results)
+    assert not scheduler.running
+    assert guard.store.metrics("tick")["ran"] == len(results)
+
+
+def test_overrunning_job_skips_missed_ticks(guard):
+    """Test under the skip policy a job slower than its interval drops the ticks it missed"""
+    scheduler = EmbeddedScheduler([Job("slow", 0.01, lambda: time.sleep(0.035))])
+    run_for(scheduler, 0.15)
+
+    metrics = guard.store.metrics("slow")
+    assert metrics["skipped"] >= metrics["ran"]
+    assert metrics["overruns"] >= 1
+
+
+def test_failing_job_keeps_ticking(guard):
+    """Test an exception in one tick is counted and the next tick still runs"""
+    def boom():
+        raise RuntimeError("database unavailable")
+
+    scheduler = EmbeddedScheduler([Job("broken", 0.02, boom)])
+    run_for(scheduler, 0.1)
+
+    assert scheduler.stats()["jobs"]["broken"]["failures"] >= 2
+    assert guard.begin("broken", 0.02) is not None
+
+
+def test_job_waits_for_lease_held_elsewhere(guard):
+    """Test a tick whose lease another process holds does not run"""
+    guard.begin("tick", 60)
+    ran = []
+
+    scheduler = EmbeddedScheduler([Job("tick", 0.02, lambda: ran.append(1))])
+    run_for(scheduler, 0.08)
+
+    assert ran == []
+    assert guard.store.metrics("tick")["skipped"] >= 2
+
+
+def test_embedded_mode_defaults_to_no_broker(monkeypatch):
+    """Test leases and market pub/sub default to in-process with the embedded scheduler, Redis with Celery, unless set"""
+    monkeypatch.setattr(settings, "TICK_LEASE_BACKEND", None)
+    monkeypatch.setattr(settings, "MARKET_CACHE_PUBSUB", None)
+    monkeypatch.setattr(settings, "SCHEDULER", "embedded")
+    assert (lease_backend(), pubsub_enabled()) == ("memory", False)
+
+    monkeypatch.setattr(settings, "SCHEDULER", "celery")
+    assert (lease_backend(), pubsub_enabled()) == ("redis", True)
+
+    monkeypatch.setattr(settings, "SCHEDULER", "embedded")
+    monkeypatch.setattr(settings, "TICK_LEASE_BACKEND", "redis")
+    monkeypatch.setattr(settings, "MARKET_CACHE_PUBSUB", True)
+    assert (lease_backend(), pubsub_enabled()) == ("redis", True)
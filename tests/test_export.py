@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+import pytest
+from decimal import Decimal
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.database import Base
+from app.models import User, Market, Holding, TransactionLog
+from app.services.cold_storage import ColdStore, compact_transactions_before
+from app.services.export import (
+    HOLDING_FIELDS,
+    TRANSACTION_FIELDS,
+    cold_transaction_chunks,
+    holding_chunk_fetcher,
+    stream_export,
+    transaction_chunk_fetcher
+)
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_export.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+CHUNK_SIZE = 50
+ROWS = 2 * CHUNK_SIZE + 7  # two full chunks and a partial one
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Create test database and session; exports fetch CHUNK_SIZE rows per query"""
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", CHUNK_SIZE)
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def test_user(db):
+    """Create test user"""
+    user = User(name="Test User", email="test@example.com", hashed_password="x", balance=Decimal("10000"))
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def history(db, test_user):
+    """ROWS transactions over two markets, with amounts that need fixed-point formatting"""
+    btc = Market(symbol="BTC/USDT", current_price=Decimal("60000"))
+    eth = Market(symbol="ETH/USDT", current_price=Decimal("3000"))
+    db.add_all([btc, eth])
+    db.commit()
+
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    for i in range(ROWS):
+        db.add(TransactionLog(
+            user_id=test_user.id,
+            market_id=btc.id if i % 2 == 0 else eth.id,
+            type="buy" if i % 3 else "sell",
+            price=Decimal("0.00000001") if i == 0 else Decimal("60000.5"),
+            quantity=Decimal("1.25"),
+            total_amount=Decimal("75000.625"),
+            timestamp=base + timedelta(seconds=i)
+        ))
+    db.commit()
+    return db.query(TransactionLog).order_by(TransactionLog.id).all()
+
+
+def export(user, format, fetcher=transaction_chunk_fetcher, fields=TRANSACTION_FIELDS):
+    return list(stream_export(fetcher(user.id), fields, format, "test", session_factory=TestingSessionLocal))
+
+
+def test_csv_export_streams_every_chunk(test_user, history):
+    """Test the CSV export has one header and every row once, in id order, one blob per chunk"""
+    blobs = export(test_user, "csv")
+    assert len(blobs) == 1 + 3
+
+    rows = list(csv.reader(io.StringIO(b"".join(blobs).decode())))
+    assert rows[0] == TRANSACTION_FIELDS
+    assert len(rows) == 1 + ROWS
+    assert [int(row[0]) for row in rows[1:]] == [t.id for t in history]
+    assert rows[1][1:6] == ["BTC/USDT", "sell", "0.00000001", "1.25000000", "75000.62500000"]
+    assert rows[2][1:4] == ["ETH/USDT", "buy", "60000.50000000"]
+    assert rows[-1][6] == history[-1].timestamp.isoformat()
+
+
+def test_ndjson_export_decodes_line_by_line(test_user, history):
+    """Test every NDJSON line is a JSON object with fixed 8-decimal amount strings"""
+    lines = b"".join(export(test_user, "ndjson")).decode().splitlines()
+    assert len(lines) == ROWS
+
+    records = [json.loads(line) for line in lines]
+    assert [record["id"] for record in records] == [t.id for t in history]
+    assert set(records[0]) == set(TRANSACTION_FIELDS)
+    assert records[0]["price"] == "0.00000001"
+    assert records[1]["price"] == "60000.50000000" and records[1]["quantity"] == "1.25000000"
+    assert records[1]["timestamp"] == "2024-01-01T12:00:01"
+
+
+def test_rows_in_cold_and_hot_export_once(db, test_user, history, tmp_path):
+    """Test rows left hot by an interrupted compaction are exported once, and a row kept hot below the cold ids is not lost"""
+    store = ColdStore(str(tmp_path))
+    cutoff = history[0].timestamp + timedelta(seconds=60)
+    compacted = [
+        {column.name: getattr(row, column.name) for column in TransactionLog.__table__.columns}
+        for row in history if row.timestamp < cutoff
+    ]
+    # Too large for cold columns, so it stays hot with an id below the compacted ones
+    db.query(TransactionLog).filter(TransactionLog.id == history[1].id).update({TransactionLog.total_amount: Decimal("1e11")})
+    db.commit()
+    assert compact_transactions_before(db, store, cutoff) == len(compacted) - 1
+
+    # A compaction that died before deleting its hot rows leaves them in both places
+    db.execute(insert(TransactionLog.__table__), [row for row in compacted if row["id"] != history[1].id])
+    db.commit()
+    assert db.query(TransactionLog).count() == ROWS
+
+    lines = b"".join(stream_export(
+        transaction_chunk_fetcher(test_user.id), TRANSACTION_FIELDS, "ndjson", "test",
+        leading_chunks=cold_transaction_chunks(test_user.id, store, TestingSessionLocal),
+        session_factory=TestingSessionLocal, store=store
+    )).decode().splitlines()
+    ids = [json.loads(line)["id"] for line in lines]
+    assert sorted(ids) == [t.id for t in history]
+
+
+def test_empty_exports(db, test_user):
+    """Test a user without rows gets just the CSV header, and an empty NDJSON body"""
+    csv_body = b"".join(export(test_user, "csv")).decode()
+    assert list(csv.reader(io.StringIO(csv_body))) == [TRANSACTION_FIELDS]
+    assert b"".join(export(test_user, "ndjson")) == b""
+
+
+def test_holdings_export(db, test_user):
+    """Test holdings stream through the same pipeline"""
+    markets = [Market(symbol=f"C{i}/USDT", current_price=Decimal("1")) for i in range(CHUNK_SIZE + 1)]
+    db.add_all(markets)
+    db.commit()
+    db.add_all([
+        Holding(user_id=test_user.id, market_id=market.id, quantity=Decimal("2"), avg_buy_price=Decimal("0.5"))
+        for market in markets
+    ])
+    db.commit()
+
+    rows = list(csv.reader(io.StringIO(b"".join(export(test_user, "csv", holding_chunk_fetcher, HOLDING_FIELDS)).decode())))
+    assert rows[0] == HOLDING_FIELDS
+    assert len(rows) == 1 + CHUNK_SIZE + 1
+    assert rows[1][1:] == ["C0/USDT", "2.00000000", "0.50000000"]
@@ -0,0 +1,184 @@
+import random
+import pytest
+from decimal import Decimal, ROUND_HALF_EVEN, localcontext
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.database import Base
+from app.models import Holding, Market, User
+from app.routers import holdings as holdings_router
+from app.routers import portfolio as portfolio_router
+from app.schemas.holding import TradeRequest
+from app.services.market_directory import MarketDirectory
+from app.services.price_sources import next_price
+from app.utils.fixed_point import QUANTUM, SCALE, divide, float_ratio, from_units, mul, round_units, to_units
+from app.utils.principal_cache import Principal
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_fixed_point.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+PRINCIPAL = Principal(id=1, email="trader@example.com", name="Trader")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Create test database and session"""
+    monkeypatch.setattr(holdings_router, "market_directory", MarketDirectory())
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def exact(value: Decimal) -> Decimal:
+    """Reference: the exact Decimal result quantized half-even to 8 decimals"""
+    return value.quantize(QUANTUM, ROUND_HALF_EVEN)
+
+
+def decimal_next_price(current_price: Decimal, rng) -> Decimal:
+    """The Decimal random-walk step the integer walk replaced, computed without precision loss"""
+    variation_percent = rng.uniform(settings.PRICE_VARIATION_MIN, settings.PRICE_VARIATION_MAX)
+    direction = rng.choice([1, -1])
+    with localcontext() as context:
+        context.prec = 100
+        new_price = current_price + current_price * Decimal(str(variation_percent / 100)) * direction
+        if new_price < QUANTUM:
+            new_price = current_price * Decimal("0.99")
+        return max(exact(new_price), QUANTUM)
+
+
+def random_amount(rng) -> Decimal:
+    return Decimal(rng.randint(1, 10 ** rng.randint(1, 16))).scaleb(-8)
+
+
+def test_units_round_trip_and_half_even():
+    """Test conversions keep 8 decimals and round ties to even like Decimal.quantize"""
+    assert to_units(Decimal("12.5")) == 1_250_000_000
+    assert to_units(3) == 3 * SCALE and to_units("0.00000001") == 1
+    assert from_units(1_250_000_000) == Decimal("12.50000000")
+    assert str(from_units(1)) == "1E-8" and from_units(-5) == Decimal("-0.00000005")
+
+    assert to_units(Decimal("0.000000005")) == 0 and to_units(Decimal("0.000000015")) == 2
+    assert to_units(Decimal("-0.000000015")) == -2
+    assert [divide(n, 2) for n in (1, 3, 5, -1, -3)] == [0, 2, 2, 0, -2]
+    assert divide(7, -2) == -4 and divide(10, 3) == 3 and divide(-10, 3) == -3
+
+    rng = random.Random(1)
+    for _ in range(2000):
+        amount = random_amount(rng) * rng.choice([1, -1])
+        assert from_units(to_units(amount)) == amount
+
+
+def test_products_and_quotients_match_quantized_decimal():
+    """Test products and quotients of units equal the exact Decimal result at 8 decimals"""
+    rng = random.Random(2)
+    with localcontext() as context:
+        context.prec = 100
+        for _ in range(5000):
+            a, b = random_amount(rng), random_amount(rng)
+            assert from_units(mul(to_units(a), to_units(b))) == exact(a * b)
+            assert from_units(divide(to_units(a) * SCALE, to_units(b))) == exact(a / b)
+            assert from_units(round_units(to_units(a) * to_units(b))) == exact(a * b)
+
+
+def test_float_ratio_matches_decimal_str():
+    """Test floats enter integer math with the value Decimal(str(x)) reads"""
+    rng = random.Random(3)
+    samples = [0.0, 1.0, 0.05, 1e-05, 2.5e-07, 1234.5, 1e20] + [rng.uniform(0.0001, 0.05) for _ in range(5000)]
+    for value in samples:
+        numerator, denominator = float_ratio(value)
+        assert Decimal(numerator) / Decimal(denominator) == Decimal(str(value))
+
+
+def test_next_price_matches_decimal_walk():
+    """Test the integer walk step is identical to the Decimal step quantized to 8 decimals"""
+    picker = random.Random(4)
+    for sample in range(20000):
+        price = random_amount(picker)
+        expected = decimal_next_price(price, random.Random(sample))
+        assert from_units(next_price(to_units(price), random.Random(sample))) == expected
+
+
+def test_next_price_never_walks_below_minimum(monkeypatch):
+    """Test tiny prices stay at or above one unit"""
+    monkeypatch.setattr(settings, "PRICE_VARIATION_MIN", 150.0)
+    monkeypatch.setattr(settings, "PRICE_VARIATION_MAX", 150.0)
+    rng = random.Random(5)
+    for units in [1, 2, 3, 150, 10 ** 10]:
+        for _ in range(50):
+            assert next_price(units, rng) >= 1
+
+
+def _seed(db, balance="100000", holdings=()):
+    db.add(User(id=1, name="Trader", email="trader@example.com", hashed_password="x", balance=Decimal(balance)))
+    db.add(Market(id=1, symbol="BTC/USDT", current_price=Decimal("62000.12345678")))
+    for quantity, avg_buy_price in holdings:
+        db.add(Holding(user_id=1, market_id=1, quantity=Decimal(quantity), avg_buy_price=Decimal(avg_buy_price)))
+    db.commit()
+
+
+def test_trades_match_decimal_math(db):
+    """Test the balance moves by the logged total and the average price equals the Decimal math at 8 decimals"""
+    _seed(db, balance="1000.12345679", holdings=[("0.33333333", "29999.99999999")])
+    price, quantity = Decimal("30123.45678901"), Decimal("0.01234567")
+
+    response = holdings_router.execute_trade(
+        TradeRequest(user_id=1, symbol="BTC/USDT", type="buy", price=price, quantity=quantity), db, PRINCIPAL
+    )
+    with localcontext() as context:
+        context.prec = 100
+        total = exact(price * quantity)
+        balance = Decimal("1000.12345679") - total
+        avg_buy_price = exact((Decimal("29999.99999999") * Decimal("0.33333333") + price * quantity)
+                              / (Decimal("0.33333333") + quantity))
+
+    db.expire_all()
+    holding = db.query(Holding).one()
+    assert db.get(User, 1).balance == balance
+    assert holding.avg_buy_price == avg_buy_price and holding.quantity == Decimal("0.34567900")
+    assert response["total_amount"] == float(total)
+
+    holdings_router.execute_trade(
+        TradeRequest(user_id=1, symbol="BTC/USDT", type="sell", price=price, quantity=Decimal("0.345679")), db, PRINCIPAL
+    )
+    db.expire_all()
+    assert db.query(Holding).count() == 0
+    with localcontext() as context:
+        context.prec = 100
+        assert db.get(User, 1).balance == balance + exact(price * Decimal("0.345679"))
+
+
+def test_trade_rejects_amounts_below_one_unit(db):
+    """Test a quantity that rounds to zero units is rejected instead of creating an empty holding"""
+    _seed(db)
+    with pytest.raises(HTTPException) as exc:
+        holdings_router.execute_trade(
+            TradeRequest(user_id=1, symbol="BTC/USDT", type="buy", price=Decimal("100"), quantity=Decimal("0.000000001")),
+            db, PRINCIPAL
+        )
+    assert exc.value.status_code == 400
+
+
+def test_portfolio_matches_decimal_math(db):
+    """Test P&L and total value equal the exact Decimal sums at 8 decimals"""
+    _seed(db, balance="0.00000001", holdings=[("0.12345678", "61000.98765432")])
+    db.add(Market(id=2, symbol="ETH/USDT", current_price=Decimal("3000.5")))
+    db.add(Holding(user_id=1, market_id=2, quantity=Decimal("1.00000001"), avg_buy_price=Decimal("3100")))
+    db.commit()
+
+    body = portfolio_router.get_portfolio_summary(1, db, PRINCIPAL).body.decode()
+    with localcontext() as context:
+        context.prec = 100
+        btc = (Decimal("62000.12345678"), Decimal("61000.98765432"), Decimal("0.12345678"))
+        eth = (Decimal("3000.5"), Decimal("3100"), Decimal("1.00000001"))
+        total = exact(Decimal("0.00000001") + sum(price * quantity for price, _, quantity in (btc, eth)))
+        pnls = [exact((price - avg) * quantity) for price, avg, quantity in (btc, eth)]
+
+    assert f'"total_value":"{total}"' in body
+    for pnl in pnls:
+        assert f'"unrealized_pnl":"{pnl}"' in body
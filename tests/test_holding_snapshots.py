@@ -0,0 +1,264 @@
+import json
+import pytest
+from decimal import Decimal
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session, sessionmaker
+from app.config import settings
+from app.database import Base
+from app.db_sharding import ShardSet
+from app.models import Holding, HoldingSnapshot, Market, TransactionLog, User
+from app.routers import holdings as holdings_router
+from app.routers import markets as markets_router
+from app.schemas.holding import TradeRequest
+from app.services import holding_snapshots
+from app.services.cold_storage import ColdStore, compact_transactions_before
+from app.services.holding_snapshots import main, run
+from app.services.market_directory import MarketDirectory
+from app.utils.principal_cache import Principal
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_holding_snapshots.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ColdStore(str(tmp_path))
+
+
+@pytest.fixture
+def db(monkeypatch, store):
+    """Single-database setup: replays read this engine and a temp cold store"""
+    monkeypatch.setattr(holding_snapshots, "shards", ShardSet(engine, []))
+    monkeypatch.setattr(holding_snapshots, "cold_store_for_shard", lambda shard_id: store)
+    monkeypatch.setattr(holdings_router, "market_directory", MarketDirectory())
+    monkeypatch.setattr(settings, "SNAPSHOT_SETTLE_SECONDS", 0)
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def traders(db):
+    """Three users trading two markets through the trade endpoint"""
+    users = [User(name=f"Trader {i}", email=f"t{i}@example.com", hashed_password="x", balance=Decimal("10000"))
+             for i in range(3)]
+    db.add_all(users + [
+        Market(symbol="BTC/USDT", current_price=Decimal("60000")),
+        Market(symbol="ETH/USDT", current_price=Decimal("3000")),
+    ])
+    db.commit()
+    for user in users:
+        trade(db, user, "BTC/USDT", "buy", "60000.12345678", "0.01234567")
+        trade(db, user, "BTC/USDT", "buy", "61000.5", "0.00765433")
+        trade(db, user, "ETH/USDT", "buy", "3000.33333333", "0.33333333")
+        trade(db, user, "BTC/USDT", "sell", "62000", "0.005")
+    return users
+
+
+def trade(db, user, symbol, type, price, quantity):
+    return holdings_router.execute_trade(
+        TradeRequest(user_id=user.id, symbol=symbol, type=type, price=Decimal(price), quantity=Decimal(quantity)),
+        db, Principal(user.id, user.name, user.email)
+    )
+
+
+def test_verify_matches_trades(db, traders):
+    """Test a full replay of the log reproduces the holdings written by the trade endpoint"""
+    report = run("verify")
+    assert report["users"] == 3 and report["replayed"] == 12
+    assert report["drift"] == []
+
+
+def test_checkpoint_then_replay_only_new_transactions(db, traders):
+    """Test a replay after a checkpoint applies just the transactions after it, balance included"""
+    assert run("checkpoint")["checkpoints"] == 3
+    snapshot = db.query(HoldingSnapshot).filter(HoldingSnapshot.user_id == traders[0].id).one()
+    assert snapshot.balance == db.get(User, traders[0].id).balance
+    assert snapshot.transaction_id == db.query(TransactionLog.id).filter(
+        TransactionLog.user_id == traders[0].id).order_by(TransactionLog.id.desc()).first()[0]
+
+    trade(db, traders[0], "ETH/USDT", "sell", "3100", "0.33333333")
+    report = run("verify")
+    assert report["replayed"] == 1 and report["drift"] == []
+
+    # Nothing new for the others, so only the trader who traded gets another checkpoint
+    assert run("checkpoint")["checkpoints"] == 1
+
+
+def test_checkpoint_leaves_unsettled_transactions_for_later(db, traders, monkeypatch):
+    """Test recent transactions are not folded in; the opening balance excludes them"""
+    monkeypatch.setattr(settings, "SNAPSHOT_SETTLE_SECONDS", 3600)
+    run("checkpoint")
+
+    snapshot = db.query(HoldingSnapshot).filter(HoldingSnapshot.user_id == traders[0].id).one()
+    assert snapshot.transaction_id == 0 and snapshot.holdings == "{}"
+    assert snapshot.balance == Decimal("10000")
+    assert run("verify")["drift"] == []
+
+
+def test_trade_committing_during_first_checkpoint(db, traders, monkeypatch):
+    """Test a trade committing right after the opening balance is read is neither in the checkpoint nor in its balance"""
+    monkeypatch.setattr(settings, "SNAPSHOT_SETTLE_SECONDS", 3600)
+    user_id = traders[0].id
+    balance_read, interleaved = [], []
+
+    # The trade commits before the checkpoint run's next statement, once the balance rows were fetched
+    def note_balance_read(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and "users.balance" in statement and "users.name" not in statement:
+            balance_read.append(True)
+
+    def trade_after_balance_read(conn, cursor, statement, parameters, context, executemany):
+        if balance_read and not interleaved:
+            interleaved.append(True)
+            other = TestingSessionLocal()
+            try:
+                trade(other, other.get(User, user_id), "BTC/USDT", "buy", "50000", "0.01")
+            finally:
+                other.close()
+
+    event.listen(engine, "after_cursor_execute", note_balance_read)
+    event.listen(engine, "before_cursor_execute", trade_after_balance_read)
+    try:
+        run("checkpoint", [user_id])
+    finally:
+        event.remove(engine, "after_cursor_execute", note_balance_read)
+        event.remove(engine, "before_cursor_execute", trade_after_balance_read)
+
+    assert interleaved
+    snapshot = db.query(HoldingSnapshot).filter(HoldingSnapshot.user_id == user_id).one()
+    assert snapshot.balance == Decimal("10000")
+    assert run("verify")["drift"] == []
+
+
+def test_verify_reports_drift_and_rebuild_repairs(db, traders):
+    """Test tampered holdings and balances are reported, then rebuilt from the log"""
+    run("checkpoint")
+    trade(db, traders[1], "BTC/USDT", "buy", "59000", "0.1")
+    btc = db.query(Market).filter(Market.symbol == "BTC/USDT").one()
+    eth = db.query(Market).filter(Market.symbol == "ETH/USDT").one()
+
+    expected = db.query(Holding).filter(Holding.user_id == traders[1].id, Holding.market_id == btc.id).one().quantity
+    db.query(Holding).filter(Holding.user_id == traders[1].id, Holding.market_id == btc.id).update({Holding.quantity: Decimal("5")})
+    db.query(Holding).filter(Holding.user_id == traders[2].id, Holding.market_id == eth.id).delete()
+    db.query(User).filter(User.id == traders[0].id).update({User.balance: Decimal("1")})
+    db.add(Holding(user_id=traders[0].id, market_id=eth.id + 100, quantity=Decimal("1"), avg_buy_price=Decimal("1")))
+    db.commit()
+
+    drift = {(item.user_id, item.market_id, item.field): item for item in run("verify")["drift"]}
+    assert set(drift) == {
+        (traders[1].id, btc.id, "quantity"),
+        (traders[2].id, eth.id, "quantity"),
+        (traders[0].id, None, "balance"),
+        (traders[0].id, eth.id + 100, "quantity"),
+    }
+    assert drift[(traders[1].id, btc.id, "quantity")].expected == expected
+    assert drift[(traders[1].id, btc.id, "quantity")].actual == Decimal("5")
+    assert drift[(traders[2].id, eth.id, "quantity")].actual is None
+    assert drift[(traders[0].id, eth.id + 100, "quantity")].expected is None
+
+    assert len(run("rebuild")["drift"]) == 4
+    db.expire_all()
+    assert run("verify")["drift"] == []
+    assert db.get(User, traders[0].id).balance != Decimal("1")
+
+
+def test_replay_reads_cold_storage(db, traders, store):
+    """Test compacted transactions are replayed from cold storage, and rows in both are applied once"""
+    hot_rows = [
+        {column.name: getattr(row, column.name) for column in TransactionLog.__table__.columns}
+        for row in db.query(TransactionLog).filter(TransactionLog.user_id == traders[0].id)
+    ]
+    assert compact_transactions_before(db, store, datetime.utcnow() + timedelta(seconds=1)) == 12
+    assert db.query(TransactionLog).count() == 0
+    assert run("verify")["drift"] == []
+
+    # A compaction that died before deleting its hot rows leaves them in both places
+    db.execute(insert(TransactionLog.__table__), hot_rows)
+    db.commit()
+    report = run("verify", [traders[0].id])
+    assert report["replayed"] == 4 and report["drift"] == []
+
+
+def test_deleted_market_leaves_checkpoints_and_replay(db, traders, store):
+    """Test a deleted market's checkpointed positions and cold rows are not replayed back into holdings"""
+    run("checkpoint", [traders[0].id])
+    assert compact_transactions_before(db, store, datetime.utcnow() + timedelta(seconds=1)) == 12
+    eth = db.query(Market).filter(Market.symbol == "ETH/USDT").one()
+    eth_id = eth.id
+
+    markets_router.delete_market(eth_id, db, Principal(traders[0].id, traders[0].name, traders[0].email))
+
+    snapshot = db.query(HoldingSnapshot).filter(HoldingSnapshot.user_id == traders[0].id).one()
+    assert str(eth_id) not in json.loads(snapshot.holdings)
+    assert run("verify")["drift"] == []
+    assert run("rebuild")["drift"] == []
+    assert db.query(Holding).filter(Holding.market_id == eth_id).count() == 0
+
+
+def test_parallel_batches_and_checkpoint_pruning(db, traders, monkeypatch):
+    """Test small batches across workers give the same result and only SNAPSHOT_KEEP checkpoints stay"""
+    monkeypatch.setattr(settings, "SNAPSHOT_BATCH_USERS", 1)
+    monkeypatch.setattr(settings, "SNAPSHOT_KEEP", 2)
+    for round in range(3):
+        run("checkpoint", workers=3)
+        for user in traders:
+            trade(db, user, "ETH/USDT", "buy", "3000", "0.01")
+
+    assert db.query(HoldingSnapshot).count() == 6
+    report = run("verify", workers=3)
+    assert report["replayed"] == 3 and report["drift"] == []
+
+
+def test_command_exit_codes(db, traders, capsys):
+    """Test verify exits 1 when it finds drift, so it can gate a cron alert"""
+    assert main(["checkpoint"]) == 0
+    assert main(["verify"]) == 0
+    db.query(Holding).filter(Holding.user_id == traders[0].id).delete()
+    db.commit()
+    assert main(["verify", "--user", str(traders[0].id)]) == 1
+    assert "2 drifted values found" in capsys.readouterr().out
+    assert main(["rebuild", "--user", str(traders[0].id)]) == 0
+    assert main(["verify"]) == 0
+
+
+def test_sharded_replay(tmp_path, monkeypatch, store):
+    """Test users on an extra shard are replayed there while their balance is checked on the primary"""
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}", connect_args={"check_same_thread": False})
+    shard_set = ShardSet(primary, [f"sqlite:///{tmp_path / 'shard1.db'}"])
+    for shard_engine in shard_set.engines:
+        Base.metadata.create_all(bind=shard_engine)
+    monkeypatch.setattr(holding_snapshots, "shards", shard_set)
+    monkeypatch.setattr(holding_snapshots, "cold_store_for_shard", lambda shard_id: store)
+    monkeypatch.setattr(settings, "SNAPSHOT_SETTLE_SECONDS", 0)
+
+    with Session(bind=primary) as db:
+        db.add_all([User(id=1, name="Odd", email="odd@example.com", hashed_password="x", balance=Decimal("900")),
+                    Market(id=1, symbol="BTC/USDT", current_price=Decimal("100"))])
+        db.commit()
+    with Session(bind=shard_set.engines[1]) as db:
+        db.add(Market(id=1, symbol="BTC/USDT", current_price=Decimal("100")))
+        db.add(TransactionLog(user_id=1, market_id=1, type="buy", price=Decimal("100"),
+                              quantity=Decimal("1"), total_amount=Decimal("100")))
+        db.add(Holding(user_id=1, market_id=1, quantity=Decimal("1"), avg_buy_price=Decimal("100")))
+        db.commit()
+
+    assert run("checkpoint")["checkpoints"] == 1
+    assert shard_set.fan_out(lambda db: db.query(HoldingSnapshot).count()) == [0, 1]
+
+    with Session(bind=primary) as db:
+        db.query(User).update({User.balance: Decimal("1000")})
+        db.commit()
+    drift = run("verify")["drift"]
+    assert [(item.field, item.expected, item.actual) for item in drift] == [("balance", Decimal("900"), Decimal("1000"))]
+
+    run("rebuild")
+    with Session(bind=primary) as db:
+        assert db.get(User, 1).balance == Decimal("900")
+    for shard_engine in shard_set.engines:
+        Base.metadata.drop_all(bind=shard_engine)
@@ -0,0 +1,188 @@
+import random
+import threading
+import time
+import pytest
+import numpy as np
+from decimal import Decimal
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import Market
+from app.services.indicators import INDICATORS, IndicatorCache
+from app.services.price_history import Tick, record_ticks
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_indicators.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Create test database and session"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def random_walk(count, seed=7):
+    rng = random.Random(seed)
+    prices, price = [], 100.0
+    for _ in range(count):
+        price *= 1 + rng.uniform(-0.02, 0.02)
+        prices.append(round(price, 8))
+    volumes = [round(rng.uniform(0.1, 5.0), 8) for _ in range(count)]
+    return prices, volumes
+
+
+@pytest.mark.parametrize("name", sorted(INDICATORS))
+@pytest.mark.parametrize("count", [5, 14, 15, 300])
+def test_backfill_matches_incremental(name, count):
+    """Test vectorized backfill ends in the same state as tick-by-tick updates"""
+    prices, volumes = random_walk(count)
+
+    incremental = INDICATORS[name](14)
+    for price, volume in zip(prices, volumes):
+        incremental.update(price, volume)
+
+    backfilled = INDICATORS[name](14)
+    backfilled.backfill(np.array(prices), np.array(volumes))
+
+    if incremental.value is None:
+        assert backfilled.value is None
+    else:
+        assert backfilled.value == pytest.approx(incremental.value, rel=1e-9)
+
+    # Both must keep agreeing after further ticks
+    for price, volume in zip(*random_walk(20, seed=11)):
+        incremental.update(price, volume)
+        backfilled.update(price, volume)
+    assert backfilled.value == pytest.approx(incremental.value, rel=1e-9)
+
+
+def test_sma_value():
+    """Test SMA over a known series"""
+    sma = INDICATORS["sma"](3)
+    for price in [1, 2, 3, 4]:
+        sma.update(price)
+    assert sma.value == pytest.approx(3.0)
+
+
+def test_cache_catches_up_with_new_ticks(db):
+    """Test a cached indicator folds in ticks recorded after it was first computed"""
+    market = Market(symbol="BTC/USDT", current_price=Decimal("100"))
+    db.add(market)
+    db.commit()
+
+    prices, volumes = random_walk(40)
+    base = datetime(2024, 1, 1)
+    ticks = [
+        Tick(market_id=market.id, price=Decimal(str(p)), volume=Decimal(str(v)), timestamp=base + timedelta(seconds=i))
+        for i, (p, v) in enumerate(zip(prices, volumes))
+    ]
+    record_ticks(db, ticks[:25])
+    db.commit()
+
+    cache = IndicatorCache(max_entries=8)
+    cache.get(db, market.id, "ema", 10)
+
+    record_ticks(db, ticks[25:])
+    db.commit()
+    value, as_of = cache.get(db, market.id, "ema", 10)
+
+    expected = INDICATORS["ema"](10)
+    for price in prices:
+        expected.update(price)
+
+    assert value == pytest.approx(expected.value, rel=1e-9)
+    assert as_of == ticks[-1].timestamp
+
+
+def _ticks(market_id, prices, start, step=1):
+    return [Tick(market_id=market_id, price=Decimal(str(price)), timestamp=start + timedelta(seconds=i * step))
+            for i, price in enumerate(prices)]
+
+
+def _expected(name, window, prices):
+    indicator = INDICATORS[name](window)
+    for price in prices:
+        indicator.update(price)
+    return indicator.value
+
+
+def test_late_tick_triggers_backfill(db):
+    """Test a tick older than the cached state is not skipped: the state is backfilled in timestamp order"""
+    market = Market(symbol="BTC/USDT", current_price=Decimal("100"))
+    db.add(market)
+    db.commit()
+    prices, _ = random_walk(30)
+    base = datetime(2024, 1, 1)
+    ticks = _ticks(market.id, prices, base)
+
+    record_ticks(db, ticks[:10] + ticks[11:])
+    db.commit()
+    cache = IndicatorCache(max_entries=8)
+    cache.get(db, market.id, "sma", 25)
+
+    # Tick 10 arrives last, e.g. from POST /api/markets/ticks
+    record_ticks(db, [ticks[10]])
+    db.commit()
+    value, as_of = cache.get(db, market.id, "sma", 25)
+    assert value == pytest.approx(_expected("sma", 25, prices), rel=1e-9)
+    assert as_of == ticks[-1].timestamp
+
+    # A late tick stored before the first request is inside the backfill and not re-read afterwards
+    record_ticks(db, _ticks(market.id, [50.0], base - timedelta(days=1)))
+    db.commit()
+    fresh = IndicatorCache(max_entries=8)
+    first = fresh.get(db, market.id, "sma", 25)
+    assert fresh.get(db, market.id, "sma", 25) == first
+
+
+def test_concurrent_first_requests_backfill_once(db, monkeypatch):
+    """Test a request that finds an entry still being created backfills it rather than catching up from id 0"""
+    market = Market(symbol="BTC/USDT", current_price=Decimal("100"))
+    db.add(market)
+    db.commit()
+    prices, _ = random_walk(40)
+    record_ticks(db, _ticks(market.id, prices, datetime(2024, 1, 1)))
+    db.commit()
+
+    cache = IndicatorCache(max_entries=8)
+    entry, backfill, catch_up = cache._entry, cache._backfill, cache._catch_up
+    calls = []
+    published = threading.Event()
+
+    def slow_creator(key):
+        # The first request publishes the entry, then stalls before it takes the entry's lock
+        found = entry(key)
+        if not published.is_set():
+            published.set()
+            time.sleep(0.2)
+        return found
+
+    monkeypatch.setattr(cache, "_entry", slow_creator)
+    monkeypatch.setattr(cache, "_backfill", lambda *args: (calls.append("backfill"), backfill(*args)))
+    monkeypatch.setattr(cache, "_catch_up", lambda *args: (calls.append("catch_up"), catch_up(*args)))
+
+    def request():
+        session = TestingSessionLocal()
+        try:
+            return cache.get(session, market.id, "ema", 10)
+        finally:
+            session.close()
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(request()))
+    first.start()
+    published.wait()
+    results.append(request())
+    first.join()
+
+    assert calls == ["backfill", "catch_up"]
+    assert results[0] == results[1]
+    assert results[0][0] == pytest.approx(_expected("ema", 10, prices), rel=1e-9)
@@ -0,0 +1,98 @@
+import json
+import pytest
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.database import Base
+from app.models import Market, PriceTick
+from app.routers import markets as markets_router
+from app.schemas.market import MarketBulkUpsert, MarketCreate
+from app.services.market_directory import MarketDirectory
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_market_bulk.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Create test database and session"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def directory(monkeypatch):
+    """Directory that does not publish invalidations to Redis"""
+    directory = MarketDirectory(publish=lambda symbol: None)
+    monkeypatch.setattr(markets_router, "market_directory", directory)
+    return directory
+
+
+@pytest.fixture
+def statements():
+    """SQL statements sent to the database"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _bulk(db, prices):
+    payload = MarketBulkUpsert(markets=[MarketCreate(symbol=symbol, price=Decimal(price)) for symbol, price in prices])
+    return json.loads(markets_router.bulk_upsert_markets(payload=payload, db=db, current_user=None).body)
+
+
+def test_bulk_upsert_one_statement(db, directory, statements):
+    """Test creating and repricing many markets takes one upsert and records a tick each"""
+    db.add(Market(symbol="BTC/USDT", current_price=Decimal("60000")))
+    db.commit()
+    statements.clear()
+
+    result = _bulk(db, [("BTC/USDT", "61000"), ("ETH/USDT", "3000"), ("SOL/USDT", "140"), ("ETH/USDT", "3100")])
+
+    assert result["created"] == 2 and result["updated"] == 1
+    assert {m["symbol"]: m["current_price"] for m in result["markets"]} == {
+        "BTC/USDT": "61000.00000000", "ETH/USDT": "3100.00000000", "SOL/USDT": "140.00000000"
+    }
+    assert len([s for s in statements if s.startswith("INSERT INTO markets")]) == 1
+    assert not [s for s in statements if s.startswith("SELECT")]
+
+    assert db.query(Market).filter(Market.symbol == "BTC/USDT").one().current_price == Decimal("61000")
+    assert db.query(PriceTick).count() == 3
+    assert directory.resolve(db, "SOL/USDT") == db.query(Market.id).filter(Market.symbol == "SOL/USDT").scalar()
+
+
+def test_bulk_upsert_limit(db, directory, monkeypatch):
+    """Test oversized batches are rejected"""
+    monkeypatch.setattr(settings, "MARKET_BULK_MAX", 1)
+
+    with pytest.raises(HTTPException) as exc:
+        _bulk(db, [("BTC/USDT", "1"), ("ETH/USDT", "2")])
+    assert exc.value.status_code == 400
+
+
+def test_price_lookup_single_query(db, directory, statements):
+    """Test prices for many symbols come back from one IN query, with unknown symbols listed"""
+    _bulk(db, [("BTC/USDT", "61000"), ("ETH/USDT", "3000")])
+    statements.clear()
+
+    response = markets_router.get_market_prices(symbols=["BTC/USDT,ETH/USDT", "DOGE/USDT", "BTC/USDT"], db=db, current_user=None)
+    body = json.loads(response.body)
+
+    assert body == {"prices": {"BTC/USDT": "61000.00000000", "ETH/USDT": "3000.00000000"}, "missing": ["DOGE/USDT"]}
+    assert len(statements) == 1 and " IN (" in statements[0]
+
+    with pytest.raises(HTTPException):
+        markets_router.get_market_prices(symbols=[" , "], db=db, current_user=None)
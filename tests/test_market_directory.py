@@ -0,0 +1,125 @@
+import pytest
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, Market, Holding
+from app.routers import holdings as holdings_router
+from app.routers import markets as markets_router
+from app.schemas.holding import TradeRequest
+from app.services.market_directory import MarketDirectory
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_market_directory.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Create test database and session"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def published():
+    """Invalidations sent to other processes"""
+    return []
+
+
+@pytest.fixture
+def directory(monkeypatch, published):
+    """Fresh directory wired into the routers, publishing into a list instead of Redis"""
+    directory = MarketDirectory(publish=published.append)
+    monkeypatch.setattr(holdings_router, "market_directory", directory)
+    monkeypatch.setattr(markets_router, "market_directory", directory)
+    return directory
+
+
+@pytest.fixture
+def market(db):
+    market = Market(symbol="BTC/USDT", current_price=Decimal("60000"))
+    db.add(market)
+    db.commit()
+    db.refresh(market)
+    return market
+
+
+@pytest.fixture
+def market_queries():
+    """Count SELECTs against the markets table"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and "FROM markets" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_resolve_caches_hits_only(db, directory, market, market_queries):
+    """Test a known symbol is queried once, unknown symbols every time"""
+    assert directory.resolve(db, "BTC/USDT") == market.id
+    assert directory.resolve(db, "BTC/USDT") == market.id
+    assert directory.resolve(db, "DOGE/USDT") is None
+    assert directory.resolve(db, "DOGE/USDT") is None
+
+    assert len(market_queries) == 3
+    stats = directory.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["size"] == 1
+
+
+def test_trades_skip_market_query(db, directory, market, market_queries):
+    """Test repeated trades resolve the symbol from the cache"""
+    user = User(name="Test User", email="test@example.com", hashed_password="x", balance=Decimal("10000"))
+    db.add(user)
+    db.commit()
+
+    for _ in range(3):
+        trade = TradeRequest(user_id=user.id, symbol="BTC/USDT", type="buy", price=Decimal("100"), quantity=Decimal("1"))
+        holdings_router.execute_trade(trade=trade, db=db, current_user=user)
+
+    assert len(market_queries) == 1
+    assert directory.stats()["hits"] == 2
+    assert db.query(Holding).one().quantity == Decimal("3")
+
+
+def test_delete_invalidates_and_broadcasts(db, directory, market, published):
+    """Test deleting a market drops its entry here and notifies other processes"""
+    directory.resolve(db, "BTC/USDT")
+
+    markets_router.delete_market(market_id=market.id, db=db, current_user=None)
+
+    assert directory.stats()["size"] == 0
+    assert published == ["BTC/USDT"]
+    assert directory.resolve(db, "BTC/USDT") is None
+
+
+def test_stale_entry_recovers(db, directory, market):
+    """Test a cached id whose market vanished (missed invalidation) is dropped on the next read"""
+    directory.remember("BTC/USDT", market.id + 100)
+
+    assert directory.get_market(db, "BTC/USDT").id == market.id
+    assert directory.resolve(db, "BTC/USDT") == market.id
+
+
+def test_remote_invalidation(directory, published):
+    """Test messages from other processes drop entries without re-broadcasting"""
+    directory.remember("BTC/USDT", 1)
+    directory.remember("ETH/USDT", 2)
+
+    directory.handle_message(b"BTC/USDT")
+    assert directory.stats()["size"] == 1
+
+    directory.handle_message(b"*")
+    assert directory.stats()["size"] == 0
+    assert published == []
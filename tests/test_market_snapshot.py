@@ -0,0 +1,108 @@
+import json
+import pytest
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.routers import markets as markets_router
+from app.schemas.market import MarketCreate, MarketUpdate
+from app.services.market_directory import MarketDirectory
+from app.services.market_snapshot import MarketSnapshot, etag_matches
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_market_snapshot.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Create test database and session"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    """Fresh snapshot (and a directory that does not publish to Redis) wired into the router"""
+    snapshot = MarketSnapshot()
+    monkeypatch.setattr(markets_router, "market_snapshot", snapshot)
+    monkeypatch.setattr(markets_router, "market_directory", MarketDirectory())
+    return snapshot
+
+
+@pytest.fixture
+def market_queries():
+    """Count SELECTs against the markets table"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and "FROM markets" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _create(db, symbol: str, price: str):
+    return markets_router.create_or_update_market(
+        market_data=MarketCreate(symbol=symbol, price=Decimal(price)), db=db, current_user=None
+    )
+
+
+def _list(db, if_none_match=None):
+    return markets_router.get_all_markets(db=db, current_user=None, if_none_match=if_none_match)
+
+
+def test_serialized_once_per_version(db, snapshot, market_queries):
+    """Test repeated polling reuses the cached bytes without loading markets again"""
+    _create(db, "BTC/USDT", "60000")
+    market_queries.clear()
+
+    first = _list(db)
+    second = _list(db)
+
+    assert first.body == second.body
+    assert first.headers["etag"] == '"markets-1"'
+    body = json.loads(first.body)
+    assert body[0]["symbol"] == "BTC/USDT"
+    assert body[0]["current_price"] == "60000.00000000"
+    assert len(market_queries) == 1
+    assert snapshot.stats()["rebuilds"] == 1 and snapshot.stats()["hits"] == 1
+
+
+def test_not_modified_until_price_changes(db, snapshot):
+    """Test a current client gets 304 until a price update or new market bumps the version"""
+    market = _create(db, "BTC/USDT", "60000")
+    etag = _list(db).headers["etag"]
+
+    assert _list(db, if_none_match=etag).status_code == 304
+    assert _list(db, if_none_match=f"W/{etag}").status_code == 304
+
+    markets_router.update_market_price(
+        symbol="BTC/USDT", price_update=MarketUpdate(price=Decimal("61000")), db=db, current_user=None
+    )
+    response = _list(db, if_none_match=etag)
+    assert response.status_code == 200
+    assert json.loads(response.body)[0]["current_price"] == "61000.00000000"
+
+    etag = response.headers["etag"]
+    _create(db, "ETH/USDT", "3000")
+    assert len(json.loads(_list(db, if_none_match=etag).body)) == 2
+
+    etag = _list(db).headers["etag"]
+    markets_router.delete_market(market_id=market.id, db=db, current_user=None)
+    assert [m["symbol"] for m in json.loads(_list(db, if_none_match=etag).body)] == ["ETH/USDT"]
+
+
+def test_etag_matching():
+    """Test If-None-Match lists, weak tags and wildcards"""
+    assert etag_matches('"a", "markets-3"', '"markets-3"')
+    assert etag_matches("*", '"markets-3"')
+    assert not etag_matches('"markets-2"', '"markets-3"')
+    assert not etag_matches(None, '"markets-3"')
@@ -0,0 +1,226 @@
+import json
+import pytest
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import Holding, Market, Order, TransactionLog, User
+from app.routers import markets as markets_router
+from app.routers import orders as orders_router
+from app.schemas.order import OrderCreate
+from app.services import order_book
+from app.services.market_directory import MarketDirectory
+from app.services.order_book import AT_OR_ABOVE, AT_OR_BELOW, Ladder, OrderBooks, fill_crossed_orders
+from app.utils.principal_cache import Principal
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_orders.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Test database with fresh order books and market directory"""
+    monkeypatch.setattr(order_book, "order_books", OrderBooks())
+    monkeypatch.setattr(orders_router, "market_directory", MarketDirectory())
+
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def user(db):
+    user = User(name="Alice", email="alice@example.com", hashed_password="x", balance=Decimal("1000"))
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def market(db):
+    market = Market(symbol="BTC/USDT", current_price=Decimal("100"))
+    db.add(market)
+    db.commit()
+    db.refresh(market)
+    return market
+
+
+def place(db, user, side, type, price, quantity="1"):
+    order = OrderCreate(user_id=user.id, symbol="BTC/USDT", side=side, type=type,
+                        price=Decimal(price), quantity=Decimal(quantity))
+    return orders_router.place_order(order_data=order, db=db, current_user=Principal(user.id, user.name, user.email))
+
+
+def tick(db, market, price):
+    return fill_crossed_orders(db, {market.id: (market.symbol, Decimal(price))})
+
+
+def test_ladder_takes_crossed_entries_in_price_time_order():
+    """Test a ladder keeps (trigger, id) order and splits off exactly the crossed side"""
+    ladder = Ladder()
+    for trigger, order_id in [(300, 1), (100, 2), (200, 3), (200, 4), (100, 5)]:
+        ladder.add(trigger, order_id)
+
+    assert list(ladder.ids) == [2, 5, 3, 4, 1]
+    assert ladder.take_through(200) == [(100, 2), (100, 5), (200, 3), (200, 4)]
+    assert ladder.take_from(300) == [(300, 1)]
+    assert len(ladder) == 0
+
+
+def test_bulk_sync_matches_single_inserts():
+    """Test the sort-merge path used for large syncs builds the same ladder as one-by-one inserts"""
+    entries = [((order_id * 7919) % 1000, order_id) for order_id in range(1, 500)]
+    single, bulk = Ladder(), Ladder()
+    for trigger, order_id in entries:
+        single.add(trigger, order_id)
+    bulk.extend(entries)
+
+    assert list(single.triggers) == list(bulk.triggers)
+    assert list(single.ids) == list(bulk.ids)
+
+
+def test_buy_limit_fills_at_tick_price(db, user, market):
+    """Test a buy limit fills once price <= limit, at the tick price, updating balance and holding"""
+    order = place(db, user, "buy", "limit", "90", "2")
+
+    assert tick(db, market, "95") == {"filled": 0, "rejected": 0}
+    assert tick(db, market, "89.5") == {"filled": 1, "rejected": 0}
+
+    db.expire_all()
+    order = db.get(Order, order.id)
+    assert order.status == "filled"
+    assert order.filled_price == Decimal("89.5")
+    assert db.get(User, user.id).balance == Decimal("821")
+    holding = db.query(Holding).one()
+    assert (holding.quantity, holding.avg_buy_price) == (Decimal("2"), Decimal("89.5"))
+    assert db.query(TransactionLog).one().total_amount == Decimal("179")
+
+
+def test_stop_and_limit_sides(db, user, market):
+    """Test which side of its price each order type waits on"""
+    db.add(Holding(user_id=user.id, market_id=market.id, quantity=Decimal("3"), avg_buy_price=Decimal("100")))
+    db.commit()
+    sell_stop = place(db, user, "sell", "stop", "80")
+    sell_limit = place(db, user, "sell", "limit", "120")
+    buy_stop = place(db, user, "buy", "stop", "110")
+
+    tick(db, market, "110")
+    db.expire_all()
+    assert [db.get(Order, o.id).status for o in (sell_stop, sell_limit, buy_stop)] == ["open", "open", "filled"]
+
+    tick(db, market, "125")
+    tick(db, market, "75")
+    db.expire_all()
+    assert [db.get(Order, o.id).status for o in (sell_stop, sell_limit)] == ["filled", "filled"]
+    assert db.query(Holding).one().quantity == Decimal("2")
+    assert db.get(User, user.id).balance == Decimal("1000") - 110 + 125 + 75
+
+
+def test_fills_of_one_tick_apply_oldest_first(db, user, market):
+    """Test one tick's fills run in id order: an unaffordable buy is rejected, a sell sees the earlier buy"""
+    first = place(db, user, "buy", "limit", "100", "6")
+    second = place(db, user, "buy", "limit", "100", "6")
+    sell = place(db, user, "sell", "limit", "50", "1")
+    oversold = place(db, user, "sell", "limit", "50", "9")
+
+    assert tick(db, market, "100") == {"filled": 2, "rejected": 2}
+    db.expire_all()
+    statuses = [db.get(Order, o.id).status for o in (first, second, sell, oversold)]
+    assert statuses == ["filled", "rejected", "filled", "rejected"]
+    assert db.get(Order, second.id).filled_price is None
+    assert db.query(Holding).one().quantity == Decimal("5")
+    assert db.query(TransactionLog).count() == 2
+
+
+def test_cancelled_order_is_not_filled(db, user, market):
+    """Test an order cancelled after the books synced it is skipped when its price is reached"""
+    order = place(db, user, "buy", "limit", "90")
+    tick(db, market, "95")
+    orders_router.cancel_order(order_id=order.id, db=db, current_user=Principal(user.id, user.name, user.email))
+
+    assert tick(db, market, "80") == {"filled": 0, "rejected": 0}
+    assert db.get(User, user.id).balance == Decimal("1000")
+
+    with pytest.raises(HTTPException) as exc_info:
+        orders_router.cancel_order(order_id=order.id, db=db, current_user=Principal(user.id, user.name, user.email))
+    assert exc_info.value.status_code == 400
+
+
+def test_failed_fill_restores_the_books(db, user, market, monkeypatch):
+    """Test orders go back on their ladders when the fill transaction fails"""
+    place(db, user, "buy", "limit", "90")
+    settle_fills = order_book.settle_fills
+
+    def broken(*args):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(order_book, "settle_fills", broken)
+    with pytest.raises(RuntimeError):
+        tick(db, market, "80")
+    assert order_book.order_books.stats()["resting"] == 1
+
+    monkeypatch.setattr(order_book, "settle_fills", settle_fills)
+    assert tick(db, market, "80")["filled"] == 1
+
+
+def test_sync_picks_up_orders_committed_out_of_id_order(db, user, market):
+    """Test an order whose id is below the watermark but was not synced yet still joins the books"""
+    books = order_book.order_books
+    books.add_many([(1000, market.id, AT_OR_BELOW, 1), (5, market.id, AT_OR_ABOVE, 1)])
+    db.add(Order(id=900, user_id=user.id, market_id=market.id, side="buy", type="limit",
+                 price=Decimal("90"), quantity=Decimal("1"), status="open"))
+    db.commit()
+
+    assert books.sync(db) == 1
+    assert books.stats()["resting"] == 3
+
+
+def test_user_orders_listing(db, user, market):
+    """Test listing a user's orders, newest first, filtered by status"""
+    bought = place(db, user, "buy", "limit", "90")
+    resting = place(db, user, "sell", "stop", "50")
+    tick(db, market, "85")
+
+    principal = Principal(user.id, user.name, user.email)
+    every = json.loads(orders_router.get_user_orders(user_id=user.id, order_status=None, db=db, current_user=principal).body)
+    open_orders = json.loads(orders_router.get_user_orders(user_id=user.id, order_status="open", db=db, current_user=principal).body)
+
+    assert [order["id"] for order in every] == [resting.id, bought.id]
+    assert [order["id"] for order in open_orders] == [resting.id]
+    assert every[1]["filled_price"] == "85.00000000"
+
+
+def test_deleted_market_orders_never_fill_on_a_reused_id(db, user, market, monkeypatch):
+    """Test deleting a market removes its resting orders, so a new market reusing the id does not fill them"""
+    monkeypatch.setattr(markets_router, "market_directory", MarketDirectory(publish=lambda symbol: None))
+    order = place(db, user, "buy", "limit", "90")
+    tick(db, market, "95")
+    assert order_book.order_books.stats()["resting"] == 1
+
+    market_id = market.id
+    markets_router.delete_market(market_id=market_id, db=db, current_user=None)
+    assert db.query(Order).count() == 0
+
+    doge = Market(id=market_id, symbol="DOGE/USDT", current_price=Decimal("1"))
+    db.add(doge)
+    db.commit()
+    assert tick(db, doge, "1") == {"filled": 0, "rejected": 0}
+    assert db.get(User, user.id).balance == Decimal("1000")
+    assert db.query(Holding).count() == 0
+
+
+def test_drop_market_evicts_its_ladders():
+    """Test a deleted market's orders leave the in-memory books"""
+    books = OrderBooks()
+    books.add_many([(1, 1, AT_OR_BELOW, 90), (2, 1, AT_OR_ABOVE, 110), (3, 2, AT_OR_BELOW, 90)])
+
+    assert books.drop_market(1) == 2
+    assert books.stats()["resting"] == 1 and books.stats()["ladders"] == 1
+    assert books.take_crossed({1: Decimal("1")}) == []
@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.routers import auth as auth_router
+from app.schemas.user import UserCreate, UserLogin
+from app.utils import auth
+from app.utils.password_pool import PasswordPool
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_password_pool.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Create test database and session"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="module")
+def shared_pool():
+    """One worker process for the whole module (spawning is slow)"""
+    pool = PasswordPool(workers=1, max_pending=8)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def pool(monkeypatch, shared_pool):
+    """Pool wired into the auth router and helpers"""
+    monkeypatch.setattr(auth_router, "password_pool", shared_pool)
+    monkeypatch.setattr(auth, "password_pool", shared_pool)
+    return shared_pool
+
+
+def test_hash_and_verify_round_trip(pool):
+    """Test hashes made in the pool verify in the pool and in this process"""
+    async def run():
+        hashed = await pool.hash("password123")
+        return hashed, await pool.verify("password123", hashed), await pool.verify("wrong", hashed)
+
+    hashed, good, bad = asyncio.run(run())
+
+    assert good is True and bad is False
+    assert auth.verify_password("password123", hashed)
+    assert pool.stats()["in_flight"] == 0
+
+
+def test_hash_many(pool):
+    """Test bulk hashing returns one hash per password, in order"""
+    hashed = pool.hash_many(["a", "b", "c"])
+
+    assert len(hashed) == 3
+    assert all(auth.verify_password(password, h) for password, h in zip("abc", hashed))
+    assert pool.hash_many([]) == []
+
+
+def test_overload_rejected():
+    """Test requests beyond the pending limit get 503 without touching a worker"""
+    pool = PasswordPool(workers=1, max_pending=0)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(pool.hash("password123"))
+
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
+    assert pool.stats()["rejected"] == 1
+    assert pool._executor is None
+
+
+def test_register_and_login(db, pool):
+    """Test the auth routes hash and verify through the pool"""
+    before = pool.stats()["completed"]
+    user_data = UserCreate(name="Test User", email="test@example.com", password="password123", balance=Decimal("1000"))
+
+    user = asyncio.run(auth_router.register_user(user_data=user_data, db=db))
+    assert user.hashed_password != "password123"
+
+    token = asyncio.run(auth_router.login(UserLogin(email="test@example.com", password="password123"), db=db))
+    assert token["token_type"] == "bearer"
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth_router.login(UserLogin(email="test@example.com", password="nope"), db=db))
+    assert exc.value.status_code == 401
+
+    assert pool.stats()["completed"] == before + 3
@@ -0,0 +1,106 @@
+import pytest
+from decimal import Decimal
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import Market, PriceTick, Candle
+from app.services.price_history import Tick, bucket_start, get_candles, record_ticks
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_price_history.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Create test database and session"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def test_market(db):
+    """Create test market"""
+    market = Market(symbol="BTC/USDT", current_price=Decimal("100.00000000"))
+    db.add(market)
+    db.commit()
+    db.refresh(market)
+    return market
+
+
+def test_bucket_start():
+    """Test timestamps are floored to their interval bucket"""
+    ts = datetime(2024, 1, 1, 12, 7, 42)
+    assert bucket_start(ts, 60) == datetime(2024, 1, 1, 12, 7)
+    assert bucket_start(ts, 300) == datetime(2024, 1, 1, 12, 5)
+    assert bucket_start(ts, 86400) == datetime(2024, 1, 1)
+
+
+def test_candles_merge_across_batches(db, test_market):
+    """Test candles built from two separate batches match one built from all ticks"""
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    prices = ["100", "105", "95", "101", "99", "110", "98", "102"]
+    ticks = [
+        Tick(market_id=test_market.id, price=Decimal(p), timestamp=base + timedelta(seconds=5 * i), volume=Decimal("1"))
+        for i, p in enumerate(prices)
+    ]
+
+    record_ticks(db, ticks[:3])
+    db.commit()
+    record_ticks(db, ticks[3:])
+    db.commit()
+
+    assert db.query(PriceTick).count() == len(prices)
+
+    candle = db.query(Candle).filter(Candle.interval == "1m").one()
+    assert candle.open == Decimal("100")
+    assert candle.high == Decimal("110")
+    assert candle.low == Decimal("95")
+    assert candle.close == Decimal("102")
+    assert candle.volume == Decimal("8")
+    assert candle.tick_count == len(prices)
+
+
+def test_late_batch_keeps_open_and_close(db, test_market):
+    """Test a batch older than the stored ticks (a replay, a slow partition) does not rewrite open or close"""
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    prices = ["100", "105", "95", "101", "99", "110", "98", "102"]
+    ticks = [
+        Tick(market_id=test_market.id, price=Decimal(p), timestamp=base + timedelta(seconds=5 * i), volume=Decimal("1"))
+        for i, p in enumerate(prices)
+    ]
+
+    # The middle arrives first, then the tail, then the head late
+    record_ticks(db, ticks[3:6])
+    db.commit()
+    record_ticks(db, ticks[6:])
+    db.commit()
+    record_ticks(db, ticks[:3])
+    db.commit()
+
+    candle = db.query(Candle).filter(Candle.interval == "1m").one()
+    assert (candle.open, candle.high, candle.low, candle.close) == (Decimal("100"), Decimal("110"), Decimal("95"), Decimal("102"))
+    assert (candle.first_tick_at, candle.last_tick_at) == (ticks[0].timestamp, ticks[-1].timestamp)
+    assert candle.tick_count == len(prices)
+
+
+def test_get_candles_range(db, test_market):
+    """Test range queries return buckets in [start, end) and latest-first trimming without a start"""
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    record_ticks(db, [
+        Tick(market_id=test_market.id, price=Decimal(100 + i), timestamp=base + timedelta(minutes=i))
+        for i in range(10)
+    ])
+    db.commit()
+
+    candles = get_candles(db, test_market.id, "1m", start=base + timedelta(minutes=2), end=base + timedelta(minutes=5))
+    assert [c.bucket_start for c in candles] == [base + timedelta(minutes=m) for m in (2, 3, 4)]
+
+    latest = get_candles(db, test_market.id, "1m", limit=3)
+    assert [c.close for c in latest] == [Decimal("107"), Decimal("108"), Decimal("109")]
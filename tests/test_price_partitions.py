@@ -0,0 +1,123 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.celery_app import celery_app
+from app.config import settings
+from app.database import Base
+from app.db_sharding import ShardSet
+from app.models import Alert, Market, PriceTick, User
+from app.services import order_book, price_simulator, price_sources
+from app.services.market_directory import MarketDirectory
+from app.services.price_sources import SeededRandomWalkSource, partition_of, split_prices
+from app.services.tick_guard import MemoryLeaseStore, TickGuard
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_price_partitions.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+SYMBOLS = [f"C{i}/USDT" for i in range(20)]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Test database wired into the simulator tasks, with Celery running tasks eagerly in-process"""
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(celery_app.conf, "task_eager_propagates", True)
+    monkeypatch.setattr(price_simulator, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(price_simulator, "shards", ShardSet(engine, []))
+    monkeypatch.setattr(price_sources, "market_directory", MarketDirectory())
+    # One guard for both modules: the seeded step is shared through it like the lease
+    guard = TickGuard(MemoryLeaseStore())
+    monkeypatch.setattr(price_simulator, "tick_guard", guard)
+    monkeypatch.setattr(price_sources, "tick_guard", guard)
+    monkeypatch.setattr(order_book, "order_books", order_book.OrderBooks())
+    monkeypatch.setattr(settings, "PRICE_UPDATE_PARTITIONS", 4)
+
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def markets(db):
+    db.add_all([Market(symbol=symbol, current_price=Decimal("100")) for symbol in SYMBOLS])
+    db.commit()
+
+
+def test_split_prices_is_disjoint_and_stable():
+    """Test every symbol lands in exactly one partition, the one partition_of() names"""
+    prices = {symbol: Decimal("1") for symbol in SYMBOLS}
+    parts = split_prices(prices, 4)
+
+    assert sum(len(part) for part in parts) == len(SYMBOLS)
+    assert all(partition_of(symbol, 4) == i for i, part in enumerate(parts) for symbol in part)
+    assert len([part for part in parts if part]) > 1
+
+
+def test_partitioned_tick_merges_before_alerts(db, markets):
+    """Test the chord walks every market once and evaluates alerts on the merged prices"""
+    user = User(name="Alice", email="alice@example.com", hashed_password="x", balance=Decimal("0"))
+    db.add(user)
+    db.commit()
+    market_ids = [market_id for market_id, in db.query(Market.id)]
+    db.add_all([
+        Alert(user_id=user.id, market_id=market_id, target_price=Decimal("1"), direction="above", triggered=False)
+        for market_id in market_ids
+    ])
+    db.commit()
+
+    result = price_simulator.dispatch_partitioned_update(4).get()
+
+    assert result == {"markets": 20, "partitions": 4, "orders_filled": 0, "alerts_triggered": 20}
+    assert db.query(PriceTick).count() == 20
+    assert db.query(Market).filter(Market.current_price == Decimal("100")).count() == 0
+
+
+def test_seeded_partitioned_path_matches_single_task(db, markets, monkeypatch):
+    """Test partitioning a seeded simulation does not change the prices it produces"""
+    monkeypatch.setattr(settings, "PRICE_SIMULATION_SEED", 42)
+    monkeypatch.setattr(settings, "PRICE_SIMULATION_START_TIME", datetime(2024, 1, 1))
+
+    for _ in range(3):
+        price_simulator.update_market_prices()
+
+    single = SeededRandomWalkSource(42, {symbol: Decimal("100") for symbol in SYMBOLS}, steps=3)
+    for _ in single:
+        pass
+
+    stored = {symbol: price for symbol, price in db.query(Market.symbol, Market.current_price)}
+    assert stored == single.prices
+
+
+def test_seeded_start_prices_apply_only_on_shared_step_zero(db, markets, monkeypatch):
+    """Test later ticks continue from the stored prices, partitioned or not, instead of rewinding to the start"""
+    monkeypatch.setattr(settings, "PRICE_SIMULATION_SEED", 42)
+    monkeypatch.setattr(settings, "PRICE_SIMULATION_START", {symbol: Decimal("50") for symbol in SYMBOLS})
+
+    price_simulator.update_market_prices()
+    price_simulator.update_market_prices()
+    # The single-task walk picks up the step the partitioned ticks shared
+    price_sources.run_source(price_sources.simulation_source(session_factory=TestingSessionLocal), TestingSessionLocal)
+
+    single = SeededRandomWalkSource(42, {symbol: Decimal("50") for symbol in SYMBOLS}, steps=3)
+    for _ in single:
+        pass
+
+    stored = {symbol: price for symbol, price in db.query(Market.symbol, Market.current_price)}
+    assert stored == single.prices
+    assert price_sources.tick_guard.load_state(price_sources.SIMULATION_STATE)["step"] == 3
+
+
+def test_partitioned_tick_holds_lease_until_merge(db, markets):
+    """Test the price tick lease is released by the chord callback, not by the dispatching task"""
+    price_simulator.update_market_prices()
+
+    metrics = price_simulator.tick_guard.store.metrics(price_simulator.PRICE_TICK)
+    assert metrics["ran"] == 1
+    assert price_simulator.tick_guard.begin(price_simulator.PRICE_TICK, 5) is not None
@@ -0,0 +1,257 @@
+import json
+import random
+import pytest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.database import Base
+from app.models import Candle, Market, PriceTick
+from app.routers import markets as markets_router
+from app.schemas.market import TickIn, TickIngest
+from app.services import price_sources
+from app.services.market_directory import MarketDirectory
+from app.services.price_sources import (
+    RandomWalkSource,
+    RecordingSource,
+    ReplaySource,
+    SeededRandomWalkSource,
+    read_ticks,
+    run_source
+)
+from app.services.symbol_index import SymbolIndex
+from app.services.tick_guard import MemoryLeaseStore, TickGuard
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_price_sources.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+T0 = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Create test database and session; directories do not publish to Redis"""
+    monkeypatch.setattr(price_sources, "market_directory", MarketDirectory())
+    monkeypatch.setattr(markets_router, "market_directory", MarketDirectory())
+    monkeypatch.setattr(markets_router, "symbol_index", SymbolIndex())
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _write_ndjson(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return str(path)
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the replay sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_read_ticks_ndjson_and_csv(tmp_path):
+    """Test both file formats parse to exact Decimals and naive UTC timestamps"""
+    ndjson = _write_ndjson(tmp_path / "ticks.ndjson", [
+        {"symbol": "BTC/USDT", "price": 62000.12345678, "timestamp": "2024-01-01T12:00:00Z"},
+        {"symbol": "ETH/USDT", "price": "3000", "timestamp": 1704110400, "volume": "2.5"},
+    ])
+    csv_path = tmp_path / "ticks.csv"
+    csv_path.write_text("symbol,price,timestamp,volume\nBTC/USDT,62000.5,2024-01-01T13:00:00+01:00,\n")
+
+    first, second = read_ticks(ndjson)
+    assert first.price == Decimal("62000.12345678") and first.timestamp == T0
+    assert second.timestamp == T0 and second.volume == Decimal("2.5")
+
+    (row,) = read_ticks(str(csv_path))
+    assert row.symbol == "BTC/USDT" and row.price == Decimal("62000.5") and row.timestamp == T0
+
+    bad = _write_ndjson(tmp_path / "bad.ndjson", [{"symbol": "BTC/USDT", "price": "-1", "timestamp": 0}])
+    with pytest.raises(ValueError, match="line 1"):
+        list(read_ticks(bad))
+
+
+def test_replay_paces_batches_by_timestamp(tmp_path):
+    """Test ticks due together share a batch and the replay sleeps out the gaps at `speed`"""
+    path = _write_ndjson(tmp_path / "ticks.ndjson", [
+        {"symbol": "BTC/USDT", "price": "1", "timestamp": (T0 + timedelta(seconds=offset)).isoformat()}
+        for offset in (0, 0, 4, 8)
+    ])
+    clock = FakeClock()
+
+    batches = list(ReplaySource(path, speed=2, batch_size=100, clock=clock, sleep=clock.sleep))
+    assert [len(batch) for batch in batches] == [2, 1, 1]
+    assert clock.sleeps == [2.0, 2.0]
+
+    unpaced = list(ReplaySource(path, speed=0, batch_size=3, clock=clock, sleep=clock.sleep))
+    assert [len(batch) for batch in unpaced] == [3, 1] and clock.sleeps == [2.0, 2.0]
+
+
+def test_replay_ingests_every_tick(db, tmp_path):
+    """Test a replay records all ticks and candles and leaves each market at its latest price"""
+    path = _write_ndjson(tmp_path / "ticks.ndjson", [
+        {"symbol": "BTC/USDT", "price": "100", "timestamp": T0.isoformat(), "volume": "1"},
+        {"symbol": "BTC/USDT", "price": "120", "timestamp": (T0 + timedelta(seconds=30)).isoformat(), "volume": "1"},
+        {"symbol": "ETH/USDT", "price": "10", "timestamp": T0.isoformat()},
+        {"symbol": "BTC/USDT", "price": "90", "timestamp": (T0 + timedelta(seconds=10)).isoformat(), "volume": "1"},
+    ])
+
+    stats = run_source(ReplaySource(path, speed=0, batch_size=10), session_factory=TestingSessionLocal)
+    assert stats["ticks"] == 4 and stats["batches"] == 1 and stats["markets_created"] == 2
+
+    btc = db.query(Market).filter(Market.symbol == "BTC/USDT").one()
+    assert btc.current_price == Decimal("120")
+    assert db.query(PriceTick).count() == 4
+
+    candle = db.query(Candle).filter(Candle.market_id == btc.id, Candle.interval == "1m").one()
+    assert (candle.open, candle.high, candle.low, candle.close) == (Decimal("100"), Decimal("120"), Decimal("90"), Decimal("120"))
+    assert candle.volume == Decimal("3") and candle.tick_count == 3
+
+
+def test_random_walk_source(db):
+    """Test the simulator walks every listed market through the same write path"""
+    db.add_all([Market(symbol="BTC/USDT", current_price=Decimal("100")), Market(symbol="ETH/USDT", current_price=Decimal("10"))])
+    db.commit()
+
+    source = RandomWalkSource(session_factory=TestingSessionLocal, steps=3, rng=random.Random(7))
+    stats = run_source(source, session_factory=TestingSessionLocal)
+
+    assert stats["ticks"] == 6 and stats["batches"] == 3 and stats["markets_created"] == 0
+    assert db.query(PriceTick).count() == 6
+    assert db.query(Market).filter(Market.symbol == "BTC/USDT").one().current_price != Decimal("100")
+
+
+def _walk(source):
+    return [(tick.symbol, tick.price, tick.timestamp) for batch in source for tick in batch]
+
+
+def test_seeded_walk_is_reproducible():
+    """Test the same seed and start state give identical ticks, and markets do not disturb each other"""
+    start = {"BTC/USDT": Decimal("62000"), "ETH/USDT": Decimal("3000")}
+
+    first = _walk(SeededRandomWalkSource(42, start, steps=20, start_time=T0, step_seconds=5))
+    again = _walk(SeededRandomWalkSource(42, start, steps=20, start_time=T0, step_seconds=5))
+    assert first == again
+    assert first[-1][2] == T0 + timedelta(seconds=95)
+    assert all(price == price.quantize(Decimal("0.00000001")) for _, price, _ in first)
+
+    assert first != _walk(SeededRandomWalkSource(43, start, steps=20, start_time=T0, step_seconds=5))
+
+    wider = _walk(SeededRandomWalkSource(42, {**start, "SOL/USDT": Decimal("140")}, steps=20, start_time=T0, step_seconds=5))
+    assert [tick for tick in wider if tick[0] == "BTC/USDT"] == [tick for tick in first if tick[0] == "BTC/USDT"]
+
+
+def test_seeded_walk_resumes_from_state():
+    """Test a run split in two (resumed from state()) follows the same path as one long run"""
+    start = {"BTC/USDT": Decimal("62000")}
+    whole = _walk(SeededRandomWalkSource(7, start, steps=10, start_time=T0))
+
+    head = SeededRandomWalkSource(7, start, steps=4, start_time=T0)
+    ticks = _walk(head)
+    state = head.state()
+    tail = SeededRandomWalkSource(state["seed"], state["prices"], steps=6, start_time=T0, start_step=state["step"])
+
+    assert ticks + _walk(tail) == whole
+
+
+def test_seeded_ticks_continue_one_path_across_processes(db, monkeypatch):
+    """Test each tick resumes from the shared state, whichever process runs it, and a new seed starts over"""
+    monkeypatch.setattr(price_sources, "tick_guard", TickGuard(MemoryLeaseStore()))
+    monkeypatch.setattr(settings, "PRICE_SIMULATION_SEED", 42)
+    monkeypatch.setattr(settings, "PRICE_SIMULATION_START", {"BTC/USDT": Decimal("62000")})
+    monkeypatch.setattr(settings, "PRICE_SIMULATION_START_TIME", T0)
+
+    # Every tick builds its source from scratch, like a fresh prefork child would
+    ticks = []
+    for _ in range(3):
+        ticks += _walk(price_sources.simulation_source(session_factory=TestingSessionLocal))
+    assert ticks == _walk(SeededRandomWalkSource(42, {"BTC/USDT": Decimal("62000")}, steps=3, start_time=T0))
+    assert price_sources.tick_guard.load_state(price_sources.SIMULATION_STATE)["step"] == 3
+
+    monkeypatch.setattr(settings, "PRICE_SIMULATION_SEED", 43)
+    assert _walk(price_sources.simulation_source()) == _walk(
+        SeededRandomWalkSource(43, {"BTC/USDT": Decimal("62000")}, start_time=T0))
+
+
+def test_failed_seeded_step_is_walked_again(db, monkeypatch):
+    """Test state is only saved once a batch was written, so a failed write does not skip a step"""
+    monkeypatch.setattr(price_sources, "tick_guard", TickGuard(MemoryLeaseStore()))
+    monkeypatch.setattr(settings, "PRICE_SIMULATION_SEED", 7)
+    monkeypatch.setattr(settings, "PRICE_SIMULATION_START", {"BTC/USDT": Decimal("100")})
+
+    source = iter(price_sources.simulation_source())
+    next(source)
+    assert price_sources.tick_guard.load_state(price_sources.SIMULATION_STATE) is None
+
+
+def test_recorded_run_replays_exactly(db, tmp_path):
+    """Test a recorded seeded run replayed into an empty database reproduces every tick and price"""
+    path = str(tmp_path / "run.ndjson")
+    source = SeededRandomWalkSource(42, {"BTC/USDT": Decimal("62000"), "ETH/USDT": Decimal("3000")}, steps=15, start_time=T0)
+    run_source(RecordingSource(source, path), session_factory=TestingSessionLocal)
+
+    def snapshot():
+        ticks = db.query(Market.symbol, PriceTick.price, PriceTick.timestamp).join(Market, Market.id == PriceTick.market_id)
+        prices = db.query(Market.symbol, Market.current_price).order_by(Market.symbol).all()
+        return sorted(ticks.all()), prices
+
+    recorded = snapshot()
+    assert len(recorded[0]) == 30
+
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    run_source(ReplaySource(path, speed=0), session_factory=TestingSessionLocal)
+
+    assert snapshot() == recorded
+
+
+def test_tick_ingest_endpoint(db, monkeypatch):
+    """Test the endpoint records a batch (aware and naive timestamps mixed) and enforces TICK_INGEST_MAX"""
+    payload = TickIngest(ticks=[
+        TickIn(symbol="SOL/USDT", price=Decimal("140"), timestamp=T0.replace(tzinfo=timezone.utc)),
+        TickIn(symbol="SOL/USDT", price=Decimal("141")),
+    ])
+
+    body = json.loads(markets_router.ingest_market_ticks(payload=payload, db=db, current_user=None).body)
+    assert body == {"ticks": 2, "markets": 1, "created": 1}
+    assert db.query(Market).filter(Market.symbol == "SOL/USDT").one().current_price == Decimal("141")
+    assert db.query(PriceTick.timestamp).order_by(PriceTick.timestamp).first()[0] == T0
+
+    monkeypatch.setattr(settings, "TICK_INGEST_MAX", 1)
+    with pytest.raises(HTTPException) as exc:
+        markets_router.ingest_market_ticks(payload=payload, db=db, current_user=None)
+    assert exc.value.status_code == 400
+
+
+def test_delayed_batch_does_not_move_price_back(db):
+    """Test a batch older than the market's price is recorded in history but leaves current_price alone"""
+    def ingest(price, timestamp):
+        payload = TickIngest(ticks=[TickIn(symbol="SOL/USDT", price=Decimal(price), timestamp=timestamp)])
+        markets_router.ingest_market_ticks(payload=payload, db=db, current_user=None)
+
+    ingest("150", T0 + timedelta(minutes=1))
+    ingest("140", T0)
+    market = db.query(Market).filter(Market.symbol == "SOL/USDT").one()
+    assert (market.current_price, market.price_timestamp) == (Decimal("150"), T0 + timedelta(minutes=1))
+    assert db.query(PriceTick).count() == 2
+
+    ingest("155", T0 + timedelta(minutes=2))
+    db.refresh(market)
+    assert market.current_price == Decimal("155")
@@ -0,0 +1,132 @@
+import pytest
+import time
+from decimal import Decimal
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User
+from app.schemas.user import TokenData
+from app.utils import auth
+from app.utils.auth import create_access_token, get_current_principal, get_current_user
+from app.utils.principal_cache import PrincipalCache
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_principal_cache.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Create test database and session"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Fresh cache wired into the auth dependencies and ORM invalidation hooks"""
+    cache = PrincipalCache(max_entries=2, ttl=60)
+    monkeypatch.setattr(auth, "principal_cache", cache)
+    monkeypatch.setattr("app.utils.principal_cache.principal_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def user(db):
+    user = User(name="Test User", email="test@example.com", hashed_password="x", balance=Decimal("10000"))
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def user_queries():
+    """Count SELECTs against the users table"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _credentials(user_id: int) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token({"sub": str(user_id)}))
+
+
+def test_repeat_requests_skip_user_lookup(db, cache, user, user_queries):
+    """Test a recently verified token is served from the cache"""
+    credentials = _credentials(user.id)
+
+    first = get_current_principal(credentials=credentials, db=db)
+    second = get_current_principal(credentials=credentials, db=db)
+
+    assert first == second
+    assert first.id == user.id and first.email == "test@example.com"
+    assert len(user_queries) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_current_user_rereads_row(db, cache, user, user_queries):
+    """Test balance-sensitive callers still get the live row"""
+    credentials = _credentials(user.id)
+    principal = get_current_principal(credentials=credentials, db=db)
+
+    db.query(User).filter(User.id == user.id).update({"balance": Decimal("5")})
+    db.commit()
+
+    assert get_current_user(principal=principal, db=db).balance == Decimal("5")
+    assert len(user_queries) == 2
+
+
+def test_identity_change_invalidates(db, cache, user, user_queries):
+    """Test changing a user's email drops their cached tokens, but a balance change does not"""
+    credentials = _credentials(user.id)
+    get_current_principal(credentials=credentials, db=db)
+
+    user.balance = Decimal("1")
+    db.commit()
+    assert cache.stats()["size"] == 1
+
+    user.email = "new@example.com"
+    db.commit()
+    assert cache.stats()["size"] == 0
+
+    assert get_current_principal(credentials=credentials, db=db).email == "new@example.com"
+
+
+def test_deleted_user_rejected(db, cache, user):
+    """Test a deleted user's cached token stops working"""
+    credentials = _credentials(user.id)
+    get_current_principal(credentials=credentials, db=db)
+
+    db.delete(user)
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        get_current_principal(credentials=credentials, db=db)
+    assert exc.value.status_code == 401
+
+
+def test_lru_bound_and_token_expiry(cache, user):
+    """Test the cache evicts the least recently used token and honours the token's exp"""
+    for token in ("a", "b", "c"):
+        cache.put(token, user, TokenData(user_id=user.id))
+
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+    cache.put("expired", user, TokenData(user_id=user.id, exp=int(time.time()) - 1))
+    assert cache.get("expired") is None
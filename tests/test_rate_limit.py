@@ -0,0 +1,117 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.middleware import rate_limit
+from app.middleware.rate_limit import MemoryBucketStore, RateLimitMiddleware, route_group
+from app.utils.auth import create_access_token
+
+
+class FakeClock:
+    """Stand-in for the time module so bucket refills are deterministic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def store():
+    return MemoryBucketStore(shards=4)
+
+
+@pytest.fixture
+def client(store):
+    """Tiny app behind the middleware: trades allow a burst of 2, reads are unlimited"""
+    app = FastAPI()
+
+    @app.post("/api/holdings/trade/")
+    def trade():
+        return {"ok": True}
+
+    @app.get("/api/markets/")
+    def markets():
+        return []
+
+    @app.get("/health")
+    def health():
+        return {"status": "healthy"}
+
+    app.add_middleware(RateLimitMiddleware, store=store, limits={"trade": [1, 2]})
+    return TestClient(app)
+
+
+def _headers(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def test_route_groups():
+    """Test requests are grouped by route and method"""
+    assert route_group("POST", "/api/auth/login") == "auth"
+    assert route_group("GET", "/api/auth/me") == "read"
+    assert route_group("POST", "/api/holdings/trade/") == "trade"
+    assert route_group("DELETE", "/api/markets/1") == "write"
+    assert route_group("GET", "/api/markets/") == "read"
+    assert route_group("GET", "/health") is None
+
+
+def test_bucket_burst_and_refill(store, clock):
+    """Test a bucket allows its burst, then refills at the configured rate"""
+    assert store.take_sync("k", rate=2, burst=3) == 0
+    assert store.take_sync("k", rate=2, burst=3) == 0
+    assert store.take_sync("k", rate=2, burst=3) == 0
+    assert store.take_sync("k", rate=2, burst=3) == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert store.take_sync("k", rate=2, burst=3) == 0
+    assert store.stats()["limited"] == 1
+
+
+def test_sweep_drops_refilled_buckets(clock):
+    """Test idle buckets are forgotten once the shard grows past its limit"""
+    store = MemoryBucketStore(shards=1, max_keys=2)
+    store.take_sync("a", rate=1, burst=1)
+    store.take_sync("b", rate=1, burst=1)
+
+    clock.now += 5
+    store.take_sync("c", rate=1, burst=1)
+
+    assert store.stats()["buckets"] == 1
+
+
+def test_limits_per_user(client, clock):
+    """Test one user exhausting the trade bucket gets 429 without affecting others"""
+    alice, bob = _headers(1), _headers(2)
+
+    assert client.post("/api/holdings/trade/", headers=alice).status_code == 200
+    assert client.post("/api/holdings/trade/", headers=alice).status_code == 200
+
+    response = client.post("/api/holdings/trade/", headers=alice)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+    assert client.post("/api/holdings/trade/", headers=bob).status_code == 200
+
+    clock.now += 1
+    assert client.post("/api/holdings/trade/", headers=alice).status_code == 200
+
+
+def test_anonymous_and_unlimited_routes(client, clock):
+    """Test callers without a valid token share their IP's bucket and ungrouped routes pass"""
+    bad_token = {"Authorization": "Bearer not-a-jwt"}
+
+    assert client.post("/api/holdings/trade/").status_code == 200
+    assert client.post("/api/holdings/trade/", headers=bad_token).status_code == 200
+    assert client.post("/api/holdings/trade/").status_code == 429
+
+    for _ in range(5):
+        assert client.get("/api/markets/").status_code == 200
+        assert client.get("/health").status_code == 200
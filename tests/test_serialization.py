@@ -0,0 +1,51 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+from app.models import Alert, Holding
+from app.schemas.alert import AlertResponse
+from app.schemas.fields import format_amount
+from app.schemas.holding import HoldingResponse
+from app.schemas.portfolio import HoldingDetail, PortfolioResponse
+from app.utils.responses import json_response
+
+
+def test_format_amount_fixed_scale():
+    """Test Decimals always render with 8 decimals and no exponent or negative zero"""
+    assert format_amount(Decimal("1E-8")) == "0.00000001"
+    assert format_amount(Decimal("62000")) == "62000.00000000"
+    assert format_amount(Decimal("1.123456785")) == "1.12345678"
+    assert format_amount(Decimal("-0.000000001")) == "0.00000000"
+    assert format_amount(Decimal("-12.5")) == "-12.50000000"
+
+
+def test_json_response_from_orm_rows():
+    """Test ORM rows are serialized straight to bytes with fixed-scale amounts"""
+    created = datetime(2024, 1, 2, 3, 4, 5)
+    holdings = [Holding(id=1, user_id=2, market_id=3, quantity=Decimal("0.0000001"), avg_buy_price=Decimal("90.5"))]
+    alerts = [Alert(id=1, user_id=2, market_id=3, target_price=Decimal("70000"), direction="above",
+                    triggered=False, created_at=created)]
+
+    response = json_response(List[HoldingResponse], holdings)
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == [
+        {"id": 1, "user_id": 2, "market_id": 3, "quantity": "0.00000010", "avg_buy_price": "90.50000000"}
+    ]
+
+    body = json.loads(json_response(List[AlertResponse], alerts).body)
+    assert body[0]["target_price"] == "70000.00000000"
+    assert body[0]["created_at"] == "2024-01-02T03:04:05"
+    assert body[0]["triggered_at"] is None
+
+
+def test_json_response_matches_model_json():
+    """Test the fast path produces the same JSON as the schema's own serializer"""
+    portfolio = PortfolioResponse(
+        balance=Decimal("100"),
+        holdings=[HoldingDetail(symbol="BTC/USDT", quantity=Decimal("2"), avg_buy_price=Decimal("10"),
+                                current_price=Decimal("12.5"), unrealized_pnl=Decimal("5"))],
+        total_value=Decimal("125"),
+    )
+
+    assert json_response(PortfolioResponse, portfolio).body == portfolio.model_dump_json().encode()
+    assert json.loads(portfolio.model_dump_json())["holdings"][0]["unrealized_pnl"] == "5.00000000"
@@ -0,0 +1,141 @@
+import json
+import pytest
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import Market
+from app.schemas.market import MarketCreate, MarketBulkUpsert
+from app.routers import markets as markets_router
+from app.services.market_directory import MarketDirectory
+from app.services.market_snapshot import bump_market_revision
+from app.services.symbol_index import SymbolIndex
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_symbol_index.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+SYMBOLS = ["BTC/USDT", "ETH/USDT", "SOL/USDT", "SOL/BTC", "SOLO/USDT", "ETH/BTC"]
+
+
+@pytest.fixture
+def db():
+    """Create test database and session"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def index(monkeypatch):
+    """Fresh index (and a directory that does not publish to Redis) wired into the router"""
+    index = SymbolIndex()
+    monkeypatch.setattr(markets_router, "symbol_index", index)
+    monkeypatch.setattr(markets_router, "market_directory", MarketDirectory())
+    return index
+
+
+@pytest.fixture
+def markets(db):
+    db.add_all([Market(symbol=symbol, current_price=Decimal("1")) for symbol in SYMBOLS])
+    bump_market_revision(db, listing_changed=True)
+    db.commit()
+
+
+def _symbols(matches):
+    return [symbol for symbol, _ in matches]
+
+
+def test_prefix_base_and_quote(db, index, markets):
+    """Test prefix ranges are case-insensitive and base/quote filters use the split symbol"""
+    index.rebuild(db)
+
+    assert _symbols(index.search("so")[0]) == ["SOL/BTC", "SOL/USDT", "SOLO/USDT"]
+    assert _symbols(index.search(quote="usdt")[0]) == ["BTC/USDT", "ETH/USDT", "SOL/USDT", "SOLO/USDT"]
+    assert _symbols(index.search(base="SOL")[0]) == ["SOL/BTC", "SOL/USDT"]
+    assert _symbols(index.search(base="ETH", quote="BTC")[0]) == ["ETH/BTC"]
+    assert _symbols(index.search("S", quote="USDT")[0]) == ["SOL/USDT", "SOLO/USDT"]
+    assert index.search("XRP")[0] == []
+
+
+def test_paging_and_incremental_updates(db, index, markets):
+    """Test pages continue after the cursor symbol and add/remove keep the lists sorted"""
+    index.rebuild(db)
+
+    page, after = index.search(quote="USDT", limit=2)
+    assert _symbols(page) == ["BTC/USDT", "ETH/USDT"] and after == "ETH/USDT"
+    page, after = index.search(quote="USDT", after=after, limit=2)
+    assert _symbols(page) == ["SOL/USDT", "SOLO/USDT"] and after is None
+
+    index.add("ADA/USDT", 99)
+    index.remove("SOL/USDT")
+    assert _symbols(index.search(quote="USDT")[0]) == ["ADA/USDT", "BTC/USDT", "ETH/USDT", "SOLO/USDT"]
+    assert _symbols(index.search(base="SOL")[0]) == ["SOL/BTC"]
+    assert index.stats()["symbols"] == 6
+
+
+def test_search_endpoint_pages(db, index, markets):
+    """Test the endpoint returns full market rows page by page"""
+    def search(**params):
+        params = {"prefix": "", "base": None, "quote": None, "cursor": None, "limit": 50, **params}
+        return json.loads(markets_router.search_markets(db=db, current_user=None, **params).body)
+
+    first = search(quote="USDT", limit=3)
+    assert [m["symbol"] for m in first["items"]] == ["BTC/USDT", "ETH/USDT", "SOL/USDT"]
+    assert first["items"][0]["current_price"] == "1.00000000"
+
+    second = search(quote="USDT", limit=3, cursor=first["next_cursor"])
+    assert [m["symbol"] for m in second["items"]] == ["SOLO/USDT"]
+    assert second["next_cursor"] is None
+
+    with pytest.raises(HTTPException):
+        search(cursor="%%%")
+
+
+def test_rebuilds_after_listing_change_elsewhere(db, index, markets):
+    """Test markets created by another process show up, but price changes do not trigger a rebuild"""
+    index.refresh(db)
+    assert index.stats()["rebuilds"] == 1
+
+    market = db.query(Market).filter(Market.symbol == "BTC/USDT").one()
+    market.current_price = Decimal("2")
+    bump_market_revision(db)
+    db.commit()
+    index.refresh(db)
+    assert index.stats()["rebuilds"] == 1
+
+    db.add(Market(symbol="DOGE/USDT", current_price=Decimal("0.1")))
+    bump_market_revision(db, listing_changed=True)
+    db.commit()
+    index.refresh(db)
+    assert index.stats()["rebuilds"] == 2
+    assert _symbols(index.search("DOGE")[0]) == ["DOGE/USDT"]
+
+
+def test_local_writes_do_not_rebuild(db, index, markets):
+    """Test creates and deletes made through this process move the index's revision instead of forcing a rebuild"""
+    index.refresh(db)
+
+    created = markets_router.create_or_update_market(MarketCreate(symbol="ADA/USDT", price=Decimal("0.5")), db, None)
+    markets_router.bulk_upsert_markets(MarketBulkUpsert(markets=[
+        MarketCreate(symbol="XRP/USDT", price=Decimal("0.6")),
+        MarketCreate(symbol="BTC/USDT", price=Decimal("2")),
+    ]), db, None)
+    markets_router.delete_market(created.id, db, None)
+    index.refresh(db)
+    assert index.stats()["rebuilds"] == 1
+    assert _symbols(index.search(quote="USDT")[0]) == ["BTC/USDT", "ETH/USDT", "SOL/USDT", "SOLO/USDT", "XRP/USDT"]
+
+    # A listing change elsewhere in between: the local write must not hide it
+    db.add(Market(symbol="DOGE/USDT", current_price=Decimal("0.1")))
+    bump_market_revision(db, listing_changed=True)
+    db.commit()
+    markets_router.create_or_update_market(MarketCreate(symbol="LINK/USDT", price=Decimal("15")), db, None)
+    index.refresh(db)
+    assert index.stats()["rebuilds"] == 2
+    assert {"DOGE/USDT", "LINK/USDT"} <= set(_symbols(index.search(quote="USDT")[0]))
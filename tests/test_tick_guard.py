@@ -0,0 +1,147 @@
+import time
+import pytest
+import redis
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.celery_app import celery_app
+from app.config import settings
+from app.database import Base
+from app.db_sharding import ShardSet
+from app.models import Market, PriceTick
+from app.services import order_book, price_simulator, price_sources
+from app.services.market_directory import MarketDirectory
+from app.services.tick_guard import MemoryLeaseStore, RedisLeaseStore, TickGuard
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_tick_guard.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Test database wired into the simulator tasks, with Celery running tasks eagerly in-process"""
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(celery_app.conf, "task_eager_propagates", True)
+    monkeypatch.setattr(price_simulator, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(price_simulator, "shards", ShardSet(engine, []))
+    monkeypatch.setattr(settings, "PRICE_UPDATE_PARTITIONS", 2)
+    monkeypatch.setattr(price_sources, "market_directory", MarketDirectory())
+    monkeypatch.setattr(order_book, "order_books", order_book.OrderBooks())
+
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_skip_policy_drops_overlapping_ticks():
+    """Test a tick arriving while the lease is held does not run and is counted as skipped"""
+    guard = TickGuard(MemoryLeaseStore(), "skip")
+    lease = guard.begin("tick", 5)
+
+    assert guard.begin("tick", 5) is None
+    assert guard.begin("tick", 5) is None
+    assert guard.begin("other", 5) is not None
+    assert guard.end(lease) is False
+    assert guard.begin("tick", 5) is not None
+
+    metrics = guard.store.metrics("tick")
+    assert metrics["skipped"] == 2
+    assert metrics["ran"] == 1
+
+
+def test_coalesce_policy_owes_one_catch_up():
+    """Test any number of dropped ticks coalesce into a single catch-up tick"""
+    guard = TickGuard(MemoryLeaseStore(), "coalesce")
+    lease = guard.begin("tick", 5)
+    for _ in range(3):
+        assert guard.begin("tick", 5) is None
+
+    assert guard.end(lease) is True
+    assert guard.end(guard.begin("tick", 5)) is False
+
+    metrics = guard.store.metrics("tick")
+    assert metrics["coalesced"] == 3
+    assert metrics["catch_ups"] == 1
+
+
+def test_expired_lease_is_taken_over():
+    """Test a lease past its TTL (a crashed worker) no longer blocks ticks, and its late release is ignored"""
+    guard = TickGuard(MemoryLeaseStore(), ttl=0.01)
+    stale = guard.begin("tick", 5)
+    time.sleep(0.02)
+
+    fresh = guard.begin("tick", 5)
+    assert fresh is not None
+    guard.end(stale)
+    assert guard.begin("tick", 5) is None
+
+
+def test_lag_and_overrun_metrics():
+    """Test lag is measured against one interval after the previous start, overruns against the interval"""
+    guard = TickGuard(MemoryLeaseStore())
+    lease = guard.begin("tick", 0.01)
+    time.sleep(0.03)
+    guard.end(lease)
+    guard.end(guard.begin("tick", 0.01))
+
+    metrics = guard.store.metrics("tick")
+    assert metrics["overruns"] == 1
+    assert metrics["max_duration"] >= 0.03
+    assert metrics["last_lag"] >= 0.02
+    assert metrics["ran"] == 2
+
+
+def test_unknown_policy_rejected():
+    """Test a misconfigured TICK_OVERLAP_POLICY fails loudly"""
+    with pytest.raises(ValueError):
+        TickGuard(MemoryLeaseStore(), "queue")
+
+
+def test_redis_store_fails_open():
+    """Test ticks still run (unguarded) when Redis is unreachable"""
+    store = RedisLeaseStore("redis://127.0.0.1:1/0")
+    guard = TickGuard(store)
+
+    lease = guard.begin("tick", 5)
+    assert lease is not None
+    assert guard.end(lease) is False
+    assert guard.stats()["connected"] is False
+
+
+def test_state_round_trip_and_redis_state_does_not_fail_open():
+    """Test saved state comes back as a copy, and an unreachable Redis raises instead of losing it"""
+    guard = TickGuard(MemoryLeaseStore())
+    assert guard.load_state("tick") is None
+    state = {"step": 3, "prices": {"BTC/USDT": "1.5"}}
+    guard.save_state("tick", state)
+    state["step"] = 4
+    assert guard.load_state("tick") == {"step": 3, "prices": {"BTC/USDT": "1.5"}}
+
+    redis_guard = TickGuard(RedisLeaseStore("redis://127.0.0.1:1/0"))
+    with pytest.raises(redis.RedisError):
+        redis_guard.load_state("tick")
+    with pytest.raises(redis.RedisError):
+        redis_guard.save_state("tick", state)
+
+
+def test_price_tick_skipped_while_lease_held(db, monkeypatch):
+    """Test the scheduled price update does nothing while another worker holds its lease"""
+    guard = TickGuard(MemoryLeaseStore(), "coalesce")
+    monkeypatch.setattr(price_simulator, "tick_guard", guard)
+    db.add(Market(symbol="BTC/USDT", current_price=Decimal("100")))
+    db.commit()
+
+    held = guard.begin(price_simulator.PRICE_TICK, 5)
+    price_simulator.update_market_prices()
+    assert db.query(PriceTick).count() == 0
+
+    # Releasing the held lease owes one catch-up tick, which runs (eagerly) and writes
+    assert guard.end(held) is True
+    price_simulator.update_market_prices.delay()
+    assert db.query(PriceTick).count() == 1
+    assert guard.store.metrics(price_simulator.PRICE_TICK)["coalesced"] == 1
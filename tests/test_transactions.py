@@ -0,0 +1,107 @@
+import pytest
+from decimal import Decimal
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, Market, TransactionLog
+from app.routers.transactions import get_user_transactions
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_transactions.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Create test database and session"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def test_user(db):
+    """Create test user"""
+    user = User(
+        name="Test User",
+        email="test@example.com",
+        hashed_password="hashed_password",
+        balance=Decimal("10000.00000000")
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def markets(db):
+    """Create two test markets"""
+    btc = Market(symbol="BTC/USDT", current_price=Decimal("60000.00000000"))
+    eth = Market(symbol="ETH/USDT", current_price=Decimal("3000.00000000"))
+    db.add_all([btc, eth])
+    db.commit()
+    return btc, eth
+
+
+@pytest.fixture
+def history(db, test_user, markets):
+    """Create 7 transactions; several share a timestamp to exercise the id tie-breaker"""
+    btc, eth = markets
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    for i in range(7):
+        db.add(TransactionLog(
+            user_id=test_user.id,
+            market_id=btc.id if i % 2 == 0 else eth.id,
+            type="buy" if i < 4 else "sell",
+            price=Decimal("100"),
+            quantity=Decimal("1"),
+            total_amount=Decimal("100"),
+            timestamp=base + timedelta(seconds=i // 3)
+        ))
+    db.commit()
+    return db.query(TransactionLog).order_by(TransactionLog.timestamp.desc(), TransactionLog.id.desc()).all()
+
+
+def fetch(db, user, **kwargs):
+    params = {"cursor": None, "limit": 50, "symbol": None, "type": None}
+    params.update(kwargs)
+    return get_user_transactions(user_id=user.id, db=db, current_user=user, **params)
+
+
+def test_pages_cover_history_without_gaps_or_duplicates(db, test_user, history):
+    """Test walking the cursor returns every row exactly once, newest first"""
+    seen = []
+    cursor = None
+    while True:
+        page = fetch(db, test_user, cursor=cursor, limit=2)
+        seen.extend(item.id for item in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == [t.id for t in history]
+
+
+def test_filters_by_symbol_and_type(db, test_user, history, markets):
+    """Test market and type filters narrow the page"""
+    btc, _ = markets
+    page = fetch(db, test_user, symbol="BTC/USDT", type="buy")
+
+    assert page.items
+    assert all(item.market_id == btc.id and item.type == "buy" for item in page.items)
+    assert page.next_cursor is None
+
+
+def test_invalid_cursor_rejected(db, test_user, history):
+    """Test a malformed cursor returns 400"""
+    with pytest.raises(HTTPException) as exc:
+        fetch(db, test_user, cursor="not-a-cursor")
+
+    assert exc.value.status_code == 400